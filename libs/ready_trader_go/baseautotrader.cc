@@ -15,6 +15,8 @@
 //     You should have received a copy of the GNU Affero General Public
 //     License along with Ready Trader Go.  If not, see
 //     <https://www.gnu.org/licenses/>.
+#include <boost/asio/post.hpp>
+
 #include "baseautotrader.h"
 #include "error.h"
 #include "logging.h"
@@ -47,6 +49,7 @@ void BaseAutoTrader::MessageHandler(IConnection* connection,
                                     unsigned char const* data,
                                     std::size_t size)
 {
+    ++mMessagesReceived;
     switch (messageType)
     {
     case MessageType::ERROR_MESSAGE:
@@ -74,6 +77,9 @@ void BaseAutoTrader::MessageHandler(IConnection* connection,
                                   status.mRemainingVolume, status.mFees);
         break;
     }
+    case MessageType::LOCKSTEP:
+        mLockstep = true;
+        break;
     default:
     {
         RLOG(LG_BAT, LogLevel::LL_ERROR) << "received execution message with unexpected type: "
@@ -81,6 +87,8 @@ void BaseAutoTrader::MessageHandler(IConnection* connection,
         throw ReadyTraderGoError("received execution message with unexpected type");
     }
     }
+
+    ScheduleIdle();
 }
 
 void BaseAutoTrader::MessageHandler(ISubscription* subscription,
@@ -111,6 +119,24 @@ void BaseAutoTrader::MessageHandler(ISubscription* subscription,
         throw ReadyTraderGoError("received information message with unexpected type");
     }
     }
+
+    ScheduleIdle();
+}
+
+void BaseAutoTrader::ScheduleIdle()
+{
+    if (mLockstep && !mIdlePending)
+    {
+        mIdlePending = true;
+        boost::asio::post(mContext, [this] { SendIdle(); });
+    }
+}
+
+void BaseAutoTrader::SendIdle()
+{
+    mIdlePending = false;
+    std::uint64_t framesRead = mInformationSubscription ? mInformationSubscription->GetLastSequence() : 0;
+    mExecutionConnection->SendMessage(MessageType::IDLE, IdleMessage{framesRead, mMessagesReceived});
 }
 
 }
\ No newline at end of file
@@ -50,6 +50,20 @@ public:
                                  unsigned long volume,
                                  Lifespan lifespan);
 
+    // If the exchange hosts several instrument pairs, these trade the future
+    // or ETF of the given pair (the first pair is pair zero).
+    virtual void SendPairHedgeOrder(unsigned long clientOrderId,
+                                    Side side,
+                                    unsigned long price,
+                                    unsigned long volume,
+                                    unsigned long pair);
+    virtual void SendPairInsertOrder(unsigned long clientOrderId,
+                                     Side side,
+                                     unsigned long price,
+                                     unsigned long volume,
+                                     Lifespan lifespan,
+                                     unsigned long pair);
+
     virtual void SetExecutionConnection(std::unique_ptr<IConnection>&& connection);
     virtual void SetInformationSubscription(std::shared_ptr<ISubscription>&& subscription);
     virtual void SetLoginDetails(std::string teamName, std::string secret);
@@ -62,6 +76,12 @@ protected:
     std::string mTeamName;
     std::string mSecret;
 
+    // When the exchange runs on a virtual clock, it asks for an idle message
+    // after each batch of messages is handled so that it can keep in step.
+    bool mIdlePending = false;
+    bool mLockstep = false;
+    unsigned long mMessagesReceived = 0;
+
     virtual void DisconnectHandler();
     virtual void MessageHandler(IConnection*, unsigned char, unsigned char const*, std::size_t);
     virtual void MessageHandler(ISubscription* subscription,
@@ -94,6 +114,10 @@ protected:
                                           const std::array<unsigned long, TOP_LEVEL_COUNT>& askVolumes,
                                           const std::array<unsigned long, TOP_LEVEL_COUNT>& bidPrices,
                                           const std::array<unsigned long, TOP_LEVEL_COUNT>& bidVolumes) {};
+
+private:
+    void ScheduleIdle();
+    void SendIdle();
 };
 
 inline void BaseAutoTrader::DisconnectHandler()
@@ -150,6 +174,46 @@ inline void BaseAutoTrader::SendInsertOrder(unsigned long clientOrderId,
                                                     lifespan});
 }
 
+inline void BaseAutoTrader::SendPairHedgeOrder(unsigned long clientOrderId,
+                                               Side side,
+                                               unsigned long price,
+                                               unsigned long volume,
+                                               unsigned long pair)
+{
+    if (pair == 0)
+    {
+        SendHedgeOrder(clientOrderId, side, price, volume);
+        return;
+    }
+    mExecutionConnection->SendMessage(MessageType::PAIR_HEDGE_ORDER,
+                                      PairHedgeMessage{clientOrderId,
+                                                       side,
+                                                       price,
+                                                       volume,
+                                                       pair});
+}
+
+inline void BaseAutoTrader::SendPairInsertOrder(unsigned long clientOrderId,
+                                                Side side,
+                                                unsigned long price,
+                                                unsigned long volume,
+                                                Lifespan lifespan,
+                                                unsigned long pair)
+{
+    if (pair == 0)
+    {
+        SendInsertOrder(clientOrderId, side, price, volume, lifespan);
+        return;
+    }
+    mExecutionConnection->SendMessage(MessageType::PAIR_INSERT_ORDER,
+                                      PairInsertMessage{clientOrderId,
+                                                        side,
+                                                        price,
+                                                        volume,
+                                                        lifespan,
+                                                        pair});
+}
+
 inline void BaseAutoTrader::SetLoginDetails(std::string teamName, std::string secret)
 {
     mTeamName = std::move(teamName);
@@ -15,7 +15,11 @@
 //     You should have received a copy of the GNU Affero General Public
 //     License along with Ready Trader Go.  If not, see
 //     <https://www.gnu.org/licenses/>.
+#include <algorithm>
+#include <atomic>
 #include <cstddef>
+#include <cstdint>
+#include <cstring>
 #include <iomanip>
 #include <memory>
 #include <string>
@@ -29,6 +33,11 @@
 #include <boost/endian/conversion.hpp>
 #include <boost/interprocess/file_mapping.hpp>
 #include <boost/interprocess/mapped_region.hpp>
+#ifdef _WIN32
+#include <boost/interprocess/windows_shared_memory.hpp>
+#else
+#include <boost/interprocess/shared_memory_object.hpp>
+#endif
 #include <boost/system/error_code.hpp>
 
 #include "connectivity.h"
@@ -197,10 +206,12 @@ void Connection::WriteSomeHandler(const boost::system::error_code& error, std::s
     }
 }
 
-Subscription::Subscription(boost::asio::io_context& context, interprocess::file_mapping& file, interprocess::mapped_region& region)
-    : mContext(context), mFile(std::move(file)), mRegion(std::move(region))
+Subscription::Subscription(boost::asio::io_context& context, const std::string& name, interprocess::mapped_region& region)
+    : mContext(context), mRegion(std::move(region)), mBufferMask(mRegion.get_size() - 1)
 {
-    SetName(std::string(mFile.get_name()));
+    SetName(name);
+    if (mRegion.get_size() < FRAME_SIZE || (mRegion.get_size() & mBufferMask) != 0)
+        throw ReadyTraderGoError("information buffer size is not a power of two: " + std::to_string(mRegion.get_size()));
 }
 
 Subscription::~Subscription()
@@ -210,8 +221,18 @@ Subscription::~Subscription()
 
 void Subscription::AsyncReceive()
 {
+    // Expect the newest frame already published, if any, so that frames
+    // published before subscribing are not counted as dropped.
+    unsigned long pos = NewestFrame();
+    const volatile unsigned char* addr = ((const volatile unsigned char*)mRegion.get_address()) + pos;
+    std::uint64_t sequence = boost::endian::big_to_native(*(const volatile uint64_t*)(addr + FRAME_SEQUENCE_OFFSET));
+    if (addr[0] != 0 && sequence != 0)
+        mExpectedSequence = sequence;
+    else
+        pos = 0;
+
     std::weak_ptr<ISubscription> weak_this = shared_from_this();
-    mContext.post([this, weak_this](){ AsyncReceive(0, weak_this); });
+    mContext.post([this, pos, weak_this](){ AsyncReceive(pos, weak_this); });
 }
 
 void Subscription::AsyncReceive(unsigned long pos, std::weak_ptr<ISubscription> weak_this)
@@ -222,19 +243,99 @@ void Subscription::AsyncReceive(unsigned long pos, std::weak_ptr<ISubscription>
         return;
     }
 
-    unsigned char* addr = ((unsigned char*)mRegion.get_address()) + pos;
+    const volatile unsigned char* addr = ((const volatile unsigned char*)mRegion.get_address()) + pos;
 
     if (addr[0] != 0)
     {
-        const uint32_t* payload_size_ptr = (uint32_t*)(addr + FRAME_PAYLOAD_SIZE_OFFSET);
-        const std::size_t payloadSize = boost::endian::big_to_native(*payload_size_ptr);
-        ReceiveFromHandler(addr + FRAME_HEADER_SIZE, payloadSize);
-        pos = (pos + FRAME_SIZE) & (SUBSCRIPTION_TRANSPORT_BUFFER_SIZE - 1);
+        std::atomic_thread_fence(std::memory_order_acquire);
+        std::uint64_t sequence = boost::endian::big_to_native(*(const volatile uint64_t*)(addr + FRAME_SEQUENCE_OFFSET));
+        unsigned char fragment = addr[FRAME_FRAGMENT_OFFSET];
+        std::size_t payloadSize = boost::endian::big_to_native(*(const volatile uint32_t*)(addr + FRAME_PAYLOAD_SIZE_OFFSET));
+        unsigned char payload[FRAME_SIZE - FRAME_HEADER_SIZE];
+        std::memcpy(payload, (const unsigned char*)addr + FRAME_HEADER_SIZE, std::min(payloadSize, sizeof(payload)));
+        std::atomic_thread_fence(std::memory_order_acquire);
+
+        if (sequence != mExpectedSequence
+            || boost::endian::big_to_native(*(const volatile uint64_t*)(addr + FRAME_SEQUENCE_OFFSET)) != sequence)
+        {
+            // Lapped by the publisher, so skip ahead to the newest frame.
+            pos = NewestFrame();
+            addr = ((const volatile unsigned char*)mRegion.get_address()) + pos;
+            sequence = boost::endian::big_to_native(*(const volatile uint64_t*)(addr + FRAME_SEQUENCE_OFFSET));
+            fragment = addr[FRAME_FRAGMENT_OFFSET];
+            payloadSize = boost::endian::big_to_native(*(const volatile uint32_t*)(addr + FRAME_PAYLOAD_SIZE_OFFSET));
+            std::memcpy(payload, (const unsigned char*)addr + FRAME_HEADER_SIZE, std::min(payloadSize, sizeof(payload)));
+            std::atomic_thread_fence(std::memory_order_acquire);
+            if (sequence == 0
+                || boost::endian::big_to_native(*(const volatile uint64_t*)(addr + FRAME_SEQUENCE_OFFSET)) != sequence)
+            {
+                // The newest frame is being rewritten, try again.
+                mContext.post([this, pos, weak_this](){ AsyncReceive(pos, weak_this); });
+                return;
+            }
+
+            if (sequence > mExpectedSequence)
+            {
+                mDroppedFrameCount += sequence - mExpectedSequence;
+                RLOG(LG_CON, LogLevel::LL_WARNING) << std::quoted(mName, '\'') << " fell behind and dropped "
+                                                   << sequence - mExpectedSequence << " frames (total="
+                                                   << mDroppedFrameCount << ")";
+            }
+
+            // Any message being put back together has lost a fragment.
+            mIsReassembling = false;
+        }
+
+        if (fragment == 0)
+            ReceiveFromHandler(payload, payloadSize);
+        else
+            ReceiveFragment(fragment, payload, std::min(payloadSize, sizeof(payload)));
+        mExpectedSequence = sequence + 1;
+        pos = (pos + FRAME_SIZE) & mBufferMask;
     }
 
     mContext.post([this, pos, weak_this](){ AsyncReceive(pos, weak_this); });
 }
 
+unsigned long Subscription::NewestFrame() const
+{
+    const volatile unsigned char* base = (const volatile unsigned char*)mRegion.get_address();
+    unsigned long newest = 0;
+    std::uint64_t newestSequence = 0;
+    for (unsigned long pos = 0; pos < mRegion.get_size(); pos += FRAME_SIZE)
+    {
+        if (base[pos] != 0)
+        {
+            std::uint64_t sequence = boost::endian::big_to_native(*(const volatile uint64_t*)(base + pos + FRAME_SEQUENCE_OFFSET));
+            if (sequence > newestSequence)
+            {
+                newest = pos;
+                newestSequence = sequence;
+            }
+        }
+    }
+    return newest;
+}
+
+void Subscription::ReceiveFragment(unsigned char fragment, unsigned char const* data, std::size_t size)
+{
+    if ((fragment & FRAGMENT_CONTINUATION) == 0)
+    {
+        mFragments.assign(data, data + size);
+        mIsReassembling = true;
+    }
+    else if (mIsReassembling)
+    {
+        mFragments.insert(mFragments.end(), data, data + size);
+    }
+
+    if (mIsReassembling && (fragment & FRAGMENT_MORE) == 0)
+    {
+        mIsReassembling = false;
+        ReceiveFromHandler(mFragments.data(), mFragments.size());
+    }
+}
+
 void Subscription::ReceiveFromHandler(unsigned char const* data, std::size_t size)
 {
     RLOG(LG_CON, LogLevel::LL_DEBUG) << std::quoted(mName, '\'') << " received "
@@ -317,9 +418,24 @@ SubscriptionFactory::SubscriptionFactory(boost::asio::io_context& context,
 
 std::shared_ptr<ISubscription> SubscriptionFactory::Create()
 {
+    if (mType == "shm")
+    {
+        // The region remains mapped after the shared memory object is closed.
+#ifdef _WIN32
+        interprocess::windows_shared_memory shm{interprocess::open_only, mName.c_str(), interprocess::read_only};
+#else
+        // Like Python's shared_memory module, Boost adds the leading slash
+        // required by shm_open.
+        std::string name = mName.substr(mName.find_first_not_of('/'));
+        interprocess::shared_memory_object shm{interprocess::open_only, name.c_str(), interprocess::read_only};
+#endif
+        interprocess::mapped_region region{shm, interprocess::read_only};
+        return std::make_shared<Subscription>(mContext, mName, region);
+    }
+
     interprocess::file_mapping file{mName.c_str(), interprocess::read_only};
     interprocess::mapped_region region{file, interprocess::read_only};
-    return std::make_shared<Subscription>(mContext, file, region);
+    return std::make_shared<Subscription>(mContext, mName, region);
 }
 
 }
\ No newline at end of file
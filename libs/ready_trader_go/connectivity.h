@@ -19,6 +19,7 @@
 #define CPPREADY_TRADER_GO_LIBS_READY_TRADER_GO_CONNECTIVITY_H
 
 #include <cstddef>
+#include <cstdint>
 #include <memory>
 #include <string>
 #include <vector>
@@ -26,7 +27,6 @@
 #include <boost/asio/io_context.hpp>
 #include <boost/asio/ip/tcp.hpp>
 #include <boost/asio/streambuf.hpp>
-#include <boost/interprocess/file_mapping.hpp>
 #include <boost/interprocess/mapped_region.hpp>
 #include <boost/system/error_code.hpp>
 
@@ -43,13 +43,23 @@ namespace ReadyTraderGo {
 constexpr std::size_t MESSAGE_HEADER_SIZE = 3;
 constexpr std::size_t MESSAGE_TYPE_OFFSET = 2;
 
-// Each subscription transport frame begins with a two-part header:
-//    1. spinlock - a four-byte little-endian flag (either 0 or 1); and
-//    2. payload size - a four-byte, big endian, unsigned intteger.
+// Each subscription transport frame begins with a four-part header:
+//    1. spinlock - a one-byte flag (either 0 or 1);
+//    2. fragment flags - a one-byte flag set followed by two unused bytes;
+//    3. payload size - a four-byte, big endian, unsigned intteger; and
+//    4. sequence number - an eight-byte, big endian, unsigned integer.
+// The publisher chooses the number of frames in the ring, which is always a
+// power of two. A message too long for one frame is split into fragments
+// that are published in consecutive frames.
+constexpr std::size_t FRAME_FRAGMENT_OFFSET = 1;
 constexpr std::size_t FRAME_PAYLOAD_SIZE_OFFSET = 4;
-constexpr std::size_t FRAME_HEADER_SIZE = 8;
+constexpr std::size_t FRAME_SEQUENCE_OFFSET = 8;
+constexpr std::size_t FRAME_HEADER_SIZE = 16;
 constexpr std::size_t FRAME_SIZE = 128;
-constexpr std::size_t SUBSCRIPTION_TRANSPORT_BUFFER_SIZE = 8182;
+
+// Fragment flags
+constexpr unsigned char FRAGMENT_MORE = 1;
+constexpr unsigned char FRAGMENT_CONTINUATION = 2;
 
 
 class Connection : public IConnection
@@ -79,18 +89,25 @@ class Subscription : public ISubscription
 {
 public:
     Subscription(boost::asio::io_context& context,
-                 interprocess::file_mapping& file,
+                 const std::string& name,
                  interprocess::mapped_region& region);
     ~Subscription() override;
     void AsyncReceive() override;
+    std::uint64_t GetLastSequence() const override { return mExpectedSequence - 1; }
 
 private:
     void AsyncReceive(unsigned long, std::weak_ptr<ISubscription>);
+    unsigned long NewestFrame() const;
+    void ReceiveFragment(unsigned char fragment, unsigned char const*, std::size_t size);
     void ReceiveFromHandler(unsigned char const*, std::size_t size);
 
     boost::asio::io_context& mContext;
-    interprocess::file_mapping mFile;
     interprocess::mapped_region mRegion;
+    std::size_t mBufferMask;
+    std::uint64_t mExpectedSequence = 1;
+    std::uint64_t mDroppedFrameCount = 0;
+    std::vector<unsigned char> mFragments;
+    bool mIsReassembling = false;
 };
 
 class ConnectionFactory : public IConnectionFactory
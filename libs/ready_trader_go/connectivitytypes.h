@@ -19,6 +19,7 @@
 #define CPPREADY_TRADER_GO_LIBS_READY_TRADER_GO_CONNECTIVITYTYPES_H
 
 #include <cstddef>
+#include <cstdint>
 #include <functional>
 #include <memory>
 #include <utility>
@@ -80,6 +81,7 @@ struct ISubscription: public std::enable_shared_from_this<ISubscription>
 {
     virtual ~ISubscription() = default;
     virtual void AsyncReceive() = 0;
+    virtual std::uint64_t GetLastSequence() const = 0;
 
     const std::string& GetName() const { return mName; }
     void SetName(std::string name) { mName = std::move(name); }
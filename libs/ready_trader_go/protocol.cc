@@ -41,6 +41,27 @@ static void writeFixedLengthString(const std::string& message, unsigned char* bu
     }
 }
 
+// Return the number of levels on each side in an order book or trade ticks
+// message with a body of the given size.
+static std::size_t bookDepth(std::size_t size)
+{
+    return (size - MessageFieldSize::BYTE - MessageFieldSize::LONG) / (MessageFieldSize::LONG * 4);
+}
+
+// Read one part (e.g. the ask prices) of an order book or trade ticks message
+// of the given depth, keeping at most TOP_LEVEL_COUNT levels, and return a
+// pointer to the next part.
+static unsigned char const* readBookPart(unsigned char const* data,
+                                         std::size_t depth,
+                                         std::array<unsigned long, TOP_LEVEL_COUNT>& part)
+{
+    for (std::size_t i = 0; i < TOP_LEVEL_COUNT; ++i)
+    {
+        part[i] = (i < depth) ? boost::endian::big_to_native(*(uint32_t*)(data + i * MessageFieldSize::LONG)) : 0;
+    }
+    return data + depth * MessageFieldSize::LONG;
+}
+
 void AmendMessage::Deserialise(unsigned char const* data, std::size_t)
 {
     mClientOrderId = boost::endian::big_to_native(*(uint32_t*)data);
@@ -119,6 +140,20 @@ void HedgeFilledMessage::Serialise(unsigned char* buf) const
     *(uint32_t*)buf = boost::endian::native_to_big((uint32_t)mVolume);
 }
 
+void IdleMessage::Deserialise(unsigned char const* data, std::size_t)
+{
+    mFramesRead = boost::endian::big_to_native(*(uint64_t*)data);
+    data += MessageFieldSize::LONG_LONG;
+    mMessagesReceived = boost::endian::big_to_native(*(uint32_t*)data);
+}
+
+void IdleMessage::Serialise(unsigned char* buf) const
+{
+    *(uint64_t*)buf = boost::endian::native_to_big((uint64_t)mFramesRead);
+    buf += MessageFieldSize::LONG_LONG;
+    *(uint32_t*)buf = boost::endian::native_to_big((uint32_t)mMessagesReceived);
+}
+
 void InsertMessage::Deserialise(unsigned char const* data, std::size_t)
 {
     mClientOrderId = boost::endian::big_to_native(*(uint32_t*)data);
@@ -159,33 +194,18 @@ void LoginMessage::Serialise(unsigned char* buf) const
     writeFixedLengthString(mSecret, buf, MessageFieldSize::STRING);
 }
 
-void OrderBookMessage::Deserialise(unsigned char const* data, std::size_t)
+void OrderBookMessage::Deserialise(unsigned char const* data, std::size_t size)
 {
     mInstrument = Instrument(*data);
     data += MessageFieldSize::BYTE;
     mSequenceNumber = boost::endian::big_to_native(*(uint32_t*)data);
     data += MessageFieldSize::LONG;
 
-    for (auto& p : mAskPrices)
-    {
-        p = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
-    for (auto& v : mAskVolumes)
-    {
-        v = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
-    for (auto& p : mBidPrices)
-    {
-        p = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
-    for (auto& v : mBidVolumes)
-    {
-        v = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
+    std::size_t depth = bookDepth(size);
+    data = readBookPart(data, depth, mAskPrices);
+    data = readBookPart(data, depth, mAskVolumes);
+    data = readBookPart(data, depth, mBidPrices);
+    readBookPart(data, depth, mBidVolumes);
 }
 
 void OrderBookMessage::Serialise(unsigned char* buf) const
@@ -257,33 +277,42 @@ void OrderStatusMessage::Serialise(unsigned char* buf) const
     *(int32_t*)buf = boost::endian::native_to_big((int32_t)mFees);
 }
 
-void TradeTicksMessage::Deserialise(unsigned char const* data, std::size_t)
+void PairHedgeMessage::Deserialise(unsigned char const* data, std::size_t size)
+{
+    HedgeMessage::Deserialise(data, size);
+    mPair = data[HedgeMessage::Size()];
+}
+
+void PairHedgeMessage::Serialise(unsigned char* buf) const
+{
+    HedgeMessage::Serialise(buf);
+    buf[HedgeMessage::Size()] = static_cast<unsigned char>(mPair);
+}
+
+void PairInsertMessage::Deserialise(unsigned char const* data, std::size_t size)
+{
+    InsertMessage::Deserialise(data, size);
+    mPair = data[InsertMessage::Size()];
+}
+
+void PairInsertMessage::Serialise(unsigned char* buf) const
+{
+    InsertMessage::Serialise(buf);
+    buf[InsertMessage::Size()] = static_cast<unsigned char>(mPair);
+}
+
+void TradeTicksMessage::Deserialise(unsigned char const* data, std::size_t size)
 {
     mInstrument = Instrument(*data);
     data += MessageFieldSize::BYTE;
     mSequenceNumber = boost::endian::big_to_native(*(uint32_t*)data);
     data += MessageFieldSize::LONG;
 
-    for (auto& p : mAskPrices)
-    {
-        p = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
-    for (auto& v : mAskVolumes)
-    {
-        v = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
-    for (auto& p : mBidPrices)
-    {
-        p = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
-    for (auto& v : mBidVolumes)
-    {
-        v = boost::endian::big_to_native(*(uint32_t*)data);
-        data += MessageFieldSize::LONG;
-    }
+    std::size_t depth = bookDepth(size);
+    data = readBookPart(data, depth, mAskPrices);
+    data = readBookPart(data, depth, mAskVolumes);
+    data = readBookPart(data, depth, mBidPrices);
+    readBookPart(data, depth, mBidVolumes);
 }
 
 void TradeTicksMessage::Serialise(unsigned char* buf) const
@@ -20,6 +20,7 @@
 
 #include <array>
 #include <cstddef>
+#include <cstdint>
 #include <string>
 #include <utility>
 #include <vector>
@@ -36,11 +37,15 @@ enum MessageType : unsigned char
     ERROR_MESSAGE = 3,
     HEDGE_FILLED = 4,
     HEDGE_ORDER = 5,
+    IDLE = 20,
     INSERT_ORDER = 6,
+    LOCKSTEP = 19,
     LOGIN = 7,
     ORDER_BOOK_UPDATE = 10,
     ORDER_FILLED = 8,
     ORDER_STATUS = 9,
+    PAIR_HEDGE_ORDER = 17,
+    PAIR_INSERT_ORDER = 18,
     TRADE_TICKS = 11
 };
 
@@ -48,6 +53,7 @@ enum MessageFieldSize : std::size_t
 {
     BYTE = 1,
     LONG = 4,
+    LONG_LONG = 8,
     STRING = 50
 };
 
@@ -140,6 +146,21 @@ struct HedgeFilledMessage : ISerialisable
     unsigned long mVolume = 0;
 };
 
+struct IdleMessage : ISerialisable
+{
+    IdleMessage() = default;
+    IdleMessage(std::uint64_t framesRead, unsigned long messagesReceived)
+        : mFramesRead(framesRead), mMessagesReceived(messagesReceived) {}
+
+    std::size_t Size() const noexcept override { return MessageFieldSize::LONG_LONG + MessageFieldSize::LONG; }
+
+    void Deserialise(unsigned char const* data, std::size_t size) override;
+    void Serialise(unsigned char* buf) const override;
+
+    std::uint64_t mFramesRead = 0;
+    unsigned long mMessagesReceived = 0;
+};
+
 struct InsertMessage : ISerialisable
 {
     InsertMessage() = default;
@@ -261,6 +282,47 @@ struct OrderStatusMessage : ISerialisable
     signed long mFees = 0;
 };
 
+// A hedge order for the future of any instrument pair.
+struct PairHedgeMessage : HedgeMessage
+{
+    PairHedgeMessage() = default;
+    PairHedgeMessage(unsigned long clientOrderId,
+                     Side side,
+                     unsigned long price,
+                     unsigned long volume,
+                     unsigned long pair)
+        : HedgeMessage(clientOrderId, side, price, volume),
+          mPair(pair) {}
+
+    std::size_t Size() const noexcept override { return HedgeMessage::Size() + MessageFieldSize::BYTE; }
+
+    void Deserialise(unsigned char const* data, std::size_t size) override;
+    void Serialise(unsigned char* buf) const override;
+
+    unsigned long mPair = 0;
+};
+
+// An insert order for the ETF of any instrument pair.
+struct PairInsertMessage : InsertMessage
+{
+    PairInsertMessage() = default;
+    PairInsertMessage(unsigned long clientOrderId,
+                      Side side,
+                      unsigned long price,
+                      unsigned long volume,
+                      Lifespan lifespan,
+                      unsigned long pair)
+        : InsertMessage(clientOrderId, side, price, volume, lifespan),
+          mPair(pair) {}
+
+    std::size_t Size() const noexcept override { return InsertMessage::Size() + MessageFieldSize::BYTE; }
+
+    void Deserialise(unsigned char const* data, std::size_t size) override;
+    void Serialise(unsigned char* buf) const override;
+
+    unsigned long mPair = 0;
+};
+
 struct TradeTicksMessage : ISerialisable
 {
     TradeTicksMessage() = default;
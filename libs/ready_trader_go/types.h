@@ -26,16 +26,44 @@ namespace ReadyTraderGo {
 
 constexpr unsigned long MAXIMUM_ASK = 2147483647;
 constexpr unsigned long MINIMUM_BID = 1;
-constexpr std::size_t TOP_LEVEL_COUNT = 5;
+// The number of price levels on each side of a book passed to the order book
+// and trade ticks handlers. Build with READY_TRADER_GO_TOP_LEVEL_COUNT set to
+// match a simulator configured with a different book depth; levels beyond
+// those the simulator publishes are reported as zero.
+#ifndef READY_TRADER_GO_TOP_LEVEL_COUNT
+#define READY_TRADER_GO_TOP_LEVEL_COUNT 5
+#endif
+constexpr std::size_t TOP_LEVEL_COUNT = READY_TRADER_GO_TOP_LEVEL_COUNT;
 
 enum class Instrument : unsigned char { FUTURE, ETF };
 enum class Lifespan : unsigned char { FILL_AND_KILL, GOOD_FOR_DAY };
 enum class Side : unsigned char { SELL, BUY };
 
+// If the exchange hosts several instrument pairs, instruments are numbered
+// two per pair: the future and ETF of pair p are numbered 2p and 2p + 1.
+constexpr Instrument InstrumentNumber(unsigned long pair, Instrument type)
+{
+    return static_cast<Instrument>(2 * pair + static_cast<unsigned char>(type));
+}
+
+constexpr unsigned long InstrumentPair(Instrument instrument)
+{
+    return static_cast<unsigned char>(instrument) >> 1;
+}
+
+constexpr Instrument InstrumentType(Instrument instrument)
+{
+    return static_cast<Instrument>(static_cast<unsigned char>(instrument) & 1);
+}
+
 template<typename C, typename T>
 std::basic_ostream<C, T>& operator<<(std::basic_ostream<C, T>& strm, Instrument inst)
 {
-    strm << ((inst == Instrument::FUTURE) ? "Future" : "ETF");
+    strm << ((InstrumentType(inst) == Instrument::FUTURE) ? "Future" : "ETF");
+    if (InstrumentPair(inst) != 0)
+    {
+        strm << '[' << InstrumentPair(inst) << ']';
+    }
     return strm;
 }
 
@@ -15,9 +15,10 @@
 #     You should have received a copy of the GNU Affero General Public
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
-__all__ = ["BaseAutoTrader", "Instrument", "Lifespan", "MAXIMUM_ASK", "MINIMUM_BID", "Side"]
+__all__ = ["BaseAutoTrader", "Instrument", "Lifespan", "MAXIMUM_ASK", "MINIMUM_BID", "Side", "instrument_number",
+           "instrument_pair", "instrument_type"]
 
 from .application import Application
 from .base_auto_trader import BaseAutoTrader
 from .order_book import MAXIMUM_ASK, MINIMUM_BID
-from .types import Instrument, Lifespan, Side
+from .types import Instrument, Lifespan, Side, instrument_number, instrument_pair, instrument_type
@@ -15,11 +15,19 @@
 #     You should have received a copy of the GNU Affero General Public
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
-from .types import Instrument, Side
+from typing import Iterable, Tuple
+
+from .types import Instrument, Side, tick_size_in_cents
 
 
 class CompetitorAccount(object):
-    """A competitors account."""
+    """A competitors account.
+
+    Balances and positions are kept up to date as transactions occur, but the
+    account is only valued when its profit or loss is asked for, at the
+    prices last given to mark or update. The maximum profit and drawdown are
+    tracked each time update is called.
+    """
 
     def __init__(self, tick_size: float, etf_clamp: float):
         """Initialise a new instance of the CompetitorAccount class."""
@@ -30,11 +38,35 @@ class CompetitorAccount(object):
         self.future_position: int = 0
         self.max_drawdown: int = 0
         self.max_profit: int = 0
-        self.profit_or_loss: int = 0
         self.sell_volume: int = 0
-        self.tick_size: int = int(tick_size * 100.0)
+        self.tick_size: int = tick_size_in_cents(tick_size)
         self.total_fees: int = 0
 
+        self.__clamp_bounds: Tuple[int, int] = (0, 0)
+        self.__clamp_future_price: int = 0
+        self.__etf_price: int = 0
+        self.__future_price: int = 0
+        self.__transacted: bool = False
+
+    @property
+    def profit_or_loss(self) -> int:
+        """Return the profit or loss at the prices last given to mark or update."""
+        future_price: int = self.__future_price
+        if future_price != self.__clamp_future_price:
+            delta: int = round(self.etf_clamp * future_price)
+            delta -= delta % self.tick_size
+            self.__clamp_bounds = (future_price - delta, future_price + delta)
+            self.__clamp_future_price = future_price
+        min_price, max_price = self.__clamp_bounds
+        etf_price: int = self.__etf_price
+        clamped: int = min_price if etf_price < min_price else max_price if etf_price > max_price else etf_price
+        return self.account_balance + self.future_position * future_price + self.etf_position * clamped
+
+    def mark(self, future_price: int, etf_price: int) -> None:
+        """Set the prices at which this account is valued, without valuing it."""
+        self.__future_price = future_price
+        self.__etf_price = etf_price
+
     def transact(self, instrument: Instrument, side: Side, price: float, volume: int, fee: int) -> None:
         """Update this account with the specified transaction."""
         if side == Side.SELL:
@@ -44,6 +76,7 @@ class CompetitorAccount(object):
 
         self.account_balance -= fee
         self.total_fees += fee
+        self.__transacted = True
 
         if instrument == Instrument.FUTURE:
             if side == Side.SELL:
@@ -59,17 +92,65 @@ class CompetitorAccount(object):
                 self.etf_position += volume
 
     def update(self, future_price: int, etf_price: int) -> None:
-        """Update this account using the specified prices."""
-        delta: int = round(self.etf_clamp * future_price)
-        delta -= delta % self.tick_size
-        min_price: int = future_price - delta
-        max_price: int = future_price + delta
-        clamped: int = min_price if etf_price < min_price else max_price if etf_price > max_price else etf_price
-        self.profit_or_loss = self.account_balance + self.future_position * future_price + self.etf_position * clamped
-        if self.profit_or_loss > self.max_profit:
-            self.max_profit = self.profit_or_loss
-        if self.max_profit - self.profit_or_loss > self.max_drawdown:
-            self.max_drawdown = self.max_profit - self.profit_or_loss
+        """Value this account at the specified prices and track its maximum profit and drawdown."""
+        if future_price == self.__future_price and etf_price == self.__etf_price and not self.__transacted:
+            return  # Nothing has changed since the last valuation
+
+        self.__future_price = future_price
+        self.__etf_price = etf_price
+        self.__transacted = False
+        profit_or_loss: int = self.profit_or_loss
+        if profit_or_loss > self.max_profit:
+            self.max_profit = profit_or_loss
+        if self.max_profit - profit_or_loss > self.max_drawdown:
+            self.max_drawdown = self.max_profit - profit_or_loss
+
+
+class PortfolioAccount(object):
+    """The combined accounts of a competitor that trades several pairs of instruments.
+
+    Volumes, positions, fees, balances and profit or loss are the sums of
+    those in the individual accounts, which must be kept up to date.
+    """
+
+    def __init__(self, accounts: Iterable[CompetitorAccount]):
+        """Initialise a new instance of the PortfolioAccount class."""
+        self.accounts: Tuple[CompetitorAccount, ...] = tuple(accounts)
+
+    @property
+    def account_balance(self) -> int:
+        """Return the total of the account balances."""
+        return sum(a.account_balance for a in self.accounts)
+
+    @property
+    def buy_volume(self) -> int:
+        """Return the total volume bought."""
+        return sum(a.buy_volume for a in self.accounts)
+
+    @property
+    def etf_position(self) -> int:
+        """Return the total ETF position."""
+        return sum(a.etf_position for a in self.accounts)
+
+    @property
+    def future_position(self) -> int:
+        """Return the total future position."""
+        return sum(a.future_position for a in self.accounts)
+
+    @property
+    def profit_or_loss(self) -> int:
+        """Return the total profit or loss."""
+        return sum(a.profit_or_loss for a in self.accounts)
+
+    @property
+    def sell_volume(self) -> int:
+        """Return the total volume sold."""
+        return sum(a.sell_volume for a in self.accounts)
+
+    @property
+    def total_fees(self) -> int:
+        """Return the total fees paid."""
+        return sum(a.total_fees for a in self.accounts)
 
 
 class AccountFactory:
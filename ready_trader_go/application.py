@@ -22,28 +22,22 @@ import pathlib
 import signal
 import sys
 
-from typing import Callable, Optional
+from typing import Any, Callable, Optional
 
 
 class Application(object):
     """Standard application setup."""
 
-    def __init__(self, name: str, config_validator: Optional[Callable] = None, config_path: Optional[str] = None):
-        """Initialise a new instance of the Application class."""
-        self.event_loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+    def __init__(self, name: str, config_validator: Optional[Callable] = None, config_path: Optional[str] = None,
+                 event_loop_factory: Optional[Callable[[Any], asyncio.AbstractEventLoop]] = None):
+        """Initialise a new instance of the Application class.
+
+        If an event loop factory is supplied, it is called with the validated
+        configuration to create the application's event loop.
+        """
         self.logger = logging.getLogger("APP")
         self.name: str = name
 
-        # Turn on debugging if you're having trouble with the event loop
-        # self.event_loop.set_debug(True)
-
-        try:
-            self.event_loop.add_signal_handler(signal.SIGINT, self.on_signal, signal.SIGINT)
-            self.event_loop.add_signal_handler(signal.SIGTERM, self.on_signal, signal.SIGTERM)
-        except NotImplementedError:
-            # Signal handlers are only implemented on Unix
-            pass
-
         self.config = None
         if config_path is None: 
             config_path = pathlib.Path(name + ".json")
@@ -58,6 +52,23 @@ class Application(object):
         elif config_validator is not None:
             raise Exception("configuration file does not exist: %s" % str(config_path))
 
+        self.event_loop: asyncio.AbstractEventLoop
+        if event_loop_factory is not None:
+            self.event_loop = event_loop_factory(self.config)
+            asyncio.set_event_loop(self.event_loop)
+        else:
+            self.event_loop = asyncio.get_event_loop()
+
+        # Turn on debugging if you're having trouble with the event loop
+        # self.event_loop.set_debug(True)
+
+        try:
+            self.event_loop.add_signal_handler(signal.SIGINT, self.on_signal, signal.SIGINT)
+            self.event_loop.add_signal_handler(signal.SIGTERM, self.on_signal, signal.SIGTERM)
+        except NotImplementedError:
+            # Signal handlers are only implemented on Unix
+            pass
+
         logging.basicConfig(filename=f'{name}.log', format="%(asctime)s [%(levelname)-7s] [%(name)s] %(message)s",
                             level=logging.INFO)
 
@@ -0,0 +1,592 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+import bisect
+import collections
+import heapq
+import itertools
+
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from .order_book import TOP_LEVEL_COUNT, Order, OrderBook
+from .types import Instrument, Lifespan, Side, tick_size_in_cents
+
+DEFAULT_CAPACITY = 4096
+MAXIMUM_CAPACITY = 65536
+
+
+class ArrayOrderBook(object):
+    """A collection of orders arranged by the price-time priority principle.
+
+    Price levels are kept in preallocated arrays indexed by the number of
+    ticks from a reference price, with a cursor marking the best level on
+    each side. Finding, adding or removing a level is O(1) and a bytearray
+    marking the occupied levels is searched to move a cursor after the best
+    level empties. The arrays are re-centred (and grown if necessary) should
+    a price fall outside of them, but never beyond the maximum capacity.
+
+    Levels whose prices do not fit in the arrays, or are not multiples of
+    the tick size, are kept in a dictionary with a sorted list of their
+    prices, so that a single far-away order costs no more than any other.
+
+    The version number is incremented whenever one of the top levels (as
+    reported by top_levels) changes, and only then. The order signals are
+    the same as those of the OrderBook class.
+    """
+
+    def __init__(self, instrument: Instrument, maker_fee: float, taker_fee: float, tick_size: int = 1,
+                 capacity: int = DEFAULT_CAPACITY, depth: int = TOP_LEVEL_COUNT,
+                 maximum_capacity: int = MAXIMUM_CAPACITY):
+        """Initialise a new instance of the ArrayOrderBook class.
+
+        The tick size is in cents. The depth is the number of price levels on
+        each side of the book that are reported by top_levels and
+        trade_ticks. The capacity doubles, up to the maximum capacity, as
+        needed.
+        """
+        self.depth: int = depth
+        self.instrument: Instrument = instrument
+        self.maker_fee: float = maker_fee
+        self.taker_fee: float = taker_fee
+        self.version: int = 0
+
+        self.__ask_count: int = 0
+        self.__ask_occupied: bytearray = bytearray(capacity)
+        self.__ask_queues: List[Optional[Deque[Order]]] = [None] * capacity
+        self.__ask_ticks: Dict[int, int] = collections.defaultdict(int)
+        self.__ask_volumes: List[int] = [0] * capacity
+        self.__base: Optional[int] = None
+        self.__best_ask: int = 0
+        self.__best_bid: int = 0
+        self.__bid_count: int = 0
+        self.__bid_occupied: bytearray = bytearray(capacity)
+        self.__bid_queues: List[Optional[Deque[Order]]] = [None] * capacity
+        self.__bid_ticks: Dict[int, int] = collections.defaultdict(int)
+        self.__bid_volumes: List[int] = [0] * capacity
+        self.__capacity: int = capacity
+        self.__last_traded_price: Optional[int] = None
+        self.__maximum_capacity: int = max(capacity, maximum_capacity)
+        self.__tick_size: int = tick_size
+
+        # Levels outside of the arrays, keyed by price, with their prices in
+        # ascending order
+        self.__outer_ask_prices: List[int] = list()
+        self.__outer_ask_queues: Dict[int, Deque[Order]] = dict()
+        self.__outer_ask_volumes: Dict[int, int] = dict()
+        self.__outer_bid_prices: List[int] = list()
+        self.__outer_bid_queues: Dict[int, Deque[Order]] = dict()
+        self.__outer_bid_volumes: Dict[int, int] = dict()
+
+        # Signals
+        self.order_amended: List[Callable[[Any, Order, int], None]] = list()
+        self.order_cancelled: List[Callable[[Any, Order, int], None]] = list()
+        self.order_filled: List[Callable[[Any, Order, int], None]] = list()
+        self.order_placed: List[Callable[[Any, Order], None]] = list()
+        self.trade_occurred: List[Callable[[Any], None]] = list()
+
+    def __str__(self):
+        """Return a string representation of this order book."""
+        ask_prices = [0] * self.depth
+        ask_volumes = [0] * self.depth
+        bid_prices = [0] * self.depth
+        bid_volumes = [0] * self.depth
+        self.top_levels(ask_prices, ask_volumes, bid_prices, bid_volumes)
+        return ("BidVol\tPrice\tAskVol\n"
+                + "\n".join("\t%dc\t%6d" % (p, v) for p, v in zip(reversed(ask_prices), reversed(ask_volumes)) if p)
+                + "\n" + "\n".join("%6d\t%dc" % (v, p) for p, v in zip(bid_prices, bid_volumes) if p))
+
+    def __index(self, price: int) -> int:
+        """Return the array index for the given price, or -1 if the price does not belong in the arrays."""
+        ticks, remainder = divmod(price, self.__tick_size)
+        if remainder:
+            return -1
+        if self.__base is None or (self.__ask_count == 0 and self.__bid_count == 0):
+            # Nothing is in the arrays, so they can be centred on this price
+            self.__base = ticks - self.__capacity // 2
+        index: int = ticks - self.__base
+        if 0 <= index < self.__capacity:
+            return index
+        if not self.__recentre(ticks):
+            return -1
+        return ticks - self.__base
+
+    def __recentre(self, ticks: int) -> bool:
+        """Move (and, if necessary, grow) the arrays so that they cover the given price, if they can."""
+        low: int = min(self.__base, ticks)
+        high: int = max(self.__base + self.__capacity, ticks + 1)
+        if high - low > self.__maximum_capacity:
+            return False
+        capacity: int = self.__capacity
+        while capacity < high - low:
+            capacity *= 2
+        capacity = min(capacity, self.__maximum_capacity)
+
+        base: int = low - (capacity - (high - low)) // 2
+        shift: int = self.__base - base
+
+        def move(old: Any, new: Any) -> Any:
+            new[shift:shift + self.__capacity] = old
+            return new
+
+        self.__ask_occupied = move(self.__ask_occupied, bytearray(capacity))
+        self.__ask_queues = move(self.__ask_queues, [None] * capacity)
+        self.__ask_volumes = move(self.__ask_volumes, [0] * capacity)
+        self.__bid_occupied = move(self.__bid_occupied, bytearray(capacity))
+        self.__bid_queues = move(self.__bid_queues, [None] * capacity)
+        self.__bid_volumes = move(self.__bid_volumes, [0] * capacity)
+        self.__best_ask += shift
+        self.__best_bid += shift
+        self.__base = base
+        self.__capacity = capacity
+        return True
+
+    def __ask_levels(self) -> Iterator[Tuple[int, int]]:
+        """Return an iterator over the price and volume of every ask level, best first."""
+        levels = self.__array_ask_levels()
+        if self.__outer_ask_prices:
+            volumes = self.__outer_ask_volumes
+            levels = heapq.merge(levels, ((p, volumes[p]) for p in self.__outer_ask_prices))
+        return levels
+
+    def __array_ask_levels(self) -> Iterator[Tuple[int, int]]:
+        """Yield the price and volume of each ask level in the arrays, best first."""
+        if self.__ask_count:
+            base: int = self.__base
+            tick_size: int = self.__tick_size
+            occupied = self.__ask_occupied
+            volumes = self.__ask_volumes
+            j: int = self.__best_ask
+            while j >= 0:
+                yield (base + j) * tick_size, volumes[j]
+                j = occupied.find(1, j + 1)
+
+    def __bid_levels(self) -> Iterator[Tuple[int, int]]:
+        """Return an iterator over the price and volume of every bid level, best first."""
+        levels = self.__array_bid_levels()
+        if self.__outer_bid_prices:
+            volumes = self.__outer_bid_volumes
+            levels = heapq.merge(levels, ((p, volumes[p]) for p in reversed(self.__outer_bid_prices)), reverse=True)
+        return levels
+
+    def __array_bid_levels(self) -> Iterator[Tuple[int, int]]:
+        """Yield the price and volume of each bid level in the arrays, best first."""
+        if self.__bid_count:
+            base: int = self.__base
+            tick_size: int = self.__tick_size
+            occupied = self.__bid_occupied
+            volumes = self.__bid_volumes
+            j: int = self.__best_bid
+            while j >= 0:
+                yield (base + j) * tick_size, volumes[j]
+                j = occupied.rfind(1, 0, j)
+
+    def amend(self, now: float, order: Order, new_volume: int) -> None:
+        """Amend an order in this order book by decreasing its volume."""
+        if order.remaining_volume > 0:
+            fill_volume = order.volume - order.remaining_volume
+            diff = order.volume - (fill_volume if new_volume < fill_volume else new_volume)
+            self.remove_volume_from_level(order.price, diff, order.side)
+            order.volume -= diff
+            order.remaining_volume -= diff
+            if order.listener:
+                order.listener.on_order_amended(now, order, diff)
+            for callback in self.order_amended:
+                callback(self, order, diff)
+
+    def best_ask(self) -> Optional[int]:
+        """Return the current best ask price, or None if there are no ask orders."""
+        outer: List[int] = self.__outer_ask_prices
+        if self.__ask_count:
+            price: int = (self.__base + self.__best_ask) * self.__tick_size
+            return outer[0] if outer and outer[0] < price else price
+        return outer[0] if outer else None
+
+    def best_bid(self) -> Optional[int]:
+        """Return the current best bid price, or None if there are no bid orders."""
+        outer: List[int] = self.__outer_bid_prices
+        if self.__bid_count:
+            price: int = (self.__base + self.__best_bid) * self.__tick_size
+            return outer[-1] if outer and outer[-1] > price else price
+        return outer[-1] if outer else None
+
+    def cancel(self, now: float, order: Order) -> None:
+        """Cancel an order in this order book."""
+        if order.remaining_volume > 0:
+            self.remove_volume_from_level(order.price, order.remaining_volume, order.side)
+            remaining = order.remaining_volume
+            order.remaining_volume = 0
+            if order.listener:
+                order.listener.on_order_cancelled(now, order, remaining)
+            for callback in self.order_cancelled:
+                callback(self, order, remaining)
+
+    def insert(self, now: float, order: Order) -> None:
+        """Insert a new order into this order book."""
+        if order.side == Side.SELL:
+            if (self.__bid_count or self.__outer_bid_prices) and order.price <= self.best_bid():
+                self.trade_ask(now, order)
+        elif (self.__ask_count or self.__outer_ask_prices) and order.price >= self.best_ask():
+            self.trade_bid(now, order)
+
+        if order.remaining_volume > 0:
+            if order.lifespan == Lifespan.FILL_AND_KILL:
+                remaining = order.remaining_volume
+                order.remaining_volume = 0
+                if order.listener:
+                    order.listener.on_order_cancelled(now, order, remaining)
+            else:
+                self.place(now, order)
+
+    def last_traded_price(self) -> Optional[int]:
+        """Return the last traded price."""
+        return self.__last_traded_price
+
+    def midpoint_price(self) -> Optional[float]:
+        """Return the midpoint price."""
+        best_bid = self.best_bid()
+        best_ask = self.best_ask()
+        if best_bid is not None and best_ask is not None:
+            return (best_bid + best_ask) / 2.0
+        return None
+
+    def place(self, now: float, order: Order) -> None:
+        """Place an order that does not match any existing order in this order book."""
+        price: int = order.price
+
+        if order.side == Side.SELL:
+            index: int = -1 if price in self.__outer_ask_volumes else self.__index(price)
+            if index < 0:
+                self.__place_outer(order, self.__outer_ask_prices, self.__outer_ask_queues, self.__outer_ask_volumes)
+                if self.__is_top_ask(price):
+                    self.version += 1
+            else:
+                if self.__ask_volumes[index] == 0:
+                    if self.__ask_queues[index] is None:
+                        self.__ask_queues[index] = collections.deque()
+                    if self.__ask_count == 0 or index < self.__best_ask:
+                        self.__best_ask = index
+                    self.__ask_occupied[index] = 1
+                    self.__ask_count += 1
+                self.__ask_queues[index].append(order)
+                self.__ask_volumes[index] += order.remaining_volume
+                if self.__is_top_ask_level(index):
+                    self.version += 1
+        else:
+            index: int = -1 if price in self.__outer_bid_volumes else self.__index(price)
+            if index < 0:
+                self.__place_outer(order, self.__outer_bid_prices, self.__outer_bid_queues, self.__outer_bid_volumes)
+                if self.__is_top_bid(price):
+                    self.version += 1
+            else:
+                if self.__bid_volumes[index] == 0:
+                    if self.__bid_queues[index] is None:
+                        self.__bid_queues[index] = collections.deque()
+                    if self.__bid_count == 0 or index > self.__best_bid:
+                        self.__best_bid = index
+                    self.__bid_occupied[index] = 1
+                    self.__bid_count += 1
+                self.__bid_queues[index].append(order)
+                self.__bid_volumes[index] += order.remaining_volume
+                if self.__is_top_bid_level(index):
+                    self.version += 1
+
+        if order.listener:
+            order.listener.on_order_placed(now, order)
+        for callback in self.order_placed:
+            callback(self, order)
+
+    @staticmethod
+    def __place_outer(order: Order, prices: List[int], queues: Dict[int, Deque[Order]],
+                      volumes: Dict[int, int]) -> None:
+        """Add an order to a level outside of the arrays."""
+        if order.price in volumes:
+            volumes[order.price] += order.remaining_volume
+        else:
+            bisect.insort(prices, order.price)
+            queues[order.price] = collections.deque()
+            volumes[order.price] = order.remaining_volume
+        queues[order.price].append(order)
+
+    @staticmethod
+    def __clear_outer_level(price: int, prices: List[int], queues: Dict[int, Deque[Order]],
+                            volumes: Dict[int, int]) -> None:
+        """Remove a level outside of the arrays."""
+        del queues[price]
+        del volumes[price]
+        prices.pop(bisect.bisect_left(prices, price))
+
+    def remove_volume_from_level(self, price: int, volume: int, side: Side) -> None:
+        if side == Side.SELL:
+            volumes = self.__outer_ask_volumes
+            if price in volumes:
+                if volume and self.__is_top_ask(price):
+                    self.version += 1
+                if volumes[price] == volume:
+                    self.__clear_outer_level(price, self.__outer_ask_prices, self.__outer_ask_queues, volumes)
+                else:
+                    volumes[price] -= volume
+                return
+            index: int = price // self.__tick_size - self.__base
+            if volume and self.__is_top_ask_level(index):
+                self.version += 1
+            if self.__ask_volumes[index] == volume:
+                self.__clear_ask_level(index)
+            else:
+                self.__ask_volumes[index] -= volume
+        elif side == Side.BUY:
+            volumes = self.__outer_bid_volumes
+            if price in volumes:
+                if volume and self.__is_top_bid(price):
+                    self.version += 1
+                if volumes[price] == volume:
+                    self.__clear_outer_level(price, self.__outer_bid_prices, self.__outer_bid_queues, volumes)
+                else:
+                    volumes[price] -= volume
+                return
+            index: int = price // self.__tick_size - self.__base
+            if volume and self.__is_top_bid_level(index):
+                self.version += 1
+            if self.__bid_volumes[index] == volume:
+                self.__clear_bid_level(index)
+            else:
+                self.__bid_volumes[index] -= volume
+
+    def __is_top_ask(self, price: int) -> bool:
+        """Return True if the ask level at the given price is one of the top levels."""
+        depth: int = self.depth
+        if self.__ask_count + len(self.__outer_ask_prices) <= depth:
+            return True
+        for p, _ in itertools.islice(self.__ask_levels(), depth):
+            if p >= price:
+                return True
+        return False
+
+    def __is_top_bid(self, price: int) -> bool:
+        """Return True if the bid level at the given price is one of the top levels."""
+        depth: int = self.depth
+        if self.__bid_count + len(self.__outer_bid_prices) <= depth:
+            return True
+        for p, _ in itertools.islice(self.__bid_levels(), depth):
+            if p <= price:
+                return True
+        return False
+
+    def __is_top_ask_level(self, index: int) -> bool:
+        """Return True if the ask level at the given index is one of the top levels."""
+        if self.__outer_ask_prices:
+            return self.__is_top_ask((self.__base + index) * self.__tick_size)
+        depth: int = self.depth
+        if self.__ask_count <= depth or index <= self.__best_ask:
+            return True
+        return self.__ask_occupied.count(1, self.__best_ask, index) < depth
+
+    def __is_top_bid_level(self, index: int) -> bool:
+        """Return True if the bid level at the given index is one of the top levels."""
+        if self.__outer_bid_prices:
+            return self.__is_top_bid((self.__base + index) * self.__tick_size)
+        depth: int = self.depth
+        if self.__bid_count <= depth or index >= self.__best_bid:
+            return True
+        return self.__bid_occupied.count(1, index + 1, self.__best_bid + 1) < depth
+
+    def __clear_ask_level(self, index: int) -> None:
+        """Remove the ask level at the given index and, if need be, find the new best ask."""
+        self.__ask_volumes[index] = 0
+        self.__ask_occupied[index] = 0
+        self.__ask_queues[index].clear()
+        self.__ask_count -= 1
+        if self.__ask_count and index == self.__best_ask:
+            self.__best_ask = self.__ask_occupied.find(1, index + 1)
+
+    def __clear_bid_level(self, index: int) -> None:
+        """Remove the bid level at the given index and, if need be, find the new best bid."""
+        self.__bid_volumes[index] = 0
+        self.__bid_occupied[index] = 0
+        self.__bid_queues[index].clear()
+        self.__bid_count -= 1
+        if self.__bid_count and index == self.__best_bid:
+            self.__best_bid = self.__bid_occupied.rfind(1, 0, index)
+
+    def top_levels(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                   bid_volumes: List[int]) -> None:
+        """Populate the supplied lists with the top levels for this book."""
+        depth: int = self.depth
+
+        i: int = 0
+        for price, volume in itertools.islice(self.__ask_levels(), depth):
+            ask_prices[i] = price
+            ask_volumes[i] = volume
+            i += 1
+        while i < depth:
+            ask_prices[i] = ask_volumes[i] = 0
+            i += 1
+
+        i = 0
+        for price, volume in itertools.islice(self.__bid_levels(), depth):
+            bid_prices[i] = price
+            bid_volumes[i] = volume
+            i += 1
+        while i < depth:
+            bid_prices[i] = bid_volumes[i] = 0
+            i += 1
+
+    def trade_ask(self, now: float, order: Order) -> None:
+        """Check to see if any existing bid orders match the specified ask order."""
+        while order.remaining_volume > 0:
+            best_bid: Optional[int] = self.best_bid()
+            if best_bid is None or best_bid < order.price:
+                break
+            self.trade_level(now, order, best_bid)
+            self.__remove_empty_level(best_bid, Side.BUY)
+
+    def trade_bid(self, now: float, order: Order) -> None:
+        """Check to see if any existing ask orders match the specified bid order."""
+        while order.remaining_volume > 0:
+            best_ask: Optional[int] = self.best_ask()
+            if best_ask is None or best_ask > order.price:
+                break
+            self.trade_level(now, order, best_ask)
+            self.__remove_empty_level(best_ask, Side.SELL)
+
+    def __remove_empty_level(self, price: int, side: Side) -> None:
+        """Remove the level at the given price if trading has emptied it."""
+        if side == Side.SELL:
+            volumes = self.__outer_ask_volumes
+            if price in volumes:
+                if volumes[price] == 0:
+                    self.__clear_outer_level(price, self.__outer_ask_prices, self.__outer_ask_queues, volumes)
+            else:
+                index: int = price // self.__tick_size - self.__base
+                if self.__ask_volumes[index] == 0:
+                    self.__clear_ask_level(index)
+        else:
+            volumes = self.__outer_bid_volumes
+            if price in volumes:
+                if volumes[price] == 0:
+                    self.__clear_outer_level(price, self.__outer_bid_prices, self.__outer_bid_queues, volumes)
+            else:
+                index: int = price // self.__tick_size - self.__base
+                if self.__bid_volumes[index] == 0:
+                    self.__clear_bid_level(index)
+
+    def trade_level(self, now: float, order: Order, best_price: int) -> None:
+        """Match the specified order with existing orders at the given level."""
+        if order.side == Side.BUY:
+            if best_price in self.__outer_ask_volumes:
+                index: int = best_price
+                volumes = self.__outer_ask_volumes
+                order_queue: Deque[Order] = self.__outer_ask_queues[best_price]
+            else:
+                index: int = best_price // self.__tick_size - self.__base
+                volumes = self.__ask_volumes
+                order_queue: Deque[Order] = self.__ask_queues[index]
+        else:
+            if best_price in self.__outer_bid_volumes:
+                index: int = best_price
+                volumes = self.__outer_bid_volumes
+                order_queue: Deque[Order] = self.__outer_bid_queues[best_price]
+            else:
+                index: int = best_price // self.__tick_size - self.__base
+                volumes = self.__bid_volumes
+                order_queue: Deque[Order] = self.__bid_queues[index]
+
+        remaining: int = order.remaining_volume
+        total_volume: int = volumes[index]
+
+        while remaining > 0 and total_volume > 0:
+            while order_queue[0].remaining_volume == 0:
+                order_queue.popleft()
+            passive: Order = order_queue[0]
+            volume: int = remaining if remaining < passive.remaining_volume else passive.remaining_volume
+            fee: int = round(best_price * volume * self.maker_fee)
+            total_volume -= volume
+            remaining -= volume
+            passive.remaining_volume -= volume
+            passive.total_fees += fee
+            if passive.listener:
+                passive.listener.on_order_filled(now, passive, best_price, volume, fee)
+            for callback in self.order_filled:
+                callback(self, passive, volume)
+
+        # A level that has been emptied is left with a volume of zero so that
+        # the caller can remove it and move the best price cursor.
+        volumes[index] = total_volume
+        traded_volume_at_this_level: int = order.remaining_volume - remaining
+        self.version += 1
+
+        if order.side == Side.BUY:
+            self.__ask_ticks[best_price] += traded_volume_at_this_level
+        else:
+            self.__bid_ticks[best_price] += traded_volume_at_this_level
+
+        fee: int = round(best_price * traded_volume_at_this_level * self.taker_fee)
+        order.remaining_volume = remaining
+        order.total_fees += fee
+        if order.listener:
+            order.listener.on_order_filled(now, order, best_price, traded_volume_at_this_level, fee)
+
+        self.__last_traded_price = best_price
+        for callback in self.trade_occurred:
+            callback(self)
+
+    def trade_ticks(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                    bid_volumes: List[int]) -> bool:
+        """Return True and populate the lists if there have been trades."""
+        if self.__ask_ticks or self.__bid_ticks:
+            depth: int = self.depth
+            prices = sorted(self.__ask_ticks.keys())[:depth]
+            volumes = tuple(self.__ask_ticks[p] for p in prices)
+            ask_prices[:] = prices + [0] * (depth - len(prices))
+            ask_volumes[:] = volumes + (0,) * (depth - len(volumes))
+
+            prices = sorted(self.__bid_ticks.keys(), reverse=True)[:depth]
+            volumes = tuple(self.__bid_ticks[p] for p in prices)
+            bid_prices[:] = prices + [0] * (depth - len(prices))
+            bid_volumes[:] = volumes + (0,) * (depth - len(volumes))
+
+            self.__ask_ticks.clear()
+            self.__bid_ticks.clear()
+
+            return True
+
+        return False
+
+    def try_trade(self, side: Side, limit_price: int, volume: int) -> Tuple[int, int]:
+        """Return the volume that would trade and the average price per lot for
+        the requested trade without changing the order book.
+        """
+        total_volume: int = 0
+        total_value: int = 0
+
+        for price, available in (self.__bid_levels() if side == Side.ASK else self.__ask_levels()):
+            if total_volume >= volume or (side == Side.ASK and price < limit_price) or (side == Side.BID
+                                                                                        and price > limit_price):
+                break
+            required: int = volume - total_volume
+            weight: int = required if required <= available else available
+            total_volume += weight
+            total_value += weight * price
+
+        return total_volume, total_value // total_volume if total_volume > 0 else 0
+
+
+def create_order_book(instrument: int, maker_fee: float, taker_fee: float, tick_size: float, depth: int,
+                      array: bool) -> Union[ArrayOrderBook, OrderBook]:
+    """Return a new array order book if array is True, otherwise a new (sorted) order book."""
+    if array:
+        return ArrayOrderBook(instrument, maker_fee, taker_fee, tick_size_in_cents(tick_size), depth=depth)
+    return OrderBook(instrument, maker_fee, taker_fee, depth)
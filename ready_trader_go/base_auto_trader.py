@@ -17,22 +17,33 @@
 #     <https://www.gnu.org/licenses/>.
 import asyncio
 import logging
+import struct
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .messages import (AMEND_MESSAGE, AMEND_MESSAGE_SIZE, CANCEL_MESSAGE, CANCEL_MESSAGE_SIZE,
-                       ERROR_MESSAGE, ERROR_MESSAGE_SIZE, HEDGE_MESSAGE, HEDGE_MESSAGE_SIZE,
-                       HEDGE_FILLED_MESSAGE, HEDGE_FILLED_MESSAGE_SIZE, INSERT_MESSAGE, INSERT_MESSAGE_SIZE,
-                       LOGIN_MESSAGE, LOGIN_MESSAGE_SIZE, ORDER_BOOK_HEADER, ORDER_BOOK_HEADER_SIZE,
-                       ORDER_BOOK_MESSAGE_SIZE, BOOK_PART, ORDER_FILLED_MESSAGE, ORDER_FILLED_MESSAGE_SIZE,
-                       ORDER_STATUS_MESSAGE, ORDER_STATUS_MESSAGE_SIZE, TRADE_TICKS_HEADER,
-                       TRADE_TICKS_HEADER_SIZE, TRADE_TICKS_MESSAGE_SIZE, TICKS_PART,
-                       Connection, MessageType, Subscription)
+                       ERROR_MESSAGE, ERROR_MESSAGE_SIZE, HEADER_SIZE, HEDGE_MESSAGE, HEDGE_MESSAGE_SIZE,
+                       HEDGE_FILLED_MESSAGE, HEDGE_FILLED_MESSAGE_SIZE, IDLE_MESSAGE, IDLE_MESSAGE_SIZE,
+                       INSERT_MESSAGE, INSERT_MESSAGE_SIZE, LOCKSTEP_MESSAGE_SIZE, LOGIN_MESSAGE, LOGIN_MESSAGE_SIZE,
+                       ORDER_ADDED_MESSAGE, ORDER_ADDED_MESSAGE_SIZE, ORDER_BOOK_HEADER, ORDER_BOOK_HEADER_SIZE,
+                       ORDER_BOOK_MESSAGE_SIZE, BOOK_PART,
+                       ORDER_DELETED_MESSAGE, ORDER_DELETED_MESSAGE_SIZE, ORDER_EXECUTED_MESSAGE,
+                       ORDER_EXECUTED_MESSAGE_SIZE, ORDER_FILLED_MESSAGE, ORDER_FILLED_MESSAGE_SIZE,
+                       ORDER_MODIFIED_MESSAGE, ORDER_MODIFIED_MESSAGE_SIZE, ORDER_STATUS_MESSAGE,
+                       ORDER_STATUS_MESSAGE_SIZE, PAIR_HEDGE_MESSAGE, PAIR_HEDGE_MESSAGE_SIZE, PAIR_INSERT_MESSAGE,
+                       PAIR_INSERT_MESSAGE_SIZE, SNAPSHOT_HEADER, SNAPSHOT_HEADER_SIZE, SNAPSHOT_ORDER,
+                       TRADE_TICKS_HEADER, Connection, MessageType, Subscription, book_depth, book_part)
 from .types import Lifespan, Side
 
 
 class BaseAutoTrader(Connection, Subscription):
-    """Base class for an auto-trader."""
+    """Base class for an auto-trader.
+
+    If the exchange runs on a virtual clock, it asks the auto-trader to keep
+    in step. The auto-trader then sends an idle message, saying how many
+    information frames it has read and how many execution messages it has
+    received, after handling each batch of messages.
+    """
 
     def __init__(self, loop: asyncio.AbstractEventLoop, team_name: str, secret: str):
         """Initialise a new instance of the BaseTraderProtocol class."""
@@ -44,6 +55,17 @@ class BaseAutoTrader(Connection, Subscription):
         self.team_name: bytes = team_name.encode()
         self.secret: bytes = secret.encode()
 
+        self.__idle_pending: bool = False
+        self.__lockstep: bool = False
+        self.__messages_received: int = 0
+
+        # Order book and trade ticks messages share a layout that depends on
+        # the exchange's book depth, which is found from the message length.
+        self.__book_message_size: int = 0
+        self.__book_part: struct.Struct = BOOK_PART
+        self.__book_part_offsets: Tuple[int, ...] = ()
+        self.__set_book_depth(ORDER_BOOK_MESSAGE_SIZE)
+
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
         """Called twice, when the execution connection and the information channel are established."""
         if transport.get_extra_info("peername") is not None:
@@ -62,18 +84,66 @@ class BaseAutoTrader(Connection, Subscription):
             Connection.close(self)
         self.event_loop.stop()
 
+    def datagram_received(self, data: bytes, address: Tuple[str, int]) -> None:
+        """Called when an information message is received."""
+        Subscription.datagram_received(self, data, address)
+        if self.__lockstep and not self.__idle_pending:
+            self.__schedule_idle()
+
     def on_datagram(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Called when an information message is received from the matching engine."""
-        if typ == MessageType.ORDER_BOOK_UPDATE and length == ORDER_BOOK_MESSAGE_SIZE:
+        # The data may be a view of the information channel that is only
+        # valid during this call, so unpack it in place without slicing.
+        # Only order book and trade ticks messages may change the book depth
+        is_book: bool = typ == MessageType.ORDER_BOOK_UPDATE or typ == MessageType.TRADE_TICKS
+        valid_length: bool = is_book and (length == self.__book_message_size or self.__set_book_depth(length))
+        if typ == MessageType.ORDER_BOOK_UPDATE and valid_length:
             inst, seq = ORDER_BOOK_HEADER.unpack_from(data, start)
-            self.on_order_book_update_message(inst, seq, *BOOK_PART.iter_unpack(data[ORDER_BOOK_HEADER_SIZE:]))
-        elif typ == MessageType.TRADE_TICKS and length == TRADE_TICKS_MESSAGE_SIZE:
+            ap, av, bp, bv = self.__book_part_offsets
+            unpack_part = self.__book_part.unpack_from
+            self.on_order_book_update_message(inst, seq, unpack_part(data, ap), unpack_part(data, av),
+                                              unpack_part(data, bp), unpack_part(data, bv))
+        elif typ == MessageType.TRADE_TICKS and valid_length:
             inst, seq = TRADE_TICKS_HEADER.unpack_from(data, start)
-            self.on_trade_ticks_message(inst, seq, *TICKS_PART.iter_unpack(data[TRADE_TICKS_HEADER_SIZE:]))
+            ap, av, bp, bv = self.__book_part_offsets
+            unpack_part = self.__book_part.unpack_from
+            self.on_trade_ticks_message(inst, seq, unpack_part(data, ap), unpack_part(data, av),
+                                        unpack_part(data, bp), unpack_part(data, bv))
         else:
             self.logger.error("received invalid information message: length=%d type=%d", length, typ)
             self.event_loop.stop()
 
+    def __schedule_idle(self) -> None:
+        """Arrange for an idle message to be sent once the messages already received have been handled."""
+        self.__idle_pending = True
+        self.event_loop.call_soon(self.__send_idle)
+
+    def __send_idle(self) -> None:
+        """Tell the exchange how far this auto-trader has got."""
+        self.__idle_pending = False
+        if self._connection_transport is not None and not self._connection_transport.is_closing():
+            frames_read: int = self._receiver_transport.sequence if self._receiver_transport is not None else 0
+            self.send_message(MessageType.IDLE, IDLE_MESSAGE.pack(frames_read, self.__messages_received),
+                              IDLE_MESSAGE_SIZE)
+
+    def __set_book_depth(self, length: int) -> bool:
+        """Prepare to decode order book and trade ticks messages of the given length, if it is valid."""
+        depth = book_depth(length)
+        if depth == 0:
+            return False
+        self.__book_message_size = length
+        self.__book_part = book_part(depth)
+        self.__book_part_offsets = tuple(ORDER_BOOK_HEADER_SIZE + i * self.__book_part.size for i in range(4))
+        return True
+
+    def on_frames_dropped(self, count: int) -> None:
+        """Called when information messages were overwritten before they could be read.
+
+        The information channel skips ahead to the newest message, so order
+        book and trade ticks messages will have been missed.
+        """
+        self.logger.warning("information channel fell behind and dropped %d messages", count)
+
     def on_hedge_filled_message(self, client_order_id: int, price: int, volume: int) -> None:
         """Called when one of your hedge orders is filled, partially or fully.
 
@@ -84,6 +154,7 @@ class BaseAutoTrader(Connection, Subscription):
 
     def on_message(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Called when an execution message is received from the matching engine."""
+        self.__messages_received += 1
         if typ == MessageType.ERROR and length == ERROR_MESSAGE_SIZE:
             client_order_id, error_message = ERROR_MESSAGE.unpack_from(data, start)
             self.on_error_message(client_order_id, error_message.rstrip(b"\x00"))
@@ -93,24 +164,82 @@ class BaseAutoTrader(Connection, Subscription):
             self.on_order_filled_message(*ORDER_FILLED_MESSAGE.unpack_from(data, start))
         elif typ == MessageType.ORDER_STATUS and length == ORDER_STATUS_MESSAGE_SIZE:
             self.on_order_status_message(*ORDER_STATUS_MESSAGE.unpack_from(data, start))
+        elif typ == MessageType.LOCKSTEP and length == LOCKSTEP_MESSAGE_SIZE:
+            self.__lockstep = True
         else:
             self.logger.error("received invalid execution message: length=%d type=%d", length, typ)
             self.event_loop.stop()
+            return
+
+        if self.__lockstep and not self.__idle_pending:
+            self.__schedule_idle()
 
     def on_error_message(self, client_order_id: int, error_message: bytes):
         """Called when the matching engine detects an error."""
 
+    def on_order_added_message(self, instrument: int, sequence_number: int, order_id: int, side: int, price: int,
+                               volume: int) -> None:
+        """Called when an order is placed in the order book (order feed only).
+
+        Every order resting in the order book, including your own, is given
+        an order id by the order feed. The sequence number of each order feed
+        message is one more than that of the previous message about the same
+        instrument, so a gap means that a change has been missed.
+        """
+
+    def on_order_book_snapshot_message(self, instrument: int, sequence_number: int,
+                                       orders: List[Tuple[int, int, int, int]]) -> None:
+        """Called periodically with every order in the order book (order feed only).
+
+        Each order is a tuple of order id, side, price and remaining volume,
+        and the orders are listed in time priority. The snapshot includes
+        every change up to and including the given sequence number, so a
+        book built from it can be kept up to date by applying the order feed
+        messages that follow.
+        """
+
     def on_order_book_update_message(self, instrument: int, sequence_number: int, ask_prices: List[int],
                                      ask_volumes: List[int], bid_prices: List[int], bid_volumes: List[int]) -> None:
         """Called periodically to report the status of the order book.
 
-        The sequence number can be used to detect missed messages. The five
-        best available ask (i.e. sell) and bid (i.e. buy) prices are reported
-        along with the volume available at each of those price levels. If
-        there are less than five prices on a side, then zeros will appear at
-        the end of both the prices and volumes lists on that side so that
-        there are always five entries in each list.
+        The sequence number can be used to detect missed messages. The best
+        available ask (i.e. sell) and bid (i.e. buy) prices are reported
+        along with the volume available at each of those price levels. The
+        number of levels reported on each side is the exchange's book depth
+        (five by default). If there are fewer prices on a side, then zeros
+        will appear at the end of both the prices and volumes lists on that
+        side so that every list has one entry per level.
+
+        The sequence number is the number of the tick at which the message
+        was sent. If the simulator is configured to send only the order books
+        that have changed, a gap in the sequence numbers for an instrument
+        means that the book did not change in the meantime.
+
+        If the exchange hosts several instrument pairs, the instrument number
+        identifies both the pair and the instrument (see instrument_pair and
+        instrument_type).
+        """
+
+    def on_order_deleted_message(self, instrument: int, sequence_number: int, order_id: int) -> None:
+        """Called when an order is cancelled (order feed only).
+
+        An amendment that leaves an order with no volume also deletes it.
+        """
+
+    def on_order_executed_message(self, instrument: int, sequence_number: int, order_id: int, volume: int) -> None:
+        """Called when an order in the order book trades (order feed only).
+
+        The volume is the number of lots traded at the order's price. An
+        order is removed from the order book once all of its volume has
+        traded; no order deleted message is sent for it.
+        """
+
+    def on_order_feed_frames_dropped(self, count: int) -> None:
+        """Called when order feed messages were overwritten before they could be read.
+
+        The book should be rebuilt from the next snapshot.
         """
+        self.logger.warning("order feed fell behind and dropped %d messages", count)
 
     def on_order_filled_message(self, client_order_id: int, price: int, volume: int) -> None:
         """Called when one of your orders is filled, partially or fully.
@@ -120,6 +249,10 @@ class BaseAutoTrader(Connection, Subscription):
         the number of lots filled at that price.
         """
 
+    def on_order_modified_message(self, instrument: int, sequence_number: int, order_id: int,
+                                  remaining_volume: int) -> None:
+        """Called when the volume of an order is reduced by an amendment (order feed only)."""
+
     def on_order_status_message(self, client_order_id: int, fill_volume: int, remaining_volume: int,
                                 fees: int) -> None:
         """Called when the status of one of your orders changes.
@@ -135,11 +268,11 @@ class BaseAutoTrader(Connection, Subscription):
                                ask_volumes: List[int], bid_prices: List[int], bid_volumes: List[int]) -> None:
         """Called when there is trading activity on the market.
 
-        The five best ask (i.e. sell) and bid (i.e. buy) prices at which there
-        has been trading activity are reported along with the volume traded at
-        each of those price levels. If there are less than five prices on a
-        side, then zeros will appear at the end of both the prices and volumes
-        lists on that side so that there are always five entries in each list.
+        The best ask (i.e. sell) and bid (i.e. buy) prices at which there has
+        been trading activity, as many as the exchange's book depth (five by
+        default), are reported along with the volume traded at each of those
+        price levels. If there are fewer prices on a side, then zeros will
+        appear at the end of both the prices and volumes lists on that side.
         """
 
     def send_amend_order(self, client_order_id: int, volume: int) -> None:
@@ -160,14 +293,88 @@ class BaseAutoTrader(Connection, Subscription):
         """
         self.send_message(MessageType.CANCEL_ORDER, CANCEL_MESSAGE.pack(client_order_id), CANCEL_MESSAGE_SIZE)
 
-    def send_hedge_order(self, client_order_id: int, side: Side, price: int, volume: int) -> None:
-        """Order lots in the future to hedge a position."""
-        self.send_message(MessageType.HEDGE_ORDER,
-                          HEDGE_MESSAGE.pack(client_order_id, side, price, volume),
-                          HEDGE_MESSAGE_SIZE)
-
-    def send_insert_order(self, client_order_id: int, side: Side, price: int, volume: int, lifespan: Lifespan) -> None:
-        """Insert a new order into the market."""
-        self.send_message(MessageType.INSERT_ORDER,
-                          INSERT_MESSAGE.pack(client_order_id, side, price, volume, lifespan),
-                          INSERT_MESSAGE_SIZE)
+    def send_hedge_order(self, client_order_id: int, side: Side, price: int, volume: int, pair: int = 0) -> None:
+        """Order lots in the future to hedge a position.
+
+        If the exchange hosts several instrument pairs, the pair says which
+        pair's future to trade.
+        """
+        if pair == 0:
+            self.send_message(MessageType.HEDGE_ORDER,
+                              HEDGE_MESSAGE.pack(client_order_id, side, price, volume),
+                              HEDGE_MESSAGE_SIZE)
+        else:
+            self.send_message(MessageType.PAIR_HEDGE_ORDER,
+                              PAIR_HEDGE_MESSAGE.pack(client_order_id, side, price, volume, pair),
+                              PAIR_HEDGE_MESSAGE_SIZE)
+
+    def send_insert_order(self, client_order_id: int, side: Side, price: int, volume: int, lifespan: Lifespan,
+                          pair: int = 0) -> None:
+        """Insert a new order into the market.
+
+        If the exchange hosts several instrument pairs, the pair says which
+        pair's ETF to trade.
+        """
+        if pair == 0:
+            self.send_message(MessageType.INSERT_ORDER,
+                              INSERT_MESSAGE.pack(client_order_id, side, price, volume, lifespan),
+                              INSERT_MESSAGE_SIZE)
+        else:
+            self.send_message(MessageType.PAIR_INSERT_ORDER,
+                              PAIR_INSERT_MESSAGE.pack(client_order_id, side, price, volume, lifespan, pair),
+                              PAIR_INSERT_MESSAGE_SIZE)
+
+
+class OrderFeedReceiver(Subscription):
+    """Decode the messages on the order feed and pass them to an auto-trader.
+
+    The parts of each order book snapshot are collected and passed on
+    together once the last part arrives. A snapshot with a missing part is
+    discarded.
+    """
+
+    def __init__(self, auto_trader: BaseAutoTrader):
+        """Initialise a new instance of the OrderFeedReceiver class."""
+        Subscription.__init__(self)
+
+        self.__auto_trader: BaseAutoTrader = auto_trader
+        self.__snapshot_orders: Dict[int, List[Tuple[int, int, int, int]]] = dict()
+        self.__snapshot_parts: Dict[int, int] = dict()
+        self.__snapshot_sequences: Dict[int, int] = dict()
+
+    def on_datagram(self, typ: int, data: bytes, start: int, length: int) -> None:
+        """Called when an order feed message is received from the matching engine."""
+        if typ == MessageType.ORDER_ADDED and length == ORDER_ADDED_MESSAGE_SIZE:
+            self.__auto_trader.on_order_added_message(*ORDER_ADDED_MESSAGE.unpack_from(data, start))
+        elif typ == MessageType.ORDER_DELETED and length == ORDER_DELETED_MESSAGE_SIZE:
+            self.__auto_trader.on_order_deleted_message(*ORDER_DELETED_MESSAGE.unpack_from(data, start))
+        elif typ == MessageType.ORDER_EXECUTED and length == ORDER_EXECUTED_MESSAGE_SIZE:
+            self.__auto_trader.on_order_executed_message(*ORDER_EXECUTED_MESSAGE.unpack_from(data, start))
+        elif typ == MessageType.ORDER_MODIFIED and length == ORDER_MODIFIED_MESSAGE_SIZE:
+            self.__auto_trader.on_order_modified_message(*ORDER_MODIFIED_MESSAGE.unpack_from(data, start))
+        elif (typ == MessageType.ORDER_BOOK_SNAPSHOT and length >= SNAPSHOT_HEADER_SIZE
+              and (length - SNAPSHOT_HEADER_SIZE) % SNAPSHOT_ORDER.size == 0):
+            self.__on_snapshot_part(data, start, length)
+        else:
+            self.__auto_trader.logger.error("received invalid order feed message: length=%d type=%d", length, typ)
+
+    def __on_snapshot_part(self, data: bytes, start: int, length: int) -> None:
+        """Collect one part of an order book snapshot."""
+        instrument, sequence_number, part, part_count = SNAPSHOT_HEADER.unpack_from(data, start)
+        if part == 0:
+            self.__snapshot_orders[instrument] = list()
+            self.__snapshot_sequences[instrument] = sequence_number
+        elif (part != self.__snapshot_parts.get(instrument, -1)
+              or sequence_number != self.__snapshot_sequences[instrument]):
+            self.__snapshot_parts[instrument] = -1
+            return
+
+        orders = self.__snapshot_orders[instrument]
+        message_start: int = start - HEADER_SIZE
+        orders.extend(SNAPSHOT_ORDER.unpack_from(data, offset) for offset in
+                      range(message_start + SNAPSHOT_HEADER_SIZE, message_start + length, SNAPSHOT_ORDER.size))
+        if part + 1 == part_count:
+            self.__snapshot_parts[instrument] = -1
+            self.__auto_trader.on_order_book_snapshot_message(instrument, sequence_number, orders)
+        else:
+            self.__snapshot_parts[instrument] = part + 1
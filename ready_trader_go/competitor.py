@@ -15,35 +15,134 @@
 #     You should have received a copy of the GNU Affero General Public
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
-import bisect
+import heapq
 import logging
 
-from typing import Any, Callable, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
 
-from .account import AccountFactory, CompetitorAccount
+from .account import AccountFactory, CompetitorAccount, PortfolioAccount
 from .match_events import MatchEvents
 from .order_book import IOrderListener, Order, OrderBook, MINIMUM_BID, MAXIMUM_ASK
 from .score_board import ScoreBoardWriter
 from .timer import Timer
-from .types import ICompetitor, IController, IExecutionConnection, Instrument, Lifespan, Side
+from .types import (ICompetitor, IController, IExecutionConnection, Instrument, Lifespan, Side,
+                    tick_size_in_cents)
 from .unhedged_lots import UnhedgedLots, UnhedgedLotsFactory
 
+# Error messages that do not depend on the order are only built once
+DUPLICATE_ORDER_ID_ERROR = b"duplicate or out-of-order client_order_id"
+IN_CROSS_ERROR = b"order rejected: in cross with an existing order"
+MARKET_NOT_OPEN_ERROR = b"order rejected: market not yet open"
+ORDER_COUNT_LIMIT_ERROR = b"order rejected: active order count limit breached"
+ORDER_VOLUME_LIMIT_ERROR = b"order rejected: active order volume limit breached"
+TICK_SIZE_ERROR = b"price is not a multiple of tick size"
 
-class Competitor(ICompetitor, IOrderListener):
-    """A competitor in the Ready Trader Go competition."""
+# The sides and lifespans that may appear in a message, keyed by value
+LIFESPANS: Dict[int, Lifespan] = {lifespan.value: lifespan for lifespan in Lifespan}
+SIDES: Dict[int, Side] = {side.value: side for side in Side}
+
+
+class InstrumentPair(object):
+    """An ETF and the future it tracks, each traded in its own order book."""
+
+    def __init__(self, pair: int, future_book: OrderBook, etf_book: OrderBook, account_factory: AccountFactory):
+        """Initialise a new instance of the InstrumentPair class."""
+        self.account_factory: AccountFactory = account_factory
+        self.etf_book: OrderBook = etf_book
+        self.future_book: OrderBook = future_book
+        self.pair: int = pair
+
+
+class OrderPrices(object):
+    """The prices of a competitor's orders on one side of an order book.
+
+    The number of orders at each price is kept in a dictionary and the prices
+    themselves in a heap, so that the best price is always at hand. A price
+    whose orders have all gone is left in the heap until it reaches the top.
+    """
+
+    def __init__(self, side: Side):
+        """Initialise a new instance of the OrderPrices class."""
+        self.best: Optional[int] = None
+        self.__counts: Dict[int, int] = dict()
+        self.__heap: List[int] = list()
+        self.__sign: int = -1 if side == Side.BUY else 1
+
+    def __len__(self) -> int:
+        """Return the number of distinct prices."""
+        return len(self.__counts)
+
+    def add(self, price: int) -> None:
+        """Add an order at the given price."""
+        counts = self.__counts
+        if price in counts:
+            counts[price] += 1
+            return
+
+        counts[price] = 1
+        heap = self.__heap
+        heapq.heappush(heap, self.__sign * price)
+        if len(heap) > 2 * len(counts) + 8:
+            # Drop prices that are no longer in use
+            heap[:] = [self.__sign * p for p in counts]
+            heapq.heapify(heap)
+        self.best = self.__sign * heap[0]
+
+    def remove(self, price: int) -> None:
+        """Remove an order at the given price."""
+        counts = self.__counts
+        count = counts[price] - 1
+        if count:
+            counts[price] = count
+            return
 
-    def __init__(self, name: str, exec_channel: IExecutionConnection, etf_book: OrderBook, future_book: OrderBook,
-                 account: CompetitorAccount, match_events: MatchEvents, score_board: ScoreBoardWriter,
-                 position_limit: int, order_count_limit: int, active_volume_limit: int, tick_size: float,
+        del counts[price]
+        if price == self.best:
+            heap = self.__heap
+            sign = self.__sign
+            while heap and sign * heap[0] not in counts:
+                heapq.heappop(heap)
+            self.best = sign * heap[0] if heap else None
+
+
+class PairPosition(object):
+    """A competitor's account, resting order prices and unhedged lots for one instrument pair."""
+
+    def __init__(self, pair: InstrumentPair, unhedged_lots_factory: UnhedgedLotsFactory,
+                 on_unhedged_lots_expiry: Callable[[Any], None]):
+        """Initialise a new instance of the PairPosition class."""
+        self.account: CompetitorAccount = pair.account_factory.create()
+        self.buy_prices: OrderPrices = OrderPrices(Side.BUY)
+        self.etf_book: OrderBook = pair.etf_book
+        self.future_book: OrderBook = pair.future_book
+        self.pair: int = pair.pair
+        self.sell_prices: OrderPrices = OrderPrices(Side.SELL)
+        self.unhedged_etf_lots: UnhedgedLots = unhedged_lots_factory.create(lambda: on_unhedged_lots_expiry(self))
+
+
+class Competitor(ICompetitor, IOrderListener):
+    """A competitor in the Ready Trader Go competition.
+
+    A competitor has a position in each instrument pair hosted by the
+    exchange. The position limit and the unhedged lots time limit apply to
+    each pair separately, while the active order and volume limits apply to
+    all of the competitor's orders. The score board shows the combined
+    account for all pairs and the prices of the first pair.
+    """
+
+    def __init__(self, name: str, exec_channel: IExecutionConnection, pairs: Sequence[InstrumentPair],
+                 match_events: MatchEvents, score_board: ScoreBoardWriter, position_limit: int,
+                 order_count_limit: int, active_volume_limit: int, tick_size: float,
                  unhedged_lots_factory: UnhedgedLotsFactory, controller: IController):
         """Initialise a new instance of the Competitor class."""
-        self.account: CompetitorAccount = account
+        self.positions: List[PairPosition] = [PairPosition(p, unhedged_lots_factory, self.on_unhedged_lots_expiry)
+                                              for p in pairs]
+        self.account: Union[CompetitorAccount, PortfolioAccount] = (
+            self.positions[0].account if len(self.positions) == 1
+            else PortfolioAccount(p.account for p in self.positions))
         self.active_volume: int = 0
         self.active_volume_limit: int = active_volume_limit
         self.controller: IController = controller
-        self.etf_book: OrderBook = etf_book
-        self.future_book: OrderBook = future_book
-        self.buy_prices: List[int] = list()
         self.exec_connection: IExecutionConnection = exec_channel
         self.last_client_order_id: int = -1
         self.logger: logging.Logger = logging.getLogger("COMPETITOR")
@@ -53,10 +152,17 @@ class Competitor(ICompetitor, IOrderListener):
         self.orders: Dict[int, Order] = dict()
         self.position_limit: int = position_limit
         self.score_board: ScoreBoardWriter = score_board
-        self.sell_prices: List[int] = list()
         self.status: str = "OK"
-        self.tick_size: int = int(tick_size * 100.0)  # convert tick size to cents
-        self.unhedged_etf_lots: UnhedgedLots = unhedged_lots_factory.create(self.on_unhedged_lots_expiry)
+        self.tick_size: int = tick_size_in_cents(tick_size)
+
+        self.__pair_count: int = len(self.positions)
+
+        # The position in the pair to which each instrument belongs, indexed by
+        # instrument number
+        self.__instrument_positions: Dict[int, PairPosition] = dict()
+        for position in self.positions:
+            self.__instrument_positions[position.etf_book.instrument] = position
+            self.__instrument_positions[position.future_book.instrument] = position
 
     def disconnect(self, now: float) -> None:
         """Disconnect this competitor."""
@@ -67,18 +173,20 @@ class Competitor(ICompetitor, IOrderListener):
     def hard_breach(self, now: float, client_order_id: int, message: bytes) -> None:
         """Handle a hard breach by this competitor."""
         self.status = "BREACH"
-        self.score_board.breach(now, self.name, self.account, self.etf_book.last_traded_price(),
-                                self.future_book.last_traded_price())
+        first: PairPosition = self.positions[0]
+        self.score_board.breach(now, self.name, self.account, first.etf_book.last_traded_price(),
+                                first.future_book.last_traded_price())
         if self.exec_connection is not None:
             self.send_error_and_close(now, client_order_id, message)
 
     def on_connection_lost(self, now: float) -> None:
         """Called when the connection to the matching engine is lost."""
         self.exec_connection = None
-        self.score_board.disconnect(now, self.name, self.account, self.etf_book.last_traded_price(),
-                                    self.future_book.last_traded_price())
+        first: PairPosition = self.positions[0]
+        self.score_board.disconnect(now, self.name, self.account, first.etf_book.last_traded_price(),
+                                    first.future_book.last_traded_price())
         for o in tuple(self.orders.values()):
-            self.etf_book.cancel(now, o)
+            self.__instrument_positions[o.instrument].etf_book.cancel(now, o)
 
     # IOrderListener callbacks
     def on_order_amended(self, now: float, order: Order, volume_removed: int) -> None:
@@ -92,10 +200,11 @@ class Competitor(ICompetitor, IOrderListener):
 
         if order.remaining_volume == 0:
             del self.orders[order.client_order_id]
+            position: PairPosition = self.__instrument_positions[order.instrument]
             if order.side == Side.BUY:
-                self.buy_prices.pop(bisect.bisect(self.buy_prices, order.price) - 1)
+                position.buy_prices.remove(order.price)
             else:
-                self.sell_prices.pop(bisect.bisect(self.sell_prices, -order.price) - 1)
+                position.sell_prices.remove(order.price)
 
     def on_order_cancelled(self, now: float, order: Order, volume_removed: int) -> None:
         """Called when an order is cancelled."""
@@ -107,10 +216,11 @@ class Competitor(ICompetitor, IOrderListener):
         self.active_volume -= volume_removed
 
         del self.orders[order.client_order_id]
+        position: PairPosition = self.__instrument_positions[order.instrument]
         if order.side == Side.BUY:
-            self.buy_prices.pop(bisect.bisect(self.buy_prices, order.price) - 1)
+            position.buy_prices.remove(order.price)
         else:
-            self.sell_prices.pop(bisect.bisect(self.sell_prices, -order.price) - 1)
+            position.sell_prices.remove(order.price)
 
     def on_order_placed(self, now: float, order: Order) -> None:
         """Called when a good-for-day order is placed in the order book."""
@@ -121,34 +231,36 @@ class Competitor(ICompetitor, IOrderListener):
     def on_order_filled(self, now: float, order: Order, price: int, volume: int, fee: int) -> None:
         """Called when an order is partially or completely filled."""
         self.active_volume -= volume
+        position: PairPosition = self.__instrument_positions[order.instrument]
 
         if order.remaining_volume == 0:
             del self.orders[order.client_order_id]
             if order.side == Side.BUY:
-                self.buy_prices.pop()
+                position.buy_prices.remove(order.price)
             else:
-                self.sell_prices.pop()
+                position.sell_prices.remove(order.price)
 
-        self.unhedged_etf_lots.apply_position_delta(volume if order.side == Side.BUY else -volume)
+        position.unhedged_etf_lots.apply_position_delta(volume if order.side == Side.BUY else -volume)
 
         self.match_events.fill(now, self.name, order.client_order_id, order.instrument, order.side, price, volume, fee)
-        last_traded: int = self.future_book.last_traded_price() or round(self.future_book.midpoint_price())
-        self.account.transact(Instrument.ETF, order.side, price, volume, fee)
-        self.account.update(last_traded, price)
+        future_book: OrderBook = position.future_book
+        last_traded: int = future_book.last_traded_price() or round(future_book.midpoint_price())
+        position.account.transact(Instrument.ETF, order.side, price, volume, fee)
+        position.account.mark(last_traded, price)
 
         if self.exec_connection is not None:
             self.exec_connection.send_order_filled(order.client_order_id, price, volume)
             self.exec_connection.send_order_status(order.client_order_id, order.volume - order.remaining_volume,
                                                    order.remaining_volume, order.total_fees)
 
-        if not (-self.position_limit <= self.account.etf_position <= self.position_limit):
+        if not (-self.position_limit <= position.account.etf_position <= self.position_limit):
             self.hard_breach(now, order.client_order_id, b"ETF position limit breached")
 
-    def on_unhedged_lots_expiry(self):
-        """Called when unhedged lots have been held for too long."""
-        self.logger.info("Unhedged lots timer expired for %s at etf=%d fut=%d rel=%d", self.name,
-                         self.account.etf_position, self.account.future_position,
-                         self.unhedged_etf_lots.relative_position)
+    def on_unhedged_lots_expiry(self, position: PairPosition):
+        """Called when unhedged lots in the given instrument pair have been held for too long."""
+        self.logger.info("Unhedged lots timer expired for %s at pair=%d etf=%d fut=%d rel=%d", self.name,
+                         position.pair, position.account.etf_position, position.account.future_position,
+                         position.unhedged_etf_lots.relative_position)
 
         now: float = self.controller.advance_time()
         self.hard_breach(now, 0, b"held unhedged lots for longer than the time limit")
@@ -165,7 +277,7 @@ class Competitor(ICompetitor, IOrderListener):
             if volume > order.volume:
                 self.send_error(now, client_order_id, b"amend operation would increase order volume")
             else:
-                self.etf_book.amend(now, order, volume)
+                self.__instrument_positions[order.instrument].etf_book.amend(now, order, volume)
 
     def on_cancel_message(self, now: float, client_order_id: int) -> None:
         """Called when a cancel order request is received from the competitor."""
@@ -174,16 +286,22 @@ class Competitor(ICompetitor, IOrderListener):
             return
 
         if client_order_id in self.orders:
-            self.etf_book.cancel(now, self.orders[client_order_id])
+            order = self.orders[client_order_id]
+            self.__instrument_positions[order.instrument].etf_book.cancel(now, order)
 
-    def on_hedge_message(self, now: float, client_order_id: int, side: int, price: int, volume: int) -> None:
+    def on_hedge_message(self, now: float, client_order_id: int, side: int, price: int, volume: int,
+                         pair: int = 0) -> None:
         """Called when a hedge order request is received from the competitor."""
         if client_order_id <= self.last_client_order_id:
-            self.send_error(now, client_order_id, b"duplicate or out-of-order client_order_id")
+            self.send_error(now, client_order_id, DUPLICATE_ORDER_ID_ERROR)
             return
 
         self.last_client_order_id = client_order_id
 
+        if pair >= len(self.positions):
+            self.send_error(now, client_order_id, b"%d is not a valid instrument pair" % pair)
+            return
+
         if side != Side.BUY and side != Side.SELL:
             self.send_error(now, client_order_id, b"%d is not a valid side" % side)
             return
@@ -193,7 +311,7 @@ class Competitor(ICompetitor, IOrderListener):
             return
 
         if price % self.tick_size != 0:
-            self.send_error(now, client_order_id, b"price is not a multiple of tick size")
+            self.send_error(now, client_order_id, TICK_SIZE_ERROR)
             return
 
         if volume < 1:
@@ -201,16 +319,19 @@ class Competitor(ICompetitor, IOrderListener):
             return
 
         if now == 0.0:
-            self.send_error(now, client_order_id, b"order rejected: market not yet open")
+            self.send_error(now, client_order_id, MARKET_NOT_OPEN_ERROR)
             return
 
+        position: PairPosition = self.positions[pair]
+        future_book: OrderBook = position.future_book
+        etf_book: OrderBook = position.etf_book
         side_: Side = Side(side)
-        volume_traded, average_price = self.future_book.try_trade(side_, price, volume)
+        volume_traded, average_price = future_book.try_trade(side_, price, volume)
         if volume_traded == 0:
             # The trade could have failed because there were no orders on the opposite side
-            best: Optional[int] = self.future_book.best_ask() if side_ == Side.BID else self.future_book.best_bid()
+            best: Optional[int] = future_book.best_ask() if side_ == Side.BID else future_book.best_bid()
             if best is None:
-                last_traded = self.future_book.last_traded_price()
+                last_traded = future_book.last_traded_price()
                 if last_traded is None:
                     self.send_error(now, client_order_id, b"order rejected: cannot determine future price")
                     return
@@ -222,80 +343,90 @@ class Competitor(ICompetitor, IOrderListener):
                 self.exec_connection.send_hedge_filled(client_order_id, 0, 0)
             return
 
-        self.unhedged_etf_lots.apply_position_delta(volume if side_ == Side.BID else -volume)
-        self.match_events.hedge(now, self.name, client_order_id, Instrument.FUTURE, side_, average_price,
+        position.unhedged_etf_lots.apply_position_delta(volume if side_ == Side.BID else -volume)
+        self.match_events.hedge(now, self.name, client_order_id, future_book.instrument, side_, average_price,
                                 volume)
-        self.account.transact(Instrument.FUTURE, side_, average_price, volume, 0)
-        self.account.update(self.future_book.last_traded_price() or self.future_book.midpoint_price(),
-                            self.etf_book.last_traded_price() or self.etf_book.midpoint_price())
+        position.account.transact(Instrument.FUTURE, side_, average_price, volume, 0)
+        position.account.mark(future_book.last_traded_price() or future_book.midpoint_price(),
+                              etf_book.last_traded_price() or etf_book.midpoint_price())
 
         if self.exec_connection is not None:
             self.exec_connection.send_hedge_filled(client_order_id, average_price, volume)
 
-        if not (-self.position_limit <= self.account.future_position <= self.position_limit):
+        if not (-self.position_limit <= position.account.future_position <= self.position_limit):
             self.hard_breach(now, client_order_id, b"future position limit breached")
 
     def on_insert_message(self, now: float, client_order_id: int, side: int, price: int, volume: int,
-                          lifespan: int) -> None:
+                          lifespan: int, pair: int = 0) -> None:
         """Called when an insert order request is received from the competitor."""
-        if client_order_id <= self.last_client_order_id:
-            self.send_error(now, client_order_id, b"duplicate or out-of-order client_order_id")
+        side_: Optional[Side] = SIDES.get(side)
+        lifespan_: Optional[Lifespan] = LIFESPANS.get(lifespan)
+
+        # A valid order passes every check at once and anything else is handed
+        # to reject_insert to find out which check it failed
+        if (client_order_id <= self.last_client_order_id or pair >= self.__pair_count or side_ is None
+                or lifespan_ is None or not (MINIMUM_BID <= price <= MAXIMUM_ASK) or price % self.tick_size != 0
+                or len(self.orders) >= self.order_count_limit or volume < 1
+                or self.active_volume + volume > self.active_volume_limit or now == 0.0):
+            self.reject_insert(now, client_order_id, side, price, volume, lifespan, pair)
             return
 
         self.last_client_order_id = client_order_id
 
-        if side != Side.BUY and side != Side.SELL:
-            self.send_error(now, client_order_id, b"%d is not a valid side" % side)
+        position: PairPosition = self.positions[pair]
+        if side_ == Side.BUY:
+            best: Optional[int] = position.sell_prices.best
+            if best is not None and price >= best:
+                self.send_error(now, client_order_id, IN_CROSS_ERROR)
+                return
+            position.buy_prices.add(price)
+        else:
+            best = position.buy_prices.best
+            if best is not None and price <= best:
+                self.send_error(now, client_order_id, IN_CROSS_ERROR)
+                return
+            position.sell_prices.add(price)
+
+        order = self.orders[client_order_id] = Order(client_order_id, position.etf_book.instrument, lifespan_,
+                                                     side_, price, volume, self)
+        self.match_events.insert(now, self.name, client_order_id, order.instrument, side_, volume, price, lifespan_)
+        self.active_volume += volume
+        position.etf_book.insert(now, order)
+
+    def on_timer_tick(self, now: float, future_prices: Sequence[Optional[int]],
+                      etf_prices: Sequence[Optional[int]]) -> None:
+        """Called on each timer tick to update the auto-trader with the last traded prices in each pair."""
+        for position, future_price, etf_price in zip(self.positions, future_prices, etf_prices):
+            position.account.update(future_price or 0, etf_price or 0)
+        self.score_board.tick(now, self.name, self.account, etf_prices[0], future_prices[0], self.status)
+
+    def reject_insert(self, now: float, client_order_id: int, side: int, price: int, volume: int,
+                      lifespan: int, pair: int) -> None:
+        """Send an error message for the first check failed by an insert order request."""
+        if client_order_id <= self.last_client_order_id:
+            self.send_error(now, client_order_id, DUPLICATE_ORDER_ID_ERROR)
             return
 
-        if lifespan != Lifespan.FILL_AND_KILL and lifespan != Lifespan.GOOD_FOR_DAY:
-            self.send_error(now, client_order_id, b"%d is not a valid lifespan" % lifespan)
-            return
+        self.last_client_order_id = client_order_id
 
-        if not (MINIMUM_BID <= price <= MAXIMUM_ASK):
+        if pair >= self.__pair_count:
+            self.send_error(now, client_order_id, b"%d is not a valid instrument pair" % pair)
+        elif side not in SIDES:
+            self.send_error(now, client_order_id, b"%d is not a valid side" % side)
+        elif lifespan not in LIFESPANS:
+            self.send_error(now, client_order_id, b"%d is not a valid lifespan" % lifespan)
+        elif not (MINIMUM_BID <= price <= MAXIMUM_ASK):
             self.send_error(now, client_order_id, b"%d is not a valid price" % price)
-            return
-
-        if price % self.tick_size != 0:
-            self.send_error(now, client_order_id, b"price is not a multiple of tick size")
-            return
-
-        if len(self.orders) == self.order_count_limit:
-            self.send_error(now, client_order_id, b"order rejected: active order count limit breached")
-            return
-
-        if volume < 1:
-            self.send_error(now, client_order_id, b"%d is not a valid volume")
-            return
-
-        if self.active_volume + volume > self.active_volume_limit:
-            self.send_error(now, client_order_id, b"order rejected: active order volume limit breached")
-            return
-
-        if now == 0.0:
-            self.send_error(now, client_order_id, b"order rejected: market not yet open")
-            return
-
-        if ((side == Side.BUY and self.sell_prices and price >= -self.sell_prices[-1])
-                or (side == Side.SELL and self.buy_prices and price <= self.buy_prices[-1])):
-            self.send_error(now, client_order_id, b"order rejected: in cross with an existing order")
-            return
-
-        order = self.orders[client_order_id] = Order(client_order_id, Instrument.ETF, Lifespan(lifespan), Side(side),
-                                                     price, volume, self)
-        if side == Side.BUY:
-            bisect.insort(self.buy_prices, price)
+        elif price % self.tick_size != 0:
+            self.send_error(now, client_order_id, TICK_SIZE_ERROR)
+        elif len(self.orders) >= self.order_count_limit:
+            self.send_error(now, client_order_id, ORDER_COUNT_LIMIT_ERROR)
+        elif volume < 1:
+            self.send_error(now, client_order_id, b"%d is not a valid volume" % volume)
+        elif self.active_volume + volume > self.active_volume_limit:
+            self.send_error(now, client_order_id, ORDER_VOLUME_LIMIT_ERROR)
         else:
-            bisect.insort(self.sell_prices, -price)
-        self.match_events.insert(now, self.name, order.client_order_id, order.instrument, order.side, order.volume,
-                                 order.price, order.lifespan)
-        self.active_volume += volume
-        self.etf_book.insert(now, order)
-
-    def on_timer_tick(self, now: float, future_price: int, etf_price: int) -> None:
-        """Called on each timer tick to update the auto-trader."""
-        self.account.update(future_price or 0, etf_price or 0)
-        self.score_board.tick(now, self.name, self.account, etf_price, future_price, self.status)
+            self.send_error(now, client_order_id, MARKET_NOT_OPEN_ERROR)
 
     def send_error(self, now: float, client_order_id: int, message: bytes) -> None:
         """Send an error message to the auto-trader and shut down the match."""
@@ -313,19 +444,16 @@ class Competitor(ICompetitor, IOrderListener):
 class CompetitorManager:
     """A manager of competitors."""
 
-    def __init__(self, limits_config: Dict[str, Any], traders_config: Dict[str, str], account_factory: AccountFactory,
-                 etf_book: OrderBook, future_book: OrderBook, match_events: MatchEvents,
-                 score_board_writer: ScoreBoardWriter, tick_size: float, timer: Timer,
+    def __init__(self, limits_config: Dict[str, Any], traders_config: Dict[str, str], pairs: Sequence[InstrumentPair],
+                 match_events: MatchEvents, score_board_writer: ScoreBoardWriter, tick_size: float, timer: Timer,
                  unhedged_lots_factory: UnhedgedLotsFactory):
         """Initialise a new instance of the CompetitorManager class."""
-        self.__account_factory: AccountFactory = account_factory
         self.__active_volume_limit: int = limits_config["ActiveVolumeLimit"]
         self.__competitors: Dict[str, Competitor] = dict()
-        self.__etf_book: OrderBook = etf_book
-        self.__future_book: OrderBook = future_book
         self.__logger: logging.Logger = logging.getLogger("COMPETITOR")
         self.__match_events: MatchEvents = match_events
         self.__order_count_limit: int = limits_config["ActiveOrderCountLimit"]
+        self.__pairs: Sequence[InstrumentPair] = pairs
         self.__position_limit: int = limits_config["PositionLimit"]
         self.__score_board_writer: ScoreBoardWriter = score_board_writer
         self.__start_time: float = 0.0
@@ -350,11 +478,13 @@ class CompetitorManager:
         if name in self.__competitors or name not in self.__traders or self.__traders[name] != secret:
             return None
 
-        competitor = Competitor(name, exec_channel, self.__etf_book, self.__future_book,
-                                self.__account_factory.create(), self.__match_events, self.__score_board_writer,
+        competitor = Competitor(name, exec_channel, self.__pairs, self.__match_events, self.__score_board_writer,
                                 self.__position_limit, self.__order_count_limit, self.__active_volume_limit,
                                 self.__tick_size, self.__unhedged_lots_factory, self.controller)
         self.__competitors[name] = competitor
+        # Keep the competitors in order of name, rather than of login, so
+        # that ties are always broken the same way
+        self.__competitors = dict(sorted(self.__competitors.items()))
 
         if self.__start_time != 0.0:
             self.__logger.warning("competitor logged in after market open: name='%s'", name)
@@ -383,10 +513,10 @@ class CompetitorManager:
 
     def on_timer_tick(self, timer: Timer, now: float, _: int) -> None:
         """Called on each timer tick."""
-        etf_price = self.__etf_book.last_traded_price()
-        future_price = self.__future_book.last_traded_price()
+        etf_prices = [pair.etf_book.last_traded_price() for pair in self.__pairs]
+        future_prices = [pair.future_book.last_traded_price() for pair in self.__pairs]
         for competitor in self.__competitors.values():
-            competitor.on_timer_tick(now, future_price, etf_price)
+            competitor.on_timer_tick(now, future_prices, etf_prices)
 
         if self.active_competitor_count == 0:
             timer.shutdown(now, "no remaining competitors")
@@ -18,14 +18,17 @@
 import asyncio
 import logging
 
-from typing import Any, Optional
+from typing import Any, Optional, Sequence, Set
 
 from .execution import ExecutionServer
 from .heads_up import HeadsUpDisplayServer
 from .information import InformationPublisher
+from .instrumentation import Instrumentation, ReactionTimes
 from .market_events import MarketEventsReader
 from .match_events import MatchEventsWriter
+from .order_feed import OrderFeedPublisher
 from .score_board import ScoreBoardWriter
+from .shard import ShardGateway
 from .timer import Timer
 from .types import IController
 
@@ -34,16 +37,21 @@ class Controller(IController):
     """Controller for the Ready Trader Go matching engine."""
 
     def __init__(self, market_open_delay: float, exec_server: ExecutionServer, info_publisher: InformationPublisher,
-                 market_events_reader: MarketEventsReader, match_events_writer: MatchEventsWriter,
+                 market_events_readers: Sequence[MarketEventsReader], match_events_writer: MatchEventsWriter,
                  score_board_writer: ScoreBoardWriter, market_timer: Timer, tick_timer: Timer):
         """Initialise a new instance of the Controller class."""
         self.heads_up_display_server: Optional[HeadsUpDisplayServer] = None
+        self.instrumentation: Optional[Instrumentation] = None
+        self.reaction_times: Optional[ReactionTimes] = None
+        self.order_feed_publisher: Optional[OrderFeedPublisher] = None
+        self.shard_gateway: Optional[ShardGateway] = None
 
         self.__done: bool = False
         self.__execution_server: ExecutionServer = exec_server
         self.__information_publisher: InformationPublisher = info_publisher
         self.__logger: logging.Logger = logging.getLogger("CONTROLLER")
-        self.__market_events_reader = market_events_reader
+        self.__market_events_readers: Sequence[MarketEventsReader] = market_events_readers
+        self.__unfinished_readers: Set[MarketEventsReader] = set(market_events_readers)
         self.__market_open_delay: float = market_open_delay
         self.__market_timer: Timer = market_timer
         self.__match_events_writer = match_events_writer
@@ -52,7 +60,8 @@ class Controller(IController):
 
         # Connect signals
         self.__match_events_writer.task_complete.append(self.on_task_complete)
-        self.__market_events_reader.task_complete.append(self.on_task_complete)
+        for reader in self.__market_events_readers:
+            reader.task_complete.append(self.on_task_complete)
         self.__market_timer.timer_ticked.append(self.on_market_timer_ticked)
         self.__score_board_writer.task_complete.append(self.on_task_complete)
         self.__tick_timer.timer_stopped.append(self.on_tick_timer_stopped)
@@ -61,11 +70,22 @@ class Controller(IController):
     def advance_time(self):
         """Return the current time after accounting for events."""
         now: float = self.__market_timer.advance()
-        self.__market_events_reader.process_market_events(now)
+        for reader in self.__market_events_readers:
+            reader.process_market_events(now)
         return now
 
     def cleanup(self) -> None:
         """Ensure the controller shuts down gracefully"""
+        self.__information_publisher.close()
+        if self.order_feed_publisher:
+            self.order_feed_publisher.close()
+        if self.shard_gateway:
+            self.shard_gateway.close()
+        if self.reaction_times:
+            self.reaction_times.close()
+        if self.instrumentation:
+            self.instrumentation.close()
+
         if self.__match_events_writer:
             self.__match_events_writer.finish()
 
@@ -74,7 +94,8 @@ class Controller(IController):
 
     def on_market_timer_ticked(self, timer: Timer, now: float, _: int):
         """Called when it is time to process market events."""
-        self.__market_events_reader.process_market_events(now)
+        for reader in self.__market_events_readers:
+            reader.process_market_events(now)
 
     def on_task_complete(self, task: Any) -> None:
         """Called when a reader or writer task is complete"""
@@ -82,8 +103,9 @@ class Controller(IController):
             self.__match_events_writer = None
         elif task is self.__score_board_writer:
             self.__score_board_writer = None
-        elif task is self.__market_events_reader:
-            self.__done = True
+        elif task in self.__unfinished_readers:
+            self.__unfinished_readers.discard(task)
+            self.__done = not self.__unfinished_readers
 
         if self.__match_events_writer is None and self.__score_board_writer is None:
             asyncio.get_running_loop().stop()
@@ -103,12 +125,23 @@ class Controller(IController):
         """Start running the match."""
         self.__logger.info("starting the match")
 
-        await self.__execution_server.start()
+        try:
+            await self.__execution_server.start()
+        except OSError as e:
+            # For example, the port is already in use
+            self.__logger.error("failed to start the execution server: errno=%d %s", e.errno, e.strerror)
+            asyncio.get_running_loop().stop()
+            return
         await self.__information_publisher.start()
+        if self.order_feed_publisher:
+            await self.order_feed_publisher.start()
         if self.heads_up_display_server:
             await self.heads_up_display_server.start()
+        if self.instrumentation:
+            await self.instrumentation.start()
 
-        self.__market_events_reader.start()
+        for reader in self.__market_events_readers:
+            reader.start()
         self.__match_events_writer.start()
         self.__score_board_writer.start()
 
@@ -15,24 +15,32 @@
 #     You should have received a copy of the GNU Affero General Public
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
+import asyncio
+import random
 import socket
 
 from .account import AccountFactory
 from .application import Application
-from .competitor import CompetitorManager
+from .array_order_book import create_order_book
+from .competitor import CompetitorManager, InstrumentPair
 from .controller import Controller
 from .execution import ExecutionServer
 from .heads_up import HeadsUpDisplayServer
-from .information import InformationPublisher
+from .instrumentation import Instrumentation, ReactionTimes
+from .information import BOOK_UPDATE_POLICIES, MAXIMUM_BOOK_DEPTH, InformationPublisher
 from .limiter import FrequencyLimiterFactory
-from .market_events import MarketEventsReader
-from .match_events import MatchEvents, MatchEventsWriter
-from .order_book import OrderBook
-from .pubsub import PublisherFactory
+from .market_events import create_market_events_reader
+from .match_events import ColumnarMatchEventsWriter, MatchEvents, MatchEventsWriter
+from .order_book import TOP_LEVEL_COUNT
+from .order_feed import DEFAULT_ORDER_FEED_RING_SIZE, DEFAULT_SNAPSHOT_INTERVAL, OrderFeedPublisher
+from .pubsub import DEFAULT_RING_SIZE, MINIMUM_RING_SIZE, PublisherFactory
 from .score_board import ScoreBoardWriter
+from .shard import ShardGateway
 from .timer import Timer
-from .types import Instrument
+from .types import Instrument, instrument_number
 from .unhedged_lots import UnhedgedLotsFactory
+from .virtual_clock import DEFAULT_REPLY_TIMEOUT, Lockstep, VirtualClockEventLoop
+from .writer_queue import DEFAULT_WRITER_QUEUE_SIZE, WRITER_QUEUE_POLICIES, WriterQueue
 
 
 def __validate_hostname(config, section, key):
@@ -52,6 +60,40 @@ def __validate_object(config, section, required_keys, value_types):
         raise Exception("Element of inappropriate type in %s configuration" % section)
 
 
+def __validate_optional(config, section, optional_keys, value_types):
+    obj = config[section]
+    if any(k in obj and type(obj[k]) is not t for k, t in zip(optional_keys, value_types)):
+        raise Exception("Element of inappropriate type in %s configuration" % section)
+
+
+def __validate_ring_size(config, section, default):
+    ring_size = config[section].get("RingSize", default)
+    if ring_size < MINIMUM_RING_SIZE or ring_size & (ring_size - 1) != 0:
+        raise Exception("%s.RingSize configuration should be a power of two no less than %d"
+                        % (section, MINIMUM_RING_SIZE))
+
+
+def __validate_additional_pairs(config):
+    if type(config["AdditionalPairs"]) is not list:
+        raise Exception("AdditionalPairs configuration should be a JSON array")
+    for i, pair in enumerate(config["AdditionalPairs"]):
+        section = "AdditionalPairs[%d]" % i
+        pairs = {section: pair}
+        __validate_object(pairs, section, ("MarketDataFile",), (str,))
+        __validate_optional(pairs, section, ("EtfClamp", "Fees"), (float, dict))
+        if "Fees" in pair:
+            __validate_object({section + ".Fees": pair["Fees"]}, section + ".Fees", ("Maker", "Taker"),
+                              (float, float))
+
+
+def __create_event_loop(config) -> asyncio.AbstractEventLoop:
+    """Return the event loop appropriate for the Engine.Clock configuration."""
+    engine = config["Engine"]
+    if engine.get("Clock", "Wall") == "Virtual":
+        return VirtualClockEventLoop(engine.get("ReplyTimeout", DEFAULT_REPLY_TIMEOUT), engine["MarketOpenDelay"])
+    return asyncio.get_event_loop()
+
+
 def __exchange_config_validator(config):
     """Return True if the specified config is valid, otherwise raise an exception."""
     if type(config) is not dict:
@@ -62,18 +104,65 @@ def __exchange_config_validator(config):
     __validate_object(config, "Engine", ("MarketDataFile", "MarketEventInterval", "MarketOpenDelay", "MatchEventsFile",
                                          "ScoreBoardFile", "Speed", "TickInterval"),
                       (str, float, float, str, str, float, float))
+    __validate_optional(config, "Engine", ("Clock", "MarketDataReader", "MatchEventsFormat", "OrderBook",
+                                           "ReplyTimeout", "Seed", "Shards", "WriterQueuePolicy", "WriterQueueSize"),
+                        (str, str, str, str, float, int, int, str, int))
+    if config["Engine"].get("Clock", "Wall") not in ("Wall", "Virtual"):
+        raise Exception("Engine.Clock configuration should be either 'Wall' or 'Virtual'")
+    if config["Engine"].get("MarketDataReader", "Row") not in ("Row", "Block"):
+        raise Exception("Engine.MarketDataReader configuration should be either 'Row' or 'Block'")
+    if config["Engine"].get("MatchEventsFormat", "CSV") not in ("CSV", "Columnar"):
+        raise Exception("Engine.MatchEventsFormat configuration should be either 'CSV' or 'Columnar'")
+    if config["Engine"].get("OrderBook", "Sorted") not in ("Sorted", "Array"):
+        raise Exception("Engine.OrderBook configuration should be either 'Sorted' or 'Array'")
+    if config["Engine"].get("WriterQueuePolicy", "Block") not in WRITER_QUEUE_POLICIES:
+        raise Exception("Engine.WriterQueuePolicy configuration should be one of 'Block', 'Spill' or 'Drop'")
+    if config["Engine"].get("WriterQueueSize", DEFAULT_WRITER_QUEUE_SIZE) < 1:
+        raise Exception("Engine.WriterQueueSize configuration should be at least one")
     __validate_object(config, "Execution", ("Host", "Port"), (str, int))
     __validate_object(config, "Fees", ("Maker", "Taker"), (float, float))
     __validate_object(config, "Information", ("Type", "Name"), (str, str))
+    __validate_optional(config, "Information", ("BookDepth", "BookUpdates", "RingSize"), (int, str, int))
+    if not 1 <= config["Information"].get("BookDepth", TOP_LEVEL_COUNT) <= MAXIMUM_BOOK_DEPTH:
+        raise Exception("Information.BookDepth configuration should be between 1 and %d" % MAXIMUM_BOOK_DEPTH)
+    if config["Information"].get("BookUpdates", "EveryTick") not in BOOK_UPDATE_POLICIES:
+        raise Exception("Information.BookUpdates configuration should be either 'EveryTick' or 'OnChange'")
+    __validate_ring_size(config, "Information", DEFAULT_RING_SIZE)
     __validate_object(config, "Instrument", ("EtfClamp", "TickSize",), (float, float))
     __validate_object(config, "Limits", ("ActiveOrderCountLimit", "ActiveVolumeLimit", "MessageFrequencyInterval",
                                          "MessageFrequencyLimit", "PositionLimit"), (int, int, float, int, int))
     __validate_hostname(config, "Execution", "Host")
 
+    if "OrderFeed" in config:
+        __validate_object(config, "OrderFeed", ("Type", "Name"), (str, str))
+        __validate_optional(config, "OrderFeed", ("RingSize", "SnapshotInterval"), (int, int))
+        __validate_ring_size(config, "OrderFeed", DEFAULT_ORDER_FEED_RING_SIZE)
+        if config["OrderFeed"].get("SnapshotInterval", DEFAULT_SNAPSHOT_INTERVAL) < 1:
+            raise Exception("OrderFeed.SnapshotInterval configuration should be at least one")
+
+    if "AdditionalPairs" in config:
+        __validate_additional_pairs(config)
+
+    pair_count = 1 + len(config.get("AdditionalPairs", ()))
+    if not 0 <= config["Engine"].get("Shards", 0) <= pair_count:
+        raise Exception("Engine.Shards configuration should be between zero and the number of instrument pairs")
+    if config["Engine"].get("Shards", 0) and "OrderFeed" in config:
+        raise Exception("OrderFeed configuration is not supported with Engine.Shards")
+
     if "Hud" in config:
         __validate_object(config, "Hud", ("Host", "Port"), (str, int))
         __validate_hostname(config, "Hud", "Host")
 
+    if "Instrumentation" in config:
+        __validate_object(config, "Instrumentation", (), ())
+        __validate_optional(config, "Instrumentation", ("File", "Host", "Port"), (str, str, int))
+        if "Host" in config["Instrumentation"]:
+            __validate_hostname(config, "Instrumentation", "Host")
+
+    if "ReactionTimes" in config:
+        __validate_object(config, "ReactionTimes", (), ())
+        __validate_optional(config, "ReactionTimes", ("File", "ScoreBoard"), (str, bool))
+
     if type(config["Traders"]) is not dict:
         raise Exception("Traders configuration should be a JSON object")
     if any(type(k) is not str for k in config["Traders"]):
@@ -92,34 +181,107 @@ def setup(app: Application) -> Controller:
     instrument = app.config["Instrument"]
     limits = app.config["Limits"]
 
-    future_book = OrderBook(Instrument.FUTURE, 0.0, 0.0)
-    etf_book = OrderBook(Instrument.ETF, app.config["Fees"]["Maker"], app.config["Fees"]["Taker"])
+    if "Seed" in engine:
+        random.seed(engine["Seed"])
+
+    instrumentation = None
+    if "Instrumentation" in app.config:
+        settings = app.config["Instrumentation"]
+        instrumentation = Instrumentation(settings.get("File"), settings.get("Host", "127.0.0.1"),
+                                          settings.get("Port"))
+        instrumentation.install()
+
+    reaction_times = None
+    if "ReactionTimes" in app.config:
+        reaction_times = ReactionTimes(app.config["ReactionTimes"].get("File"))
+        reaction_times.install()
+
+    # The first instrument pair is described by the Engine, Fees and
+    # Instrument sections and any others by the AdditionalPairs section
+    depth = info.get("BookDepth", TOP_LEVEL_COUNT)
+    pair_configs = [{"MarketDataFile": engine["MarketDataFile"], "EtfClamp": instrument["EtfClamp"],
+                     "Fees": app.config["Fees"]}]
+    pair_configs.extend(app.config.get("AdditionalPairs", ()))
 
     match_events = MatchEvents()
-    match_events_writer = MatchEventsWriter(match_events, engine["MatchEventsFile"], app.event_loop)
-    market_events_reader = MarketEventsReader(engine["MarketDataFile"], app.event_loop, future_book, etf_book,
-                                              match_events)
-    score_board_writer = ScoreBoardWriter(engine["ScoreBoardFile"], app.event_loop)
+    queue_size = engine.get("WriterQueueSize", DEFAULT_WRITER_QUEUE_SIZE)
+    queue_policy = engine.get("WriterQueuePolicy", "Block")
+    writer_type = ColumnarMatchEventsWriter if engine.get("MatchEventsFormat") == "Columnar" else MatchEventsWriter
+    match_events_writer = writer_type(match_events, engine["MatchEventsFile"], app.event_loop,
+                                      WriterQueue("MATCH_EVENTS", queue_size, queue_policy))
+    pair_fees = [pair_config.get("Fees", app.config["Fees"]) for pair_config in pair_configs]
+    array_books = engine.get("OrderBook", "Sorted") == "Array"
+    block_reader = engine.get("MarketDataReader", "Row") == "Block"
+    shard_gateway = None
+    if engine.get("Shards", 0):
+        shard_gateway = ShardGateway(engine["Shards"], [(c["MarketDataFile"], f["Maker"], f["Taker"])
+                                                        for c, f in zip(pair_configs, pair_fees)],
+                                     array_books, block_reader, instrument["TickSize"], depth, match_events)
+        order_books = shard_gateway.order_books
+        market_events_readers = [shard_gateway]
+    else:
+        order_books = list()
+        market_events_readers = list()
+        for p, (pair_config, fees) in enumerate(zip(pair_configs, pair_fees)):
+            future_book = create_order_book(instrument_number(p, Instrument.FUTURE), 0.0, 0.0,
+                                            instrument["TickSize"], depth, array_books)
+            etf_book = create_order_book(instrument_number(p, Instrument.ETF), fees["Maker"], fees["Taker"],
+                                         instrument["TickSize"], depth, array_books)
+            market_events_readers.append(create_market_events_reader(pair_config["MarketDataFile"], block_reader,
+                                                                     app.event_loop, future_book, etf_book,
+                                                                     match_events))
+            order_books.extend((future_book, etf_book))
+
+    pairs = [InstrumentPair(p, order_books[2 * p], order_books[2 * p + 1],
+                            AccountFactory(pair_config.get("EtfClamp", instrument["EtfClamp"]), instrument["TickSize"]))
+             for p, pair_config in enumerate(pair_configs)]
+    score_board_writer = ScoreBoardWriter(engine["ScoreBoardFile"], app.event_loop,
+                                          WriterQueue("SCORE_BOARD", queue_size, queue_policy))
 
     tick_timer = Timer(engine["TickInterval"], engine["Speed"])
-    account_factory = AccountFactory(instrument["EtfClamp"], instrument["TickSize"])
     unhedged_lots_factory = UnhedgedLotsFactory()
-    competitor_manager = CompetitorManager(app.config["Limits"], app.config["Traders"], account_factory, etf_book,
-                                           future_book, match_events, score_board_writer, instrument["TickSize"],
-                                           tick_timer, unhedged_lots_factory)
+    competitor_manager = CompetitorManager(app.config["Limits"], app.config["Traders"], pairs, match_events,
+                                           score_board_writer, instrument["TickSize"], tick_timer,
+                                           unhedged_lots_factory)
 
     limiter_factory = FrequencyLimiterFactory(limits["MessageFrequencyInterval"] / engine["Speed"],
                                               limits["MessageFrequencyLimit"])
     exec_server = ExecutionServer(exec_["Host"], exec_["Port"], competitor_manager, limiter_factory)
-    info_publisher = InformationPublisher(app.event_loop, PublisherFactory(info["Type"], info["Name"]),
-                                          (future_book, etf_book), tick_timer)
+    pub_factory = PublisherFactory(info["Type"], info["Name"], info.get("RingSize", DEFAULT_RING_SIZE))
+    info_publisher = InformationPublisher(app.event_loop, pub_factory, order_books, tick_timer,
+                                          info.get("BookUpdates", "EveryTick"))
+    if reaction_times:
+        info_publisher.book_updates_published.append(reaction_times.on_book_updates_published)
+        if app.config["ReactionTimes"].get("ScoreBoard", False):
+            score_board_writer.reaction_times = reaction_times.score_board_summary
 
     market_timer = Timer(engine["MarketEventInterval"], engine["Speed"])
-    controller = Controller(engine["MarketOpenDelay"], exec_server, info_publisher, market_events_reader,
+    controller = Controller(engine["MarketOpenDelay"], exec_server, info_publisher, market_events_readers,
                             match_events_writer, score_board_writer, market_timer, tick_timer)
+    controller.instrumentation = instrumentation
+    controller.reaction_times = reaction_times
+    controller.shard_gateway = shard_gateway
     competitor_manager.controller = controller
     exec_server.controller = controller
 
+    if isinstance(app.event_loop, VirtualClockEventLoop):
+        # Keep the auto-traders in step with the simulated clock and start it
+        # as soon as every auto-trader has logged in
+        lockstep = Lockstep(app.event_loop, lambda: info_publisher.frames_published)
+        app.event_loop.use_lockstep(lockstep)
+        exec_server.lockstep = lockstep
+
+        def on_competitor_logged_in(_: str) -> None:
+            if len(competitor_manager.get_competitors()) == len(app.config["Traders"]):
+                app.event_loop.thaw()
+        competitor_manager.competitor_logged_in.append(on_competitor_logged_in)
+
+    if "OrderFeed" in app.config:
+        feed = app.config["OrderFeed"]
+        feed_factory = PublisherFactory(feed["Type"], feed["Name"], feed.get("RingSize", DEFAULT_ORDER_FEED_RING_SIZE))
+        controller.order_feed_publisher = OrderFeedPublisher(feed_factory, order_books, tick_timer,
+                                                             feed.get("SnapshotInterval", DEFAULT_SNAPSHOT_INTERVAL))
+
     if "Hud" in app.config:
         hud_server = HeadsUpDisplayServer(app.config["Hud"]["Host"], app.config["Hud"]["Port"], match_events,
                                           competitor_manager, controller)
@@ -130,7 +292,7 @@ def setup(app: Application) -> Controller:
 
 
 def main(config_path: str):
-    app = Application("exchange", __exchange_config_validator, config_path)
+    app = Application("exchange", __exchange_config_validator, config_path, __create_event_loop)
     controller: Controller = setup(app)
     app.run()
     controller.cleanup()
@@ -24,16 +24,29 @@ from .competitor import Competitor, CompetitorManager
 from .limiter import FrequencyLimiter, FrequencyLimiterFactory
 from .messages import (AMEND_MESSAGE, AMEND_MESSAGE_SIZE, CANCEL_MESSAGE, CANCEL_MESSAGE_SIZE,
                        ERROR_MESSAGE, ERROR_MESSAGE_SIZE, HEADER, HEADER_SIZE, HEDGE_FILLED_MESSAGE,
-                       HEDGE_FILLED_MESSAGE_SIZE, HEDGE_MESSAGE, HEDGE_MESSAGE_SIZE, INSERT_MESSAGE,
-                       INSERT_MESSAGE_SIZE, LOGIN_MESSAGE, LOGIN_MESSAGE_SIZE, ORDER_FILLED_MESSAGE,
-                       ORDER_FILLED_MESSAGE_SIZE, ORDER_STATUS_MESSAGE, ORDER_STATUS_MESSAGE_SIZE,
+                       HEDGE_FILLED_MESSAGE_SIZE, HEDGE_MESSAGE, HEDGE_MESSAGE_SIZE, IDLE_MESSAGE, IDLE_MESSAGE_SIZE,
+                       INSERT_MESSAGE, INSERT_MESSAGE_SIZE, LOCKSTEP_MESSAGE_SIZE, LOGIN_MESSAGE, LOGIN_MESSAGE_SIZE,
+                       ORDER_FILLED_MESSAGE, ORDER_FILLED_MESSAGE_SIZE, ORDER_STATUS_MESSAGE, ORDER_STATUS_MESSAGE_SIZE,
+                       PAIR_HEDGE_MESSAGE, PAIR_HEDGE_MESSAGE_SIZE, PAIR_INSERT_MESSAGE, PAIR_INSERT_MESSAGE_SIZE,
                        Connection, MessageType)
 from .types import IController, IExecutionConnection
+from .virtual_clock import Lockstep, LockstepPeer
 
 
 class ExecutionConnection(Connection, IExecutionConnection):
+    """A connection to an auto-trader.
+
+    Outbound messages are collected in a buffer and written together once
+    the current round of event loop callbacks (for example, handling an
+    incoming message or a batch of market events) has finished, so that a
+    cascade of fills costs one write rather than one per message.
+
+    Given a lockstep, the messages received after login are handed to it,
+    rather than handled straight away, and handled when it releases them.
+    """
+
     def __init__(self, competitor_manager: CompetitorManager, frequency_limiter: FrequencyLimiter,
-                 controller: IController):
+                 controller: IController, lockstep: Optional[Lockstep] = None):
         """Initialise a new instance of the ExecutionChannel class."""
         Connection.__init__(self)
 
@@ -45,6 +58,12 @@ class ExecutionConnection(Connection, IExecutionConnection):
         self.logger: logging.Logger = logging.getLogger("EXECUTION")
         self.login_timeout: asyncio.Handle = asyncio.get_running_loop().call_later(1.0, self.close)
 
+        self.__event_loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self.__flush_pending: bool = False
+        self.__lockstep: Optional[Lockstep] = lockstep
+        self.__lockstep_peer: Optional[LockstepPeer] = None
+        self.__outbound: bytearray = bytearray()
+
         self.__error_message = bytearray(ERROR_MESSAGE_SIZE)
         self.__hedge_filled_message = bytearray(HEDGE_FILLED_MESSAGE_SIZE)
         self.__order_status_message = bytearray(ORDER_STATUS_MESSAGE_SIZE)
@@ -59,8 +78,29 @@ class ExecutionConnection(Connection, IExecutionConnection):
         """Clean up this instance of the ExecutionChannel class."""
         self.login_timeout.cancel()
 
+    def __flush(self) -> None:
+        """Write the buffered outbound messages."""
+        self.__flush_pending = False
+        if self.__outbound:
+            outbound = self.__outbound
+            # The transport may hold on to the buffer, so use a new one
+            self.__outbound = bytearray()
+            if self._connection_transport is not None and not self._connection_transport.is_closing():
+                self._connection_transport.write(outbound)
+
+    def __send(self, message: bytearray) -> None:
+        """Add a message to the outbound buffer and arrange for it to be written."""
+        if self.__lockstep_peer is not None:
+            self.__lockstep_peer.messages_sent += 1
+        self.__outbound += message
+        if not self.__flush_pending:
+            self.__flush_pending = True
+            self.__event_loop.call_soon(self.__flush)
+
     def close(self):
         """Close the connection associated with this ExecutionChannel instance."""
+        self.__leave_lockstep()
+        self.__flush()
         Connection.close(self)
         self.login_timeout.cancel()
         self.closing = True
@@ -71,6 +111,7 @@ class ExecutionConnection(Connection, IExecutionConnection):
         """Called when the connection to the auto-trader is lost."""
         Connection.connection_lost(self, exc)
 
+        self.__leave_lockstep()
         self.login_timeout.cancel()
         if self.competitor is not None:
             self.competitor.on_connection_lost(self.controller.advance_time())
@@ -83,8 +124,24 @@ class ExecutionConnection(Connection, IExecutionConnection):
         Connection.connection_made(self, transport)
         self.competitor_manager.on_competitor_connect()
 
+    def __leave_lockstep(self) -> None:
+        """Stop taking part in the lockstep, if this connection is."""
+        if self.__lockstep_peer is not None:
+            self.__lockstep.remove_peer(self.__lockstep_peer)
+            self.__lockstep_peer = None
+
     def on_message(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Called when a message is received from the auto-trader."""
+        if self.__lockstep_peer is None:
+            self.__handle_message(typ, data, start, length)
+        elif typ == MessageType.IDLE and length == IDLE_MESSAGE_SIZE:
+            self.__lockstep.acknowledge(self.__lockstep_peer, *IDLE_MESSAGE.unpack_from(data, start))
+        else:
+            # The receive buffer will be reused, so keep a copy of the message
+            self.__lockstep.hold(self.__lockstep_peer, typ, bytes(data[start:start + length - HEADER_SIZE]), length)
+
+    def __handle_message(self, typ: int, data: bytes, start: int, length: int) -> None:
+        """Handle a message from the auto-trader."""
         now: float = self.controller.advance_time()
 
         if self.frequency_limiter.check_event(now):
@@ -113,6 +170,10 @@ class ExecutionConnection(Connection, IExecutionConnection):
             self.competitor.on_hedge_message(now, *HEDGE_MESSAGE.unpack_from(data, start))
         elif typ == MessageType.INSERT_ORDER and length == INSERT_MESSAGE_SIZE:
             self.competitor.on_insert_message(now, *INSERT_MESSAGE.unpack_from(data, start))
+        elif typ == MessageType.PAIR_HEDGE_ORDER and length == PAIR_HEDGE_MESSAGE_SIZE:
+            self.competitor.on_hedge_message(now, *PAIR_HEDGE_MESSAGE.unpack_from(data, start))
+        elif typ == MessageType.PAIR_INSERT_ORDER and length == PAIR_INSERT_MESSAGE_SIZE:
+            self.competitor.on_insert_message(now, *PAIR_INSERT_MESSAGE.unpack_from(data, start))
         else:
             if typ == MessageType.LOGIN:
                 self.logger.info("fd=%d received second login message: time=%.6f name='%s'", self._file_number,
@@ -134,27 +195,33 @@ class ExecutionConnection(Connection, IExecutionConnection):
 
         self.logger.info("fd=%d '%s' is ready!", self._file_number, name)
 
+        if self.__lockstep is not None:
+            self.__lockstep_peer = self.__lockstep.add_peer(name, self.__handle_message)
+            lockstep_message = bytearray(LOCKSTEP_MESSAGE_SIZE)
+            HEADER.pack_into(lockstep_message, 0, LOCKSTEP_MESSAGE_SIZE, MessageType.LOCKSTEP)
+            self.__send(lockstep_message)
+
     def send_error(self, client_order_id: int, error_message: bytes) -> None:
         """Send an error message to the auto-trader."""
         ERROR_MESSAGE.pack_into(self.__error_message, HEADER_SIZE, client_order_id, error_message)
-        self._connection_transport.write(self.__error_message)
+        self.__send(self.__error_message)
 
     def send_hedge_filled(self, client_order_id: int, average_price: int, volume: int) -> None:
         """Send a hedge filled message to the auto-trader."""
         HEDGE_FILLED_MESSAGE.pack_into(self.__hedge_filled_message, HEADER_SIZE, client_order_id, average_price,
                                        volume)
-        self._connection_transport.write(self.__hedge_filled_message)
+        self.__send(self.__hedge_filled_message)
 
     def send_order_filled(self, client_order_id: int, price: int, volume: int) -> None:
         """Send an order filled message to the auto-trader."""
         ORDER_FILLED_MESSAGE.pack_into(self.__order_filled_message, HEADER_SIZE, client_order_id, price, volume)
-        self._connection_transport.write(self.__order_filled_message)
+        self.__send(self.__order_filled_message)
 
     def send_order_status(self, client_order_id: int, fill_volume: int, remaining_volume: int, fees: int) -> None:
         """Send an order status message to the auto-trader."""
         ORDER_STATUS_MESSAGE.pack_into(self.__order_status_message, HEADER_SIZE, client_order_id, fill_volume,
                                        remaining_volume, fees)
-        self._connection_transport.write(self.__order_status_message)
+        self.__send(self.__order_status_message)
 
 
 class ExecutionServer:
@@ -164,6 +231,7 @@ class ExecutionServer:
         """Initialise a new instance of the ExecutionServer class."""
         self.controller: Optional[IController] = None
         self.host: str = host
+        self.lockstep: Optional[Lockstep] = None
         self.port: int = port
 
         self.__competitor_manager: CompetitorManager = competitor_manager
@@ -177,7 +245,8 @@ class ExecutionServer:
 
     def __on_new_connection(self) -> ExecutionConnection:
         """Callback for when a new connection is accepted."""
-        return ExecutionConnection(self.__competitor_manager, self.__limiter_factory.create(), self.controller)
+        return ExecutionConnection(self.__competitor_manager, self.__limiter_factory.create(), self.controller,
+                                   self.lockstep)
 
     async def start(self) -> None:
         """Start the server."""
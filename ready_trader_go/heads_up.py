@@ -124,7 +124,7 @@ class HudConnection(Connection, IExecutionConnection):
         elif event.operation == MatchEventOperation.INSERT:
             INSERT_EVENT_MESSAGE.pack_into(self.__insert_event_message, HEADER_SIZE, event.time,
                                            self.__competitor_ids[event.competitor], event.order_id,
-                                           event.instrument.value, event.side.value, event.volume, event.price,
+                                           int(event.instrument), event.side.value, event.volume, event.price,
                                            event.lifespan.value)
             self._connection_transport.write(self.__insert_event_message)
         elif event.operation == MatchEventOperation.HEDGE:
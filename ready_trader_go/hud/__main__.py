@@ -28,6 +28,8 @@ from typing import Any, Mapping, Tuple, Optional
 from PySide6 import QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
+from ready_trader_go.match_events import is_columnar_match_events, read_match_events
+
 from .event_source import EventSource, LiveEventSource, RecordedEventSource
 from .main_window.main_window import MainWindow
 
@@ -109,8 +111,11 @@ def replay(path: pathlib.Path):
     splash = __show_splash()
     splash.showMessage("Processing %s..." % str(path), Qt.AlignBottom, QtGui.QColor("#F0F0F0"))
     etf_clamp, tick_size = __read_exchange_config()
-    with path.open("r", newline="") as csv_file:
-        event_source = RecordedEventSource.from_csv(csv_file, etf_clamp, tick_size)
+    if is_columnar_match_events(str(path)):
+        event_source = RecordedEventSource.from_rows(map(tuple, read_match_events(str(path))), etf_clamp, tick_size)
+    else:
+        with path.open("r", newline="") as csv_file:
+            event_source = RecordedEventSource.from_csv(csv_file, etf_clamp, tick_size)
     window = __show_main_window(splash, event_source)
     return app.exec_()
 
@@ -19,7 +19,7 @@ import collections
 import csv
 import itertools
 
-from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, TextIO, Tuple
 
 from PySide6 import QtCore,  QtNetwork
 
@@ -30,7 +30,7 @@ from ready_trader_go.messages import (AMEND_EVENT_MESSAGE, AMEND_EVENT_MESSAGE_S
                                       INSERT_EVENT_MESSAGE_SIZE, LOGIN_EVENT_MESSAGE, LOGIN_EVENT_MESSAGE_SIZE,
                                       TRADE_EVENT_MESSAGE, TRADE_EVENT_MESSAGE_SIZE, MessageType)
 from ready_trader_go.order_book import TOP_LEVEL_COUNT, Order, OrderBook
-from ready_trader_go.types import Instrument, Lifespan, Side
+from ready_trader_go.types import Instrument, Lifespan, Side, instrument_pair
 
 
 __all__ = ("EventSource", "LiveEventSource", "RecordedEventSource")
@@ -98,6 +98,7 @@ class LiveEventSource(EventSource):
         self.port: int = port
 
         self.__accounts: Dict[int, CompetitorAccount] = dict()
+        self.__hidden_orders: Set[Tuple[int, int]] = set()
         self.__now: float = 0.0
         self.__order_books: List[OrderBook] = list(OrderBook(i, 0.0, 0.0) for i in Instrument)
         self.__orders: Dict[int, Dict[int, Order]] = {0: dict()}
@@ -171,6 +172,8 @@ class LiveEventSource(EventSource):
     def on_amend_event_message(self, now: float, competitor_id: int, order_id: int, volume_delta: int) -> None:
         """Callback when an amend event message is received."""
         self.__now = now
+        if (competitor_id, order_id) in self.__hidden_orders:
+            return
         order = self.__orders[competitor_id].get(order_id)
         if order is not None:
             self.__order_books[order.instrument].amend(now, order, order.volume + volume_delta)
@@ -182,6 +185,9 @@ class LiveEventSource(EventSource):
     def on_cancel_event_message(self, now: float, competitor_id: int, order_id: int) -> None:
         """Callback when an cancel event message is received."""
         self.__now = now
+        if (competitor_id, order_id) in self.__hidden_orders:
+            self.__hidden_orders.discard((competitor_id, order_id))
+            return
         order = self.__orders[competitor_id].pop(order_id, None)
         if order is not None:
             self.__order_books[order.instrument].cancel(now, order)
@@ -192,6 +198,10 @@ class LiveEventSource(EventSource):
                                 volume: int, price: int, lifespan: int) -> None:
         """Callback when an insert event message is received."""
         self.__now = now
+        # The HUD only displays the first instrument pair
+        if instrument_pair(instrument) != 0:
+            self.__hidden_orders.add((competitor_id, order_id))
+            return
         order = Order(order_id, Instrument(instrument), Lifespan(lifespan), Side(side), price, volume)
         self.__orders[competitor_id][order_id] = order
         self.__order_books[instrument].insert(now, order)
@@ -203,6 +213,8 @@ class LiveEventSource(EventSource):
                                price: float) -> None:
         """Callback when an hedge event message is received."""
         self.__now = now
+        if instrument_pair(instrument) != 0:
+            return
         self.__accounts[competitor_id].transact(Instrument(instrument), Side(side), price, volume, 0)
 
     def on_login_event_message(self, name: str, competitor_id: int) -> None:
@@ -246,6 +258,8 @@ class LiveEventSource(EventSource):
                                volume: int, price: int, fee: int) -> None:
         """Callback when an trade event message is received."""
         self.__now = now
+        if instrument_pair(instrument) != 0:
+            return
         self.__accounts[competitor_id].transact(Instrument(instrument), Side(side), price, volume, fee)
         self.trade_occurred.emit(self.__teams[competitor_id], now, order_id, Side(side), volume, price, fee)
 
@@ -308,14 +322,20 @@ class RecordedEventSource(EventSource):
     def from_csv(file_object: TextIO, etf_clamp: float, tick_size: float,
                  parent: Optional[QtCore.QObject] = None):
         """Create a new RecordedEventSource instance from a CSV file."""
-        source = RecordedEventSource(etf_clamp, tick_size, parent)
-        events = source.__events
-
         reader = csv.reader(file_object)
         next(reader)  # Skip header
+        return RecordedEventSource.from_rows(reader, etf_clamp, tick_size, parent)
+
+    @staticmethod
+    def from_rows(reader: Iterable[Sequence], etf_clamp: float, tick_size: float,
+                  parent: Optional[QtCore.QObject] = None):
+        """Create a new RecordedEventSource instance from rows of match events."""
+        source = RecordedEventSource(etf_clamp, tick_size, parent)
+        events = source.__events
 
         accounts: Dict[str, CompetitorAccount] = collections.defaultdict(source._account_factory.create)
         books: Tuple[OrderBook, ...] = tuple(OrderBook(i, 0.0, 0.0) for i in Instrument)
+        hidden_orders: Set[Tuple[str, int]] = set()
         orders: Dict[str, Dict[int, Order]] = collections.defaultdict(dict)
 
         ask_prices = [0] * TOP_LEVEL_COUNT
@@ -354,6 +374,17 @@ class RecordedEventSource(EventSource):
             if team and team not in source.__teams:
                 source.__teams.add(team)
 
+            # The HUD only displays the first instrument pair
+            if operation in ("Amend", "Cancel"):
+                if (team, order_id) in hidden_orders:
+                    if operation == "Cancel":
+                        hidden_orders.discard((team, order_id))
+                    continue
+            elif instrument_pair(int(row[4])) != 0:
+                if operation == "Insert":
+                    hidden_orders.add((team, order_id))
+                continue
+
             if operation == "Insert":
                 order = Order(order_id, Instrument(int(row[4])), Lifespan[row[8]], Side[row[5]],
                               int(row[7]), int(row[6]))
@@ -17,63 +17,118 @@
 #     <https://www.gnu.org/licenses/>.
 import asyncio
 import logging
+import struct
 
-from typing import Iterable, List, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, Tuple
 
-from .messages import (HEADER, HEADER_SIZE, ORDER_BOOK_HEADER, ORDER_BOOK_HEADER_SIZE,
-                       ORDER_BOOK_MESSAGE, ORDER_BOOK_MESSAGE_SIZE, TRADE_TICKS_HEADER, TRADE_TICKS_HEADER_SIZE,
-                       TRADE_TICKS_MESSAGE, TRADE_TICKS_MESSAGE_SIZE, MessageType)
+from .messages import (BOOK_LEVEL_SIZE, HEADER, HEADER_SIZE, ORDER_BOOK_HEADER, ORDER_BOOK_HEADER_SIZE,
+                       TRADE_TICKS_HEADER, TRADE_TICKS_HEADER_SIZE, MessageType, book_message)
 from .order_book import TOP_LEVEL_COUNT, OrderBook
-from .pubsub import PublisherFactory
+from .pubsub import MAXIMUM_MESSAGE_LENGTH, Publisher, PublisherFactory
 from .timer import Timer
 from .types import Instrument
 
+# Order book update policies
+BOOK_UPDATE_POLICIES = ("EveryTick", "OnChange")
+
+# The deepest order book that can be published on the information channel
+MAXIMUM_BOOK_DEPTH = (MAXIMUM_MESSAGE_LENGTH - ORDER_BOOK_HEADER_SIZE) // BOOK_LEVEL_SIZE
+
 
 class InformationPublisher(asyncio.DatagramProtocol):
     """A publisher of exchange information."""
 
     def __init__(self, loop: asyncio.AbstractEventLoop, publisher_factory: PublisherFactory,
-                 order_books: Iterable[OrderBook], timer: Timer):
+                 order_books: Iterable[OrderBook], timer: Timer, book_updates: str = "EveryTick"):
         """Initialize a new instance of the InformationChannel class."""
+        if book_updates not in BOOK_UPDATE_POLICIES:
+            raise ValueError("unknown order book update policy: %s" % book_updates)
+        order_books = tuple(order_books)
+        depths = {book.depth for book in order_books}
+        if len(depths) > 1:
+            raise ValueError("order books must all have the same depth")
+        depth: int = depths.pop() if depths else TOP_LEVEL_COUNT
+        if depth > MAXIMUM_BOOK_DEPTH:
+            raise ValueError("order book depth is greater than %d" % MAXIMUM_BOOK_DEPTH)
+
+        instrument_count: int = max([len(Instrument)] + [book.instrument + 1 for book in order_books])
+
         self.__event_loop: asyncio.AbstractEventLoop = loop
         self.__file_number: int = 0
         self.__logger: logging.Logger = logging.getLogger("INFORMATION")
         self.__order_books: Tuple[OrderBook] = tuple(order_books)
         self.__publisher_factory: PublisherFactory = publisher_factory
-        self.__send_ticks_handles: List[Optional[asyncio.Handle]] = [None for _ in Instrument]
-        self.__trade_ticks_sequences: List[int] = [1 for _ in Instrument]
-        self.__transport: Optional[asyncio.WriteTransport] = None
+        self.__send_ticks_handles: List[Optional[asyncio.Handle]] = [None] * instrument_count
+        self.__skip_unchanged_books: bool = book_updates == "OnChange"
+        self.__trade_ticks_sequences: List[int] = [1] * instrument_count
+        self.__transport: Optional[Publisher] = None
 
         # Connect signals
         for book in self.__order_books:
             book.trade_occurred.append(self.on_trade)
         timer.timer_ticked.append(self.on_timer_tick)
 
-        # Store book data for dissemination to competitors.
-        self.__ask_prices: List[int] = [0] * TOP_LEVEL_COUNT
-        self.__ask_volumes: List[int] = [0] * TOP_LEVEL_COUNT
-        self.__bid_prices: List[int] = [0] * TOP_LEVEL_COUNT
-        self.__bid_volumes: List[int] = [0] * TOP_LEVEL_COUNT
+        # Store book data for dissemination to competitors. Order book and
+        # trade ticks messages have the same layout.
+        self.__ask_prices: List[int] = [0] * depth
+        self.__ask_volumes: List[int] = [0] * depth
+        self.__bid_prices: List[int] = [0] * depth
+        self.__bid_volumes: List[int] = [0] * depth
+        self.__levels_message: struct.Struct = book_message(depth)
+        self.__order_book_message_size: int = ORDER_BOOK_HEADER_SIZE + self.__levels_message.size
+        self.__trade_ticks_message_size: int = TRADE_TICKS_HEADER_SIZE + self.__levels_message.size
+
+        # The body of the last order book update for each instrument is kept
+        # and only repacked when the book's version shows that it changed.
+        self.__book_bodies: List[bytearray] = [bytearray(self.__levels_message.size)
+                                             for _ in range(instrument_count)]
+        self.__book_versions: List[int] = [-1] * instrument_count
 
-        # Message buffers
-        self.__book_message = bytearray(ORDER_BOOK_MESSAGE_SIZE)
-        self.__ticks_message = bytearray(TRADE_TICKS_MESSAGE_SIZE)
-        HEADER.pack_into(self.__book_message, 0, ORDER_BOOK_MESSAGE_SIZE, MessageType.ORDER_BOOK_UPDATE)
-        HEADER.pack_into(self.__ticks_message, 0, TRADE_TICKS_MESSAGE_SIZE, MessageType.TRADE_TICKS)
+        # Callbacks
+        self.book_updates_published: List[Callable[[float], None]] = list()
 
-    def connection_made(self, transport: asyncio.WriteTransport) -> None:
+    def close(self) -> None:
+        """Close the information channel."""
+        if self.__transport is not None:
+            self.__transport.close()
+
+    def connection_made(self, transport: Publisher) -> None:
         """Called when the datagram endpoint is created."""
         self.__logger.info("information channel established")
         self.__transport = transport
 
+    @property
+    def frames_published(self) -> int:
+        """The number of frames published on the information channel so far."""
+        return self.__transport.sequence if self.__transport is not None else 0
+
     def on_timer_tick(self, timer: Timer, now: float, tick_number: int) -> None:
         """Called each time the timer ticks."""
+        if self.__transport.is_closing():
+            return
+
+        # Messages are packed straight into the publisher's ring buffer
+        message_size: int = self.__order_book_message_size
+        published: bool = False
         for book in self.__order_books:
-            book.top_levels(self.__ask_prices, self.__ask_volumes, self.__bid_prices, self.__bid_volumes)
-            ORDER_BOOK_HEADER.pack_into(self.__book_message, HEADER_SIZE, book.instrument, tick_number)
-            ORDER_BOOK_MESSAGE.pack_into(self.__book_message, ORDER_BOOK_HEADER_SIZE, *self.__ask_prices,
-                                         *self.__ask_volumes, *self.__bid_prices, *self.__bid_volumes)
-            self.__transport.write(self.__book_message)
+            body = self.__book_bodies[book.instrument]
+            if book.version != self.__book_versions[book.instrument]:
+                self.__book_versions[book.instrument] = book.version
+                book.top_levels(self.__ask_prices, self.__ask_volumes, self.__bid_prices, self.__bid_volumes)
+                self.__levels_message.pack_into(body, 0, *self.__ask_prices, *self.__ask_volumes,
+                                                *self.__bid_prices, *self.__bid_volumes)
+            elif self.__skip_unchanged_books:
+                continue
+            buffer, offset = self.__transport.begin_write(message_size)
+            HEADER.pack_into(buffer, offset, message_size, MessageType.ORDER_BOOK_UPDATE)
+            ORDER_BOOK_HEADER.pack_into(buffer, offset + HEADER_SIZE, book.instrument, tick_number)
+            buffer[offset + ORDER_BOOK_HEADER_SIZE:offset + message_size] = body
+            self.__transport.end_write()
+            published = True
+
+        if published:
+            for callback in self.book_updates_published:
+                callback(now)
 
     def on_trade(self, book: OrderBook) -> None:
         """Called when a trade occurs in one of the order books."""
@@ -84,13 +139,19 @@ class InformationPublisher(asyncio.DatagramProtocol):
         """Prepare and send trade ticks for the given order book."""
         self.__send_ticks_handles[order_book.instrument] = None
 
+        if self.__transport.is_closing():
+            return
+
         if order_book.trade_ticks(self.__ask_prices, self.__ask_volumes, self.__bid_prices, self.__bid_volumes):
             self.__trade_ticks_sequences[order_book.instrument] += 1
-            TRADE_TICKS_HEADER.pack_into(self.__ticks_message, HEADER_SIZE, order_book.instrument,
+            message_size: int = self.__trade_ticks_message_size
+            buffer, offset = self.__transport.begin_write(message_size)
+            HEADER.pack_into(buffer, offset, message_size, MessageType.TRADE_TICKS)
+            TRADE_TICKS_HEADER.pack_into(buffer, offset + HEADER_SIZE, order_book.instrument,
                                          self.__trade_ticks_sequences[order_book.instrument])
-            TRADE_TICKS_MESSAGE.pack_into(self.__ticks_message, TRADE_TICKS_HEADER_SIZE, *self.__ask_prices,
-                                          *self.__ask_volumes, *self.__bid_prices, *self.__bid_volumes)
-            self.__transport.write(self.__ticks_message)
+            self.__levels_message.pack_into(buffer, offset + TRADE_TICKS_HEADER_SIZE, *self.__ask_prices,
+                                            *self.__ask_volumes, *self.__bid_prices, *self.__bid_volumes)
+            self.__transport.end_write()
 
     async def start(self) -> None:
         """Start this publisher."""
@@ -0,0 +1,364 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Optional timing of the exchange's hot paths and of the auto-traders.
+
+When enabled, Instrumentation.install and ReactionTimes.install replace a
+handful of methods on the exchange's classes with wrappers that take times
+with time.perf_counter_ns and record them in histograms. When they are not
+enabled nothing is replaced, so there is no cost at all.
+"""
+import asyncio
+import csv
+import functools
+import json
+import logging
+
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .array_order_book import ArrayOrderBook
+from .competitor import Competitor
+from .execution import ExecutionConnection
+from .market_events import MarketEventsReader
+from .messages import MessageType
+from .order_book import OrderBook
+from .shard import RemoteOrderBook
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+BOOK_OPERATIONS = ("amend", "cancel", "insert", "try_trade")
+ORDER_CALLBACKS = ("on_order_amended", "on_order_cancelled", "on_order_filled", "on_order_placed")
+
+
+class Histogram:
+    """A histogram of non-negative integers with a bounded relative error.
+
+    Values below 2**SUB_BUCKET_BITS have a bucket each; above that, every
+    power of two is split into SUB_BUCKET_HALF buckets, so that a value is
+    never reported as more than about 6% larger than it was.
+    """
+
+    __slots__ = ("count", "counts", "maximum", "minimum", "total")
+
+    def __init__(self):
+        """Initialise a new instance of the Histogram class."""
+        self.count: int = 0
+        self.counts: List[int] = list()
+        self.maximum: int = 0
+        self.minimum: int = 0
+        self.total: int = 0
+
+    def percentile(self, percent: float) -> int:
+        """Return the highest value in the bucket holding the given percentile."""
+        if self.count == 0:
+            return 0
+        threshold = max(1, self.count * percent / 100.0)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold:
+                return min(self.maximum, bucket_upper_bound(index))
+        return self.maximum
+
+    def record(self, value: int) -> None:
+        """Record a value."""
+        index = bucket_index(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        if self.count == 0 or value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> Dict[str, Any]:
+        """Return a summary of the recorded values."""
+        return {"count": self.count, "min": self.minimum, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(50.0), "p90": self.percentile(90.0), "p99": self.percentile(99.0),
+                "p99.9": self.percentile(99.9), "max": self.maximum}
+
+
+def bucket_index(value: int) -> int:
+    """Return the index of the histogram bucket holding the given value."""
+    exponent = value.bit_length() - SUB_BUCKET_BITS
+    if exponent <= 0:
+        return value
+    return exponent * SUB_BUCKET_HALF + (value >> exponent)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Return the highest value held by the histogram bucket with the given index."""
+    if index < 2 * SUB_BUCKET_HALF:
+        return index
+    exponent = index // SUB_BUCKET_HALF - 1
+    return ((index - exponent * SUB_BUCKET_HALF + 1) << exponent) - 1
+
+
+def replace_method(originals: List[Tuple[type, str, Callable]], cls: type, name: str,
+                   wrap: Callable[[Callable], Callable]) -> None:
+    """Replace the named method of a class with a wrapped version of it, noting the original."""
+    function = cls.__dict__.get(name)
+    if function is not None:
+        originals.append((cls, name, function))
+        setattr(cls, name, wrap(function))
+
+
+def restore_methods(originals: List[Tuple[type, str, Callable]]) -> None:
+    """Restore methods replaced by replace_method, most recent first."""
+    while originals:
+        cls, name, function = originals.pop()
+        setattr(cls, name, function)
+
+
+class Instrumentation:
+    """Timing of message handling, order book operations and writes to auto-traders.
+
+    Histograms are kept for:
+
+    * message.<TYPE> - nanoseconds taken to handle each type of message
+    * book.<operation> - nanoseconds taken by each order book operation
+    * book.<operation>.callbacks - order listener callbacks made by each
+      order book operation
+    * write - nanoseconds taken to write replies to an auto-trader
+    """
+
+    def __init__(self, filename: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None):
+        """Initialise a new instance of the Instrumentation class."""
+        self.filename: Optional[str] = filename
+        self.histograms: Dict[str, Histogram] = dict()
+        self.host: Optional[str] = host
+        self.logger = logging.getLogger("INSTRUMENTATION")
+        self.port: Optional[int] = port
+
+        self.__callback_count: List[int] = [0]
+        self.__originals: List[Tuple[type, str, Callable]] = list()
+        self.__server: Optional[asyncio.AbstractServer] = None
+
+    def close(self) -> None:
+        """Stop the statistics server, remove the timing wrappers and write out the statistics."""
+        if self.__server is not None:
+            self.__server.close()
+            self.__server = None
+        self.uninstall()
+
+        statistics = self.statistics()
+        for name, summary in statistics.items():
+            self.logger.info("%s: %s", name, " ".join("%s=%s" % (k, round(v, 1)) for k, v in summary.items()))
+        if self.filename is not None:
+            with open(self.filename, "w") as statistics_file:
+                json.dump(statistics, statistics_file, indent=2)
+
+    def histogram(self, name: str) -> Histogram:
+        """Return the named histogram, creating it if necessary."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def install(self) -> None:
+        """Replace the exchange's hot-path methods with timing wrappers."""
+        replace_method(self.__originals, ExecutionConnection, "on_message", self.__time_message)
+        replace_method(self.__originals, ExecutionConnection, "_ExecutionConnection__flush",
+                       lambda function: self.__time(function, self.histogram("write")))
+        for book_type in (OrderBook, ArrayOrderBook, RemoteOrderBook):
+            for operation in BOOK_OPERATIONS:
+                replace_method(self.__originals, book_type, operation,
+                               functools.partial(self.__time_book, name=operation))
+        for listener_type in (Competitor, MarketEventsReader):
+            for callback in ORDER_CALLBACKS:
+                replace_method(self.__originals, listener_type, callback, self.__count_callback)
+
+    def statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Return a summary of every histogram."""
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    async def start(self) -> None:
+        """Start the statistics server, if there is one."""
+        if self.port is not None:
+            self.logger.info("starting statistics server: host=%s port=%d", self.host, self.port)
+            self.__server = await asyncio.start_server(self.__on_connection, self.host, self.port)
+
+    def uninstall(self) -> None:
+        """Restore the methods replaced by install."""
+        restore_methods(self.__originals)
+
+    def __count_callback(self, function: Callable) -> Callable:
+        """Return a wrapper that counts calls to the given order listener callback."""
+        callback_count = self.__callback_count
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            callback_count[0] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    async def __on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reply to any request with the statistics as JSON over HTTP."""
+        try:
+            await reader.readline()
+            body = json.dumps(self.statistics()).encode()
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                         % len(body))
+            writer.write(body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    @staticmethod
+    def __time(function: Callable, histogram: Histogram) -> Callable:
+        """Return a wrapper that records the time taken by each call to the given function."""
+        record = histogram.record
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(perf_counter_ns() - start)
+        return wrapper
+
+    def __time_book(self, function: Callable, name: str) -> Callable:
+        """Return a wrapper that records the time taken, and callbacks made, by an order book operation."""
+        callback_count = self.__callback_count
+        record_latency = self.histogram("book.%s" % name).record
+        record_callbacks = self.histogram("book.%s.callbacks" % name).record
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            callbacks = callback_count[0]
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record_latency(perf_counter_ns() - start)
+                record_callbacks(callback_count[0] - callbacks)
+        return wrapper
+
+    def __time_message(self, function: Callable) -> Callable:
+        """Return a wrapper that records the time taken to handle each type of message."""
+        records: Dict[int, Callable[[int], None]] = dict()
+
+        @functools.wraps(function)
+        def wrapper(connection, typ: int, data: bytes, start: int, length: int):
+            record = records.get(typ)
+            if record is None:
+                try:
+                    name = MessageType(typ).name
+                except ValueError:
+                    name = str(typ)
+                record = records[typ] = self.histogram("message.%s" % name).record
+            begin = perf_counter_ns()
+            try:
+                return function(connection, typ, data, start, length)
+            finally:
+                record(perf_counter_ns() - begin)
+        return wrapper
+
+
+class ReactionTimes:
+    """The time each auto-trader takes to send an order after seeing the order books.
+
+    The time at which each round of order book updates is published on the
+    information channel is noted, and the first insert order message (for
+    any instrument pair) that arrives from each auto-trader after that is
+    taken as its reaction. Both
+    times are taken by the exchange, so auto-traders need no changes. The
+    score board summary of each auto-trader is kept until its next reaction.
+    """
+
+    def __init__(self, filename: Optional[str] = None):
+        """Initialise a new instance of the ReactionTimes class."""
+        self.filename: Optional[str] = filename
+        self.histograms: Dict[str, Histogram] = dict()
+        self.logger = logging.getLogger("REACTION_TIMES")
+
+        self.__originals: List[Tuple[type, str, Callable]] = list()
+        self.__published: int = 0
+        self.__reacted: Dict[str, int] = dict()
+        self.__summaries: Dict[str, Tuple[int, float, float]] = dict()
+
+    def close(self) -> None:
+        """Remove the wrappers and write out the reaction times of each auto-trader."""
+        self.uninstall()
+
+        rows = [(name, *self.report(name)) for name in sorted(self.histograms)]
+        for row in rows:
+            self.logger.info("%s: count=%d min=%.1f mean=%.1f p50=%.1f p90=%.1f p99=%.1f max=%.1f", *row)
+        if self.filename is not None:
+            with open(self.filename, "w", newline="") as report_file:
+                csv_writer = csv.writer(report_file)
+                csv_writer.writerow(("Team", "Count", "Min", "Mean", "P50", "P90", "P99", "Max"))
+                csv_writer.writerows(rows)
+
+    def install(self) -> None:
+        """Replace ExecutionConnection.on_message with a wrapper that notes when orders arrive."""
+        replace_method(self.__originals, ExecutionConnection, "on_message", self.__watch_messages)
+
+    def on_book_updates_published(self, now: float) -> None:
+        """Called when order book updates have been published on the information channel."""
+        self.__published = perf_counter_ns()
+
+    def on_insert_order(self, name: str, received: int) -> None:
+        """Called when an insert order message is received from the named auto-trader."""
+        published = self.__published
+        if published and self.__reacted.get(name) != published:
+            self.__reacted[name] = published
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(received - published)
+            self.__summaries.pop(name, None)
+
+    def report(self, name: str) -> Tuple[int, float, float, float, float, float, float]:
+        """Return the count, min, mean, median, 90th percentile, 99th percentile and max in microseconds."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            return 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        values = (histogram.minimum, histogram.total / histogram.count, histogram.percentile(50.0),
+                  histogram.percentile(90.0), histogram.percentile(99.0), histogram.maximum)
+        return (histogram.count, *(round(value / 1000.0, 1) for value in values))
+
+    def score_board_summary(self, name: str) -> Tuple[int, float, float]:
+        """Return the count, median and 99th percentile in microseconds for the score board."""
+        summary = self.__summaries.get(name)
+        if summary is None:
+            count, _, _, median, _, p99, _ = self.report(name)
+            summary = self.__summaries[name] = (count, median, p99)
+        return summary
+
+    def uninstall(self) -> None:
+        """Restore the methods replaced by install."""
+        restore_methods(self.__originals)
+
+    def __watch_messages(self, function: Callable) -> Callable:
+        """Return a wrapper that notes the arrival of each insert order message."""
+        insert_order = MessageType.INSERT_ORDER
+        pair_insert_order = MessageType.PAIR_INSERT_ORDER
+        on_insert_order = self.on_insert_order
+
+        @functools.wraps(function)
+        def wrapper(connection, typ: int, data: bytes, start: int, length: int):
+            if (typ == insert_order or typ == pair_insert_order) and connection.competitor is not None:
+                on_insert_order(connection.competitor.name, perf_counter_ns())
+            return function(connection, typ, data, start, length)
+        return wrapper
@@ -18,19 +18,31 @@
 import asyncio
 import csv
 import enum
+import itertools
 import logging
+import mmap
 import queue
+import struct
 import threading
 
-from typing import Callable, Dict, List, Optional, TextIO
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 
 from .match_events import MatchEvents
 from .order_book import IOrderListener, Order, OrderBook
 from .types import Instrument, Lifespan, Side
 
+MARKET_EVENT_BLOCK_SIZE = 4096
+MARKET_EVENT_BLOCK_QUEUE_SIZE = 16
 MARKET_EVENT_QUEUE_SIZE = 1024
 INPUT_SCALING = 100
 
+# A compiled market data file is a header followed by one fixed-size record
+# per market event. Absent sides and lifespans are stored as -1.
+COMPILED_MARKET_DATA_MAGIC = b"RTGMD\x00\x00\x01"
+COMPILED_MARKET_DATA_HEADER = struct.Struct("<8sIQ")  # magic, input scaling, record count
+COMPILED_MARKET_DATA_RECORD = struct.Struct("<dBBbbqqq")  # time, instrument, operation, side, lifespan, order id,
+                                                          # volume, price
+
 
 class MarketEventOperation(enum.IntEnum):
     AMEND = 0
@@ -58,8 +70,36 @@ class MarketEvent(object):
         self.lifespan: Optional[Lifespan] = lifespan
 
 
+class MarketEventBlock(object):
+    """A run of consecutive market events held column by column."""
+    __slots__ = ("times", "instruments", "operations", "order_ids", "sides", "volumes", "prices", "lifespans")
+
+    INSTRUMENTS: Dict[str, Instrument] = {str(i.value): i for i in Instrument}
+    LIFESPANS: Dict[str, Optional[Lifespan]] = {"": None, **Lifespan.__members__}
+    OPERATIONS: Dict[str, MarketEventOperation] = dict(MarketEventOperation.__members__)
+    SIDES: Dict[str, Optional[Side]] = {"": None, **Side.__members__}
+
+    def __init__(self, rows: List[List[str]]):
+        """Initialise a new instance of the MarketEventBlock class from rows of a market data file."""
+        # time, instrument, operation, order_id, side, volume, price, lifespan
+        columns = tuple(zip(*rows)) or ((),) * 8
+        self.times: List[float] = list(map(float, columns[0]))
+        self.instruments: List[Instrument] = list(map(self.INSTRUMENTS.__getitem__, columns[1]))
+        self.operations: List[MarketEventOperation] = list(map(self.OPERATIONS.__getitem__, columns[2]))
+        self.order_ids: List[int] = list(map(int, columns[3]))
+        self.sides: List[Optional[Side]] = list(map(self.SIDES.__getitem__, columns[4]))
+        self.volumes: List[int] = [int(float(v)) if v else 0 for v in columns[5]]
+        self.prices: List[int] = [int(float(p) * INPUT_SCALING) if p else 0 for p in columns[6]]
+        self.lifespans: List[Optional[Lifespan]] = list(map(self.LIFESPANS.__getitem__, columns[7]))
+
+
 class MarketEventsReader(IOrderListener):
-    """A processor of market events read from a file."""
+    """A processor of market events read from a file.
+
+    The instruments in a market data file are always numbered as for the
+    first instrument pair; the orders are placed in the given books, which
+    may belong to any pair.
+    """
 
     def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, future_book: OrderBook, etf_book: OrderBook,
                  match_events: MatchEvents):
@@ -71,6 +111,14 @@ class MarketEventsReader(IOrderListener):
         self.filename: str = filename
         self.future_book: OrderBook = future_book
         self.future_orders: Dict[int, Order] = dict()
+
+        # Dispatch tables: the books and orders for each instrument in the
+        # market data file (indexed by Instrument) and the orders for each
+        # book (keyed by the book's instrument number)
+        self.books: Tuple[OrderBook, OrderBook] = (future_book, etf_book)
+        self.orders: Tuple[Dict[int, Order], Dict[int, Order]] = (self.future_orders, self.etf_orders)
+        self.book_orders: Dict[int, Dict[int, Order]] = {future_book.instrument: self.future_orders,
+                                                         etf_book.instrument: self.etf_orders}
         self.logger: logging.Logger = logging.getLogger("MARKET_EVENTS")
         self.match_events: MatchEvents = match_events
         self.queue: queue.Queue = queue.Queue(MARKET_EVENT_QUEUE_SIZE)
@@ -89,33 +137,25 @@ class MarketEventsReader(IOrderListener):
         """Called when the order is amended."""
         self.match_events.amend(now, "", order.client_order_id, -volume_removed)
         if order.remaining_volume == 0:
-            if order.instrument == Instrument.FUTURE:
-                del self.future_orders[order.client_order_id]
-            elif order.instrument == Instrument.ETF:
-                del self.etf_orders[order.client_order_id]
+            del self.book_orders[order.instrument][order.client_order_id]
 
     def on_order_cancelled(self, now: float, order: Order, volume_removed: int) -> None:
         """Called when the order is cancelled."""
         self.match_events.cancel(now, "", order.client_order_id, -volume_removed)
-        if order.instrument == Instrument.FUTURE and order.client_order_id in self.future_orders:
-            del self.future_orders[order.client_order_id]
-        elif order.instrument == Instrument.ETF and order.client_order_id in self.etf_orders:
-            del self.etf_orders[order.client_order_id]
+        self.book_orders[order.instrument].pop(order.client_order_id, None)
 
     def on_order_placed(self, now: float, order: Order) -> None:
         """Called when a good-for-day order is placed in the order book."""
-        if order.instrument == Instrument.FUTURE:
-            self.future_orders[order.client_order_id] = order
-        elif order.instrument == Instrument.ETF:
-            self.etf_orders[order.client_order_id] = order
+        self.book_orders[order.instrument][order.client_order_id] = order
 
     def on_order_filled(self, now: float, order: Order, price: int, volume: int, fee: int) -> None:
         """Called when the order is partially or completely filled."""
         if order.remaining_volume == 0:
-            if order.instrument == Instrument.FUTURE and order.client_order_id in self.future_orders:
-                del self.future_orders[order.client_order_id]
-            elif order.instrument == Instrument.ETF and order.client_order_id in self.etf_orders:
-                del self.etf_orders[order.client_order_id]
+            self.book_orders[order.instrument].pop(order.client_order_id, None)
+
+    def next_event_time(self) -> Optional[float]:
+        """Return the time of the next market event, or None if it is not yet known."""
+        return self.next_event.time if self.next_event is not None else None
 
     def on_reader_done(self, num_events: int) -> None:
         """Called when the market data reader thread is done."""
@@ -124,17 +164,15 @@ class MarketEventsReader(IOrderListener):
     def process_market_events(self, elapsed_time: float) -> None:
         """Process market events from the queue."""
         evt: MarketEvent = self.next_event
+        books = self.books
+        orders_by_instrument = self.orders
 
         while evt and evt.time < elapsed_time:
-            if evt.instrument == Instrument.FUTURE:
-                orders = self.future_orders
-                book = self.future_book
-            else:
-                orders = self.etf_orders
-                book = self.etf_book
+            book = books[evt.instrument]
+            orders = orders_by_instrument[evt.instrument]
 
             if evt.operation == MarketEventOperation.INSERT:
-                order = Order(evt.order_id, evt.instrument, evt.lifespan, evt.side, evt.price, evt.volume, self)
+                order = Order(evt.order_id, book.instrument, evt.lifespan, evt.side, evt.price, evt.volume, self)
                 self.match_events.insert(evt.time, "", order.client_order_id, order.instrument, order.side,
                                          abs(order.volume), order.price, order.lifespan)
                 book.insert(evt.time, order)
@@ -180,3 +218,232 @@ class MarketEventsReader(IOrderListener):
         else:
             self.reader_task = threading.Thread(target=self.reader, args=(market_data,), daemon=True, name="reader")
             self.reader_task.start()
+
+
+class BlockMarketEventsReader(MarketEventsReader):
+    """A processor of market events read from a file in blocks.
+
+    The reader thread parses the file a block of rows at a time and hands
+    whole blocks to the event loop, which then works through each block by
+    index. This avoids taking a lock and creating an object for every event.
+    """
+
+    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, future_book: OrderBook, etf_book: OrderBook,
+                 match_events: MatchEvents):
+        """Initialise a new instance of the BlockMarketEventsReader class."""
+        super().__init__(filename, loop, future_book, etf_book, match_events)
+        self.queue = queue.Queue(MARKET_EVENT_BLOCK_QUEUE_SIZE)
+
+        self.__block: Optional[MarketEventBlock] = MarketEventBlock([])
+        self.__index: int = 0
+
+    def next_event_time(self) -> Optional[float]:
+        """Return the time of the next market event, or None if it is not yet known."""
+        if self.__block is not None and self.__index < len(self.__block.times):
+            return self.__block.times[self.__index]
+        return None
+
+    def process_market_events(self, elapsed_time: float) -> None:
+        """Process market events from the current block, moving on to the next as needed."""
+        block: Optional[MarketEventBlock] = self.__block
+        index: int = self.__index
+        books = self.books
+        orders_by_instrument = self.orders
+
+        while block is not None:
+            times = block.times
+            size: int = len(times)
+
+            while index < size and times[index] < elapsed_time:
+                now: float = times[index]
+                instrument: Instrument = block.instruments[index]
+                book = books[instrument]
+                orders = orders_by_instrument[instrument]
+
+                operation: MarketEventOperation = block.operations[index]
+                order_id: int = block.order_ids[index]
+                if operation == MarketEventOperation.INSERT:
+                    order = Order(order_id, book.instrument, block.lifespans[index], block.sides[index],
+                                  block.prices[index], block.volumes[index], self)
+                    self.match_events.insert(now, "", order_id, order.instrument, order.side, abs(order.volume),
+                                             order.price, order.lifespan)
+                    book.insert(now, order)
+                elif order_id in orders:
+                    order = orders[order_id]
+                    if operation == MarketEventOperation.CANCEL:
+                        book.cancel(now, order)
+                    elif block.volumes[index] < 0:
+                        # operation must be MarketEventOperation.AMEND
+                        book.amend(now, order, order.volume + block.volumes[index])
+
+                index += 1
+
+            if index < size:
+                break
+
+            block = self.queue.get()
+            index = 0
+
+        self.__block = block
+        self.__index = index
+
+        if block is None:
+            for c in self.task_complete:
+                c(self)
+
+    def reader(self, market_data: TextIO) -> None:
+        """Read the market data file and place blocks of order events in the queue."""
+        fifo = self.queue
+
+        with market_data:
+            csv_reader = csv.reader(market_data)
+            next(csv_reader)  # Skip header row
+            rows = list(itertools.islice(csv_reader, MARKET_EVENT_BLOCK_SIZE))
+            while rows:
+                fifo.put(MarketEventBlock(rows))
+                rows = list(itertools.islice(csv_reader, MARKET_EVENT_BLOCK_SIZE))
+            fifo.put(None)
+
+        self.event_loop.call_soon_threadsafe(self.on_reader_done, csv_reader.line_num - 1)
+
+
+class CompiledMarketEventsReader(MarketEventsReader):
+    """A processor of market events read from a compiled market data file.
+
+    The file is memory-mapped and its records unpacked directly from the
+    mapping as they are needed, so there is no parsing and no reader thread.
+    """
+
+    LIFESPANS: Tuple[Optional[Lifespan], ...] = (Lifespan.FILL_AND_KILL, Lifespan.GOOD_FOR_DAY, None)
+    SIDES: Tuple[Optional[Side], ...] = (Side.SELL, Side.BUY, None)
+
+    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, future_book: OrderBook, etf_book: OrderBook,
+                 match_events: MatchEvents):
+        """Initialise a new instance of the CompiledMarketEventsReader class."""
+        super().__init__(filename, loop, future_book, etf_book, match_events)
+
+        self.__mmap: Optional[mmap.mmap] = None
+        self.__next_record: Optional[Tuple] = None
+        self.__records: Optional[Iterator[Tuple]] = None
+        self.__view: Optional[memoryview] = None
+
+    def __close(self) -> None:
+        """Release the memory-mapped file."""
+        self.__records = None
+        if self.__view is not None:
+            self.__view.release()
+            self.__view = None
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
+
+    def next_event_time(self) -> Optional[float]:
+        """Return the time of the next market event, or None if it is not yet known."""
+        return self.__next_record[0] if self.__next_record is not None else None
+
+    def process_market_events(self, elapsed_time: float) -> None:
+        """Process market events from the memory-mapped file."""
+        record: Optional[Tuple] = self.__next_record
+        records: Optional[Iterator[Tuple]] = self.__records
+        books = self.books
+        orders_by_instrument = self.orders
+        lifespans = self.LIFESPANS
+        sides = self.SIDES
+
+        while record is not None and record[0] < elapsed_time:
+            now, instrument, operation, side, lifespan, order_id, volume, price = record
+            book = books[instrument]
+            orders = orders_by_instrument[instrument]
+
+            if operation == MarketEventOperation.INSERT:
+                order = Order(order_id, book.instrument, lifespans[lifespan], sides[side], price, volume, self)
+                self.match_events.insert(now, "", order_id, order.instrument, order.side, abs(volume), price,
+                                         order.lifespan)
+                book.insert(now, order)
+            elif order_id in orders:
+                order = orders[order_id]
+                if operation == MarketEventOperation.CANCEL:
+                    book.cancel(now, order)
+                elif volume < 0:
+                    # operation must be MarketEventOperation.AMEND
+                    book.amend(now, order, order.volume + volume)
+
+            record = next(records, None)
+
+        self.__next_record = record
+        if record is None:
+            self.__close()
+            for c in self.task_complete:
+                c(self)
+
+    def start(self):
+        """Map the compiled market data file into memory."""
+        try:
+            with open(self.filename, "rb") as market_data:
+                self.__mmap = mmap.mmap(market_data.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, input_scaling, count = COMPILED_MARKET_DATA_HEADER.unpack_from(self.__mmap)
+            if magic != COMPILED_MARKET_DATA_MAGIC or input_scaling != INPUT_SCALING:
+                raise Exception("market data file was compiled for a different version of the simulator")
+            end: int = COMPILED_MARKET_DATA_HEADER.size + count * COMPILED_MARKET_DATA_RECORD.size
+            if end > len(self.__mmap):
+                raise Exception("market data file is truncated")
+        except Exception as e:
+            self.logger.error("failed to open market data file: filename='%s'" % self.filename, exc_info=e)
+            self.__close()
+            raise
+        else:
+            self.__view = memoryview(self.__mmap)[COMPILED_MARKET_DATA_HEADER.size:end]
+            self.__records = COMPILED_MARKET_DATA_RECORD.iter_unpack(self.__view)
+            # Prime the event pump with the first event
+            self.__next_record = next(self.__records, None)
+            self.logger.info("mapped compiled market data file containing %d market events", count)
+
+
+def compile_market_data(source: str, destination: str) -> int:
+    """Convert a market data CSV file into a compiled market data file and return the number of events."""
+    pack = COMPILED_MARKET_DATA_RECORD.pack
+    count: int = 0
+
+    with open(source, "r", newline="") as market_data, open(destination, "wb") as compiled:
+        compiled.write(COMPILED_MARKET_DATA_HEADER.pack(COMPILED_MARKET_DATA_MAGIC, INPUT_SCALING, 0))
+        csv_reader = csv.reader(market_data)
+        next(csv_reader)  # Skip header row
+        rows = list(itertools.islice(csv_reader, MARKET_EVENT_BLOCK_SIZE))
+        while rows:
+            block = MarketEventBlock(rows)
+            compiled.write(b"".join(pack(*event) for event in zip(
+                block.times, block.instruments, block.operations,
+                (-1 if s is None else s for s in block.sides), (-1 if l is None else l for l in block.lifespans),
+                block.order_ids, block.volumes, block.prices)))
+            count += len(rows)
+            rows = list(itertools.islice(csv_reader, MARKET_EVENT_BLOCK_SIZE))
+        compiled.seek(0)
+        compiled.write(COMPILED_MARKET_DATA_HEADER.pack(COMPILED_MARKET_DATA_MAGIC, INPUT_SCALING, count))
+
+    return count
+
+
+def is_compiled_market_data(filename: str) -> bool:
+    """Return True if the named file is a compiled market data file."""
+    try:
+        with open(filename, "rb") as market_data:
+            return market_data.read(len(COMPILED_MARKET_DATA_MAGIC)) == COMPILED_MARKET_DATA_MAGIC
+    except OSError:
+        return False
+
+
+def create_market_events_reader(filename: str, block_reader: bool, loop: asyncio.AbstractEventLoop,
+                                future_book: OrderBook, etf_book: OrderBook,
+                                match_events: MatchEvents) -> MarketEventsReader:
+    """Return a market events reader suitable for the named market data file.
+
+    Compiled market data files are always read by a CompiledMarketEventsReader;
+    CSV files are read in blocks if block_reader is True, otherwise row by row.
+    """
+    if is_compiled_market_data(filename):
+        reader_type = CompiledMarketEventsReader
+    elif block_reader:
+        reader_type = BlockMarketEventsReader
+    else:
+        reader_type = MarketEventsReader
+    return reader_type(filename, loop, future_book, etf_book, match_events)
@@ -15,16 +15,36 @@
 #     You should have received a copy of the GNU Affero General Public
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
+import array
 import asyncio
 import csv
 import enum
 import logging
-import queue
+import struct
+import sys
 import threading
+import zlib
 
-from typing import Any, Callable, List, Optional, TextIO, Union
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 from .types import Instrument, Lifespan, Side
+from .writer_queue import WriterQueue
+
+MATCH_EVENT_BATCH_SIZE = 4096
+MATCH_EVENTS_HEADER = ("Time,Competitor,Operation,OrderId,Instrument,Side,Volume,Price,Lifespan,Fee").split(",")
+
+# A columnar match events file is the magic number followed by batches of
+# events. Each batch is a header, the competitor names first seen in the
+# batch (each a length followed by UTF-8 bytes) and then the zlib-compressed
+# columns, each a little-endian array, one after the other. Absent
+# instruments, sides and lifespans are stored as -1, absent prices and fees
+# as zero. Prices are stored as doubles and read back as integers when they
+# are whole numbers.
+COLUMNAR_MATCH_EVENTS_MAGIC = b"RTGME\x00\x00\x01"
+COLUMNAR_MATCH_EVENTS_BATCH = struct.Struct("<III")  # event count, new competitor name count, compressed size
+COLUMNAR_MATCH_EVENTS_NAME = struct.Struct("<H")  # length of a competitor name
+COLUMNAR_MATCH_EVENTS_COLUMNS = ("times", "competitors", "operations", "order_ids", "instruments", "sides", "volumes",
+                                 "prices", "lifespans", "fees")
 
 
 class MatchEventOperation(enum.IntEnum):
@@ -60,7 +80,7 @@ class MatchEvent:
                      self.competitor,
                      MatchEvent.OPERATION_NAMES[self.operation],
                      self.order_id,
-                     self.instrument.value if self.instrument is not None else None,
+                     int(self.instrument) if self.instrument is not None else None,
                      "AB"[self.side.value] if self.side is not None else None,
                      self.volume,
                      self.price if self.price is not None else None,
@@ -93,16 +113,17 @@ class MatchEvents:
     def fill(self, now: float, name: str, order_id: int, instrument: Instrument, side: Side, price: int, diff: int,
              fee: int) -> None:
         """Create a new fill event."""
+        event = MatchEvent(now, name, MatchEventOperation.TRADE, order_id, instrument, side, diff, price, None, fee)
         for callback in self.event_occurred:
-            callback(MatchEvent(now, name, MatchEventOperation.TRADE, order_id, instrument, side, diff, price,
-                                None, fee))
+            callback(event)
 
     def hedge(self, now: float, name: str, order_id: int, instrument: Instrument, side: Side, price: float,
               volume: int) -> None:
-        """Create a new fill event."""
+        """Create a new hedge event."""
+        event = MatchEvent(now, name, MatchEventOperation.HEDGE, order_id, instrument, side, volume, price, None,
+                           None)
         for callback in self.event_occurred:
-            callback(MatchEvent(now, name, MatchEventOperation.HEDGE, order_id, instrument, side, volume, price,
-                                None, None))
+            callback(event)
 
     def insert(self, now: float, name: str, order_id: int, instrument: Instrument, side: Side, volume: int,
                price: int, lifespan: Lifespan) -> None:
@@ -116,17 +137,20 @@ class MatchEvents:
 class MatchEventsWriter:
     """A processor of match events that it writes to a file."""
 
-    def __init__(self, match_events: MatchEvents, filename: str, loop: asyncio.AbstractEventLoop):
+    def __init__(self, match_events: MatchEvents, filename: str, loop: asyncio.AbstractEventLoop,
+                 fifo: Optional[WriterQueue] = None):
         """Initialise a new instance of the MatchEvents class."""
         self.event_loop: asyncio.AbstractEventLoop = loop
         self.filename: str = filename
         self.finished: bool = False
         self.logger = logging.getLogger("MATCH_EVENTS")
         self.match_events: MatchEvents = match_events
-        self.queue: queue.Queue = queue.Queue()
+        self.queue: WriterQueue = fifo if fifo is not None else WriterQueue("MATCH_EVENTS")
         self.writer_task: Optional[threading.Thread] = None
 
-        match_events.event_occurred.append(self.queue.put)
+        self.__pending: List[MatchEvent] = list()
+
+        match_events.event_occurred.append(self.on_match_event)
 
         # Callbacks
         self.task_complete: List[Callable[[Any], None]] = list()
@@ -137,17 +161,33 @@ class MatchEventsWriter:
             self.finish()
         self.writer_task.join()
 
+    def __flush(self) -> None:
+        """Hand the match events gathered during this loop iteration to the writer thread."""
+        if self.__pending:
+            self.queue.put(self.__pending)
+            self.__pending = list()
+
     def finish(self) -> None:
         """Indicate the the series of events is complete."""
-        self.match_events.event_occurred.remove(self.queue.put)
+        self.match_events.event_occurred.remove(self.on_match_event)
+        self.__flush()
         self.queue.put(None)
         self.finished = True
 
+    def on_match_event(self, event: MatchEvent) -> None:
+        """Called when a match event occurs."""
+        self.__pending.append(event)
+        if len(self.__pending) == 1:
+            self.event_loop.call_soon(self.__flush)
+
     def on_writer_done(self, num_events: int) -> None:
         """Called when the match event writer thread is done."""
         for c in self.task_complete:
             c(self)
-        self.logger.info("writer thread complete after processing %d match events", num_events)
+        statistics = self.queue.statistics()
+        self.logger.info("writer thread complete after processing %d match events: high_water_mark=%d spilled=%d "
+                         "dropped=%d max_lag=%.6f", num_events, statistics.high_water_mark, statistics.spilled,
+                         statistics.dropped, statistics.max_lag)
 
     def start(self):
         """Start the match events writer thread"""
@@ -169,14 +209,195 @@ class MatchEventsWriter:
         try:
             with match_events_file:
                 csv_writer = csv.writer(match_events_file)
-                csv_writer.writerow(("Time,Competitor,Operation,OrderId,Instrument,Side,Volume,Price,Lifespan,"
-                                     "Fee").split(','))
-
-                evt: MatchEvent = fifo.get()
-                while evt is not None:
-                    count += 1
-                    csv_writer.writerow(evt)
-                    evt = fifo.get()
+                csv_writer.writerow(MATCH_EVENTS_HEADER)
+
+                batch: Optional[List[MatchEvent]] = fifo.get()
+                while batch is not None:
+                    count += len(batch)
+                    csv_writer.writerows(batch)
+                    batch = fifo.get()
         finally:
+            fifo.close()
             if not self.event_loop.is_closed():
                 self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
+
+
+class MatchEventColumns:
+    """A series of match events held as one typed array per field."""
+
+    LIFESPANS: Tuple[Optional[Lifespan], ...] = (Lifespan.FILL_AND_KILL, Lifespan.GOOD_FOR_DAY, None)
+    OPERATIONS: Tuple[MatchEventOperation, ...] = tuple(MatchEventOperation)
+    SIDES: Tuple[Optional[Side], ...] = (Side.SELL, Side.BUY, None)
+
+    def __init__(self):
+        """Initialise a new instance of the MatchEventColumns class."""
+        self.names: List[str] = list()
+        self.times: array.array = array.array("d")
+        self.competitors: array.array = array.array("H")
+        self.operations: array.array = array.array("B")
+        self.order_ids: array.array = array.array("q")
+        self.instruments: array.array = array.array("b")
+        self.sides: array.array = array.array("b")
+        self.volumes: array.array = array.array("q")
+        self.prices: array.array = array.array("d")
+        self.lifespans: array.array = array.array("b")
+        self.fees: array.array = array.array("q")
+
+    def __iter__(self) -> Iterator[MatchEvent]:
+        """Return an iterator over the match events."""
+        names = self.names
+        lifespans = self.LIFESPANS
+        operations = self.OPERATIONS
+        sides = self.SIDES
+        for now, competitor, operation, order_id, instrument, side, volume, price, lifespan, fee in zip(
+                self.times, self.competitors, self.operations, self.order_ids, self.instruments, self.sides,
+                self.volumes, self.prices, self.lifespans, self.fees):
+            if operation == MatchEventOperation.AMEND or operation == MatchEventOperation.CANCEL:
+                price = None
+            elif price.is_integer():
+                price = int(price)
+            if operation != MatchEventOperation.TRADE:
+                fee = None
+            yield MatchEvent(now, names[competitor], operations[operation], order_id,
+                             instrument if instrument >= 0 else None, sides[side], volume, price, lifespans[lifespan],
+                             fee)
+
+    def __len__(self) -> int:
+        """Return the number of match events."""
+        return len(self.times)
+
+
+class ColumnarMatchEventsWriter(MatchEventsWriter):
+    """A processor of match events that it writes to a columnar match events file.
+
+    Events are gathered into typed columns which are written out in batches
+    of MATCH_EVENT_BATCH_SIZE events, so that nothing is formatted as text
+    while the match is running.
+    """
+
+    def start(self):
+        """Start the match events writer thread"""
+        try:
+            match_events_file = open(self.filename, "wb")
+        except IOError as e:
+            self.logger.error("failed to open match events file: filename=%s", self.filename, exc_info=e)
+            raise
+        else:
+            self.writer_task = threading.Thread(target=self.writer, args=(match_events_file,), daemon=False,
+                                                name="match_events")
+            self.writer_task.start()
+
+    def writer(self, match_events_file: BinaryIO) -> None:
+        """Fetch match events from a queue and write them to a file in batches"""
+        count = 0
+        fifo = self.queue
+        columns = MatchEventColumns()
+        name_index: Dict[str, int] = dict()
+        names_written = 0
+
+        try:
+            with match_events_file:
+                match_events_file.write(COLUMNAR_MATCH_EVENTS_MAGIC)
+
+                batch: Optional[List[MatchEvent]] = fifo.get()
+                while batch is not None:
+                    count += len(batch)
+                    for evt in batch:
+                        competitor = name_index.get(evt.competitor)
+                        if competitor is None:
+                            competitor = name_index[evt.competitor] = len(columns.names)
+                            columns.names.append(evt.competitor)
+                        columns.times.append(evt.time)
+                        columns.competitors.append(competitor)
+                        columns.operations.append(evt.operation)
+                        columns.order_ids.append(evt.order_id)
+                        columns.instruments.append(evt.instrument if evt.instrument is not None else -1)
+                        columns.sides.append(evt.side if evt.side is not None else -1)
+                        columns.volumes.append(evt.volume)
+                        columns.prices.append(evt.price if evt.price is not None else 0)
+                        columns.lifespans.append(evt.lifespan if evt.lifespan is not None else -1)
+                        columns.fees.append(evt.fee if evt.fee is not None else 0)
+                        if len(columns) == MATCH_EVENT_BATCH_SIZE:
+                            names_written = write_match_event_batch(match_events_file, columns, names_written)
+                    batch = fifo.get()
+
+                write_match_event_batch(match_events_file, columns, names_written)
+        finally:
+            fifo.close()
+            if not self.event_loop.is_closed():
+                self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
+
+
+def write_match_event_batch(match_events_file: BinaryIO, columns: MatchEventColumns, names_written: int) -> int:
+    """Write the given columns as one batch, empty them and return the number of names written so far."""
+    count = len(columns)
+    new_names = [name.encode() for name in columns.names[names_written:]]
+    parts: List[bytes] = list()
+    for attribute in COLUMNAR_MATCH_EVENTS_COLUMNS:
+        column: array.array = getattr(columns, attribute)
+        if sys.byteorder == "big":
+            column.byteswap()
+        parts.append(column.tobytes())
+        del column[:]
+    body = zlib.compress(b"".join(parts), 1)
+
+    match_events_file.write(COLUMNAR_MATCH_EVENTS_BATCH.pack(count, len(new_names), len(body)))
+    for name in new_names:
+        match_events_file.write(COLUMNAR_MATCH_EVENTS_NAME.pack(len(name)))
+        match_events_file.write(name)
+    match_events_file.write(body)
+    return names_written + len(new_names)
+
+
+def read_match_events(filename: str) -> MatchEventColumns:
+    """Read a columnar match events file into columns."""
+    columns = MatchEventColumns()
+    with open(filename, "rb") as match_events_file:
+        data = memoryview(match_events_file.read())
+
+    if data[:len(COLUMNAR_MATCH_EVENTS_MAGIC)] != COLUMNAR_MATCH_EVENTS_MAGIC:
+        raise Exception("'%s' is not a columnar match events file" % filename)
+
+    offset = len(COLUMNAR_MATCH_EVENTS_MAGIC)
+    while offset < len(data):
+        count, name_count, size = COLUMNAR_MATCH_EVENTS_BATCH.unpack_from(data, offset)
+        offset += COLUMNAR_MATCH_EVENTS_BATCH.size
+        for _ in range(name_count):
+            length, = COLUMNAR_MATCH_EVENTS_NAME.unpack_from(data, offset)
+            offset += COLUMNAR_MATCH_EVENTS_NAME.size
+            columns.names.append(str(data[offset:offset + length], "utf-8"))
+            offset += length
+        if offset + size > len(data):
+            raise Exception("match events file is truncated")
+        body = memoryview(zlib.decompress(data[offset:offset + size]))
+        offset += size
+        start = 0
+        for attribute in COLUMNAR_MATCH_EVENTS_COLUMNS:
+            column: array.array = getattr(columns, attribute)
+            end = start + count * column.itemsize
+            column.frombytes(body[start:end])
+            start = end
+
+    if sys.byteorder == "big":
+        for attribute in COLUMNAR_MATCH_EVENTS_COLUMNS:
+            getattr(columns, attribute).byteswap()
+    return columns
+
+
+def is_columnar_match_events(filename: str) -> bool:
+    """Return True if the named file is a columnar match events file."""
+    try:
+        with open(filename, "rb") as match_events_file:
+            return match_events_file.read(len(COLUMNAR_MATCH_EVENTS_MAGIC)) == COLUMNAR_MATCH_EVENTS_MAGIC
+    except OSError:
+        return False
+
+
+def convert_match_events(source: str, destination: str) -> int:
+    """Convert a columnar match events file into a match events CSV file and return the number of events."""
+    columns = read_match_events(source)
+    with open(destination, "w", newline="") as match_events_file:
+        csv_writer = csv.writer(match_events_file)
+        csv_writer.writerow(MATCH_EVENTS_HEADER)
+        csv_writer.writerows(columns)
+    return len(columns)
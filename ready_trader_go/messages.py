@@ -37,11 +37,22 @@ class MessageType(enum.IntEnum):
     LOGIN = 7
     ORDER_FILLED = 8
     ORDER_STATUS = 9
+    PAIR_HEDGE_ORDER = 17
+    PAIR_INSERT_ORDER = 18
+    LOCKSTEP = 19
+    IDLE = 20
 
     # Information messages
     ORDER_BOOK_UPDATE = 10
     TRADE_TICKS = 11
 
+    # Order feed messages
+    ORDER_ADDED = 12
+    ORDER_DELETED = 13
+    ORDER_EXECUTED = 14
+    ORDER_MODIFIED = 15
+    ORDER_BOOK_SNAPSHOT = 16
+
     # Heads Up Display messages
     AMEND_EVENT = 100
     CANCEL_EVENT = 101
@@ -51,6 +62,22 @@ class MessageType(enum.IntEnum):
     TRADE_EVENT = 105
 
 
+def book_message(depth: int) -> struct.Struct:
+    """Return the struct for the prices and volumes in an order book or trade ticks message of the given depth."""
+    return struct.Struct("!%dI" % (4 * depth))
+
+
+def book_part(depth: int) -> struct.Struct:
+    """Return the struct for one part (e.g. the ask prices) of an order book or trade ticks message."""
+    return struct.Struct("!%dI" % depth)
+
+
+def book_depth(length: int) -> int:
+    """Return the depth of an order book or trade ticks message of the given length, or zero if it is invalid."""
+    depth, remainder = divmod(length - ORDER_BOOK_HEADER_SIZE, BOOK_LEVEL_SIZE)
+    return depth if depth > 0 and remainder == 0 else 0
+
+
 # Standard message header: message length (2 bytes) and type (1 byte)
 HEADER = struct.Struct("!HB")  # Length, message type
 
@@ -58,22 +85,36 @@ HEADER = struct.Struct("!HB")  # Length, message type
 AMEND_MESSAGE = struct.Struct("!II")  # Client order id and new volume
 CANCEL_MESSAGE = struct.Struct("!I")  # Client order id
 HEDGE_MESSAGE = struct.Struct("!IBII")  # Client order id, side, price, volume
+IDLE_MESSAGE = struct.Struct("!QI")  # Information frames read and execution messages received
 INSERT_MESSAGE = struct.Struct("!IBIIB")  # Client order id, side, price, volume and lifespan
 LOGIN_MESSAGE = struct.Struct("!50s50s")  # Name, secret
+PAIR_HEDGE_MESSAGE = struct.Struct("!IBIIB")  # Client order id, side, price, volume and instrument pair
+PAIR_INSERT_MESSAGE = struct.Struct("!IBIIBB")  # Client order id, side, price, volume, lifespan and instrument pair
 
 # Matching engine to auto-trader messages
 ERROR_MESSAGE = struct.Struct("!I50s")  # message
 HEDGE_FILLED_MESSAGE = struct.Struct("!III")  # Client order id, price, volume
 ORDER_BOOK_HEADER = struct.Struct("!BI")  # Instrument and sequence number
-ORDER_BOOK_MESSAGE = struct.Struct("!%dI" % (4 * order_book.TOP_LEVEL_COUNT))  # Prices & volumes for best bids & asks
+ORDER_BOOK_MESSAGE = book_message(order_book.TOP_LEVEL_COUNT)  # Prices & volumes for best bids & asks
 ORDER_FILLED_MESSAGE = struct.Struct("!III")  # Client order id, price, volume
 ORDER_STATUS_MESSAGE = struct.Struct("!IIIi")  # Client order id, fill volume, remaining volume and fees
 TRADE_TICKS_HEADER = struct.Struct("!BI")  # Instrument and sequence number
-TRADE_TICKS_MESSAGE = struct.Struct("!%dI" % (4 * order_book.TOP_LEVEL_COUNT))  # Prices & volumes for best bids & asks
-
-# Helpers for decoding order book and trade ticks messages
-BOOK_PART = struct.Struct("!%dI" % order_book.TOP_LEVEL_COUNT)
-TICKS_PART = struct.Struct("!%dI" % order_book.TOP_LEVEL_COUNT)
+TRADE_TICKS_MESSAGE = book_message(order_book.TOP_LEVEL_COUNT)  # Prices & volumes for best bids & asks
+
+# Helpers for decoding order book and trade ticks messages. These are for
+# the default depth; the depth used by the exchange is configurable, so the
+# structs for other depths are created at startup with the functions above.
+BOOK_PART = book_part(order_book.TOP_LEVEL_COUNT)
+TICKS_PART = book_part(order_book.TOP_LEVEL_COUNT)
+BOOK_LEVEL_SIZE: int = book_message(1).size  # Ask price and volume and bid price and volume for one level
+
+# Matching engine to auto-trader order feed messages
+ORDER_ADDED_MESSAGE = struct.Struct("!BIIBII")  # Instrument, sequence number, order id, side, price, volume
+ORDER_DELETED_MESSAGE = struct.Struct("!BII")  # Instrument, sequence number, order id
+ORDER_EXECUTED_MESSAGE = struct.Struct("!BIII")  # Instrument, sequence number, order id, volume
+ORDER_MODIFIED_MESSAGE = struct.Struct("!BIII")  # Instrument, sequence number, order id, remaining volume
+SNAPSHOT_HEADER = struct.Struct("!BIHH")  # Instrument, sequence number, part number, part count
+SNAPSHOT_ORDER = struct.Struct("!IBII")  # Order id, side, price, remaining volume (repeated)
 
 # Matching engine to HUD messages
 AMEND_EVENT_MESSAGE = struct.Struct("!dIIi")  # Time, team id, order id, volume delta
@@ -89,11 +130,15 @@ HEADER_SIZE: int = HEADER.size
 AMEND_MESSAGE_SIZE: int = HEADER.size + AMEND_MESSAGE.size
 CANCEL_MESSAGE_SIZE: int = HEADER.size + CANCEL_MESSAGE.size
 HEDGE_MESSAGE_SIZE: int = HEADER.size + HEDGE_MESSAGE.size
+IDLE_MESSAGE_SIZE: int = HEADER.size + IDLE_MESSAGE.size
 INSERT_MESSAGE_SIZE: int = HEADER.size + INSERT_MESSAGE.size
 LOGIN_MESSAGE_SIZE: int = HEADER.size + LOGIN_MESSAGE.size
+PAIR_HEDGE_MESSAGE_SIZE: int = HEADER.size + PAIR_HEDGE_MESSAGE.size
+PAIR_INSERT_MESSAGE_SIZE: int = HEADER.size + PAIR_INSERT_MESSAGE.size
 
 ERROR_MESSAGE_SIZE: int = HEADER.size + ERROR_MESSAGE.size
 HEDGE_FILLED_MESSAGE_SIZE: int = HEADER.size + HEDGE_FILLED_MESSAGE.size
+LOCKSTEP_MESSAGE_SIZE: int = HEADER.size  # The lockstep message has no body
 ORDER_BOOK_HEADER_SIZE: int = HEADER.size + ORDER_BOOK_HEADER.size
 ORDER_BOOK_MESSAGE_SIZE: int = ORDER_BOOK_HEADER_SIZE + ORDER_BOOK_MESSAGE.size
 ORDER_FILLED_MESSAGE_SIZE: int = HEADER.size + ORDER_FILLED_MESSAGE.size
@@ -101,6 +146,12 @@ ORDER_STATUS_MESSAGE_SIZE: int = HEADER.size + ORDER_STATUS_MESSAGE.size
 TRADE_TICKS_HEADER_SIZE: int = HEADER.size + TRADE_TICKS_HEADER.size
 TRADE_TICKS_MESSAGE_SIZE: int = TRADE_TICKS_HEADER_SIZE + TRADE_TICKS_MESSAGE.size
 
+ORDER_ADDED_MESSAGE_SIZE: int = HEADER.size + ORDER_ADDED_MESSAGE.size
+ORDER_DELETED_MESSAGE_SIZE: int = HEADER.size + ORDER_DELETED_MESSAGE.size
+ORDER_EXECUTED_MESSAGE_SIZE: int = HEADER.size + ORDER_EXECUTED_MESSAGE.size
+ORDER_MODIFIED_MESSAGE_SIZE: int = HEADER.size + ORDER_MODIFIED_MESSAGE.size
+SNAPSHOT_HEADER_SIZE: int = HEADER.size + SNAPSHOT_HEADER.size
+
 AMEND_EVENT_MESSAGE_SIZE: int = HEADER.size + AMEND_EVENT_MESSAGE.size
 CANCEL_EVENT_MESSAGE_SIZE: int = HEADER.size + CANCEL_EVENT_MESSAGE.size
 INSERT_EVENT_MESSAGE_SIZE: int = HEADER.size + INSERT_EVENT_MESSAGE.size
@@ -108,19 +159,40 @@ HEDGE_EVENT_MESSAGE_SIZE: int = HEADER.size + HEDGE_EVENT_MESSAGE.size
 TRADE_EVENT_MESSAGE_SIZE: int = HEADER.size + TRADE_EVENT_MESSAGE.size
 LOGIN_EVENT_MESSAGE_SIZE: int = HEADER.size + LOGIN_EVENT_MESSAGE.size
 
+# The receive buffer of a connection always has room for at least one
+# message of the maximum length (65,535 bytes).
+RECEIVE_BUFFER_SIZE: int = 2 ** 17
+MINIMUM_RECEIVE_SPACE: int = 2 ** 16
 
-class Connection(asyncio.Protocol):
-    """A stream-based network connection."""
+
+class Connection(asyncio.BufferedProtocol):
+    """A stream-based network connection.
+
+    Data is received directly into a preallocated buffer. Complete messages
+    are passed to on_message in place and any trailing partial message is
+    moved to the front of the buffer when the space after it runs low.
+    """
 
     def __init__(self):
         """Initialize a new instance of the Connection class."""
         self._closing: bool = False
-        self._data: bytes = b""
         self._file_number: int = 0
         self._connection_transport: Optional[asyncio.Transport] = None
 
         self.__logger = logging.getLogger("CONNECTION")
 
+        # Received data that has not yet been handled lies between the
+        # receive start and end positions.
+        self._receive_buffer: bytearray = bytearray(RECEIVE_BUFFER_SIZE)
+        self._receive_view: memoryview = memoryview(self._receive_buffer)
+        self._receive_end: int = 0
+        self._receive_start: int = 0
+
+    @property
+    def file_number(self) -> int:
+        """Return the file number of the underlying socket."""
+        return self._file_number
+
     def close(self):
         """Close the connection."""
         self._closing = True
@@ -144,26 +216,41 @@ class Connection(asyncio.Protocol):
                            *(transport.get_extra_info("peername") or ("unknown", 0)))
         self._connection_transport = transport
 
-    def data_received(self, data: bytes) -> None:
-        """Called when data is received."""
-        if self._data:
-            self._data += data
-        else:
-            self._data = data
-
-        upto: int = 0
-        data_length: int = len(self._data)
-
-        while not self._closing and upto < data_length - HEADER_SIZE:
-            length, typ = HEADER.unpack_from(self._data, upto)
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when data has been received into the receive buffer."""
+        data: bytearray = self._receive_buffer
+        upto: int = self._receive_start
+        data_length: int = self._receive_end + nbytes
+
+        while not self._closing and upto <= data_length - HEADER_SIZE:
+            length, typ = HEADER.unpack_from(data, upto)
+            if length < HEADER_SIZE:
+                self.__logger.warning("fd=%d received malformed message: length=%d type=%d", self._file_number,
+                                      length, typ)
+                self.close()
+                break
             if upto + length > data_length:
                 break
 
-            self.on_message(typ, self._data, upto + HEADER_SIZE, length)
+            self.on_message(typ, data, upto + HEADER_SIZE, length)
 
             upto += length
 
-        self._data = self._data[upto:]
+        if upto == data_length:
+            self._receive_start = self._receive_end = 0
+        else:
+            self._receive_start = upto
+            self._receive_end = data_length
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Return the part of the receive buffer into which new data should be placed."""
+        if RECEIVE_BUFFER_SIZE - self._receive_end < MINIMUM_RECEIVE_SPACE:
+            # Move the partial message at the end of the buffer to the front
+            partial_length: int = self._receive_end - self._receive_start
+            self._receive_buffer[:partial_length] = self._receive_view[self._receive_start:self._receive_end].tobytes()
+            self._receive_start = 0
+            self._receive_end = partial_length
+        return self._receive_view[self._receive_end:]
 
     def on_message(self, typ: int, data: bytes, start: int, length: int) -> None:
         """Callback when an individual message has been received."""
@@ -25,7 +25,7 @@ from .types import Instrument, Lifespan, Side
 
 MINIMUM_BID = 1
 MAXIMUM_ASK = 2 ** 31 - 1
-TOP_LEVEL_COUNT = 5
+TOP_LEVEL_COUNT = 5  # Default number of price levels reported on each side of a book
 
 
 class IOrderListener(object):
@@ -74,13 +74,24 @@ class Order(object):
 
 
 class OrderBook(object):
-    """A collection of orders arranged by the price-time priority principle."""
+    """A collection of orders arranged by the price-time priority principle.
 
-    def __init__(self, instrument: Instrument, maker_fee: float, taker_fee: float):
+    The depth is the number of price levels on each side of the book that
+    are reported by top_levels and trade_ticks. The version number is
+    incremented whenever one of the top levels changes, and only then.
+
+    The order signals report every change to the orders resting in the
+    book: an order being placed, amended, cancelled or filled by an
+    incoming order (whose own fills are not reported by order_filled).
+    """
+
+    def __init__(self, instrument: Instrument, maker_fee: float, taker_fee: float, depth: int = TOP_LEVEL_COUNT):
         """Initialise a new instance of the OrderBook class."""
+        self.depth: int = depth
         self.instrument: Instrument = instrument
         self.maker_fee: float = maker_fee
         self.taker_fee: float = taker_fee
+        self.version: int = 0
 
         self.__ask_prices: List[int] = []
         self.__ask_ticks: Dict[int, int] = collections.defaultdict(int)
@@ -91,14 +102,18 @@ class OrderBook(object):
         self.__total_volumes: Dict[int, int] = {}
 
         # Signals
+        self.order_amended: List[Callable[[Any, Order, int], None]] = list()
+        self.order_cancelled: List[Callable[[Any, Order, int], None]] = list()
+        self.order_filled: List[Callable[[Any, Order, int], None]] = list()
+        self.order_placed: List[Callable[[Any, Order], None]] = list()
         self.trade_occurred: List[Callable[[Any], None]] = list()
 
     def __str__(self):
         """Return a string representation of this order book."""
-        ask_prices = [0] * TOP_LEVEL_COUNT
-        ask_volumes = [0] * TOP_LEVEL_COUNT
-        bid_prices = [0] * TOP_LEVEL_COUNT
-        bid_volumes = [0] * TOP_LEVEL_COUNT
+        ask_prices = [0] * self.depth
+        ask_volumes = [0] * self.depth
+        bid_prices = [0] * self.depth
+        bid_volumes = [0] * self.depth
         self.top_levels(ask_prices, ask_volumes, bid_prices, bid_volumes)
         return ("BidVol\tPrice\tAskVol\n"
                 + "\n".join("\t%dc\t%6d" % (p, v) for p, v in zip(reversed(ask_prices), reversed(ask_volumes)) if p)
@@ -114,6 +129,8 @@ class OrderBook(object):
             order.remaining_volume -= diff
             if order.listener:
                 order.listener.on_order_amended(now, order, diff)
+            for callback in self.order_amended:
+                callback(self, order, diff)
 
     def best_ask(self) -> Optional[int]:
         """Return the current best ask price, or None if there are no ask orders."""
@@ -131,6 +148,8 @@ class OrderBook(object):
             order.remaining_volume = 0
             if order.listener:
                 order.listener.on_order_cancelled(now, order, remaining)
+            for callback in self.order_cancelled:
+                callback(self, order, remaining)
 
     def insert(self, now: float, order: Order) -> None:
         """Insert a new order into this order book."""
@@ -172,11 +191,18 @@ class OrderBook(object):
 
         self.__levels[price].append(order)
         self.__total_volumes[price] += order.remaining_volume
+        if self.__is_top_level(price, order.side):
+            self.version += 1
 
         if order.listener:
             order.listener.on_order_placed(now, order)
+        for callback in self.order_placed:
+            callback(self, order)
 
     def remove_volume_from_level(self, price: int, volume: int, side: Side) -> None:
+        if volume and self.__is_top_level(price, side):
+            self.version += 1
+
         if self.__total_volumes[price] == volume:
             del self.__levels[price]
             del self.__total_volumes[price]
@@ -187,28 +213,36 @@ class OrderBook(object):
         else:
             self.__total_volumes[price] -= volume
 
+    def __is_top_level(self, price: int, side: Side) -> bool:
+        """Return True if the given price level is one of the top levels on its side of the book."""
+        depth: int = self.depth
+        if side == Side.SELL:
+            return len(self.__ask_prices) <= depth or -price >= self.__ask_prices[-depth]
+        return len(self.__bid_prices) <= depth or price >= self.__bid_prices[-depth]
+
     def top_levels(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
                    bid_volumes: List[int]) -> None:
         """Populate the supplied lists with the top levels for this book."""
+        depth: int = self.depth
         i = 0
         j = len(self.__ask_prices) - 1
-        while i < TOP_LEVEL_COUNT and j >= 0:
+        while i < depth and j >= 0:
             ask_prices[i] = -self.__ask_prices[j]
             ask_volumes[i] = self.__total_volumes[ask_prices[i]]
             i += 1
             j -= 1
-        while i < TOP_LEVEL_COUNT:
+        while i < depth:
             ask_prices[i] = ask_volumes[i] = 0
             i += 1
 
         i = 0
         j = len(self.__bid_prices) - 1
-        while i < TOP_LEVEL_COUNT and j >= 0:
+        while i < depth and j >= 0:
             bid_prices[i] = self.__bid_prices[j]
             bid_volumes[i] = self.__total_volumes[bid_prices[i]]
             i += 1
             j -= 1
-        while i < TOP_LEVEL_COUNT:
+        while i < depth:
             bid_prices[i] = bid_volumes[i] = 0
             i += 1
 
@@ -258,9 +292,12 @@ class OrderBook(object):
             passive.total_fees += fee
             if passive.listener:
                 passive.listener.on_order_filled(now, passive, best_price, volume, fee)
+            for callback in self.order_filled:
+                callback(self, passive, volume)
 
         self.__total_volumes[best_price] = total_volume
         traded_volume_at_this_level: int = order.remaining_volume - remaining
+        self.version += 1
 
         if order.side == Side.BUY:
             self.__ask_ticks[best_price] += traded_volume_at_this_level
@@ -281,15 +318,16 @@ class OrderBook(object):
                     bid_volumes: List[int]) -> bool:
         """Return True and populate the lists if there have been trades."""
         if self.__ask_ticks or self.__bid_ticks:
-            prices = sorted(self.__ask_ticks.keys())[:TOP_LEVEL_COUNT]
+            depth: int = self.depth
+            prices = sorted(self.__ask_ticks.keys())[:depth]
             volumes = tuple(self.__ask_ticks[p] for p in prices)
-            ask_prices[:] = prices + [0] * (TOP_LEVEL_COUNT - len(prices))
-            ask_volumes[:] = volumes + (0,) * (TOP_LEVEL_COUNT - len(volumes))
+            ask_prices[:] = prices + [0] * (depth - len(prices))
+            ask_volumes[:] = volumes + (0,) * (depth - len(volumes))
 
-            prices = sorted(self.__bid_ticks.keys(), reverse=True)[:TOP_LEVEL_COUNT]
+            prices = sorted(self.__bid_ticks.keys(), reverse=True)[:depth]
             volumes = tuple(self.__bid_ticks[p] for p in prices)
-            bid_prices[:] = prices + [0] * (TOP_LEVEL_COUNT - len(prices))
-            bid_volumes[:] = volumes + (0,) * (TOP_LEVEL_COUNT - len(volumes))
+            bid_prices[:] = prices + [0] * (depth - len(prices))
+            bid_volumes[:] = volumes + (0,) * (depth - len(volumes))
 
             self.__ask_ticks.clear()
             self.__bid_ticks.clear()
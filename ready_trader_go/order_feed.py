@@ -0,0 +1,171 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+import asyncio
+import logging
+import struct
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .messages import (HEADER, HEADER_SIZE, ORDER_ADDED_MESSAGE, ORDER_ADDED_MESSAGE_SIZE, ORDER_DELETED_MESSAGE,
+                       ORDER_DELETED_MESSAGE_SIZE, ORDER_EXECUTED_MESSAGE, ORDER_EXECUTED_MESSAGE_SIZE,
+                       ORDER_MODIFIED_MESSAGE, ORDER_MODIFIED_MESSAGE_SIZE, SNAPSHOT_HEADER, SNAPSHOT_HEADER_SIZE,
+                       SNAPSHOT_ORDER, MessageType)
+from .order_book import Order, OrderBook
+from .pubsub import MAXIMUM_MESSAGE_LENGTH, Publisher, PublisherFactory
+from .timer import Timer
+from .types import Instrument
+
+# Every change to a book is published as it happens, so the order feed
+# needs a deeper ring than the information channel
+DEFAULT_ORDER_FEED_RING_SIZE = 1024
+
+# Number of ticks between snapshots of the order books
+DEFAULT_SNAPSHOT_INTERVAL = 20
+
+# The greatest number of orders in one part of a snapshot
+SNAPSHOT_ORDER_LIMIT = (MAXIMUM_MESSAGE_LENGTH - SNAPSHOT_HEADER_SIZE) // SNAPSHOT_ORDER.size
+
+
+class OrderFeedPublisher(asyncio.DatagramProtocol):
+    """A publisher of every change to the orders resting in the order books.
+
+    Each order is given an order id when it is placed in a book and every
+    later change to it is published as an order modified, deleted or
+    executed message. An order that is fully executed is removed from the
+    book without an order deleted message. Every message carries a sequence
+    number, which is incremented by one for each message about the same
+    instrument, so a subscriber can tell if it has missed a change.
+
+    Every few ticks, a snapshot of each book is published listing its
+    orders (in time priority) and the sequence number of the last change
+    the snapshot includes. The books take turns, so that each tick
+    publishes the snapshots of only some of them rather than all of them
+    at once lapping slow subscribers. Snapshots too long for one message
+    are split into parts.
+    """
+
+    def __init__(self, publisher_factory: PublisherFactory, order_books: Iterable[OrderBook], timer: Timer,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL):
+        """Initialise a new instance of the OrderFeedPublisher class."""
+        if snapshot_interval < 1:
+            raise ValueError("snapshot interval must be at least one tick")
+
+        order_books = tuple(order_books)
+        instrument_count: int = max([len(Instrument)] + [book.instrument + 1 for book in order_books])
+
+        self.__logger: logging.Logger = logging.getLogger("ORDER FEED")
+        self.__next_order_id: int = 1
+        self.__order_books: Tuple[OrderBook] = order_books
+        self.__order_ids: List[Dict[Order, int]] = [dict() for _ in range(instrument_count)]
+        self.__publisher_factory: PublisherFactory = publisher_factory
+        self.__sequences: List[int] = [0] * instrument_count
+        self.__snapshot_interval: int = snapshot_interval
+        self.__transport: Optional[Publisher] = None
+
+        # Connect signals
+        for book in self.__order_books:
+            book.order_amended.append(self.on_order_amended)
+            book.order_cancelled.append(self.on_order_cancelled)
+            book.order_filled.append(self.on_order_filled)
+            book.order_placed.append(self.on_order_placed)
+        timer.timer_ticked.append(self.on_timer_tick)
+
+    def close(self) -> None:
+        """Close the order feed."""
+        if self.__transport is not None:
+            self.__transport.close()
+
+    def connection_made(self, transport: Publisher) -> None:
+        """Called when the datagram endpoint is created."""
+        self.__logger.info("order feed established")
+        self.__transport = transport
+
+    def on_order_amended(self, book: OrderBook, order: Order, volume_removed: int) -> None:
+        """Called when an order in one of the order books is amended."""
+        if volume_removed == 0:
+            return
+        if order.remaining_volume == 0:
+            self.__publish(ORDER_DELETED_MESSAGE, ORDER_DELETED_MESSAGE_SIZE, MessageType.ORDER_DELETED,
+                           book.instrument, self.__order_ids[book.instrument].pop(order))
+        else:
+            self.__publish(ORDER_MODIFIED_MESSAGE, ORDER_MODIFIED_MESSAGE_SIZE, MessageType.ORDER_MODIFIED,
+                           book.instrument, self.__order_ids[book.instrument][order], order.remaining_volume)
+
+    def on_order_cancelled(self, book: OrderBook, order: Order, volume_removed: int) -> None:
+        """Called when an order in one of the order books is cancelled."""
+        self.__publish(ORDER_DELETED_MESSAGE, ORDER_DELETED_MESSAGE_SIZE, MessageType.ORDER_DELETED,
+                       book.instrument, self.__order_ids[book.instrument].pop(order))
+
+    def on_order_filled(self, book: OrderBook, order: Order, volume: int) -> None:
+        """Called when an order in one of the order books is (partially) filled."""
+        order_ids = self.__order_ids[book.instrument]
+        order_id = order_ids[order] if order.remaining_volume else order_ids.pop(order)
+        self.__publish(ORDER_EXECUTED_MESSAGE, ORDER_EXECUTED_MESSAGE_SIZE, MessageType.ORDER_EXECUTED,
+                       book.instrument, order_id, volume)
+
+    def on_order_placed(self, book: OrderBook, order: Order) -> None:
+        """Called when an order is placed in one of the order books."""
+        order_id = self.__next_order_id
+        self.__next_order_id += 1
+        self.__order_ids[book.instrument][order] = order_id
+        self.__publish(ORDER_ADDED_MESSAGE, ORDER_ADDED_MESSAGE_SIZE, MessageType.ORDER_ADDED, book.instrument,
+                       order_id, order.side, order.price, order.remaining_volume)
+
+    def on_timer_tick(self, timer: Timer, now: float, tick_number: int) -> None:
+        """Called each time the timer ticks."""
+        phase = (tick_number - 1) % self.__snapshot_interval
+        for book in self.__order_books[phase::self.__snapshot_interval]:
+            self.__publish_snapshot(book.instrument)
+
+    def __publish(self, message: struct.Struct, message_size: int, typ: MessageType, instrument: int,
+                  *args) -> None:
+        """Publish a change to an order, giving it the next sequence number for its instrument."""
+        self.__sequences[instrument] += 1
+        if self.__transport is None or self.__transport.is_closing():
+            return
+        buffer, offset = self.__transport.begin_write(message_size)
+        HEADER.pack_into(buffer, offset, message_size, typ)
+        message.pack_into(buffer, offset + HEADER_SIZE, instrument, self.__sequences[instrument], *args)
+        self.__transport.end_write()
+
+    def __publish_snapshot(self, instrument: int) -> None:
+        """Publish every order resting in the order book for the given instrument."""
+        if self.__transport is None or self.__transport.is_closing():
+            return
+
+        orders = list(self.__order_ids[instrument].items())
+        part_count = max(1, -(-len(orders) // SNAPSHOT_ORDER_LIMIT))
+        for part in range(part_count):
+            part_orders = orders[part * SNAPSHOT_ORDER_LIMIT:(part + 1) * SNAPSHOT_ORDER_LIMIT]
+            message_size = SNAPSHOT_HEADER_SIZE + len(part_orders) * SNAPSHOT_ORDER.size
+            buffer, offset = self.__transport.begin_write(message_size)
+            HEADER.pack_into(buffer, offset, message_size, MessageType.ORDER_BOOK_SNAPSHOT)
+            SNAPSHOT_HEADER.pack_into(buffer, offset + HEADER_SIZE, instrument, self.__sequences[instrument], part,
+                                      part_count)
+            offset += SNAPSHOT_HEADER_SIZE
+            for order, order_id in part_orders:
+                SNAPSHOT_ORDER.pack_into(buffer, offset, order_id, order.side, order.price, order.remaining_volume)
+                offset += SNAPSHOT_ORDER.size
+            self.__transport.end_write()
+
+    async def start(self) -> None:
+        """Start this publisher."""
+        typ = self.__publisher_factory.typ
+        name = self.__publisher_factory.name
+        self.__logger.info("starting order feed publisher: type=%s name=%s", typ, name)
+        self.__publisher_factory.create(self)
@@ -16,17 +16,176 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 import asyncio
+import itertools
+import logging
+import math
 import mmap
 import os
+import socket
 import struct
+import sys
+import tempfile
 
-from typing import Coroutine, Optional, Tuple, Union
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Coroutine, List, Optional, Set, Tuple, Union
 
-BUFFER_SIZE = 8192
-FRAME_HEADER_SIZE = 8
+FRAME_HEADER_SIZE = 16
 FRAME_SIZE = 128
 MAXIMUM_PAYLOAD_LENGTH = FRAME_SIZE - FRAME_HEADER_SIZE
 
+# Messages longer than the maximum payload length are split into fragments,
+# one per frame, which are published in consecutive frames.
+MAXIMUM_FRAGMENT_COUNT = 8
+MAXIMUM_MESSAGE_LENGTH = MAXIMUM_FRAGMENT_COUNT * MAXIMUM_PAYLOAD_LENGTH
+
+DEFAULT_RING_SIZE = 64
+MINIMUM_RING_SIZE = 32
+BUFFER_SIZE = DEFAULT_RING_SIZE * FRAME_SIZE
+
+# Each frame contains a spinlock (1 byte), fragment flags (1 byte), two
+# unused bytes, payload length (4 bytes), sequence number (8 bytes) and
+# payload (up to 112 bytes).
+FRAME_HEADER = struct.Struct("!IQ")
+FRAME_SEQUENCE = struct.Struct("!Q")
+
+# Fragment flags: more fragments of the message follow this one and this
+# fragment continues a message. Neither is set for a message in one frame.
+FRAGMENT_MORE = 1
+FRAGMENT_CONTINUATION = 2
+
+DEFAULT_SPIN_BUDGET = 1000
+DOORBELL_SUFFIX = ".doorbell"
+WAKEUP_POLICIES = ("Spin", "SpinThenBlock", "Block")
+
+
+def doorbell_address(typ: str, name: str) -> str:
+    """Return the address of the doorbell socket belonging to the named information channel."""
+    if typ == "shm":
+        return os.path.join(tempfile.gettempdir(), _shm_name(name) + DOORBELL_SUFFIX)
+    return name + DOORBELL_SUFFIX
+
+
+class Doorbell(object):
+    """Wakes subscribers that are blocked waiting for the publisher.
+
+    Subscribers register by sending a datagram to the doorbell's Unix domain
+    socket. After a write, each registered subscriber is sent a datagram,
+    at most once per event loop iteration however many frames were written.
+    """
+
+    def __init__(self, address: str):
+        """Initialise a new instance of the Doorbell class."""
+        self.__address: str = address
+        self.__event_loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        self.__pending: bool = False
+        self.__subscribers: Set[Union[str, bytes]] = set()
+
+        if os.path.exists(address):
+            # Left behind by a publisher that did not exit cleanly
+            os.unlink(address)
+        self.__socket: Optional[socket.socket] = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.__socket.setblocking(False)
+        self.__socket.bind(address)
+        self.__event_loop.add_reader(self.__socket.fileno(), self.__on_readable)
+
+    def __on_readable(self) -> None:
+        """Called when a subscriber registers or unregisters."""
+        while self.__socket is not None:
+            try:
+                data, address = self.__socket.recvfrom(16)
+            except OSError:
+                return
+            if data == b"+":
+                self.__subscribers.add(address)
+            elif data == b"-":
+                self.__subscribers.discard(address)
+
+    def __ring(self) -> None:
+        """Send a wakeup to every registered subscriber."""
+        self.__pending = False
+        if self.__socket is None:
+            return
+        for address in tuple(self.__subscribers):
+            try:
+                self.__socket.sendto(b"!", address)
+            except BlockingIOError:
+                # The subscriber already has wakeups waiting to be read
+                pass
+            except OSError:
+                self.__subscribers.discard(address)
+
+    def close(self) -> None:
+        """Close the doorbell."""
+        if self.__socket is not None:
+            self.__event_loop.remove_reader(self.__socket.fileno())
+            self.__socket.close()
+            self.__socket = None
+            try:
+                os.unlink(self.__address)
+            except OSError:
+                pass
+
+    def ring(self) -> None:
+        """Arrange for registered subscribers to be woken."""
+        if not self.__pending and self.__subscribers:
+            self.__pending = True
+            self.__event_loop.call_soon(self.__ring)
+
+
+class DoorbellListener(object):
+    """The subscriber side of a doorbell."""
+
+    __counter = itertools.count(1)
+
+    def __init__(self, address: str):
+        """Initialise a new instance of the DoorbellListener class and register with the doorbell."""
+        self.__address: str = address
+        self.__event_loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        self.__path: Optional[str] = None
+        self.__socket: Optional[socket.socket] = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.__socket.setblocking(False)
+
+        name = "rtg-%d-%d%s" % (os.getpid(), next(DoorbellListener.__counter), DOORBELL_SUFFIX)
+        try:
+            if sys.platform == "linux":
+                # Use the abstract namespace so there is no file to clean up
+                self.__socket.bind("\0" + name)
+            else:
+                self.__path = os.path.join(tempfile.gettempdir(), name)
+                self.__socket.bind(self.__path)
+            self.__socket.sendto(b"+", address)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Unregister from the doorbell and close the listener."""
+        if self.__socket is not None:
+            try:
+                self.__socket.sendto(b"-", self.__address)
+            except OSError:
+                pass
+            self.__socket.close()
+            self.__socket = None
+        if self.__path is not None:
+            try:
+                os.unlink(self.__path)
+            except OSError:
+                pass
+            self.__path = None
+
+    def drain(self) -> None:
+        """Discard any wakeups that have already arrived."""
+        try:
+            while True:
+                self.__socket.recv(16)
+        except OSError:
+            pass
+
+    async def wait(self) -> None:
+        """Wait until the doorbell rings."""
+        await self.__event_loop.sock_recv(self.__socket, 16)
+
 
 class Publisher(asyncio.WriteTransport):
     """Publisher side of a datagram transport based on shared memory.
@@ -34,18 +193,31 @@ class Publisher(asyncio.WriteTransport):
     Transport is achieved through the use of memory mapped files or shared
     memory blocks. There must be an interval between writes to permit
     subscribers to read the data before it is overwritten.
+
+    Every frame carries a sequence number, starting from one, which is
+    cleared while the frame is being written so that a subscriber can tell
+    when it has fallen a whole ring behind the publisher.
+
+    Messages may be written straight into the ring by packing them between
+    calls to begin_write and end_write, rather than passing them to write.
+    A message too long for one frame is packed into a scratch buffer instead
+    and split into fragments by end_write.
     """
-    __slots__ = ("__pack_into", "_buffer", "_closed", "_pos")
+    __slots__ = ("_buffer", "_closed", "_doorbell", "_length", "_mask", "_pos", "_scratch", "_sequence")
 
-    def __init__(self, buffer: Union[mmap.mmap, memoryview], protocol: asyncio.BaseProtocol):
+    def __init__(self, buffer: Union[mmap.mmap, memoryview], protocol: asyncio.BaseProtocol,
+                 doorbell: Optional[Doorbell] = None):
         super().__init__()
         self._buffer: Optional[Union[mmap.mmap, memoryview]] = buffer
         self._closed: bool = False
+        self._doorbell: Optional[Doorbell] = doorbell
+        self._length: int = 0
+        self._mask: int = len(buffer) - 1
         self._pos: int = 0
+        self._scratch: bytearray = bytearray()
+        self._sequence: int = 0
         asyncio.get_event_loop().call_soon(protocol.connection_made, self)
 
-        self.__pack_into = struct.Struct("!I").pack_into
-
     def __del__(self):
         if not self._closed:
             self.close()
@@ -54,6 +226,28 @@ class Publisher(asyncio.WriteTransport):
         """Close the publisher immediately."""
         self.close()
 
+    def begin_write(self, length: int) -> Tuple[Union[mmap.mmap, memoryview], int]:
+        """Claim the next frame for a payload of the given length.
+
+        Return the ring buffer (or, if the payload will not fit in one frame,
+        a scratch buffer) and the offset at which the payload should be
+        written (for example, using struct.pack_into) before calling end_write.
+        """
+        if length > MAXIMUM_MESSAGE_LENGTH:
+            raise ValueError("payload is longer than maximum message length")
+        if self._closed:
+            raise RuntimeError("attempt to write to a closed Publisher")
+
+        self._length = length
+        if length > MAXIMUM_PAYLOAD_LENGTH:
+            if len(self._scratch) < length:
+                self._scratch = bytearray(length)
+            return self._scratch, 0
+
+        FRAME_SEQUENCE.pack_into(self._buffer, self._pos + 8, 0)
+        self._buffer[self._pos + 1] = 0
+        return self._buffer, self._pos + FRAME_HEADER_SIZE
+
     def can_write_eof(self) -> bool:
         """Return False. Publisher's don't support writing EOF."""
         return False
@@ -61,32 +255,68 @@ class Publisher(asyncio.WriteTransport):
     def close(self) -> None:
         """Close the publisher."""
         self._closed = True
+        if self._doorbell is not None:
+            self._doorbell.close()
+            self._doorbell = None
+
+    def end_write(self) -> None:
+        """Publish the payload written to the frame claimed by begin_write."""
+        length = self._length
+        if length <= MAXIMUM_PAYLOAD_LENGTH:
+            self._publish_frame(length)
+        else:
+            buffer = self._buffer
+            scratch = self._scratch
+            for offset in range(0, length, MAXIMUM_PAYLOAD_LENGTH):
+                pos = self._pos
+                end = min(offset + MAXIMUM_PAYLOAD_LENGTH, length)
+                FRAME_SEQUENCE.pack_into(buffer, pos + 8, 0)
+                buffer[pos + 1] = (FRAGMENT_CONTINUATION if offset else 0) | (FRAGMENT_MORE if end < length else 0)
+                buffer[pos + FRAME_HEADER_SIZE:pos + FRAME_HEADER_SIZE + end - offset] = scratch[offset:end]
+                self._publish_frame(end - offset)
+
+        if self._doorbell is not None:
+            self._doorbell.ring()
+
+    def _publish_frame(self, length: int) -> None:
+        """Complete the current frame, which holds a payload of the given length, and move to the next."""
+        pos = self._pos
+        buffer = self._buffer
+        self._sequence += 1
+        FRAME_HEADER.pack_into(buffer, pos + 4, length, self._sequence)
+        self._pos = (pos + FRAME_SIZE) & self._mask
+        buffer[self._pos] = 0
+        buffer[pos] = 1
+
+    def is_closing(self) -> bool:
+        """Return True if the publisher is closed."""
+        return self._closed
+
+    @property
+    def sequence(self) -> int:
+        """The sequence number of the last frame published (zero if there is none)."""
+        return self._sequence
 
     def write(self, data: Union[bytearray, bytes, memoryview]) -> None:
         """Publish the provided data."""
-        if len(data) > MAXIMUM_PAYLOAD_LENGTH:
-            raise ValueError("payload is longer than maximum payload length")
+        if len(data) > MAXIMUM_MESSAGE_LENGTH:
+            raise ValueError("payload is longer than maximum message length")
 
         if self._closed:
             return
 
-        # Each frame contains a spinlock (4 bytes), payload length (4 bytes)
-        # and payload (up to 120 bytes).
-        pos = self._pos
-        self.__pack_into(self._buffer, pos + 4, len(data))
-        start: int = pos + FRAME_HEADER_SIZE
-        self._buffer[start:start + len(data)] = bytes(data)
-        self._pos = (pos + FRAME_SIZE) & (BUFFER_SIZE - 1)
-        self._buffer[self._pos] = 0
-        self._buffer[pos] = 1
+        buffer, start = self.begin_write(len(data))
+        buffer[start:start + len(data)] = data
+        self.end_write()
 
 
 class MmapPublisher(Publisher):
     """A publisher based on a memory mapped file."""
     __slots__ = ("__fileno",)
 
-    def __init__(self, fileno: int, mm: mmap.mmap, protocol: asyncio.BaseProtocol):
-        super().__init__(mm, protocol)
+    def __init__(self, fileno: int, mm: mmap.mmap, protocol: asyncio.BaseProtocol,
+                 doorbell: Optional[Doorbell] = None):
+        super().__init__(mm, protocol, doorbell)
         self.__fileno: Optional[int] = fileno
 
     def close(self) -> None:
@@ -100,6 +330,28 @@ class MmapPublisher(Publisher):
             self.__fileno = None
 
 
+class ShmPublisher(Publisher):
+    """A publisher based on a named shared memory block."""
+    __slots__ = ("__shm",)
+
+    def __init__(self, shm: shared_memory.SharedMemory, protocol: asyncio.BaseProtocol,
+                 doorbell: Optional[Doorbell] = None):
+        super().__init__(shm.buf, protocol, doorbell)
+        self.__shm: Optional[shared_memory.SharedMemory] = shm
+
+    def close(self) -> None:
+        """Close the publisher and remove the shared memory block."""
+        super().close()
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        if self.__shm:
+            self.__shm.close()
+            self.__shm.unlink()
+            _published_blocks.discard(self.__shm.name)
+            self.__shm = None
+
+
 class Subscriber(asyncio.DatagramTransport):
     """Subscriber side of a datagram transport based on shared memory.
 
@@ -107,14 +359,42 @@ class Subscriber(asyncio.DatagramTransport):
     memory blocks. An interval between writes gives subscribers time to read
     the data before it is overwritten and the subscriber polls the shared
     memory in order to pick up changes as soon as possible.
+
+    Given a doorbell, the subscriber stops polling after the spin budget has
+    been used up and waits for the publisher to ring the doorbell instead.
+
+    A subscriber that falls more than a whole ring behind the publisher skips
+    ahead to the newest frame. The number of frames lost is added to
+    dropped_frame_count and reported through the frames_dropped signal. A
+    subscriber that joins after frames have been published starts from the
+    newest frame and does not count the earlier frames as dropped. The
+    sequence number of the last frame read is kept in sequence.
+
+    The fragments of a message that spans several frames are put back
+    together before the message is passed to the protocol. A message that
+    lost a fragment to the publisher is discarded.
+
+    In zero-copy mode, the protocol is given a read-only memoryview of the
+    frame's payload rather than a copy. The view is released as soon as
+    datagram_received returns, so the protocol must not keep it.
     """
-    __slots__ = ("_task", "_closed", "_protocol")
+    __slots__ = ("_task", "_closed", "_doorbell", "_protocol", "_spin_budget", "_zero_copy", "dropped_frame_count",
+                 "frames_dropped", "sequence")
 
     def __init__(self, buffer: Union[mmap.mmap, memoryview], from_addr: Tuple[str, int],
-                 protocol: asyncio.DatagramProtocol):
+                 protocol: asyncio.DatagramProtocol, doorbell: Optional[DoorbellListener] = None,
+                 spin_budget: float = math.inf, zero_copy: bool = False):
         super().__init__()
         self._closed: bool = False
+        self._doorbell: Optional[DoorbellListener] = doorbell
         self._protocol: asyncio.DatagramProtocol = protocol
+        self._spin_budget: float = spin_budget if doorbell is not None else math.inf
+        self._zero_copy: bool = zero_copy
+        self.dropped_frame_count: int = 0
+        self.sequence: int = 0
+
+        # Signals
+        self.frames_dropped: List[Callable[[Subscriber, int], None]] = list()
 
         coro: Coroutine = self._subscribe_worker(buffer, from_addr, protocol)
         self._task: asyncio.Task = asyncio.ensure_future(coro)
@@ -122,23 +402,106 @@ class Subscriber(asyncio.DatagramTransport):
     async def _subscribe_worker(self, buffer: Union[mmap.mmap, memoryview],
                                 from_addr: Tuple[str, int],
                                 protocol: asyncio.DatagramProtocol) -> None:
-        mask: int = BUFFER_SIZE - 1
-        unpack_from = struct.Struct("!I").unpack_from
+        size: int = len(buffer)
+        mask: int = size - 1
+        unpack_from = FRAME_HEADER.unpack_from
+        unpack_sequence = FRAME_SEQUENCE.unpack_from
+        doorbell: Optional[DoorbellListener] = self._doorbell
+        spin_budget: float = self._spin_budget
+        view: Optional[memoryview] = memoryview(buffer).toreadonly() if self._zero_copy else None
         protocol.connection_made(self)
 
         try:
-            pos: int = 0
+            if size < MINIMUM_RING_SIZE * FRAME_SIZE or size & mask != 0:
+                raise RuntimeError("information buffer size is not a valid ring size: %d bytes" % size)
+
+            # Expect the newest frame already published, if any
+            newest = self._newest_frame(buffer, size)
+            pos: int = newest[0] if newest is not None else 0
+            expected: int = newest[1] if newest is not None else 1
+            fragments: Optional[bytearray] = None
             while not self._closed:
+                spins: int = 0
                 while buffer[pos] == 0:
-                    await asyncio.sleep(0.0)
-                length, = unpack_from(buffer, pos + 4)
+                    if spins < spin_budget:
+                        spins += 1
+                        await asyncio.sleep(0.0)
+                    else:
+                        # Discard stale wakeups before the final check so
+                        # that a write cannot slip in unnoticed.
+                        doorbell.drain()
+                        if buffer[pos] == 0:
+                            await doorbell.wait()
+                length, sequence = unpack_from(buffer, pos + 4)
+                fragment: int = buffer[pos + 1]
                 start: int = pos + FRAME_HEADER_SIZE
-                protocol.datagram_received(buffer[start:start + length], from_addr)
+                if view is not None and sequence == expected and fragment == 0:
+                    # A frame overwritten during the callback is not caught
+                    # here, but the next frame will show the lap.
+                    payload: memoryview = view[start:start + length]
+                    protocol.datagram_received(payload, from_addr)
+                    payload.release()
+                else:
+                    data: bytes = bytes(buffer[start:start + length])
+                    if sequence != expected or unpack_sequence(buffer, pos + 8)[0] != sequence:
+                        # Lapped by the publisher (possibly while copying the
+                        # payload), so skip ahead to the newest frame.
+                        newest = self._newest_frame(buffer, size)
+                        if newest is None:
+                            await asyncio.sleep(0.0)
+                            continue
+                        pos, sequence, fragment, data = newest
+                        if sequence > expected:
+                            self._on_frames_dropped(sequence - expected)
+                        fragments = None
+                    if fragment == 0:
+                        protocol.datagram_received(data, from_addr)
+                    else:
+                        if not fragment & FRAGMENT_CONTINUATION:
+                            fragments = bytearray(data)
+                        elif fragments is not None:
+                            fragments += data
+                        if fragments is not None and not fragment & FRAGMENT_MORE:
+                            protocol.datagram_received(bytes(fragments), from_addr)
+                            fragments = None
+                self.sequence = sequence
+                expected = sequence + 1
                 pos = (pos + FRAME_SIZE) & mask
         except asyncio.CancelledError:
             self._protocol.connection_lost(None)
         except Exception as e:
             self._protocol.connection_lost(e)
+        finally:
+            if view is not None:
+                # The mapping cannot be closed while a view of it exists
+                view.release()
+
+    @staticmethod
+    def _newest_frame(buffer: Union[mmap.mmap, memoryview], size: int) -> Optional[Tuple[int, int, int, bytes]]:
+        """Return the position, sequence number, fragment flags and payload of the newest complete frame, if any."""
+        unpack_from = FRAME_HEADER.unpack_from
+        newest_pos: int = 0
+        newest_sequence: int = 0
+        for pos in range(0, size, FRAME_SIZE):
+            if buffer[pos] != 0:
+                sequence: int = unpack_from(buffer, pos + 4)[1]
+                if sequence > newest_sequence:
+                    newest_pos, newest_sequence = pos, sequence
+        if newest_sequence == 0:
+            return None
+        length, sequence = unpack_from(buffer, newest_pos + 4)
+        fragment: int = buffer[newest_pos + 1]
+        start: int = newest_pos + FRAME_HEADER_SIZE
+        data: bytes = bytes(buffer[start:start + length])
+        if sequence != newest_sequence or FRAME_SEQUENCE.unpack_from(buffer, newest_pos + 8)[0] != sequence:
+            return None
+        return newest_pos, sequence, fragment, data
+
+    def _on_frames_dropped(self, count: int) -> None:
+        """Record that the given number of frames were overwritten before they could be read."""
+        self.dropped_frame_count += count
+        for callback in self.frames_dropped:
+            callback(self, count)
 
     def abort(self) -> None:
         """Close the transport immediately."""
@@ -153,6 +516,8 @@ class Subscriber(asyncio.DatagramTransport):
         if not self._closed:
             self._task.cancel()
             self._closed = True
+            if self._doorbell is not None:
+                self._doorbell.close()
 
     def get_protocol(self) -> asyncio.DatagramProtocol:
         """Return the current protocol."""
@@ -169,8 +534,9 @@ class MmapSubscriber(Subscriber):
     __slots__ = ("__fileno", "__mmap")
 
     def __init__(self, fileno: int, buffer: mmap.mmap, from_addr: Tuple[str, int],
-                 protocol: Optional[asyncio.DatagramProtocol] = None):
-        super().__init__(buffer, from_addr, protocol)
+                 protocol: Optional[asyncio.DatagramProtocol] = None, doorbell: Optional[DoorbellListener] = None,
+                 spin_budget: float = math.inf, zero_copy: bool = False):
+        super().__init__(buffer, from_addr, protocol, doorbell, spin_budget, zero_copy)
         self.__fileno: Optional[int] = fileno
         self.__mmap: Optional[mmap.mmap] = buffer
         self._task.add_done_callback(lambda _: self.__close_mmap())
@@ -187,11 +553,48 @@ class MmapSubscriber(Subscriber):
             self.__fileno = None
 
 
+class ShmSubscriber(Subscriber):
+    """A subscriber based on a named shared memory block."""
+    __slots__ = ("__buffer", "__shm")
+
+    def __init__(self, shm: shared_memory.SharedMemory, from_addr: Tuple[str, int],
+                 protocol: Optional[asyncio.DatagramProtocol] = None, doorbell: Optional[DoorbellListener] = None,
+                 spin_budget: float = math.inf, zero_copy: bool = False):
+        self.__buffer: Optional[memoryview] = shm.buf
+        self.__shm: Optional[shared_memory.SharedMemory] = shm
+        super().__init__(self.__buffer, from_addr, protocol, doorbell, spin_budget, zero_copy)
+        self._task.add_done_callback(lambda _: self.__close_shm())
+
+    def __del__(self):
+        self.__close_shm()
+
+    def __close_shm(self):
+        if self.__buffer is not None:
+            self.__buffer.release()
+            self.__buffer = None
+        if self.__shm:
+            # Only the publisher removes the shared memory block.
+            self.__shm.close()
+            self.__shm = None
+
+
+# Names of the shared memory blocks created by publishers in this process
+_published_blocks: Set[str] = set()
+
+
+def _shm_name(name: str) -> str:
+    """Return the shared memory block name for the given information channel name."""
+    return name.lstrip("/")
+
+
 class PublisherFactory:
     """A factory class for Publisher instances."""
-    def __init__(self, typ: str, name: str):
+    def __init__(self, typ: str, name: str, ring_size: int = DEFAULT_RING_SIZE):
         if typ not in ("mmap", "shm"):
             raise ValueError("type must be either 'mmap' or 'shm'")
+        if ring_size < MINIMUM_RING_SIZE or ring_size & (ring_size - 1) != 0:
+            raise ValueError("ring size must be a power of two no less than %d" % MINIMUM_RING_SIZE)
+        self.__buffer_size: int = ring_size * FRAME_SIZE
         self.__typ: str = typ
         self.__name: str = name
 
@@ -207,21 +610,52 @@ class PublisherFactory:
 
     def create(self, protocol: asyncio.BaseProtocol) -> Publisher:
         """Create a new Publisher instance."""
+        # Platforms without Unix domain sockets have no doorbell, so their
+        # subscribers must spin.
+        doorbell = Doorbell(doorbell_address(self.__typ, self.__name)) if hasattr(socket, "AF_UNIX") else None
         if self.__typ == "mmap":
             fileno = os.open(self.__name, os.O_CREAT | os.O_RDWR)
-            os.write(fileno, b"\x00" * BUFFER_SIZE)
-            buffer = mmap.mmap(fileno, BUFFER_SIZE, access=mmap.ACCESS_WRITE)
-            return MmapPublisher(fileno, buffer, protocol)
-        raise RuntimeError("PublisherFactory type was not 'mmap'")
+            os.write(fileno, b"\x00" * self.__buffer_size)
+            os.ftruncate(fileno, self.__buffer_size)
+            buffer = mmap.mmap(fileno, self.__buffer_size, access=mmap.ACCESS_WRITE)
+            return MmapPublisher(fileno, buffer, protocol, doorbell)
+        if self.__typ == "shm":
+            try:
+                shm = shared_memory.SharedMemory(_shm_name(self.__name), create=True, size=self.__buffer_size)
+            except FileExistsError:
+                # Left behind by a publisher that did not exit cleanly
+                stale = shared_memory.SharedMemory(_shm_name(self.__name))
+                stale.close()
+                stale.unlink()
+                shm = shared_memory.SharedMemory(_shm_name(self.__name), create=True, size=self.__buffer_size)
+            _published_blocks.add(shm.name)
+            return ShmPublisher(shm, protocol, doorbell)
+        raise RuntimeError("PublisherFactory type was not 'mmap' or 'shm'")
 
 
 class SubscriberFactory:
     """A factory class for Subscribers."""
-    def __init__(self, typ: str, name: str):
+    def __init__(self, typ: str, name: str, wakeup: str = "Spin", spin_budget: int = DEFAULT_SPIN_BUDGET,
+                 zero_copy: bool = False):
         if typ not in ("mmap", "shm"):
             raise ValueError("type must be either 'mmap' or 'shm'")
+        if wakeup not in WAKEUP_POLICIES:
+            raise ValueError("wakeup must be one of %s" % ", ".join("'%s'" % w for w in WAKEUP_POLICIES))
         self.__typ: str = typ
         self.__name: str = name
+        self.__spin_budget: int = 0 if wakeup == "Block" else spin_budget
+        self.__wakeup: str = wakeup
+        self.__zero_copy: bool = zero_copy
+
+    def __create_doorbell_listener(self) -> Optional[DoorbellListener]:
+        """Return a listener for the publisher's doorbell, or None if subscribers should spin."""
+        if self.__wakeup == "Spin":
+            return None
+        if not hasattr(socket, "AF_UNIX"):
+            logging.getLogger("SUBSCRIBER").warning("wakeup policy '%s' is not supported on this platform,"
+                                                    " spinning instead", self.__wakeup)
+            return None
+        return DoorbellListener(doorbell_address(self.__typ, self.__name))
 
     @property
     def name(self):
@@ -237,6 +671,19 @@ class SubscriberFactory:
         """Return a new Subscriber instance."""
         if self.__typ == "mmap":
             fileno = os.open(self.__name, os.O_RDONLY)
-            mm = mmap.mmap(fileno, BUFFER_SIZE, access=mmap.ACCESS_READ)
-            return MmapSubscriber(fileno, mm, (self.__name, fileno), protocol)
-        raise RuntimeError("SubscriberFactory type was not 'mmap'")
+            # Map the whole file as the publisher chooses the ring size
+            mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            return MmapSubscriber(fileno, mm, (self.__name, fileno), protocol, self.__create_doorbell_listener(),
+                                  self.__spin_budget, self.__zero_copy)
+        if self.__typ == "shm":
+            if sys.version_info >= (3, 13):
+                shm = shared_memory.SharedMemory(_shm_name(self.__name), track=False)
+            else:
+                shm = shared_memory.SharedMemory(_shm_name(self.__name))
+                if shm.name not in _published_blocks:
+                    # Stop the resource tracker from removing the block when
+                    # this process exits, as the publisher does that.
+                    resource_tracker.unregister(shm._name, "shared_memory")
+            return ShmSubscriber(shm, (self.__name, 0), protocol, self.__create_doorbell_listener(),
+                                 self.__spin_budget, self.__zero_copy)
+        raise RuntimeError("SubscriberFactory type was not 'mmap' or 'shm'")
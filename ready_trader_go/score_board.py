@@ -18,17 +18,17 @@
 import asyncio
 import csv
 import logging
-import queue
 import threading
 
-from typing import Callable, List, Optional, TextIO
+from typing import Callable, List, Optional, TextIO, Tuple
 
 from .account import CompetitorAccount
+from .writer_queue import WriterQueue
 
 
 class ScoreRecord:
     __slots__ = ("time", "team", "operation", "buy_volume", "sell_volume", "etf_position", "future_position",
-                 "etf_price", "future_price", "total_fees", "balance", "profit_loss", "status")
+                 "etf_price", "future_price", "total_fees", "balance", "profit_loss", "status", "reaction")
 
     def __init__(self, time: float, team: str, operation: str, buy_volume: int, sell_volume: int, etf_position: int,
                  future_position, etf_price: Optional[int], future_price: Optional[int], total_fees: int, balance: int,
@@ -46,47 +46,66 @@ class ScoreRecord:
         self.balance: int = balance
         self.profit_loss: int = profit_loss
         self.status: str = status
+        self.reaction: Optional[Tuple[int, float, float]] = None
 
     def __iter__(self):
-        return iter((round(self.time, 6),
-                     self.team,
-                     self.operation,
-                     self.buy_volume,
-                     self.sell_volume,
-                     self.etf_position,
-                     self.future_position,
-                     self.etf_price if self.etf_price is not None else None,
-                     self.future_price if self.future_price is not None else None,
-                     round(self.total_fees, 2),
-                     round(self.balance, 2),
-                     round(self.profit_loss, 2),
-                     self.status))
+        fields = (round(self.time, 6),
+                  self.team,
+                  self.operation,
+                  self.buy_volume,
+                  self.sell_volume,
+                  self.etf_position,
+                  self.future_position,
+                  self.etf_price if self.etf_price is not None else None,
+                  self.future_price if self.future_price is not None else None,
+                  round(self.total_fees, 2),
+                  round(self.balance, 2),
+                  round(self.profit_loss, 2),
+                  self.status)
+        return iter(fields if self.reaction is None else fields + self.reaction)
 
 
 class ScoreBoardWriter:
     """A processor of score records that it writes to a file."""
 
-    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop):
+    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop, fifo: Optional[WriterQueue] = None):
         """Initialise a new instance of the MatchEvents class."""
         self.event_loop: asyncio.AbstractEventLoop = loop
         self.filename: str = filename
         self.finished: bool = False
         self.logger = logging.getLogger("SCORE_BOARD")
-        self.queue: queue.Queue = queue.Queue()
+        self.queue: WriterQueue = fifo if fifo is not None else WriterQueue("SCORE_BOARD")
+        self.reaction_times: Optional[Callable[[str], Tuple[int, float, float]]] = None
         self.writer_task: Optional[threading.Thread] = None
 
+        self.__pending: List[ScoreRecord] = list()
+
         self.task_complete: List[Callable] = list()
 
     def __del__(self):
         """Destroy an instance of the MatchEvents class."""
         if not self.finished:
-            self.queue.put(None)
+            self.finish()
         self.writer_task.join()
 
+    def __add(self, record: ScoreRecord) -> None:
+        """Gather a score record to be handed to the writer thread at the end of this loop iteration."""
+        if self.reaction_times is not None:
+            record.reaction = self.reaction_times(record.team)
+        self.__pending.append(record)
+        if len(self.__pending) == 1:
+            self.event_loop.call_soon(self.__flush)
+
+    def __flush(self) -> None:
+        """Hand the score records gathered during this loop iteration to the writer thread."""
+        if self.__pending:
+            self.queue.put(self.__pending)
+            self.__pending = list()
+
     def breach(self, now: float, name: str, account: CompetitorAccount, etf_price: Optional[int],
                future_price: Optional[int]) -> None:
         """Create a new disconnect event."""
-        self.queue.put(
+        self.__add(
             ScoreRecord(now, name, "Breach", account.buy_volume, account.sell_volume, account.etf_position,
                         account.future_position, etf_price, future_price, account.total_fees, account.account_balance,
                         account.profit_or_loss))
@@ -95,13 +114,14 @@ class ScoreBoardWriter:
                    future_price: Optional[int]) -> None:
         """Create a new disconnect event."""
         if not self.finished:
-            self.queue.put(
+            self.__add(
                 ScoreRecord(now, name, "Disconnect", account.buy_volume, account.sell_volume, account.etf_position,
                             account.future_position, etf_price, future_price, account.total_fees,
                             account.account_balance, account.profit_or_loss))
 
     def finish(self) -> None:
         """Indicate the the series of events is complete."""
+        self.__flush()
         self.queue.put(None)
         self.finished = True
 
@@ -109,7 +129,10 @@ class ScoreBoardWriter:
         """Called when the match event writer thread is done."""
         for c in self.task_complete:
             c(self)
-        self.logger.info("writer thread complete after processing %d score records", num_events)
+        statistics = self.queue.statistics()
+        self.logger.info("writer thread complete after processing %d score records: high_water_mark=%d spilled=%d "
+                         "dropped=%d max_lag=%.6f", num_events, statistics.high_water_mark, statistics.spilled,
+                         statistics.dropped, statistics.max_lag)
 
     def start(self):
         """Start the score board writer thread"""
@@ -126,7 +149,7 @@ class ScoreBoardWriter:
     def tick(self, now: float, name: str, account: CompetitorAccount, etf_price: Optional[int],
              future_price: Optional[int], status: Optional[str] = None) -> None:
         """Create a new tick event"""
-        self.queue.put(
+        self.__add(
             ScoreRecord(now, name, "Tick", account.buy_volume, account.sell_volume, account.etf_position,
                         account.future_position, etf_price, future_price, account.total_fees, account.account_balance,
                         account.profit_or_loss, status))
@@ -139,15 +162,18 @@ class ScoreBoardWriter:
         try:
             with score_records_file:
                 csv_writer = csv.writer(score_records_file)
-                csv_writer.writerow(("Time,Team,Operation,BuyVolume,SellVolume,EtfPosition,FuturePosition,"
-                                     "EtfPrice,FuturePrice,TotalFees,AccountBalance,ProfitOrLoss,"
-                                     "Status").split(','))
-
-                evt = fifo.get()
-                while evt is not None:
-                    count += 1
-                    csv_writer.writerow(evt)
-                    evt = fifo.get()
+                header = ("Time,Team,Operation,BuyVolume,SellVolume,EtfPosition,FuturePosition,"
+                          "EtfPrice,FuturePrice,TotalFees,AccountBalance,ProfitOrLoss,Status").split(',')
+                if self.reaction_times is not None:
+                    header.extend(("ReactionCount", "ReactionP50", "ReactionP99"))
+                csv_writer.writerow(header)
+
+                batch: Optional[List[ScoreRecord]] = fifo.get()
+                while batch is not None:
+                    count += len(batch)
+                    csv_writer.writerows(batch)
+                    batch = fifo.get()
         finally:
+            fifo.close()
             if not self.event_loop.is_closed():
                 self.event_loop.call_soon_threadsafe(self.on_writer_done, count)
@@ -0,0 +1,568 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Run the order books of the exchange in worker processes.
+
+The exchange process (the gateway) keeps the execution server, the
+competitors and their accounts, while each worker process (a shard) owns
+the order books and market events readers of some of the instrument pairs.
+The gateway talks to each book through a RemoteOrderBook, which sends the
+request to the shard and waits for its reply. A reply lists everything
+that happened in the shard, in order: match events, trades and the
+callbacks for competitors' orders, which the gateway then replays, along
+with the trade ticks of the books that traded. The top levels of every
+changed book in a shard are fetched together the first time one of them is
+asked for, so publishing the books on each tick costs at most one request
+per shard. As the gateway waits for every reply and shards process market
+events up to the time given by the gateway, a sharded match has the same
+outcome as one run in a single process. Shards process market events in
+parallel.
+"""
+import asyncio
+import enum
+import itertools
+import logging
+import os
+import subprocess
+import sys
+
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .array_order_book import create_order_book
+from .market_events import MarketEventsReader, create_market_events_reader
+from .match_events import MatchEvents
+from .order_book import IOrderListener, Order, OrderBook
+from .types import Instrument, Lifespan, Side, instrument_number
+
+
+class ShardEventType(enum.IntEnum):
+    MATCH_EVENT = 0
+    ORDER_AMENDED = 1
+    ORDER_CANCELLED = 2
+    ORDER_FILLED = 3
+    ORDER_PLACED = 4
+    TRADE = 5
+
+
+class ShardRequestType(enum.IntEnum):
+    ADVANCE = 0
+    AMEND = 1
+    CANCEL = 2
+    INSERT = 3
+    SETUP = 4
+    START = 5
+    STOP = 6
+    TOP_LEVELS = 7
+    TRY_TRADE = 8
+
+
+# The state of a book that the gateway keeps: its version, last traded
+# price, best bid and best ask.
+BookState = Tuple[int, Optional[int], Optional[int], Optional[int]]
+
+# The ask prices, ask volumes, bid prices and bid volumes of the top levels
+# or trade ticks of a book.
+BookLevels = Tuple[List[int], List[int], List[int], List[int]]
+
+
+def book_state(book: OrderBook) -> BookState:
+    """Return the state of the given book."""
+    return book.version, book.last_traded_price(), book.best_bid(), book.best_ask()
+
+
+class ShardOrder(Order):
+    """An order belonging to a competitor, identified by the handle given it by the gateway."""
+    __slots__ = ("handle",)
+
+    def __init__(self, handle: int, client_order_id: int, instrument: int, lifespan: Lifespan, side: Side,
+                 price: int, volume: int, listener: IOrderListener):
+        """Initialise a new instance of the ShardOrder class."""
+        super().__init__(client_order_id, instrument, lifespan, side, price, volume, listener)
+        self.handle: int = handle
+
+
+class ShardWorker(IOrderListener):
+    """The order books and market events readers of some instrument pairs, run in a worker process."""
+
+    def __init__(self, connection: Connection):
+        """Initialise a new instance of the ShardWorker class."""
+        self.__books: List[OrderBook] = list()
+        self.__connection: Connection = connection
+        self.__event_loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.__events: List[Tuple] = list()
+        self.__finished_readers: Set[MarketEventsReader] = set()
+        self.__logger: logging.Logger = logging.getLogger("SHARD")
+        self.__match_events: MatchEvents = MatchEvents()
+        self.__orders: Dict[int, ShardOrder] = dict()
+        self.__pair_books: Dict[int, Tuple[OrderBook, OrderBook]] = dict()
+        self.__readers: List[MarketEventsReader] = list()
+        self.__traded_books: Set[OrderBook] = set()
+
+        self.__handlers: Tuple[Callable, ...] = (self.__advance, self.__amend, self.__cancel, self.__insert,
+                                                 self.__setup, self.__start, self.__stop, self.__top_levels,
+                                                 self.__try_trade)
+
+        self.__match_events.event_occurred.append(
+            lambda event: self.__events.append((ShardEventType.MATCH_EVENT, event)))
+
+    def __advance(self, now: float) -> None:
+        """Process market events up to the given time."""
+        for reader in self.__readers:
+            reader.process_market_events(now)
+        # Let the readers' callbacks run
+        self.__event_loop.call_soon(self.__event_loop.stop)
+        self.__event_loop.run_forever()
+
+    def __amend(self, now: float, handle: int, new_volume: int) -> None:
+        """Amend a competitor's order."""
+        order = self.__orders[handle]
+        self.__pair_books[order.instrument][order.instrument & 1].amend(now, order, new_volume)
+
+    def __cancel(self, now: float, handle: int) -> None:
+        """Cancel a competitor's order."""
+        order = self.__orders[handle]
+        self.__pair_books[order.instrument][order.instrument & 1].cancel(now, order)
+
+    def __insert(self, now: float, handle: int, client_order_id: int, instrument: int, lifespan: Lifespan,
+                 side: Side, price: int, volume: int) -> None:
+        """Insert a competitor's order."""
+        order = self.__orders[handle] = ShardOrder(handle, client_order_id, instrument, lifespan, side, price,
+                                                   volume, self)
+        self.__pair_books[instrument][instrument & 1].insert(now, order)
+
+    def __next_event_time(self) -> Optional[float]:
+        """Return the time of the next market event in any of the unfinished readers, or None if it is not known."""
+        times = [r.next_event_time() for r in self.__readers if r not in self.__finished_readers]
+        return None if None in times else min(times, default=None)
+
+    def __on_trade(self, book: OrderBook) -> None:
+        """Record a trade in the given book."""
+        self.__events.append((ShardEventType.TRADE, book.instrument))
+        self.__traded_books.add(book)
+
+    def __record(self, event_type: ShardEventType, now: float, order: ShardOrder, args: Tuple) -> None:
+        """Record a callback for a competitor's order, along with the state of the books of its pair."""
+        future_book, etf_book = self.__pair_books[order.instrument]
+        self.__events.append((event_type, order.handle, now, args, order.volume, order.remaining_volume,
+                              order.total_fees, book_state(future_book) + book_state(etf_book)))
+        if order.remaining_volume == 0:
+            self.__orders.pop(order.handle, None)
+
+    def __setup(self, shard: int, pairs: Sequence[Tuple[int, str, float, float]], array_books: bool,
+                block_reader: bool, tick_size: float, depth: int) -> None:
+        """Create the order books and market events readers for the given instrument pairs."""
+        logging.basicConfig(filename="exchange_shard%d.log" % shard, level=logging.INFO,
+                            format="%(asctime)s [%(levelname)-7s] [%(name)s] %(message)s")
+        for pair, market_data_file, maker_fee, taker_fee in pairs:
+            future_book = create_order_book(instrument_number(pair, Instrument.FUTURE), 0.0, 0.0, tick_size, depth,
+                                            array_books)
+            etf_book = create_order_book(instrument_number(pair, Instrument.ETF), maker_fee, taker_fee, tick_size,
+                                         depth, array_books)
+            for book in (future_book, etf_book):
+                book.trade_occurred.append(self.__on_trade)
+                self.__books.append(book)
+                self.__pair_books[book.instrument] = (future_book, etf_book)
+            reader = create_market_events_reader(market_data_file, block_reader, self.__event_loop, future_book,
+                                                 etf_book, self.__match_events)
+            reader.task_complete.append(self.__finished_readers.add)
+            self.__readers.append(reader)
+        self.__logger.info("shard %d hosting instrument pairs %s", shard, ", ".join(str(p[0]) for p in pairs))
+
+    def __start(self) -> None:
+        """Start the market events readers."""
+        for reader in self.__readers:
+            reader.start()
+
+    def __stop(self) -> None:
+        """Stop processing requests."""
+        self.__logger.info("shard stopping")
+
+    def __top_levels(self, instruments: Sequence[int]) -> List[BookLevels]:
+        """Return the top levels of the given books."""
+        result = list()
+        for instrument in instruments:
+            book = self.__pair_books[instrument][instrument & 1]
+            levels = tuple([0] * book.depth for _ in range(4))
+            book.top_levels(*levels)
+            result.append(levels)
+        return result
+
+    def __trade_ticks(self) -> Dict[int, BookLevels]:
+        """Return the trade ticks of the books that have traded since the last reply."""
+        result = dict()
+        for book in self.__traded_books:
+            ticks = tuple([0] * book.depth for _ in range(4))
+            if book.trade_ticks(*ticks):
+                result[book.instrument] = ticks
+        self.__traded_books.clear()
+        return result
+
+    def __try_trade(self, instrument: int, side: Side, limit_price: int, volume: int) -> Tuple[int, int]:
+        """Return the volume that would trade and the average price per lot for the requested trade."""
+        return self.__pair_books[instrument][instrument & 1].try_trade(side, limit_price, volume)
+
+    def on_order_amended(self, now: float, order: ShardOrder, volume_removed: int) -> None:
+        """Called when a competitor's order is amended."""
+        self.__record(ShardEventType.ORDER_AMENDED, now, order, (volume_removed,))
+
+    def on_order_cancelled(self, now: float, order: ShardOrder, volume_removed: int) -> None:
+        """Called when a competitor's order is cancelled."""
+        self.__record(ShardEventType.ORDER_CANCELLED, now, order, (volume_removed,))
+
+    def on_order_filled(self, now: float, order: ShardOrder, price: int, volume: int, fee: int) -> None:
+        """Called when a competitor's order is partially or completely filled."""
+        self.__record(ShardEventType.ORDER_FILLED, now, order, (price, volume, fee))
+
+    def on_order_placed(self, now: float, order: ShardOrder) -> None:
+        """Called when a competitor's good-for-day order is placed in an order book."""
+        self.__record(ShardEventType.ORDER_PLACED, now, order, ())
+
+    def run(self) -> None:
+        """Handle requests from the gateway until told to stop."""
+        connection = self.__connection
+        handlers = self.__handlers
+        books = self.__books
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                self.__logger.warning("lost connection to the gateway")
+                return
+            result = handlers[request[0]](*request[1:])
+            connection.send((result, self.__events, self.__trade_ticks(), [book_state(b) for b in books],
+                             len(self.__finished_readers) == len(self.__readers), self.__next_event_time()))
+            self.__events = list()
+            if request[0] == ShardRequestType.STOP:
+                return
+
+
+class RemoteOrderBook(object):
+    """An order book hosted by a shard.
+
+    Requests that change or examine the book are sent to the shard. The best
+    prices, last traded price and version are those reported by the shard in
+    its last reply (or with the callback being replayed), so they are always
+    up to date. The top levels are kept until the version changes and the
+    trade ticks sent with each reply are gathered until they are read.
+    """
+
+    def __init__(self, instrument: int, depth: int, shard: "Shard"):
+        """Initialise a new instance of the RemoteOrderBook class."""
+        self.depth: int = depth
+        self.instrument: int = instrument
+        self.version: int = 0
+
+        self.__best_ask: Optional[int] = None
+        self.__ask_ticks: Dict[int, int] = dict()
+        self.__best_bid: Optional[int] = None
+        self.__bid_ticks: Dict[int, int] = dict()
+        self.__last_traded_price: Optional[int] = None
+        self.__levels: Optional[BookLevels] = None
+        self.__levels_version: int = -1
+        self.__shard: Shard = shard
+
+        # Signals
+        self.trade_occurred: List[Callable[[Any], None]] = list()
+
+    def add_trade_ticks(self, ticks: BookLevels) -> None:
+        """Add trade ticks reported by the shard to those not yet read."""
+        ask_prices, ask_volumes, bid_prices, bid_volumes = ticks
+        for prices, volumes, book_ticks in ((ask_prices, ask_volumes, self.__ask_ticks),
+                                            (bid_prices, bid_volumes, self.__bid_ticks)):
+            for price, volume in zip(prices, volumes):
+                if volume:
+                    book_ticks[price] = book_ticks.get(price, 0) + volume
+
+    def amend(self, now: float, order: Order, new_volume: int) -> None:
+        """Amend an order in this order book by decreasing its volume."""
+        if order.remaining_volume > 0:
+            self.__shard.call((ShardRequestType.AMEND, now, self.__shard.order_handle(order), new_volume))
+
+    def best_ask(self) -> Optional[int]:
+        """Return the current best ask price, or None if there are no ask orders."""
+        return self.__best_ask
+
+    def best_bid(self) -> Optional[int]:
+        """Return the current best bid price, or None if there are no bid orders."""
+        return self.__best_bid
+
+    def cancel(self, now: float, order: Order) -> None:
+        """Cancel an order in this order book."""
+        if order.remaining_volume > 0:
+            self.__shard.call((ShardRequestType.CANCEL, now, self.__shard.order_handle(order)))
+
+    def has_top_levels(self) -> bool:
+        """Return True if the top levels of this book are known for its current version."""
+        return self.__levels_version == self.version
+
+    def insert(self, now: float, order: Order) -> None:
+        """Insert a new order into this order book."""
+        self.__shard.call((ShardRequestType.INSERT, now, self.__shard.add_order(order), order.client_order_id,
+                           self.instrument, order.lifespan, order.side, order.price, order.volume))
+
+    def last_traded_price(self) -> Optional[int]:
+        """Return the last traded price."""
+        return self.__last_traded_price
+
+    def midpoint_price(self) -> Optional[float]:
+        """Return the midpoint price."""
+        if self.__best_bid is not None and self.__best_ask is not None:
+            return (self.__best_bid + self.__best_ask) / 2.0
+        return None
+
+    def set_top_levels(self, levels: BookLevels) -> None:
+        """Keep the top levels reported by the shard for the current version of this book."""
+        self.__levels = levels
+        self.__levels_version = self.version
+
+    def top_levels(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                   bid_volumes: List[int]) -> None:
+        """Populate the supplied lists with the top levels for this book."""
+        if self.__levels_version != self.version:
+            self.__shard.fetch_top_levels()
+        ask_prices[:], ask_volumes[:], bid_prices[:], bid_volumes[:] = self.__levels
+
+    def trade_ticks(self, ask_prices: List[int], ask_volumes: List[int], bid_prices: List[int],
+                    bid_volumes: List[int]) -> bool:
+        """Return True and populate the lists if there have been trades."""
+        if self.__ask_ticks or self.__bid_ticks:
+            depth: int = self.depth
+            prices = sorted(self.__ask_ticks.keys())[:depth]
+            volumes = tuple(self.__ask_ticks[p] for p in prices)
+            ask_prices[:] = prices + [0] * (depth - len(prices))
+            ask_volumes[:] = volumes + (0,) * (depth - len(volumes))
+
+            prices = sorted(self.__bid_ticks.keys(), reverse=True)[:depth]
+            volumes = tuple(self.__bid_ticks[p] for p in prices)
+            bid_prices[:] = prices + [0] * (depth - len(prices))
+            bid_volumes[:] = volumes + (0,) * (depth - len(volumes))
+
+            self.__ask_ticks.clear()
+            self.__bid_ticks.clear()
+
+            return True
+
+        return False
+
+    def try_trade(self, side: Side, limit_price: int, volume: int) -> Tuple[int, int]:
+        """Return the volume that would trade and the average price per lot for
+        the requested trade without changing the order book.
+        """
+        return self.__shard.call((ShardRequestType.TRY_TRADE, self.instrument, side, limit_price, volume))
+
+    def update(self, version: int, last_traded_price: Optional[int], best_bid: Optional[int],
+               best_ask: Optional[int]) -> None:
+        """Update the state of this book with that reported by the shard."""
+        self.version = version
+        self.__last_traded_price = last_traded_price
+        self.__best_bid = best_bid
+        self.__best_ask = best_ask
+
+
+class Shard(object):
+    """The gateway's end of the connection to a shard, which hosts the given instrument pairs."""
+
+    def __init__(self, pairs: Sequence[int], depth: int, match_events: MatchEvents, handles: Callable[[], int]):
+        """Initialise a new instance of the Shard class."""
+        self.connection: Optional[Connection] = None
+        self.done: bool = False
+        self.next_event_time: Optional[float] = None
+        self.pairs: Sequence[int] = pairs
+        self.order_books: List[RemoteOrderBook] = [RemoteOrderBook(instrument_number(p, i), depth, self)
+                                                   for p in pairs for i in Instrument]
+
+        self.__books: Dict[int, RemoteOrderBook] = {book.instrument: book for book in self.order_books}
+        self.__handles: Dict[Order, int] = dict()
+        self.__match_events: MatchEvents = match_events
+        self.__next_handle: Callable[[], int] = handles
+        self.__orders: Dict[int, Order] = dict()
+
+    def add_order(self, order: Order) -> int:
+        """Return a new handle for the given order."""
+        handle = self.__handles[order] = self.__next_handle()
+        self.__orders[handle] = order
+        return handle
+
+    def apply(self, reply: Tuple) -> Any:
+        """Replay the events in a reply from the shard and return the result of the request."""
+        result, events, trade_ticks, states, self.done, self.next_event_time = reply
+        books = self.__books
+        for instrument, ticks in trade_ticks.items():
+            books[instrument].add_trade_ticks(ticks)
+        for event in events:
+            event_type = event[0]
+            if event_type == ShardEventType.MATCH_EVENT:
+                for callback in self.__match_events.event_occurred:
+                    callback(event[1])
+            elif event_type == ShardEventType.TRADE:
+                book = books[event[1]]
+                for callback in book.trade_occurred:
+                    callback(book)
+            else:
+                handle, now, args, volume, remaining_volume, total_fees, state = event[1:]
+                order = self.__orders[handle]
+                order.volume = volume
+                order.remaining_volume = remaining_volume
+                order.total_fees = total_fees
+                books[order.instrument & ~1].update(*state[:4])
+                books[order.instrument | 1].update(*state[4:])
+                if event_type == ShardEventType.ORDER_FILLED:
+                    order.listener.on_order_filled(now, order, *args)
+                elif event_type == ShardEventType.ORDER_PLACED:
+                    order.listener.on_order_placed(now, order)
+                elif event_type == ShardEventType.ORDER_AMENDED:
+                    order.listener.on_order_amended(now, order, *args)
+                else:
+                    order.listener.on_order_cancelled(now, order, *args)
+                if remaining_volume == 0:
+                    del self.__orders[handle]
+                    del self.__handles[order]
+
+        for book, state in zip(self.order_books, states):
+            book.update(*state)
+        return result
+
+    def call(self, request: Tuple) -> Any:
+        """Send a request to the shard and return the result once its reply has been replayed."""
+        self.send(request)
+        return self.apply(self.receive())
+
+    def close(self) -> None:
+        """Close the connection to the shard."""
+        self.connection.close()
+
+    def fetch_top_levels(self) -> None:
+        """Fetch the top levels of every book whose top levels are not known, in one request."""
+        books = [book for book in self.order_books if not book.has_top_levels()]
+        for book, levels in zip(books, self.call((ShardRequestType.TOP_LEVELS,
+                                                  [book.instrument for book in books]))):
+            book.set_top_levels(levels)
+
+    def order_handle(self, order: Order) -> int:
+        """Return the handle of the given order."""
+        return self.__handles[order]
+
+    def receive(self) -> Tuple:
+        """Return the next reply from the shard."""
+        return self.connection.recv()
+
+    def send(self, request: Tuple) -> None:
+        """Send a request to the shard."""
+        self.connection.send(request)
+
+
+class ShardGateway(object):
+    """Starts the shards and acts as the market events reader for all of them.
+
+    The instrument pairs are divided between the shards in order, so that
+    the shards' replies, replayed in turn, give the events in the same order
+    as processing each pair's market events in turn would.
+    """
+
+    def __init__(self, shard_count: int, pairs: Sequence[Tuple[str, float, float]], array_books: bool,
+                 block_reader: bool, tick_size: float, depth: int, match_events: MatchEvents):
+        """Initialise a new instance of the ShardGateway class and launch the shard processes.
+
+        Each pair is given as its market data file, maker fee and taker fee.
+        """
+        self.order_books: List[RemoteOrderBook] = list()
+
+        self.__authkey: bytes = os.urandom(32)
+        self.__done: bool = False
+        self.__listener: Listener = Listener(authkey=self.__authkey)
+        self.__logger: logging.Logger = logging.getLogger("SHARD")
+        self.__book_settings: Tuple[bool, bool, float, int] = (array_books, block_reader, tick_size, depth)
+        self.__pairs: Sequence[Tuple[str, float, float]] = pairs
+        self.__processes: List[subprocess.Popen] = list()
+        self.__shards: List[Shard] = list()
+
+        # Allow other objects to get a callback when every shard has finished its market events
+        self.task_complete: List[Callable] = list()
+
+        handles = itertools.count(1).__next__
+        for shard in range(shard_count):
+            first, last = shard * len(pairs) // shard_count, (shard + 1) * len(pairs) // shard_count
+            self.__shards.append(Shard(range(first, last), depth, match_events, handles))
+            self.order_books.extend(self.__shards[-1].order_books)
+
+        # The worker processes import this package from the same place
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (root, env.get("PYTHONPATH")) if p)
+        for _ in range(shard_count):
+            process = subprocess.Popen([sys.executable, "-m", __name__, str(self.__listener.address)],
+                                       stdin=subprocess.PIPE, env=env)
+            process.stdin.write(self.__authkey)
+            process.stdin.close()
+            self.__processes.append(process)
+
+    def close(self) -> None:
+        """Stop the shards and wait for their processes to exit."""
+        for shard in self.__shards:
+            if shard.connection is not None:
+                shard.call((ShardRequestType.STOP,))
+                shard.close()
+        self.__listener.close()
+        for process in self.__processes:
+            process.wait()
+        self.__shards.clear()
+        self.__processes.clear()
+
+    def process_market_events(self, elapsed_time: float) -> None:
+        """Process market events in every shard in parallel, then replay their replies in turn.
+
+        Shards that have finished, or whose next market event is not yet
+        due, are left alone.
+        """
+        request = (ShardRequestType.ADVANCE, elapsed_time)
+        shards = [s for s in self.__shards
+                  if not s.done and (s.next_event_time is None or s.next_event_time < elapsed_time)]
+        for shard in shards:
+            shard.send(request)
+        replies = [shard.receive() for shard in shards]
+        for shard, reply in zip(shards, replies):
+            shard.apply(reply)
+
+        if not self.__done and all(shard.done for shard in self.__shards):
+            self.__done = True
+            for c in self.task_complete:
+                c(self)
+
+    def start(self) -> None:
+        """Wait for the shards to connect, then create their books and start their market events readers."""
+        for number, shard in enumerate(self.__shards):
+            shard.connection = self.__listener.accept()
+            shard.call((ShardRequestType.SETUP, number, [(p,) + tuple(self.__pairs[p]) for p in shard.pairs],
+                        *self.__book_settings))
+            shard.call((ShardRequestType.START,))
+            self.__logger.info("shard %d started for instrument pairs %s", number,
+                               ", ".join(str(p) for p in shard.pairs))
+        self.__listener.close()
+
+
+def main(address: str) -> None:
+    """Connect to the gateway at the given address and run a shard."""
+    with Client(address, authkey=sys.stdin.buffer.read()) as connection:
+        ShardWorker(connection).run()
+
+
+if __name__ == "__main__":
+    # Use the package's copy of this module so that the types in replies are
+    # pickled by their package names rather than as belonging to __main__
+    from ready_trader_go.shard import main as shard_main
+    shard_main(sys.argv[1])
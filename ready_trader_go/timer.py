@@ -17,7 +17,6 @@
 #     <https://www.gnu.org/licenses/>.
 import asyncio
 import logging
-import time
 import random
 
 from typing import Any, Callable, List, Optional
@@ -30,6 +29,7 @@ class Timer:
         """Initialise a new instance of the timer class."""
         self.__event_loop: Optional[asyncio.AbstractEventLoop] = None
         self.__logger: logging.Logger = logging.getLogger("TIMER")
+        self.__shut_down: bool = False
         self.__speed: float = speed
         self.__start_time: float = 0.0
         self.__tick_timer_handle: Optional[asyncio.TimerHandle] = None
@@ -42,14 +42,13 @@ class Timer:
 
     def advance(self) -> float:
         """Advance the timer."""
-        if self.__start_time:
-            now = (time.monotonic() - self.__start_time) * self.__speed
-            return now
+        if self.__event_loop is not None:
+            return (self.__event_loop.time() - self.__start_time) * self.__speed
         return 0.0
 
     def __on_timer_tick(self, tick_time: float, tick_number: int):
         """Called on each timer tick."""
-        now = (time.monotonic() - self.__start_time) * self.__speed
+        now = (self.__event_loop.time() - self.__start_time) * self.__speed
 
         # There may have been a delay, so work out which tick this really is
         # We also need to prevent "skipping" ticks backwards due to negative random jitter
@@ -61,6 +60,10 @@ class Timer:
         for callback in self.timer_ticked:
             callback(self, now, tick_number)
 
+        # A callback may have shut the timer down
+        if self.__shut_down:
+            return
+
         tick_time += self.__tick_interval
 
         # Generate random jitter, which can be +/- 20% of standard tick interval
@@ -73,7 +76,7 @@ class Timer:
     def start(self) -> None:
         """Start this timer."""
         self.__event_loop = asyncio.get_running_loop()
-        self.__start_time = time.monotonic()
+        self.__start_time = self.__event_loop.time()
         for callback in self.timer_started:
             callback(self, self.__start_time)
         self.__on_timer_tick(0.0, 1)
@@ -81,6 +84,7 @@ class Timer:
     def shutdown(self, now: float, reason: str) -> None:
         """Shut down this timer."""
         self.__logger.info("shutting down the match: time=%.6f reason='%s'", now, reason)
+        self.__shut_down = True
         if self.__tick_timer_handle:
             self.__tick_timer_handle.cancel()
         for callback in self.timer_stopped:
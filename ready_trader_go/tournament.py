@@ -0,0 +1,249 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+import concurrent.futures
+import copy
+import csv
+import errno
+import itertools
+import json
+import pathlib
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+RESULTS_FILE = "results.csv"
+SUMMARY_FILE = "summary.csv"
+
+# Another process may take a match's port before the match starts, in which
+# case the exchange logs this and stops
+PORT_IN_USE_ERROR = "failed to start the execution server: errno=%d " % errno.EADDRINUSE
+PORT_ATTEMPTS = 3
+
+
+class Match(object):
+    """A single match in a tournament."""
+    __slots__ = ("directory", "market_data", "number", "port", "returncode", "seed", "traders")
+
+    def __init__(self, number: int, directory: pathlib.Path, traders: Sequence[pathlib.Path],
+                 market_data: pathlib.Path, seed: int, port: int):
+        """Initialise a new instance of the Match class."""
+        self.directory: pathlib.Path = directory
+        self.market_data: pathlib.Path = market_data
+        self.number: int = number
+        self.port: int = port
+        self.returncode: Optional[int] = None
+        self.seed: int = seed
+        self.traders: Tuple[pathlib.Path, ...] = tuple(traders)
+
+
+class MatchResult(object):
+    """The final score of one team in one match."""
+    __slots__ = ("match", "profit_loss", "status", "team")
+
+    def __init__(self, match: Match, team: str, profit_loss: float, status: str):
+        """Initialise a new instance of the MatchResult class."""
+        self.match: Match = match
+        self.profit_loss: float = profit_loss
+        self.status: str = status
+        self.team: str = team
+
+    def __iter__(self):
+        return iter((self.match.number,
+                     ";".join(t.name for t in self.match.traders),
+                     str(self.match.market_data),
+                     self.match.seed,
+                     self.team,
+                     self.profit_loss,
+                     self.status))
+
+
+def allocate_ports(count: int) -> List[int]:
+    """Return the given number of distinct, currently unused, port numbers.
+
+    The ports are free when this returns but nothing stops another process
+    from taking one before it is used, so run_match tries another port if
+    the exchange fails to bind its port.
+    """
+    sockets: List[socket.socket] = list()
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sockets.append(sock)
+            sock.bind(("127.0.0.1", 0))
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def final_scores(score_board: pathlib.Path) -> Dict[str, Tuple[float, str]]:
+    """Return the final profit or loss and status of each team on the given score board."""
+    scores: Dict[str, Tuple[float, str]] = dict()
+    with score_board.open("r", newline="") as score_file:
+        for row in csv.DictReader(score_file):
+            scores[row["Team"]] = (float(row["ProfitOrLoss"]), row["Status"])
+    return scores
+
+
+def __match_channel_name(match: Match, typ: str, name: str) -> str:
+    """Return a name for an information channel or order feed that no other match in a tournament uses."""
+    if typ == "mmap":
+        # Relative to the match directory
+        return pathlib.Path(name).name
+    return "%s_%04d" % (name, match.number)
+
+
+def __set_port(match: Match, port: int) -> None:
+    """Change the execution port in the configuration files of a prepared match."""
+    match.port = port
+    paths = [match.directory / "exchange.json"] + [match.directory / t.with_suffix(".json").name
+                                                   for t in match.traders]
+    for path in paths:
+        with path.open("r") as config_file:
+            config = json.load(config_file)
+        config["Execution"]["Port"] = port
+        with path.open("w") as config_file:
+            json.dump(config, config_file, indent=2)
+
+
+def prepare_match(match: Match, exchange_config: Dict[str, Any]) -> None:
+    """Create the match directory containing the auto-traders and configuration files.
+
+    The information channel and order feed are given names of their own, so
+    that matches may run at the same time, and the instrumentation port and
+    heads-up display are dropped.
+    """
+    if match.directory.exists():
+        shutil.rmtree(match.directory)
+    match.directory.mkdir(parents=True)
+
+    config = copy.deepcopy(exchange_config)
+    config.pop("Hud", None)
+    config["Engine"]["MarketDataFile"] = str(match.market_data.resolve())
+    config["Engine"]["MatchEventsFile"] = "match_events.csv"
+    config["Engine"]["ScoreBoardFile"] = "score_board.csv"
+    config["Engine"]["Seed"] = match.seed
+    config["Execution"]["Port"] = match.port
+    config["Traders"] = dict()
+    for section in ("Information", "OrderFeed"):
+        if section in config:
+            config[section]["Name"] = __match_channel_name(match, config[section]["Type"], config[section]["Name"])
+    if "Instrumentation" in config:
+        config["Instrumentation"].pop("Host", None)
+        config["Instrumentation"].pop("Port", None)
+        if not config["Instrumentation"]:
+            del config["Instrumentation"]
+
+    for trader in match.traders:
+        with trader.with_suffix(".json").open("r") as trader_config_file:
+            trader_config = json.load(trader_config_file)
+        trader_config["Execution"]["Host"] = config["Execution"]["Host"]
+        trader_config["Execution"]["Port"] = match.port
+        trader_config["Information"] = config["Information"]
+        if "OrderFeed" in trader_config and "OrderFeed" in config:
+            trader_config["OrderFeed"] = config["OrderFeed"]
+        config["Traders"][trader_config["TeamName"]] = trader_config["Secret"]
+
+        shutil.copy(trader, match.directory / trader.name)
+        with (match.directory / trader.with_suffix(".json").name).open("w") as trader_config_file:
+            json.dump(trader_config, trader_config_file, indent=2)
+
+    with (match.directory / "exchange.json").open("w") as config_file:
+        json.dump(config, config_file, indent=2)
+
+
+def run_match(match: Match, rtg: pathlib.Path, timeout: Optional[float]) -> Match:
+    """Run a match to completion in its own directory, trying other ports if the match's port is taken."""
+    command = [sys.executable, str(rtg), "run", "--hdu=0", "--config=exchange.json"]
+    exchange_log = match.directory / "exchange.log"
+    for attempt in range(PORT_ATTEMPTS):
+        if attempt:
+            __set_port(match, allocate_ports(1)[0])
+            # The log is appended to, so start it afresh
+            exchange_log.unlink()
+        with (match.directory / "rtg.log").open("w") as log:
+            try:
+                completed = subprocess.run(command + [t.name for t in match.traders], cwd=match.directory,
+                                           stdout=log, stderr=subprocess.STDOUT, timeout=timeout)
+                match.returncode = completed.returncode
+            except subprocess.TimeoutExpired:
+                print("match %d timed out" % match.number, file=log)
+        if not exchange_log.exists() or PORT_IN_USE_ERROR not in exchange_log.read_text():
+            break
+    return match
+
+
+def summarise(results: Iterable[MatchResult]) -> List[Tuple[str, int, float, float, float, float]]:
+    """Return the number of matches, mean, standard deviation, minimum and maximum profit of each team."""
+    by_team: Dict[str, List[float]] = dict()
+    for result in results:
+        by_team.setdefault(result.team, list()).append(result.profit_loss)
+
+    summary = [(team, len(pnl), statistics.fmean(pnl), statistics.stdev(pnl) if len(pnl) > 1 else 0.0, min(pnl),
+                max(pnl)) for team, pnl in by_team.items()]
+    summary.sort(key=lambda s: s[2], reverse=True)
+    return summary
+
+
+def run_tournament(exchange_config: Dict[str, Any], trader_sets: Sequence[Sequence[pathlib.Path]],
+                   market_data_files: Sequence[pathlib.Path], seeds: Sequence[int], output: pathlib.Path,
+                   rtg: pathlib.Path, processes: int, timeout: Optional[float] = None
+                   ) -> List[Tuple[str, int, float, float, float, float]]:
+    """Run every combination of trader set, market data file and seed and return a per-team summary.
+
+    Each match runs in its own sub-directory of the output directory, with its
+    own execution port and information file. The final score of every team in
+    every match is written to the results file and the per-team summary to the
+    summary file, both in the output directory.
+    """
+    combinations = list(itertools.product(trader_sets, market_data_files, seeds))
+    ports = allocate_ports(len(combinations))
+    matches = [Match(i, output / ("match_%04d" % i), traders, market_data, seed, port)
+               for i, ((traders, market_data, seed), port) in enumerate(zip(combinations, ports), 1)]
+
+    for match in matches:
+        prepare_match(match, exchange_config)
+
+    results: List[MatchResult] = list()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=processes) as executor:
+        for match in executor.map(lambda m: run_match(m, rtg, timeout), matches):
+            score_board = match.directory / "score_board.csv"
+            if not score_board.exists():
+                print("match %d (%s) produced no score board, see '%s'"
+                      % (match.number, match.directory, match.directory / "rtg.log"), file=sys.stderr)
+                continue
+            for team, (profit_loss, status) in final_scores(score_board).items():
+                results.append(MatchResult(match, team, profit_loss, status))
+
+    with (output / RESULTS_FILE).open("w", newline="") as results_file:
+        csv_writer = csv.writer(results_file)
+        csv_writer.writerow(("Match", "Traders", "MarketDataFile", "Seed", "Team", "ProfitOrLoss", "Status"))
+        csv_writer.writerows(results)
+
+    summary = summarise(results)
+    with (output / SUMMARY_FILE).open("w", newline="") as summary_file:
+        csv_writer = csv.writer(summary_file)
+        csv_writer.writerow(("Team", "Matches", "MeanProfitOrLoss", "StdevProfitOrLoss", "MinProfitOrLoss",
+                             "MaxProfitOrLoss"))
+        csv_writer.writerows((t, n, round(m, 2), round(s, 2), lo, hi) for t, n, m, s, lo, hi in summary)
+
+    return summary
@@ -25,8 +25,8 @@ import sys
 from typing import Any, Dict
 
 from .application import Application
-from .base_auto_trader import BaseAutoTrader
-from .pubsub import SubscriberFactory
+from .base_auto_trader import BaseAutoTrader, OrderFeedReceiver
+from .pubsub import DEFAULT_SPIN_BUDGET, WAKEUP_POLICIES, SubscriberFactory
 
 
 # From Python 3.8, the proactor event loop is used by default on Windows
@@ -51,6 +51,22 @@ def __validate_json_object(config, section, required_keys, value_types):
         raise Exception("Element of inappropriate type in %s configuration" % section)
 
 
+def __validate_subscription(config, section):
+    __validate_json_object(config, section, ("Type", "Name"), (str, str))
+    obj = config[section]
+    optional_types = (("Wakeup", str), ("SpinBudget", int), ("ZeroCopy", bool))
+    if any(k in obj and type(obj[k]) is not t for k, t in optional_types):
+        raise Exception("Element of inappropriate type in %s configuration" % section)
+    if obj.get("Wakeup", "Spin") not in WAKEUP_POLICIES:
+        raise Exception("%s.Wakeup configuration should be one of %s" % (section, ", ".join(WAKEUP_POLICIES)))
+
+
+def __create_subscriber_factory(config, section) -> SubscriberFactory:
+    obj = config[section]
+    return SubscriberFactory(obj["Type"], obj["Name"], obj.get("Wakeup", "Spin"),
+                             obj.get("SpinBudget", DEFAULT_SPIN_BUDGET), obj.get("ZeroCopy", False))
+
+
 def __config_validator(config):
     """Return True if the specified config is valid, otherwise raise an exception."""
     if type(config) is not dict:
@@ -59,7 +75,9 @@ def __config_validator(config):
         raise Exception("A required key is missing from the configuration")
 
     __validate_json_object(config, "Execution", ("Host", "Port"), (str, int))
-    __validate_json_object(config, "Information", ("Type", "Name"), (str, str))
+    __validate_subscription(config, "Information")
+    if "OrderFeed" in config:
+        __validate_subscription(config, "OrderFeed")
 
     __validate_hostname(config, "Execution", "Host")
 
@@ -89,9 +107,12 @@ async def __start_autotrader(auto_trader: BaseAutoTrader, config: Dict[str, Any]
         loop.stop()
         return
 
-    info = config["Information"]
-    sub_factory = SubscriberFactory(info["Type"], info["Name"])
-    sub_factory.create(auto_trader)
+    subscriber = __create_subscriber_factory(config, "Information").create(auto_trader)
+    subscriber.frames_dropped.append(lambda _, count: auto_trader.on_frames_dropped(count))
+
+    if "OrderFeed" in config:
+        feed_subscriber = __create_subscriber_factory(config, "OrderFeed").create(OrderFeedReceiver(auto_trader))
+        feed_subscriber.frames_dropped.append(lambda _, count: auto_trader.on_order_feed_frames_dropped(count))
 
 
 def main(name: str = "autotrader") -> None:
@@ -23,6 +23,30 @@ class Instrument(enum.IntEnum):
     ETF = 1
 
 
+# The exchange may host several pairs of instruments, each an ETF and the
+# future it tracks. Every instrument has a number: the instruments of the
+# first pair are numbered as above, those of the second pair are numbered
+# two and three, and so on.
+def instrument_number(pair: int, instrument: Instrument) -> int:
+    """Return the number of the given instrument of the given instrument pair."""
+    return instrument if pair == 0 else 2 * pair + instrument
+
+
+def instrument_pair(number: int) -> int:
+    """Return the instrument pair to which the numbered instrument belongs."""
+    return number >> 1
+
+
+def instrument_type(number: int) -> Instrument:
+    """Return the type (ETF or future) of the numbered instrument."""
+    return Instrument(number & 1)
+
+
+def tick_size_in_cents(tick_size: float) -> int:
+    """Return the given tick size, in dollars, as a whole number of cents."""
+    return round(tick_size * 100.0)
+
+
 class Side(enum.IntEnum):
     SELL = 0
     BUY = 1
@@ -56,12 +80,13 @@ class ICompetitor:
         """Called when a cancel order request is received from the competitor."""
         raise NotImplementedError()
 
-    def on_hedge_message(self, now: float, client_order_id: int, side: int, price: int, volume: int) -> None:
+    def on_hedge_message(self, now: float, client_order_id: int, side: int, price: int, volume: int,
+                         pair: int = 0) -> None:
         """Called when a hedge order request is received from the competitor."""
         raise NotImplementedError
 
     def on_insert_message(self, now: float, client_order_id: int, side: int, price: int, volume: int,
-                          lifespan: int) -> None:
+                          lifespan: int, pair: int = 0) -> None:
         """Called when an insert order request is received from the competitor."""
         raise NotImplementedError()
 
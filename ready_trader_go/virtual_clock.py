@@ -0,0 +1,194 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+import asyncio
+import logging
+import selectors
+import time
+
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_REPLY_TIMEOUT: float = 1.0
+
+
+class LockstepPeer:
+    """What a Lockstep knows about one auto-trader."""
+    __slots__ = ("dispatch", "frames_read", "messages_received", "messages_sent", "name", "pending")
+
+    def __init__(self, name: str, dispatch: Callable[[int, bytes, int, int], None]):
+        """Initialise a new instance of the LockstepPeer class."""
+        self.dispatch: Callable[[int, bytes, int, int], None] = dispatch
+        self.frames_read: int = 0
+        self.messages_received: int = 0
+        self.messages_sent: int = 0
+        self.name: str = name
+        self.pending: List[Tuple[int, bytes, int]] = list()
+
+    def is_caught_up(self, frames_published: int) -> bool:
+        """Return True if this auto-trader has handled everything sent to it."""
+        return self.frames_read >= frames_published and self.messages_received >= self.messages_sent
+
+
+class Lockstep:
+    """Holds back the auto-traders' messages until they have all caught up.
+
+    Each auto-trader sends an idle message once it has dealt with whatever
+    it was sent, saying how many information frames it has read and how many
+    execution messages it has received. When every auto-trader has caught up
+    with everything sent to it, the messages held back are handled in order
+    of team name, so that the outcome does not depend upon which auto-trader
+    was quickest. When there are none, the simulated clock may move on.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, frames_published: Callable[[], int]):
+        """Initialise a new instance of the Lockstep class."""
+        self.__event_loop: asyncio.AbstractEventLoop = loop
+        self.__frames_published: Callable[[], int] = frames_published
+        self.__logger: logging.Logger = logging.getLogger("LOCKSTEP")
+        self.__peers: List[LockstepPeer] = list()
+        self.__release_pending: bool = False
+
+    def acknowledge(self, peer: LockstepPeer, frames_read: int, messages_received: int) -> None:
+        """Record an idle message from an auto-trader."""
+        peer.frames_read = frames_read
+        peer.messages_received = messages_received
+        self.__schedule_release()
+
+    def add_peer(self, name: str, dispatch: Callable[[int, bytes, int, int], None]) -> LockstepPeer:
+        """Start keeping track of an auto-trader."""
+        peer = LockstepPeer(name, dispatch)
+        self.__peers.append(peer)
+        self.__peers.sort(key=lambda p: p.name)
+        return peer
+
+    def give_up(self) -> None:
+        """Stop waiting for the auto-traders that have not caught up."""
+        frames_published: int = self.__frames_published()
+        for peer in self.__peers:
+            if not peer.is_caught_up(frames_published):
+                self.__logger.warning("'%s' did not reply in time: frames_read=%d frames_published=%d"
+                                      " messages_received=%d messages_sent=%d", peer.name, peer.frames_read,
+                                      frames_published, peer.messages_received, peer.messages_sent)
+                peer.frames_read = frames_published
+                peer.messages_received = peer.messages_sent
+        self.__schedule_release()
+
+    def hold(self, peer: LockstepPeer, typ: int, body: bytes, length: int) -> None:
+        """Hold back a message from an auto-trader until every auto-trader has caught up."""
+        peer.pending.append((typ, body, length))
+        self.__schedule_release()
+
+    def is_idle(self) -> bool:
+        """Return True if every auto-trader has caught up and no messages are held back."""
+        frames_published: int = self.__frames_published()
+        return all(peer.is_caught_up(frames_published) and not peer.pending for peer in self.__peers)
+
+    def remove_peer(self, peer: LockstepPeer) -> None:
+        """Stop keeping track of an auto-trader, discarding any messages held back."""
+        if peer in self.__peers:
+            self.__peers.remove(peer)
+            peer.pending.clear()
+            self.__schedule_release()
+
+    def __release(self) -> None:
+        """Handle the messages held back, if every auto-trader has caught up."""
+        self.__release_pending = False
+        frames_published: int = self.__frames_published()
+        if not all(peer.is_caught_up(frames_published) for peer in self.__peers):
+            return
+        for peer in tuple(self.__peers):
+            pending, peer.pending = peer.pending, list()
+            for typ, body, length in pending:
+                # Handling a message may close the connection
+                if peer not in self.__peers:
+                    break
+                peer.dispatch(typ, body, 0, length)
+
+    def __schedule_release(self) -> None:
+        """Arrange for the messages held back to be handled once the current callbacks have run."""
+        if not self.__release_pending:
+            self.__release_pending = True
+            self.__event_loop.call_soon(self.__release)
+
+
+class VirtualClockSelector(selectors.DefaultSelector):
+    """A selector that advances a simulated clock instead of waiting.
+
+    Whenever the event loop would block until its next timer is due and the
+    lockstep (if any) is idle, the simulated clock jumps straight to the
+    next timer. Otherwise, the selector waits for the auto-traders to reply,
+    giving up on them after the reply timeout.
+    """
+
+    def __init__(self, reply_timeout: float):
+        """Initialise a new instance of the VirtualClockSelector class."""
+        super().__init__()
+        self.frozen_until: Optional[float] = None
+        self.lockstep: Optional[Lockstep] = None
+        self.now: float = 0.0
+        self.reply_timeout: float = reply_timeout
+
+    def select(self, timeout: Optional[float] = None) -> List[Tuple[selectors.SelectorKey, int]]:
+        """Wait for I/O events, advancing the simulated clock if there are none to wait for."""
+        if self.frozen_until is not None:
+            remaining: float = self.frozen_until - time.monotonic()
+            if remaining > 0.0:
+                # The clock is frozen, so timers cannot fire; just wait for I/O.
+                return super().select(0 if timeout is not None and timeout <= 0 else remaining)
+            self.frozen_until = None
+
+        if timeout is not None and timeout <= 0:
+            return super().select(0)
+
+        if self.lockstep is None or self.lockstep.is_idle():
+            if timeout is None:
+                return super().select(None)
+            self.now += timeout
+            return super().select(0)
+
+        events = super().select(self.reply_timeout)
+        if not events:
+            self.lockstep.give_up()
+        return events
+
+
+class VirtualClockEventLoop(asyncio.SelectorEventLoop):
+    """An event loop driven by a simulated clock rather than the wall clock.
+
+    The clock starts frozen so that auto-traders have time to connect and log
+    in. Once thawed, time only advances when the lockstep is idle, so a match
+    runs as fast as its participants allow.
+    """
+
+    def __init__(self, reply_timeout: float = DEFAULT_REPLY_TIMEOUT, freeze_period: float = 0.0):
+        """Initialise a new instance of the VirtualClockEventLoop class."""
+        self.__selector: VirtualClockSelector = VirtualClockSelector(reply_timeout)
+        super().__init__(self.__selector)
+        if freeze_period > 0.0:
+            self.__selector.frozen_until = time.monotonic() + freeze_period
+
+    def thaw(self) -> None:
+        """Allow the simulated clock to advance."""
+        self.__selector.frozen_until = None
+
+    def time(self) -> float:
+        """Return the current simulated time."""
+        return self.__selector.now
+
+    def use_lockstep(self, lockstep: Lockstep) -> None:
+        """Only advance the simulated clock while the given lockstep is idle."""
+        self.__selector.lockstep = lockstep
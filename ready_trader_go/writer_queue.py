@@ -0,0 +1,169 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+import collections
+import logging
+import pickle
+import tempfile
+import threading
+import time
+
+from typing import BinaryIO, Deque, List, NamedTuple, Optional, Tuple
+
+DEFAULT_WRITER_QUEUE_SIZE = 65536
+WRITER_QUEUE_POLICIES = ("Block", "Spill", "Drop")
+
+
+class WriterQueueStatistics(NamedTuple):
+    depth: int
+    high_water_mark: int
+    spilled: int
+    dropped: int
+    lag: float
+    max_lag: float
+
+
+class WriterQueue:
+    """A bounded queue of batches of items to be written to a file by a writer thread.
+
+    The queue holds at most max_size items, however they are batched. When
+    a batch does not fit, put either blocks until the writer catches up
+    ("Block"), appends the batch to a temporary file that the writer reads
+    once the queue is empty ("Spill") or discards the batch ("Drop").
+    Batches are always taken in the order in which they were put.
+    """
+
+    def __init__(self, name: str, max_size: int = DEFAULT_WRITER_QUEUE_SIZE, policy: str = "Block"):
+        """Initialise a new instance of the WriterQueue class."""
+        if policy not in WRITER_QUEUE_POLICIES:
+            raise ValueError("unknown writer queue policy: %s" % policy)
+
+        self.logger = logging.getLogger(name)
+        self.max_size: int = max_size
+        self.policy: str = policy
+
+        self.dropped: int = 0
+        self.high_water_mark: int = 0
+        self.lag: float = 0.0
+        self.max_lag: float = 0.0
+        self.spilled: int = 0
+
+        self.__batches: Deque[Tuple[float, Optional[List]]] = collections.deque()
+        self.__closed: bool = False
+        self.__condition = threading.Condition()
+        self.__size: int = 0
+        self.__spill_count: int = 0
+        self.__spill_file: Optional[BinaryIO] = None
+        self.__spill_read_offset: int = 0
+        self.__spill_size: int = 0
+
+    def close(self) -> None:
+        """Indicate that no more batches will be taken, so that put never blocks."""
+        with self.__condition:
+            self.__closed = True
+            self.__batches.clear()
+            self.__size = 0
+            if self.__spill_file is not None:
+                self.__spill_file.close()
+                self.__spill_file = None
+            self.__spill_count = self.__spill_size = 0
+            self.__condition.notify_all()
+
+    def get(self) -> Optional[List]:
+        """Remove and return the oldest batch, waiting for one if necessary."""
+        with self.__condition:
+            while not self.__batches and not self.__spill_count:
+                self.__condition.wait()
+            if self.__batches:
+                put_time, batch = self.__batches.popleft()
+                if batch is not None:
+                    self.__size -= len(batch)
+                self.__condition.notify()
+            else:
+                put_time, batch = self.__unspill()
+        self.lag = time.monotonic() - put_time
+        if self.lag > self.max_lag:
+            self.max_lag = self.lag
+        return batch
+
+    def put(self, batch: Optional[List]) -> None:
+        """Add a batch to the queue, following the overflow policy if it does not fit.
+
+        A batch of None marks the end of the series and is never dropped.
+        """
+        length = len(batch) if batch is not None else 0
+        with self.__condition:
+            if self.__closed:
+                self.dropped += length
+                return
+
+            if self.__spill_count or (self.__size and self.__size + length > self.max_size):
+                if self.policy == "Spill":
+                    self.__spill(batch, length)
+                    return
+                if self.policy == "Drop" and batch is not None:
+                    if self.dropped == 0:
+                        self.logger.warning("writer queue full: dropping items")
+                    self.dropped += length
+                    return
+                while self.__size and self.__size + length > self.max_size and not self.__closed:
+                    self.__condition.wait()
+                if self.__closed:
+                    return
+
+            self.__batches.append((time.monotonic(), batch))
+            self.__size += length
+            if self.__size > self.high_water_mark:
+                self.high_water_mark = self.__size
+            self.__condition.notify()
+
+    def qsize(self) -> int:
+        """Return the number of items waiting to be taken."""
+        return self.__size + self.__spill_size
+
+    def statistics(self) -> WriterQueueStatistics:
+        """Return the current statistics for this queue."""
+        return WriterQueueStatistics(self.qsize(), self.high_water_mark, self.spilled, self.dropped, self.lag,
+                                     self.max_lag)
+
+    def __spill(self, batch: Optional[List], length: int) -> None:
+        """Append a batch to the spill file."""
+        if self.__spill_file is None:
+            self.logger.warning("writer queue full: spilling items to a temporary file")
+            self.__spill_file = tempfile.TemporaryFile(prefix="rtg_spill")
+        self.__spill_file.seek(0, 2)
+        pickle.dump((time.monotonic(), batch), self.__spill_file, pickle.HIGHEST_PROTOCOL)
+        self.__spill_count += 1
+        self.__spill_size += length
+        self.spilled += length
+        self.__condition.notify()
+
+    def __unspill(self) -> Tuple[float, Optional[List]]:
+        """Remove and return the oldest batch in the spill file."""
+        spill_file = self.__spill_file
+        spill_file.seek(self.__spill_read_offset)
+        put_time, batch = pickle.load(spill_file)
+        self.__spill_count -= 1
+        if batch is not None:
+            self.__spill_size -= len(batch)
+        if self.__spill_count:
+            self.__spill_read_offset = spill_file.tell()
+        else:
+            spill_file.seek(0)
+            spill_file.truncate()
+            self.__spill_read_offset = 0
+        return put_time, batch
@@ -16,7 +16,9 @@
 #     License along with Ready Trader Go.  If not, see
 #     <https://www.gnu.org/licenses/>.
 import argparse
+import json
 import multiprocessing
+import os
 import pathlib
 import subprocess
 import sys
@@ -24,6 +26,9 @@ import time
 import traceback
 
 import ready_trader_go.exchange
+import ready_trader_go.market_events
+import ready_trader_go.match_events
+import ready_trader_go.tournament
 import ready_trader_go.trader
 
 try:
@@ -32,6 +37,30 @@ except ImportError:
     hud_main = hud_replay = None
 
 
+def compile_market_data(args) -> None:
+    """Compile a market data file."""
+    path: pathlib.Path = args.filename
+    if not path.is_file():
+        print("'%s' is not a regular file" % str(path), file=sys.stderr)
+        return
+
+    output: pathlib.Path = args.output if args.output is not None else path.with_suffix(".bin")
+    count = ready_trader_go.market_events.compile_market_data(str(path), str(output))
+    print("compiled %d market events into '%s'" % (count, output))
+
+
+def convert_match_events(args) -> None:
+    """Convert a columnar match events file into a CSV file."""
+    path: pathlib.Path = args.filename
+    if not ready_trader_go.match_events.is_columnar_match_events(str(path)):
+        print("'%s' is not a columnar match events file" % str(path), file=sys.stderr)
+        return
+
+    output: pathlib.Path = args.output if args.output is not None else path.with_suffix(".csv")
+    count = ready_trader_go.match_events.convert_match_events(str(path), str(output))
+    print("converted %d match events into '%s'" % (count, output))
+
+
 def no_heads_up_display() -> None:
     print("Cannot run the Ready Trader Go heads-up display. This could\n"
           "mean that the PySide6 module has not been installed. Please\n"
@@ -93,6 +122,45 @@ def run(args) -> None:
             hud_main(args.host, args.port, args.config)
 
 
+def tournament(args) -> None:
+    """Run many matches and summarise the results."""
+    trader_sets = [[pathlib.Path(t) for t in traders.split(",") if t] for traders in args.traders]
+    for traders in trader_sets:
+        if len(set(t.name for t in traders)) != len(traders):
+            print("each auto-trader may only appear once in a match: '%s'" % ",".join(map(str, traders)),
+                  file=sys.stderr)
+            return
+        for auto_trader in traders:
+            if not auto_trader.exists():
+                print("'%s' does not exist" % auto_trader, file=sys.stderr)
+                return
+            if not auto_trader.with_suffix(".json").exists():
+                print("'%s': configuration file is missing: %s" % (auto_trader, auto_trader.with_suffix(".json")),
+                      file=sys.stderr)
+                return
+
+    with open(args.config, "r") as config_file:
+        exchange_config = json.load(config_file)
+
+    market_data_files = args.market_data or [pathlib.Path(exchange_config["Engine"]["MarketDataFile"])]
+    for market_data in market_data_files:
+        if not market_data.is_file():
+            print("'%s' is not a regular file" % str(market_data), file=sys.stderr)
+            return
+
+    # Every auto-trader polls the information channel, so allow a core for
+    # each auto-trader and one for the exchange simulator in every match.
+    processes = args.processes or max(1, (os.cpu_count() or 1) // (1 + max(len(t) for t in trader_sets)))
+
+    summary = ready_trader_go.tournament.run_tournament(exchange_config, trader_sets, market_data_files, args.seeds,
+                                                        args.output, pathlib.Path(__file__).resolve(), processes,
+                                                        args.timeout)
+
+    print("%-20s %7s %14s %14s %14s %14s" % ("Team", "Matches", "Mean P&L", "Stdev P&L", "Min P&L", "Max P&L"))
+    for team, count, mean, stdev, minimum, maximum in summary:
+        print("%-20s %7d %14.2f %14.2f %14.2f %14.2f" % (team, count, mean, stdev, minimum, maximum))
+
+
 def main() -> None:
     """Process command line arguments and execute the given command."""
     parser = argparse.ArgumentParser(description="Ready Trader Go command line utility.")
@@ -125,6 +193,53 @@ def main() -> None:
                                type=pathlib.Path)
     replay_parser.set_defaults(func=replay)
 
+    tournament_parser = subparsers.add_parser("tournament", aliases=["to"],
+                                              description=("Run a match for every combination of auto-trader set, "
+                                                           "market data file and seed, several at a time, and "
+                                                           "summarise the results."),
+                                              help="run a tournament of Ready Trader Go matches")
+    tournament_parser.add_argument("--traders", action="append", required=True,
+                                   help="comma-separated list of auto-traders taking part in a match (may be "
+                                        "given more than once)")
+    tournament_parser.add_argument("--market-data", nargs="+", default=None, type=pathlib.Path,
+                                   help="market data files to use (default is the file named in the exchange "
+                                        "configuration)")
+    tournament_parser.add_argument("--seeds", nargs="+", default=[0], type=int,
+                                   help="seeds for the exchange simulator's random number generator (default 0)")
+    tournament_parser.add_argument("--config", default="exchange.json",
+                                   help="exchange configuration file to base each match on (default "
+                                        "'exchange.json')")
+    tournament_parser.add_argument("--output", default=pathlib.Path("tournament"), type=pathlib.Path,
+                                   help="directory in which to run the matches and write the results (default "
+                                        "'tournament')")
+    tournament_parser.add_argument("--processes", default=None, type=int,
+                                   help="number of matches to run at once (default is the number of CPU cores "
+                                        "divided by the number of processes in the largest match)")
+    tournament_parser.add_argument("--timeout", default=None, type=float,
+                                   help="number of seconds after which a match is abandoned (default no limit)")
+    tournament_parser.set_defaults(func=tournament)
+
+    compile_parser = subparsers.add_parser("compile-market-data", aliases=["co"],
+                                           description=("Convert a market data file into a binary file that the "
+                                                        "exchange simulator can read without parsing."),
+                                           help="compile a market data file")
+    compile_parser.add_argument("filename", type=pathlib.Path,
+                                help="name of the market data file to compile")
+    compile_parser.add_argument("-o", "--output", default=None, type=pathlib.Path,
+                                help="name of the compiled file (default is the market data file name ending "
+                                     "in '.bin')")
+    compile_parser.set_defaults(func=compile_market_data)
+
+    convert_parser = subparsers.add_parser("convert-match-events", aliases=["cm"],
+                                           description="Convert a columnar match events file into a CSV file.",
+                                           help="convert a columnar match events file into a CSV file")
+    convert_parser.add_argument("filename", type=pathlib.Path,
+                                help="name of the columnar match events file to convert")
+    convert_parser.add_argument("-o", "--output", default=None, type=pathlib.Path,
+                                help="name of the CSV file (default is the match events file name ending in "
+                                     "'.csv')")
+    convert_parser.set_defaults(func=convert_match_events)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,103 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Send a storm of insert and cancel messages to a competitor and report its throughput.
+
+Usage: python tests/bench_competitor.py [MESSAGE_COUNT [ORDER_COUNT_LIMIT]]
+
+A competitor with an active order count limit of ORDER_COUNT_LIMIT (10 by
+default), and an active volume limit ten times that, is sent MESSAGE_COUNT
+(200,000 by default) insert order messages for prices around 100.00, with
+a cancel message for its oldest order whenever it reaches the active order
+count limit. One insert in twenty is
+invalid and rejected. The orders rest in an empty order book, so nothing
+trades. The report shows the time taken for each message.
+"""
+import random
+import sys
+import time
+
+from ready_trader_go.account import AccountFactory
+from ready_trader_go.competitor import Competitor, InstrumentPair
+from ready_trader_go.match_events import MatchEvents
+from ready_trader_go.order_book import OrderBook
+from ready_trader_go.types import Instrument, Lifespan, Side
+from ready_trader_go.unhedged_lots import UnhedgedLotsFactory
+
+REPEAT = 3
+
+
+class NullConnection:
+    """An execution connection that discards everything sent to it."""
+
+    def close(self):
+        pass
+
+    def send_error(self, client_order_id, error_message):
+        pass
+
+    def send_order_status(self, client_order_id, fill_volume, remaining_volume, fees):
+        pass
+
+
+def make_messages(count: int, order_count_limit: int):
+    """Return a list of (is_insert, arguments) tuples for the storm."""
+    rng = random.Random(42)
+    messages = list()
+    live = list()
+    for client_order_id in range(1, count + 1):
+        if len(live) == order_count_limit:
+            messages.append((False, (live.pop(0),)))
+        side = rng.choice((Side.BUY, Side.SELL))
+        price = 10000 + (-1 if side == Side.BUY else 1) * rng.randint(1, 20) * 100
+        if client_order_id % 20 == 0:
+            price += 1  # Not a multiple of the tick size
+        else:
+            live.append(client_order_id)
+        messages.append((True, (client_order_id, side, price, rng.randint(1, 10), Lifespan.GOOD_FOR_DAY)))
+    return messages
+
+
+def storm(messages, order_count_limit: int) -> float:
+    """Send the messages to a new competitor and return the time taken."""
+    pair = InstrumentPair(0, OrderBook(Instrument.FUTURE, 0.0, 0.0), OrderBook(Instrument.ETF, -0.0001, 0.0002),
+                          AccountFactory(0.002, 1.0))
+    competitor = Competitor("Team", NullConnection(), (pair,), MatchEvents(), None, 100, order_count_limit,
+                            10 * order_count_limit, 1.0, UnhedgedLotsFactory(), None)
+    competitor.logger.disabled = True
+    on_insert_message = competitor.on_insert_message
+    on_cancel_message = competitor.on_cancel_message
+
+    start = time.perf_counter()
+    for is_insert, arguments in messages:
+        if is_insert:
+            on_insert_message(1.0, *arguments)
+        else:
+            on_cancel_message(1.0, *arguments)
+    return time.perf_counter() - start
+
+
+def main(count: int, order_count_limit: int) -> None:
+    """Time the storm and print the result."""
+    messages = make_messages(count, order_count_limit)
+    elapsed = min(storm(messages, order_count_limit) for _ in range(REPEAT))
+    print("%d messages %.3fs %.0fns/message %.0f messages/s"
+          % (len(messages), elapsed, elapsed * 1e9 / len(messages), len(messages) / elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
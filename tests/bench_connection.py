@@ -0,0 +1,155 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Measure how quickly an execution connection handles a flood of messages.
+
+Usage: python tests/bench_connection.py [MESSAGES]
+
+An execution connection is fed a login message followed by alternating
+insert and cancel messages in chunks of various sizes, as if they had been
+read from a socket. The script reports the number of messages handled per
+second (the best of five runs) by the buffered receive path and by the
+previous implementation, which appended each chunk to the unhandled data
+left over from the last. The framing columns show the same with a message
+handler that does nothing, i.e. the cost of splitting the stream into
+messages alone.
+"""
+import asyncio
+import sys
+import time
+
+from ready_trader_go.execution import ExecutionConnection
+from ready_trader_go.limiter import FrequencyLimiter
+from ready_trader_go.messages import (CANCEL_MESSAGE, CANCEL_MESSAGE_SIZE, HEADER, HEADER_SIZE, INSERT_MESSAGE,
+                                      INSERT_MESSAGE_SIZE, LOGIN_MESSAGE, LOGIN_MESSAGE_SIZE, MessageType)
+
+CHUNK_SIZES = (1460, 16384, 262144)
+REPEATS = 5
+
+
+class Competitor:
+    def __init__(self):
+        self.count = 0
+
+    def on_cancel_message(self, now, client_order_id):
+        self.count += 1
+
+    def on_insert_message(self, now, client_order_id, side, price, volume, lifespan):
+        self.count += 1
+
+
+class CompetitorManager:
+    def __init__(self):
+        self.competitor = Competitor()
+
+    def login_competitor(self, name, secret, exec_channel):
+        return self.competitor
+
+    def on_competitor_connect(self):
+        pass
+
+    def on_competitor_disconnect(self):
+        pass
+
+
+class Controller:
+    @staticmethod
+    def advance_time():
+        return 0.0
+
+
+class LegacyExecutionConnection(ExecutionConnection):
+    """An execution connection that receives data as the Connection class used to."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._data = b""
+
+    def data_received(self, data: bytes) -> None:
+        if self._data:
+            self._data += data
+        else:
+            self._data = data
+
+        upto: int = 0
+        data_length: int = len(self._data)
+
+        while not self._closing and upto < data_length - HEADER_SIZE:
+            length, typ = HEADER.unpack_from(self._data, upto)
+            if upto + length > data_length:
+                break
+
+            self.on_message(typ, self._data, upto + HEADER_SIZE, length)
+
+            upto += length
+
+        self._data = self._data[upto:]
+
+
+class FramingConnection(ExecutionConnection):
+    def on_message(self, typ, data, start, length):
+        pass
+
+
+class LegacyFramingConnection(LegacyExecutionConnection):
+    def on_message(self, typ, data, start, length):
+        pass
+
+
+def make_stream(count: int) -> bytes:
+    stream = bytearray(HEADER.pack(LOGIN_MESSAGE_SIZE, MessageType.LOGIN) + LOGIN_MESSAGE.pack(b"Bench", b"secret"))
+    insert = HEADER.pack(INSERT_MESSAGE_SIZE, MessageType.INSERT_ORDER)
+    cancel = HEADER.pack(CANCEL_MESSAGE_SIZE, MessageType.CANCEL_ORDER)
+    for i in range(count // 2):
+        stream += insert + INSERT_MESSAGE.pack(i, 0, 10000, 1, 0)
+        stream += cancel + CANCEL_MESSAGE.pack(i)
+    return bytes(stream)
+
+
+async def flood(connection_type: type, stream: bytes, count: int, chunk_size: int) -> float:
+    connection = connection_type(CompetitorManager(), FrequencyLimiter(1.0, 2 ** 62), Controller())
+    view = memoryview(stream)
+    start = time.perf_counter()
+    if issubclass(connection_type, LegacyExecutionConnection):
+        for pos in range(0, len(stream), chunk_size):
+            connection.data_received(bytes(view[pos:pos + chunk_size]))
+    else:
+        pos = 0
+        while pos < len(stream):
+            buffer = connection.get_buffer(-1)
+            nbytes = min(len(buffer), chunk_size, len(stream) - pos)
+            buffer[:nbytes] = view[pos:pos + nbytes]
+            connection.buffer_updated(nbytes)
+            pos += nbytes
+    elapsed = time.perf_counter() - start
+    connection.login_timeout.cancel()
+    return count / elapsed
+
+
+def main(count: int) -> None:
+    stream = make_stream(count)
+    connection_types = (ExecutionConnection, LegacyExecutionConnection, FramingConnection, LegacyFramingConnection)
+    print("Messages per second")
+    print("%-10s %12s %12s %12s %12s" % ("Chunk", "Buffered", "Previous", "Framing", "Previous"))
+    for chunk_size in CHUNK_SIZES:
+        rates = [max(asyncio.run(flood(t, stream, count, chunk_size)) for _ in range(REPEATS))
+                 for t in connection_types]
+        print("%-10d %12.0f %12.0f %12.0f %12.0f" % (chunk_size, *rates))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,129 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Measure the cost of sending the replies to a cascade of fills.
+
+Usage: python tests/bench_execution_replies.py [CASCADES]
+
+When an order is filled, the auto-trader is sent an order filled message
+and an order status message. For cascades of various numbers of fills,
+the script sends the replies over a local socket and reports the number
+of socket send calls per cascade and the number of cascades per second,
+both for the execution connection, which buffers its outbound messages,
+and for the previous implementation, which wrote each message separately.
+"""
+import asyncio
+import socket
+import sys
+import time
+
+from ready_trader_go.execution import ExecutionConnection
+from ready_trader_go.limiter import FrequencyLimiter
+from ready_trader_go.messages import (HEADER, HEADER_SIZE, ORDER_FILLED_MESSAGE, ORDER_FILLED_MESSAGE_SIZE,
+                                      ORDER_STATUS_MESSAGE, ORDER_STATUS_MESSAGE_SIZE, MessageType)
+
+CASCADE_LENGTHS = (1, 4, 16)
+REPLY_SIZE = ORDER_FILLED_MESSAGE_SIZE + ORDER_STATUS_MESSAGE_SIZE
+
+
+class CountingSocket(socket.socket):
+    """A socket that counts the calls made to send."""
+
+    sends = 0
+
+    def send(self, data, flags=0):
+        CountingSocket.sends += 1
+        return super().send(data, flags)
+
+
+class CompetitorManager:
+    def on_competitor_connect(self):
+        pass
+
+    def on_competitor_disconnect(self):
+        pass
+
+
+class LegacyExecutionConnection(ExecutionConnection):
+    """An execution connection that writes each message as it is sent."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.order_filled_message = bytearray(ORDER_FILLED_MESSAGE_SIZE)
+        self.order_status_message = bytearray(ORDER_STATUS_MESSAGE_SIZE)
+        HEADER.pack_into(self.order_filled_message, 0, ORDER_FILLED_MESSAGE_SIZE, MessageType.ORDER_FILLED)
+        HEADER.pack_into(self.order_status_message, 0, ORDER_STATUS_MESSAGE_SIZE, MessageType.ORDER_STATUS)
+
+    def send_order_filled(self, client_order_id: int, price: int, volume: int) -> None:
+        ORDER_FILLED_MESSAGE.pack_into(self.order_filled_message, HEADER_SIZE, client_order_id, price, volume)
+        self._connection_transport.write(self.order_filled_message)
+
+    def send_order_status(self, client_order_id: int, fill_volume: int, remaining_volume: int, fees: int) -> None:
+        ORDER_STATUS_MESSAGE.pack_into(self.order_status_message, HEADER_SIZE, client_order_id, fill_volume,
+                                       remaining_volume, fees)
+        self._connection_transport.write(self.order_status_message)
+
+
+def cascade(connection: ExecutionConnection, length: int) -> None:
+    for i in range(length):
+        connection.send_order_filled(1, 10000, 1)
+        connection.send_order_status(1, i + 1, length - i - 1, 0)
+
+
+async def run(connection_type: type, count: int, length: int) -> tuple:
+    loop = asyncio.get_running_loop()
+    ours, theirs = socket.socketpair()
+    ours = CountingSocket(fileno=ours.detach())
+    theirs.setblocking(False)
+    _, connection = await loop.connect_accepted_socket(
+        lambda: connection_type(CompetitorManager(), FrequencyLimiter(1.0, 2 ** 62), None), ours)
+    connection.login_timeout.cancel()
+
+    expected = count * length * REPLY_SIZE
+    received = 0
+    CountingSocket.sends = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        cascade(connection, length)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        while True:
+            try:
+                received += len(theirs.recv(1 << 16))
+            except BlockingIOError:
+                break
+    while received < expected:
+        received += len(await loop.sock_recv(theirs, 1 << 16))
+    elapsed = time.perf_counter() - start
+
+    sends = CountingSocket.sends
+    connection.close()
+    theirs.close()
+    await asyncio.sleep(0)
+    return sends / count, count / elapsed
+
+
+def main(count: int) -> None:
+    print("%-8s %16s %16s %16s %16s" % ("Fills", "Sends/cascade", "Previous", "Cascades/s", "Previous"))
+    for length in CASCADE_LENGTHS:
+        sends, rate = asyncio.run(run(ExecutionConnection, count, length))
+        previous_sends, previous_rate = asyncio.run(run(LegacyExecutionConnection, count, length))
+        print("%-8d %16.1f %16.1f %16.0f %16.0f" % (length, sends, previous_sends, rate, previous_rate))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,134 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Replay market data files through each order book implementation.
+
+Usage: python tests/bench_order_book.py [MARKET_DATA_FILE ...]
+
+By default, every data/market_data*.csv file is replayed. The top levels of
+both books are sampled at every tick interval and compared, so the script
+also checks that the implementations agree.
+"""
+import csv
+import pathlib
+import sys
+import time
+
+from typing import Dict, List, Tuple
+
+from ready_trader_go.array_order_book import ArrayOrderBook
+from ready_trader_go.market_events import INPUT_SCALING, MarketEvent, MarketEventOperation
+from ready_trader_go.order_book import TOP_LEVEL_COUNT, IOrderListener, Order, OrderBook
+from ready_trader_go.types import Instrument, Lifespan, Side
+
+REPEAT = 3
+TICK_INTERVAL = 0.25
+TICK_SIZE_IN_CENTS = 100
+
+
+class OrderTracker(IOrderListener):
+    """Keep track of the orders resting in the books, as the market events reader does."""
+
+    def __init__(self):
+        """Initialise a new instance of the OrderTracker class."""
+        self.orders: Dict[Tuple[Instrument, int], Order] = dict()
+
+    def on_order_amended(self, now: float, order: Order, volume_removed: int) -> None:
+        if order.remaining_volume == 0:
+            self.orders.pop((order.instrument, order.client_order_id), None)
+
+    def on_order_cancelled(self, now: float, order: Order, volume_removed: int) -> None:
+        self.orders.pop((order.instrument, order.client_order_id), None)
+
+    def on_order_placed(self, now: float, order: Order) -> None:
+        self.orders[(order.instrument, order.client_order_id)] = order
+
+    def on_order_filled(self, now: float, order: Order, price: int, volume: int, fee: int) -> None:
+        if order.remaining_volume == 0:
+            self.orders.pop((order.instrument, order.client_order_id), None)
+
+
+def read_market_events(path: pathlib.Path) -> List[MarketEvent]:
+    """Return the market events in the given file."""
+    with path.open("r", newline="") as market_data:
+        csv_reader = csv.reader(market_data)
+        next(csv_reader)  # Skip header row
+        return [MarketEvent(float(row[0]), Instrument(int(row[1])), MarketEventOperation[row[2]], int(row[3]),
+                            Side[row[4]] if row[4] else None, int(float(row[5])) if row[5] else 0,
+                            int(float(row[6]) * INPUT_SCALING) if row[6] else 0,
+                            Lifespan[row[7]] if row[7] else None)
+                for row in csv_reader]
+
+
+def replay(events: List[MarketEvent], books: Tuple) -> Tuple[float, List[Tuple]]:
+    """Replay the events through the given books and return the elapsed time and top-level snapshots."""
+    tracker = OrderTracker()
+    orders = tracker.orders
+    snapshots: List[Tuple] = list()
+    ask_prices = [0] * TOP_LEVEL_COUNT
+    ask_volumes = [0] * TOP_LEVEL_COUNT
+    bid_prices = [0] * TOP_LEVEL_COUNT
+    bid_volumes = [0] * TOP_LEVEL_COUNT
+    next_tick = TICK_INTERVAL
+
+    start = time.perf_counter()
+    for evt in events:
+        if evt.time >= next_tick:
+            for book in books:
+                book.top_levels(ask_prices, ask_volumes, bid_prices, bid_volumes)
+                snapshots.append((*ask_prices, *ask_volumes, *bid_prices, *bid_volumes))
+                book.trade_ticks(ask_prices, ask_volumes, bid_prices, bid_volumes)
+            next_tick += TICK_INTERVAL
+
+        book = books[evt.instrument]
+        if evt.operation == MarketEventOperation.INSERT:
+            book.insert(evt.time, Order(evt.order_id, evt.instrument, evt.lifespan, evt.side, evt.price, evt.volume,
+                                        tracker))
+        elif (evt.instrument, evt.order_id) in orders:
+            order = orders[(evt.instrument, evt.order_id)]
+            if evt.operation == MarketEventOperation.CANCEL:
+                book.cancel(evt.time, order)
+            elif evt.volume < 0:
+                book.amend(evt.time, order, order.volume + evt.volume)
+
+    return time.perf_counter() - start, snapshots
+
+
+def main(paths: List[pathlib.Path]) -> None:
+    """Benchmark each order book implementation against the given market data files."""
+    factories = (("Sorted", lambda i: OrderBook(i, 0.0, 0.0)),
+                 ("Array", lambda i: ArrayOrderBook(i, 0.0, 0.0, TICK_SIZE_IN_CENTS)))
+
+    for path in paths:
+        events = read_market_events(path)
+        results = dict()
+        for name, factory in factories:
+            best = float("inf")
+            for _ in range(REPEAT):
+                elapsed, snapshots = replay(events, (factory(Instrument.FUTURE), factory(Instrument.ETF)))
+                best = min(best, elapsed)
+            results[name] = (best, snapshots)
+
+        baseline = results["Sorted"][0]
+        for name, (elapsed, snapshots) in results.items():
+            print("%s %-6s %8d events %8.3fs %8.0fns/event %6.2fx%s"
+                  % (path.name, name, len(events), elapsed, elapsed * 1e9 / len(events), baseline / elapsed,
+                     "" if snapshots == results["Sorted"][1] else " MISMATCH"))
+
+
+if __name__ == "__main__":
+    main([pathlib.Path(p) for p in sys.argv[1:]] or sorted(pathlib.Path("data").glob("market_data*.csv")))
@@ -0,0 +1,115 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Replay a market data file and report the memory taken by the simulator's records.
+
+Usage: python tests/bench_records.py [MARKET_DATA_FILE [TEAM_COUNT]]
+
+The market data (data/market_data1.csv by default) is replayed through the
+row-by-row reader into a pair of order books. The match events are written
+to a file and score records are written for TEAM_COUNT teams (8 by default)
+at every tick. Memory is traced with tracemalloc throughout. The report
+shows how many of each record were created, the size of each one, the
+peak memory traced and the peak resident set size.
+"""
+import asyncio
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Dict, List
+
+from ready_trader_go.account import CompetitorAccount
+from ready_trader_go.array_order_book import create_order_book
+from ready_trader_go.market_events import MarketEvent, MarketEventsReader
+from ready_trader_go.match_events import MatchEvent, MatchEventOperation, MatchEvents, MatchEventsWriter
+from ready_trader_go.order_book import TOP_LEVEL_COUNT
+from ready_trader_go.score_board import ScoreBoardWriter, ScoreRecord
+from ready_trader_go.types import Instrument, Lifespan, Side
+
+MARKET_EVENT_INTERVAL = 0.05
+TICK_INTERVAL = 0.25
+
+
+async def replay(path: str, team_count: int, directory: str) -> Dict[str, int]:
+    """Replay the market data file and return the number of each record created."""
+    loop = asyncio.get_running_loop()
+    match_events = MatchEvents()
+    match_events_writer = MatchEventsWriter(match_events, directory + "/match_events.csv", loop)
+    score_board_writer = ScoreBoardWriter(directory + "/score_board.csv", loop)
+    future_book = create_order_book(Instrument.FUTURE, 0.0, 0.0, 1.0, TOP_LEVEL_COUNT, False)
+    etf_book = create_order_book(Instrument.ETF, -0.0001, 0.0002, 1.0, TOP_LEVEL_COUNT, False)
+    reader = MarketEventsReader(path, loop, future_book, etf_book, match_events)
+    account = CompetitorAccount(1.0, 0.002)
+    teams = ["Team%d" % i for i in range(team_count)]
+
+    counts = {"MarketEvent": 0, "MatchEvent": 0, "ScoreRecord": 0}
+    done: List[MarketEventsReader] = list()
+    reader.task_complete.append(done.append)
+    match_events.event_occurred.append(lambda e: counts.__setitem__("MatchEvent", counts["MatchEvent"] + 1))
+    match_events_writer.start()
+    score_board_writer.start()
+    reader.start()
+
+    now = 0.0
+    next_tick = TICK_INTERVAL
+    while not done:
+        now += MARKET_EVENT_INTERVAL
+        reader.process_market_events(now)
+        if now >= next_tick:
+            for team in teams:
+                score_board_writer.tick(now, team, account, etf_book.last_traded_price(),
+                                        future_book.last_traded_price())
+            counts["ScoreRecord"] += team_count
+            next_tick += TICK_INTERVAL
+        await asyncio.sleep(0)
+
+    match_events_writer.finish()
+    score_board_writer.finish()
+    await loop.run_in_executor(None, match_events_writer.writer_task.join)
+    await loop.run_in_executor(None, score_board_writer.writer_task.join)
+    with open(path) as market_data:
+        counts["MarketEvent"] = sum(1 for _ in market_data) - 1
+    return counts
+
+
+def main(path: str, team_count: int) -> None:
+    """Replay the market data file and print the memory report."""
+    samples = (MarketEvent(0.0, Instrument.ETF, 2, 1, Side.BUY, 1, 100, Lifespan.GOOD_FOR_DAY),
+               MatchEvent(0.0, "Team0", MatchEventOperation.TRADE, 1, Instrument.ETF, Side.BUY, 1, 100, None, 1),
+               ScoreRecord(0.0, "Team0", "Tick", 0, 0, 0, 0, 100, 100, 0, 0, 0))
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        start = time.perf_counter()
+        counts = asyncio.run(replay(path, team_count, directory))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print("%-12s %10s %8s" % ("Record", "Created", "Bytes"))
+    for sample in samples:
+        print("%-12s %10d %8d" % (type(sample).__name__, counts[type(sample).__name__], sys.getsizeof(sample)
+                                  + (sys.getsizeof(sample.__dict__) if hasattr(sample, "__dict__") else 0)))
+    print("elapsed %.3fs, tracemalloc peak %.1f MB, peak RSS %.1f MB"
+          % (elapsed, peak / 2 ** 20, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "data/market_data1.csv", int(sys.argv[2]) if len(sys.argv) > 2 else 8)
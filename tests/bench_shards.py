@@ -0,0 +1,160 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Replay market data for several instrument pairs in one process and across shard processes.
+
+Usage: python tests/bench_shards.py [PAIR_COUNT [MARKET_DATA_FILE]]
+
+Every pair replays the same market data file (by default the first
+data/market_data*.csv file). After each step the top levels of the books
+that changed and the trade ticks of the books that traded are read, as the
+information publisher does on each tick, and the number of requests sent to
+the shards is reported. The match events of both runs are compared, so the
+script also checks that sharding does not change the outcome. Sharding only
+helps when there are spare CPU cores for the shard processes.
+"""
+import asyncio
+import os
+import pathlib
+import sys
+import time
+
+from typing import Dict, List, Sequence, Set, Tuple
+
+from ready_trader_go.array_order_book import create_order_book
+from ready_trader_go.market_events import create_market_events_reader
+from ready_trader_go.match_events import MatchEvents
+from ready_trader_go.order_book import OrderBook
+from ready_trader_go.shard import Shard, ShardGateway
+from ready_trader_go.types import Instrument, instrument_number
+
+DEPTH = 5
+FEES = (-0.0001, 0.0002)
+STEP = 0.25
+
+
+class BookReader(object):
+    """Read the books after each step, as the information publisher does on each tick."""
+
+    def __init__(self, books: Sequence[OrderBook]):
+        """Initialise a new instance of the BookReader class."""
+        self.books: Sequence[OrderBook] = books
+        self.levels: List[List[int]] = [[0] * DEPTH for _ in range(4)]
+        self.traded: Set[OrderBook] = set()
+        self.versions: Dict[OrderBook, int] = dict()
+        for book in books:
+            book.trade_occurred.append(self.traded.add)
+
+    def read(self) -> None:
+        """Read the top levels of changed books and the trade ticks of books that traded."""
+        for book in self.books:
+            if self.versions.get(book) != book.version:
+                self.versions[book] = book.version
+                book.top_levels(*self.levels)
+        for book in self.traded:
+            book.trade_ticks(*self.levels)
+        self.traded.clear()
+
+
+def record(match_events: MatchEvents) -> List[Tuple]:
+    """Return a list that will collect the given match events."""
+    recorded: List[Tuple] = list()
+    match_events.event_occurred.append(lambda e: recorded.append(tuple(e)))
+    return recorded
+
+
+def run_in_process(paths: List[str]) -> Tuple[float, List[Tuple]]:
+    """Replay the market data files in this process and return the elapsed time and match events."""
+    loop = asyncio.new_event_loop()
+    match_events = MatchEvents()
+    recorded = record(match_events)
+    readers = list()
+    books = list()
+    completed = set()
+    for pair, path in enumerate(paths):
+        future_book = create_order_book(instrument_number(pair, Instrument.FUTURE), 0.0, 0.0, 1.0, DEPTH, True)
+        etf_book = create_order_book(instrument_number(pair, Instrument.ETF), *FEES, 1.0, DEPTH, True)
+        readers.append(create_market_events_reader(path, True, loop, future_book, etf_book, match_events))
+        books.extend((future_book, etf_book))
+    book_reader = BookReader(books)
+    for reader in readers:
+        reader.task_complete.append(completed.add)
+        reader.start()
+
+    start = time.perf_counter()
+    now = 0.0
+    while len(completed) < len(readers):
+        now += STEP
+        for reader in readers:
+            if reader not in completed:
+                reader.process_market_events(now)
+        book_reader.read()
+    elapsed = time.perf_counter() - start
+    loop.close()
+    return elapsed, recorded
+
+
+def run_sharded(paths: List[str], shard_count: int) -> Tuple[float, List[Tuple], int]:
+    """Replay the market data files on shard processes.
+
+    Return the elapsed time, the match events and the number of requests.
+    """
+    requests = 0
+    send = Shard.send
+
+    def counting_send(shard: Shard, request: Tuple) -> None:
+        nonlocal requests
+        requests += 1
+        send(shard, request)
+
+    match_events = MatchEvents()
+    recorded = record(match_events)
+    gateway = ShardGateway(shard_count, [(path,) + FEES for path in paths], True, True, 1.0, DEPTH, match_events)
+    completed = list()
+    gateway.task_complete.append(completed.append)
+    book_reader = BookReader(gateway.order_books)
+    try:
+        gateway.start()
+        Shard.send = counting_send
+        start = time.perf_counter()
+        now = 0.0
+        while not completed:
+            now += STEP
+            gateway.process_market_events(now)
+            book_reader.read()
+        elapsed = time.perf_counter() - start
+    finally:
+        Shard.send = send
+        gateway.close()
+    return elapsed, recorded, requests
+
+
+def main(pair_count: int, path: str) -> None:
+    """Compare the time taken to replay the market data for each number of shards."""
+    paths = [path] * pair_count
+    baseline, expected = run_in_process(paths)
+    print("%d pairs  in-process %8.3fs %8d events" % (pair_count, baseline, len(expected)))
+    for shard_count in range(1, pair_count + 1):
+        elapsed, actual, requests = run_sharded(paths, shard_count)
+        print("%d pairs %2d shards  %8.3fs %6.2fx %8d requests%s"
+              % (pair_count, shard_count, elapsed, baseline / elapsed, requests,
+                 "" if actual == expected else " MISMATCH"))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else min(os.cpu_count() or 1, 4),
+         sys.argv[2] if len(sys.argv) > 2 else str(sorted(pathlib.Path("data").glob("market_data*.csv"))[0]))
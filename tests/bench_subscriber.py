@@ -0,0 +1,101 @@
+# Copyright 2021 Optiver Asia Pacific Pty. Ltd.
+#
+# This file is part of Ready Trader Go.
+#
+#     Ready Trader Go is free software: you can redistribute it and/or
+#     modify it under the terms of the GNU Affero General Public License
+#     as published by the Free Software Foundation, either version 3 of
+#     the License, or (at your option) any later version.
+#
+#     Ready Trader Go is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU Affero General Public License for more details.
+#
+#     You should have received a copy of the GNU Affero General Public
+#     License along with Ready Trader Go.  If not, see
+#     <https://www.gnu.org/licenses/>.
+"""Compare the latency and CPU cost of the subscriber wakeup policies.
+
+Usage: python tests/bench_subscriber.py [MESSAGES [INTERVAL_MS [SPIN_BUDGET]]]
+
+For each policy, a subscriber process receives timestamped messages
+published at a fixed interval. The script reports the publish-to-receive
+latency and the CPU time used by the subscriber as a share of wall time.
+"""
+import asyncio
+import multiprocessing
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+
+from ready_trader_go.pubsub import DEFAULT_SPIN_BUDGET, PublisherFactory, SubscriberFactory, WAKEUP_POLICIES
+
+STAMP = struct.Struct("!q")
+
+
+class Receiver(asyncio.DatagramProtocol):
+    def __init__(self, count: int):
+        self.done = asyncio.get_event_loop().create_future()
+        self.latencies = list()
+        self.remaining = count
+
+    def datagram_received(self, data, addr):
+        self.latencies.append(time.perf_counter_ns() - STAMP.unpack_from(data)[0])
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.done.set_result(None)
+
+
+async def subscribe(name: str, policy: str, spin_budget: int, count: int, connection) -> None:
+    receiver = Receiver(count)
+    subscriber = SubscriberFactory("mmap", name, policy, spin_budget).create(receiver)
+    connection.send("ready")
+    start_cpu, start_wall = time.process_time(), time.perf_counter()
+    await receiver.done
+    cpu, wall = time.process_time() - start_cpu, time.perf_counter() - start_wall
+    subscriber.close()
+    connection.send((receiver.latencies, cpu / wall))
+
+
+def subscriber_main(name: str, policy: str, spin_budget: int, count: int, connection) -> None:
+    asyncio.run(subscribe(name, policy, spin_budget, count, connection))
+
+
+async def publish(name: str, policy: str, spin_budget: int, count: int, interval: float):
+    publisher = PublisherFactory("mmap", name).create(asyncio.Protocol())
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=subscriber_main, args=(name, policy, spin_budget, count, child))
+    process.start()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, parent.recv)
+
+    for _ in range(count):
+        await asyncio.sleep(interval)
+        publisher.write(STAMP.pack(time.perf_counter_ns()))
+
+    latencies, cpu_share = await loop.run_in_executor(None, parent.recv)
+    process.join()
+    publisher.close()
+    return latencies, cpu_share
+
+
+def main(count: int, interval: float, spin_budget: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, "info.dat")
+        print("%-14s %12s %12s %12s %10s" % ("Policy", "Median (us)", "p99 (us)", "Max (us)", "CPU"))
+        for policy in WAKEUP_POLICIES:
+            latencies, cpu_share = asyncio.run(publish(name, policy, spin_budget, count, interval))
+            latencies.sort()
+            print("%-14s %12.1f %12.1f %12.1f %9.0f%%" % (policy, statistics.median(latencies) / 1e3,
+                                                         latencies[int(len(latencies) * 0.99)] / 1e3,
+                                                         latencies[-1] / 1e3, cpu_share * 100.0))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         float(sys.argv[2]) / 1000.0 if len(sys.argv) > 2 else 0.001,
+         int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SPIN_BUDGET)
@@ -1,10 +1,12 @@
 import pytest
 import pathlib
+import random
 import subprocess
 
 def pytest_addoption(parser):
     parser.addoption("--hdu", action="store", default=False, type=bool)
     parser.addoption("--speed", action="store", default=10.0, type=float)
+    parser.addoption("--clock", action="store", default="Wall", choices=("Wall", "Virtual"))
 
 
 @pytest.fixture(scope="session")
@@ -16,9 +18,40 @@ def run_with_hdu(pytestconfig):
 def speed(pytestconfig):
     return pytestconfig.getoption("speed")
 
+@pytest.fixture(scope="session")
+def clock(pytestconfig):
+    return pytestconfig.getoption("clock")
+
 @pytest.fixture(scope="session", autouse=True)
 def get_newest_autotrader():
     configs_dir = pathlib.Path("tests/configs")
     for dir in configs_dir.glob("*"):
         command = f"bash tests/scripts/update.sh {dir.name}"
-        subprocess.run(command, shell=True)
\ No newline at end of file
+        subprocess.run(command, shell=True)
+
+
+@pytest.fixture
+def write_market_data():
+    def write(path, count, seed):
+        rng = random.Random(seed)
+        live = {0: [], 1: []}
+        with path.open("w") as market_data:
+            market_data.write("Time,Instrument,Operation,OrderId,Side,Volume,Price,Lifespan\n")
+            for order_id in range(1, count + 1):
+                now = order_id * 0.01
+                instrument = rng.randint(0, 1)
+                if live[instrument] and rng.random() < 0.3:
+                    other = rng.choice(live[instrument])
+                    if rng.random() < 0.5:
+                        market_data.write("%f,%d,Cancel,%d,,,,\n" % (now, instrument, other))
+                    else:
+                        market_data.write("%f,%d,Amend,%d,,-%d,,\n" % (now, instrument, other, rng.randint(1, 5)))
+                else:
+                    side = rng.choice("AB")
+                    price = 100 + rng.randint(-5, 5)
+                    lifespan = rng.choice("GGF")
+                    market_data.write("%f,%d,Insert,%d,%s,%d,%.2f,%s\n" % (now, instrument, order_id, side,
+                                                                           rng.randint(1, 50), price, lifespan))
+                    live[instrument].append(order_id)
+
+    return write
@@ -30,11 +30,13 @@ class Trader:
 
 @dataclass
 class _Engine:
+    Clock: str = "Wall"
     MarketDataFile: str = "data/market_data1.csv"
     MarketEventInterval: float = 0.05
     MarketOpenDelay: float = 5.0
     MatchEventsFile: str = "match_events.csv"
     ScoreBoardFile: str = "score_board.csv"
+    Seed: int = 0
     Speed: float = 1.0
     TickInterval: float = 0.25
 
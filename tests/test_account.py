@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from ready_trader_go.account import CompetitorAccount
+from ready_trader_go.types import Instrument, Side
+
+
+def value(account, future_price, etf_price):
+    """Value an account the long way, as update did before valuation was lazy."""
+    delta = round(account.etf_clamp * future_price)
+    delta -= delta % account.tick_size
+    clamped = min(max(etf_price, future_price - delta), future_price + delta)
+    return account.account_balance + account.future_position * future_price + account.etf_position * clamped
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_lazy_valuation_matches_valuing_after_every_transaction(seed):
+    rng = random.Random(seed)
+    account = CompetitorAccount(1.0, 0.002)
+    future_price = etf_price = 100000
+    max_profit = max_drawdown = 0
+    for step in range(3000):
+        if step % 10 == 9:
+            # A tick, at which the maximum profit and drawdown are tracked
+            future_price += rng.randint(-3, 3) * 100
+            etf_price = future_price + rng.randint(-5, 5) * 100
+            account.update(future_price, etf_price)
+            profit = value(account, future_price, etf_price)
+            max_profit = max(max_profit, profit)
+            max_drawdown = max(max_drawdown, max_profit - profit)
+            assert (account.profit_or_loss, account.max_profit, account.max_drawdown) == (profit, max_profit,
+                                                                                          max_drawdown)
+        else:
+            instrument = rng.choice((Instrument.ETF, Instrument.FUTURE))
+            price = future_price + rng.randint(-5, 5) * 100
+            account.transact(instrument, rng.choice((Side.BUY, Side.SELL)), price, rng.randint(1, 10),
+                             rng.randint(-2, 5) if instrument == Instrument.ETF else 0)
+            marks = (future_price, price) if instrument == Instrument.ETF else (future_price, etf_price)
+            account.mark(*marks)
+            assert account.profit_or_loss == value(account, *marks)
+
+
+def test_unchanged_ticks_leave_the_account_alone():
+    account = CompetitorAccount(1.0, 0.002)
+    account.transact(Instrument.ETF, Side.BUY, 100000, 10, 20)
+    account.update(99000, 100000)
+    assert account.profit_or_loss == -1000000 - 20 + 10 * 99100
+    assert (account.max_profit, account.max_drawdown) == (0, 1000000 + 20 - 10 * 99100)
+    account.update(99000, 100000)
+    account.mark(99000, 100000)
+    account.update(99000, 100000)
+    assert (account.max_profit, account.max_drawdown) == (0, 1000000 + 20 - 10 * 99100)
@@ -0,0 +1,229 @@
+import asyncio
+import bisect
+import random
+
+import pytest
+
+from ready_trader_go.account import AccountFactory, PortfolioAccount
+from ready_trader_go.array_order_book import create_order_book
+from ready_trader_go.competitor import Competitor, InstrumentPair, OrderPrices
+from ready_trader_go.match_events import MatchEvents
+from ready_trader_go.order_book import Order, OrderBook
+from ready_trader_go.types import Instrument, Lifespan, Side, instrument_number, instrument_pair, instrument_type
+from ready_trader_go.unhedged_lots import UnhedgedLotsFactory
+
+
+class ExecutionConnection:
+    def __init__(self):
+        self.closed = False
+        self.errors = []
+        self.hedges = []
+        self.fills = []
+
+    def close(self):
+        self.closed = True
+
+    def send_error(self, client_order_id, error_message):
+        self.errors.append((client_order_id, error_message))
+
+    def send_hedge_filled(self, client_order_id, average_price, volume):
+        self.hedges.append((client_order_id, average_price, volume))
+
+    def send_order_filled(self, client_order_id, price, volume):
+        self.fills.append((client_order_id, price, volume))
+
+    def send_order_status(self, client_order_id, fill_volume, remaining_volume, fees):
+        pass
+
+
+class ScoreBoard:
+    def __init__(self):
+        self.ticks = []
+
+    def breach(self, now, name, account, etf_price, future_price):
+        pass
+
+    def tick(self, now, name, account, etf_price, future_price, status):
+        self.ticks.append((account.etf_position, account.future_position, etf_price, future_price))
+
+
+def make_pairs(count):
+    pairs = []
+    for p in range(count):
+        future_book = OrderBook(instrument_number(p, Instrument.FUTURE), 0.0, 0.0)
+        etf_book = OrderBook(instrument_number(p, Instrument.ETF), 0.0, 0.0)
+        pairs.append(InstrumentPair(p, future_book, etf_book, AccountFactory(0.002, 1.0)))
+    return pairs
+
+
+def make_competitor(pairs):
+    connection = ExecutionConnection()
+    score_board = ScoreBoard()
+    competitor = Competitor("Team", connection, pairs, MatchEvents(), score_board, 100, 10, 200, 1.0,
+                            UnhedgedLotsFactory(), None)
+    return competitor, connection, score_board
+
+
+def test_instrument_numbers():
+    assert instrument_number(0, Instrument.ETF) is Instrument.ETF
+    assert [instrument_number(p, i) for p in range(3) for i in Instrument] == list(range(6))
+    assert [(instrument_pair(n), instrument_type(n)) for n in range(4)] == [
+        (0, Instrument.FUTURE), (0, Instrument.ETF), (1, Instrument.FUTURE), (1, Instrument.ETF)]
+
+
+def test_orders_trade_in_the_books_of_their_pair():
+    async def run():
+        pairs = make_pairs(2)
+        competitor, connection, score_board = make_competitor(pairs)
+        pairs[1].etf_book.insert(0.5, Order(1, pairs[1].etf_book.instrument, Lifespan.GOOD_FOR_DAY, Side.SELL,
+                                            100000, 10))
+        pairs[1].future_book.insert(0.5, Order(2, pairs[1].future_book.instrument, Lifespan.GOOD_FOR_DAY,
+                                               Side.BUY, 99900, 10))
+        pairs[1].future_book.insert(0.5, Order(3, pairs[1].future_book.instrument, Lifespan.GOOD_FOR_DAY,
+                                               Side.SELL, 100100, 10))
+
+        competitor.on_insert_message(1.0, 1, Side.BUY, 100000, 4, Lifespan.FILL_AND_KILL, 1)
+        competitor.on_hedge_message(1.0, 2, Side.SELL, 99900, 4, 1)
+        competitor.on_timer_tick(2.0, [None, 99900], [None, 100000])
+        return pairs, competitor, connection, score_board
+
+    pairs, competitor, connection, score_board = asyncio.run(run())
+    assert connection.errors == []
+    assert connection.fills == [(1, 100000, 4)]
+    assert connection.hedges == [(2, 99900, 4)]
+    assert pairs[0].etf_book.best_ask() is None
+    assert pairs[1].etf_book.best_ask() == 100000
+    assert [(p.account.etf_position, p.account.future_position) for p in competitor.positions] == [(0, 0), (4, -4)]
+    assert isinstance(competitor.account, PortfolioAccount)
+    assert competitor.account.buy_volume == 4 and competitor.account.sell_volume == 0
+    assert competitor.account.profit_or_loss == sum(p.account.profit_or_loss for p in competitor.positions)
+    assert score_board.ticks == [(4, -4, None, None)]
+
+
+def test_orders_for_an_unknown_pair_are_rejected():
+    competitor, connection, _ = make_competitor(make_pairs(2))
+    competitor.on_insert_message(1.0, 1, Side.BUY, 100000, 4, Lifespan.GOOD_FOR_DAY, 2)
+    competitor.on_hedge_message(1.0, 2, Side.SELL, 99900, 4, 2)
+    assert connection.errors == [(1, b"2 is not a valid instrument pair"), (2, b"2 is not a valid instrument pair")]
+    assert competitor.orders == {}
+
+
+def test_a_single_pair_competitor_keeps_a_single_account():
+    pairs = make_pairs(1)
+    competitor, _, _ = make_competitor(pairs)
+    assert competitor.account is competitor.positions[0].account
+
+
+def test_invalid_orders_are_rejected_with_the_first_check_they_fail():
+    competitor, connection, _ = make_competitor(make_pairs(1))
+    competitor.on_insert_message(1.0, 5, Side.BUY, 100000, 1, Lifespan.GOOD_FOR_DAY)
+    for client_order_id, now, side, price, volume, lifespan, pair in (
+            (5, 1.0, Side.BUY, 100000, 1, Lifespan.GOOD_FOR_DAY, 0),
+            (6, 1.0, Side.BUY, 100000, 1, Lifespan.GOOD_FOR_DAY, 1),
+            (7, 1.0, 2, 100000, 0, Lifespan.GOOD_FOR_DAY, 0),
+            (8, 1.0, Side.BUY, 100000, 0, 2, 0),
+            (9, 1.0, Side.BUY, 0, 0, Lifespan.GOOD_FOR_DAY, 0),
+            (10, 1.0, Side.BUY, 100001, 0, Lifespan.GOOD_FOR_DAY, 0),
+            (11, 1.0, Side.BUY, 100000, 0, Lifespan.GOOD_FOR_DAY, 0),
+            (12, 1.0, Side.BUY, 100000, 200, Lifespan.GOOD_FOR_DAY, 0),
+            (13, 0.0, Side.BUY, 100000, 1, Lifespan.GOOD_FOR_DAY, 0),
+            (14, 1.0, Side.SELL, 100000, 1, Lifespan.GOOD_FOR_DAY, 0)):
+        competitor.on_insert_message(now, client_order_id, side, price, volume, lifespan, pair)
+
+    assert connection.errors == [(5, b"duplicate or out-of-order client_order_id"),
+                                 (6, b"1 is not a valid instrument pair"),
+                                 (7, b"2 is not a valid side"),
+                                 (8, b"2 is not a valid lifespan"),
+                                 (9, b"0 is not a valid price"),
+                                 (10, b"price is not a multiple of tick size"),
+                                 (11, b"0 is not a valid volume"),
+                                 (12, b"order rejected: active order volume limit breached"),
+                                 (13, b"order rejected: market not yet open"),
+                                 (14, b"order rejected: in cross with an existing order")]
+    assert list(competitor.orders) == [5] and competitor.last_client_order_id == 14
+
+    for client_order_id in range(15, 25):
+        competitor.on_insert_message(1.0, client_order_id, Side.BUY, 99000, 1, Lifespan.GOOD_FOR_DAY)
+    assert connection.errors[-1] == (24, b"order rejected: active order count limit breached")
+    assert len(competitor.orders) == 10
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_order_prices_match_a_sorted_list(seed):
+    rng = random.Random(seed)
+    for side in (Side.BUY, Side.SELL):
+        prices = OrderPrices(side)
+        expected = []
+        for _ in range(2000):
+            if expected and rng.random() < 0.5:
+                price = expected[rng.randrange(len(expected))]
+                prices.remove(price)
+                expected.pop(bisect.bisect_left(expected, price))
+            else:
+                price = rng.randint(90, 110) * 100
+                prices.add(price)
+                bisect.insort(expected, price)
+            best = (expected[-1] if side == Side.BUY else expected[0]) if expected else None
+            assert prices.best == best
+            assert len(prices) == len(set(expected))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cross_check_matches_the_competitors_live_orders(seed):
+    async def run():
+        rng = random.Random(seed)
+        pairs = make_pairs(1)
+        competitor, connection, _ = make_competitor(pairs)
+        position = competitor.positions[0]
+        book = pairs[0].etf_book
+        for side, price in ((Side.BUY, 9900), (Side.SELL, 10100)):
+            pairs[0].future_book.insert(0.5, Order(side, Instrument.FUTURE, Lifespan.GOOD_FOR_DAY, side, price, 1))
+        for client_order_id in range(1, 1500):
+            live = list(competitor.orders.values())
+            action = rng.random()
+            if action < 0.15 and live:
+                competitor.on_cancel_message(1.0, rng.choice(live).client_order_id)
+            elif action < 0.25 and live:
+                order = rng.choice(live)
+                competitor.on_amend_message(1.0, order.client_order_id, rng.randint(0, order.volume))
+            elif action < 0.4:
+                # Someone else trades against the competitor's orders
+                side = rng.choice((Side.BUY, Side.SELL))
+                book.insert(1.0, Order(client_order_id, Instrument.ETF, Lifespan.FILL_AND_KILL, side,
+                                       rng.randint(95, 105) * 100, rng.randint(1, 5)))
+            else:
+                side = rng.choice((Side.BUY, Side.SELL))
+                price = rng.randint(95, 105) * 100
+                lifespan = rng.choice((Lifespan.GOOD_FOR_DAY, Lifespan.FILL_AND_KILL))
+                bids = [o.price for o in live if o.side == Side.BUY]
+                asks = [o.price for o in live if o.side == Side.SELL]
+                in_cross = (price >= min(asks)) if side == Side.BUY and asks else (
+                    side == Side.SELL and bids and price <= max(bids))
+                errors = len(connection.errors)
+                competitor.on_insert_message(1.0, client_order_id, side, price, 1, lifespan)
+                rejected = connection.errors[errors:] == [(client_order_id,
+                                                           b"order rejected: in cross with an existing order")]
+                assert rejected == bool(in_cross and len(live) < 10)
+
+            live = competitor.orders.values()
+            bids = [o.price for o in live if o.side == Side.BUY]
+            asks = [o.price for o in live if o.side == Side.SELL]
+            assert position.buy_prices.best == (max(bids) if bids else None)
+            assert position.sell_prices.best == (min(asks) if asks else None)
+            assert len(position.buy_prices) == len(set(bids)) and len(position.sell_prices) == len(set(asks))
+        return connection
+
+    connection = asyncio.run(run())
+    assert len(connection.fills) > 50
+
+
+def test_fractional_tick_sizes_agree_with_the_array_order_book():
+    pair = InstrumentPair(0, create_order_book(Instrument.FUTURE, 0.0, 0.0, 0.29, 5, True),
+                          create_order_book(Instrument.ETF, 0.0, 0.0, 0.29, 5, True), AccountFactory(0.002, 0.29))
+    connection = ExecutionConnection()
+    competitor = Competitor("Team", connection, [pair], MatchEvents(), ScoreBoard(), 100, 10, 200, 0.29,
+                            UnhedgedLotsFactory(), None)
+    competitor.on_insert_message(1.0, 1, Side.BUY, 2900, 1, Lifespan.GOOD_FOR_DAY)
+    competitor.on_insert_message(1.0, 2, Side.BUY, 2800, 1, Lifespan.GOOD_FOR_DAY)
+    assert connection.errors == [(2, b"price is not a multiple of tick size")]
+    assert pair.etf_book.best_bid() == 2900
@@ -0,0 +1,67 @@
+import asyncio
+
+from ready_trader_go.execution import ExecutionConnection
+from ready_trader_go.limiter import FrequencyLimiter
+from ready_trader_go.messages import ERROR_MESSAGE_SIZE, ORDER_FILLED_MESSAGE_SIZE, ORDER_STATUS_MESSAGE_SIZE
+
+
+class Transport(asyncio.Transport):
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+        self.writes = []
+
+    def close(self):
+        self.closed = True
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def is_closing(self):
+        return self.closed
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+
+class CompetitorManager:
+    def on_competitor_connect(self):
+        pass
+
+    def on_competitor_disconnect(self):
+        pass
+
+
+async def make_connection():
+    connection = ExecutionConnection(CompetitorManager(), FrequencyLimiter(1.0, 100), None)
+    transport = Transport()
+    connection.connection_made(transport)
+    return connection, transport
+
+
+def test_replies_are_written_together():
+    async def run():
+        connection, transport = await make_connection()
+        for i in range(3):
+            connection.send_order_filled(1, 100, 1)
+            connection.send_order_status(1, i + 1, 2 - i, 0)
+        assert transport.writes == []
+        await asyncio.sleep(0)
+        connection.login_timeout.cancel()
+        return transport.writes
+
+    writes = asyncio.run(run())
+    assert [len(w) for w in writes] == [3 * (ORDER_FILLED_MESSAGE_SIZE + ORDER_STATUS_MESSAGE_SIZE)]
+
+
+def test_pending_replies_are_written_before_close():
+    async def run():
+        connection, transport = await make_connection()
+        connection.send_error(1, b"order rejected")
+        connection.close()
+        await asyncio.sleep(0)
+        return transport
+
+    transport = asyncio.run(run())
+    assert [len(w) for w in transport.writes] == [ERROR_MESSAGE_SIZE]
+    assert transport.closed
@@ -0,0 +1,41 @@
+import pytest
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+
+from ready_trader_go.hud.event_source import RecordedEventSource  # noqa: E402
+from ready_trader_go.types import Instrument  # noqa: E402
+
+ROWS = [
+    ("0.1", "Alpha", "Insert", "1", "1", "BUY", "10", "10000", "GOOD_FOR_DAY", ""),
+    ("0.1", "Alpha", "Insert", "2", "3", "BUY", "10", "20000", "GOOD_FOR_DAY", ""),
+    ("0.2", "Beta", "Insert", "1", "1", "SELL", "5", "10000", "FILL_AND_KILL", ""),
+    ("0.2", "Alpha", "Trade", "1", "1", "BUY", "5", "10000", "", "-1"),
+    ("0.2", "Beta", "Trade", "1", "1", "SELL", "5", "10000", "", "2"),
+    ("0.3", "Beta", "Insert", "2", "3", "SELL", "5", "20000", "FILL_AND_KILL", ""),
+    ("0.3", "Alpha", "Trade", "2", "3", "BUY", "5", "20000", "", "-2"),
+    ("0.3", "Beta", "Trade", "2", "3", "SELL", "5", "20000", "", "4"),
+    ("0.4", "Alpha", "Hedge", "3", "2", "SELL", "5", "19900.0", "", ""),
+    ("0.4", "Alpha", "Amend", "2", "", "", "-2", "", "", ""),
+    ("0.6", "Alpha", "Cancel", "2", "", "", "-3", "", "", ""),
+    ("0.7", "Alpha", "Cancel", "1", "", "", "-5", "", "", ""),
+]
+
+
+def test_replays_only_show_the_first_instrument_pair():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication()
+    source = RecordedEventSource.from_rows(ROWS, 0.002, 1.0, app)
+
+    amended, cancelled, inserted, traded = list(), list(), list(), list()
+    source.order_amended.connect(lambda *args: amended.append(args[0::2]))
+    source.order_cancelled.connect(lambda *args: cancelled.append(args[0::2]))
+    source.order_inserted.connect(lambda *args: inserted.append((args[0], args[2], args[3])))
+    source.trade_occurred.connect(lambda *args: traded.append((args[0], args[2], args[5])))
+
+    source.start()
+    for _ in range(3):
+        source._on_timer_tick()
+
+    assert inserted == [("Alpha", 1, Instrument.ETF), ("Beta", 1, Instrument.ETF)]
+    assert traded == [("Alpha", 1, 10000), ("Beta", 1, 10000)]
+    assert amended == list()
+    assert cancelled == [("Alpha", 1)]
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from ready_trader_go.base_auto_trader import BaseAutoTrader
+from ready_trader_go.information import MAXIMUM_BOOK_DEPTH, InformationPublisher
+from ready_trader_go.messages import BOOK_PART, HEADER, HEADER_SIZE, ORDER_BOOK_HEADER, ORDER_BOOK_HEADER_SIZE
+from ready_trader_go.order_book import Order, OrderBook
+from ready_trader_go.pubsub import BUFFER_SIZE, Publisher
+from ready_trader_go.timer import Timer
+from ready_trader_go.types import Instrument, Lifespan, Side
+
+
+class RecordingPublisher(Publisher):
+    def __init__(self, protocol):
+        super().__init__(memoryview(bytearray(BUFFER_SIZE)), protocol)
+        self.messages = []
+        self.pending = None
+
+    def begin_write(self, length):
+        buffer, offset = super().begin_write(length)
+        self.pending = (buffer, offset, length)
+        return buffer, offset
+
+    def end_write(self):
+        buffer, offset, length = self.pending
+        self.messages.append(bytes(buffer[offset:offset + length]))
+        super().end_write()
+
+
+class RecordingAutoTrader(BaseAutoTrader):
+    def __init__(self):
+        super().__init__(None, "Team", "secret")
+        self.books = []
+
+    def on_order_book_update_message(self, instrument, sequence_number, ask_prices, ask_volumes, bid_prices,
+                                     bid_volumes):
+        self.books.append((instrument, sequence_number, ask_prices, ask_volumes, bid_prices, bid_volumes))
+
+
+async def publish_messages(book_updates, orders, depth=5):
+    """Publish three ticks, inserting the given orders after the second, and return the messages sent."""
+    books = (OrderBook(Instrument.FUTURE, 0.0, 0.0, depth), OrderBook(Instrument.ETF, 0.0, 0.0, depth))
+    timer = Timer(0.25, 1.0)
+    publisher = InformationPublisher(asyncio.get_running_loop(), None, books, timer, book_updates)
+    transport = RecordingPublisher(publisher)
+    await asyncio.sleep(0)
+    for tick_number in range(1, 4):
+        if tick_number == 3:
+            for order in orders:
+                books[order.instrument].insert(0.5, order)
+        publisher.on_timer_tick(timer, tick_number * 0.25, tick_number)
+    return transport.messages
+
+
+def publish(book_updates, orders):
+    """Return the header, ask prices and bid prices of each message sent by publish_messages."""
+    return [(ORDER_BOOK_HEADER.unpack_from(m, HEADER_SIZE), BOOK_PART.unpack_from(m, ORDER_BOOK_HEADER_SIZE),
+             BOOK_PART.unpack_from(m, ORDER_BOOK_HEADER_SIZE + 2 * BOOK_PART.size))
+            for m in asyncio.run(publish_messages(book_updates, orders))]
+
+
+def test_every_tick_republishes_unchanged_books():
+    order = Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 10000, 10)
+    empty = (0, 0, 0, 0, 0)
+    assert publish("EveryTick", (order,)) == [((Instrument.FUTURE, 1), empty, empty),
+                                              ((Instrument.ETF, 1), empty, empty),
+                                              ((Instrument.FUTURE, 2), empty, empty),
+                                              ((Instrument.ETF, 2), empty, empty),
+                                              ((Instrument.FUTURE, 3), empty, empty),
+                                              ((Instrument.ETF, 3), empty, (10000, 0, 0, 0, 0))]
+
+
+def test_on_change_skips_unchanged_books():
+    order = Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 10100, 5)
+    empty = (0, 0, 0, 0, 0)
+    assert publish("OnChange", (order,)) == [((Instrument.FUTURE, 1), empty, empty),
+                                             ((Instrument.ETF, 1), empty, empty),
+                                             ((Instrument.ETF, 3), (10100, 0, 0, 0, 0), empty)]
+
+
+def test_unknown_book_update_policy():
+    with pytest.raises(ValueError):
+        InformationPublisher(None, None, (), Timer(0.25, 1.0), "Sometimes")
+
+
+def test_deep_books_are_decoded_by_auto_trader():
+    orders = [Order(i, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 10000 - 100 * i, i) for i in range(1, 8)]
+    messages = asyncio.run(publish_messages("EveryTick", orders, 20))
+    assert all(len(m) == ORDER_BOOK_HEADER_SIZE + 4 * 4 * 20 for m in messages)
+
+    auto_trader = RecordingAutoTrader()
+    for message in messages:
+        auto_trader.on_datagram(HEADER.unpack_from(message)[1], message, HEADER_SIZE, len(message))
+    instrument, sequence_number, ask_prices, ask_volumes, bid_prices, bid_volumes = auto_trader.books[-1]
+    assert (instrument, sequence_number) == (Instrument.ETF, 3)
+    assert ask_prices == ask_volumes == (0,) * 20
+    assert bid_prices == tuple(10000 - 100 * i for i in range(1, 8)) + (0,) * 13
+    assert bid_volumes == tuple(range(1, 8)) + (0,) * 13
+    assert len(auto_trader.books) == 6
+
+
+def test_book_depth_is_limited():
+    books = (OrderBook(Instrument.FUTURE, 0.0, 0.0, MAXIMUM_BOOK_DEPTH + 1),)
+    with pytest.raises(ValueError):
+        InformationPublisher(None, None, books, Timer(0.25, 1.0))
+
+
+def test_other_messages_do_not_change_the_book_depth():
+    deep, shallow = (asyncio.run(publish_messages("EveryTick", (), depth))[1] for depth in (20, 5))
+    auto_trader = RecordingAutoTrader()
+    auto_trader.on_datagram(HEADER.unpack_from(deep)[1], deep, HEADER_SIZE, len(deep))
+    auto_trader.event_loop = asyncio.new_event_loop()
+    auto_trader.on_datagram(0, shallow, HEADER_SIZE, len(shallow))
+    auto_trader.event_loop.close()
+    assert auto_trader._BaseAutoTrader__book_message_size == len(deep)
@@ -0,0 +1,144 @@
+import asyncio
+import csv
+import json
+import random
+import socket
+import time
+import types
+
+from ready_trader_go.execution import ExecutionConnection
+from ready_trader_go.information import InformationPublisher
+from ready_trader_go.instrumentation import Histogram, Instrumentation, ReactionTimes
+from ready_trader_go.market_events import MarketEventsReader
+from ready_trader_go.messages import CANCEL_MESSAGE_SIZE, INSERT_MESSAGE_SIZE, PAIR_INSERT_MESSAGE_SIZE, MessageType
+from ready_trader_go.order_book import Order, OrderBook
+from ready_trader_go.timer import Timer
+from ready_trader_go.types import Instrument, Lifespan, Side
+
+from test_information import RecordingPublisher
+
+
+def test_histogram_percentiles_are_within_the_bucket_error():
+    rng = random.Random(3)
+    values = sorted(int(rng.lognormvariate(10, 2)) for _ in range(10000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+
+    summary = histogram.summary()
+    assert (summary["count"], summary["min"], summary["max"]) == (len(values), values[0], values[-1])
+    assert summary["mean"] == sum(values) / len(values)
+    for percent in (50.0, 90.0, 99.0, 99.9):
+        exact = values[int(len(values) * percent / 100.0) - 1]
+        assert exact <= histogram.percentile(percent) <= exact * 17 / 16 + 1
+
+
+def test_install_times_book_operations_and_uninstall_restores_them():
+    original_insert = OrderBook.insert
+    instrumentation = Instrumentation()
+    instrumentation.install()
+    try:
+        assert OrderBook.insert is not original_insert
+        book = OrderBook(Instrument.ETF, 0.0, 0.0)
+        listener = MarketEventsReader("unused.csv", None, OrderBook(Instrument.FUTURE, 0.0, 0.0), book, None)
+        book.insert(1.0, Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 10000, 5, listener))
+        book.insert(1.0, Order(2, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 10000, 5, listener))
+        book.insert(1.0, Order(3, Instrument.ETF, Lifespan.FILL_AND_KILL, Side.BUY, 10000, 7, listener))
+    finally:
+        instrumentation.uninstall()
+
+    assert OrderBook.insert is original_insert
+    statistics = instrumentation.statistics()
+    assert statistics["book.insert"]["count"] == 3
+    # Two placements, then a fill for each resting order and one for the aggressor
+    assert statistics["book.insert.callbacks"]["count"] == 3
+    assert statistics["book.insert.callbacks"]["max"] == 3
+
+
+def test_statistics_server_returns_json():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def fetch():
+        instrumentation = Instrumentation(None, "127.0.0.1", port)
+        instrumentation.histogram("write").record(1500)
+        await instrumentation.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET / HTTP/1.0\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        instrumentation.close()
+        return response
+
+    header, body = asyncio.run(fetch()).split(b"\r\n\r\n", 1)
+    assert header.startswith(b"HTTP/1.0 200 OK")
+    assert json.loads(body)["write"]["count"] == 1
+
+
+def test_book_updates_published_is_only_signalled_when_something_was_published():
+    async def run():
+        books = (OrderBook(Instrument.FUTURE, 0.0, 0.0), OrderBook(Instrument.ETF, 0.0, 0.0))
+        timer = Timer(0.25, 1.0)
+        publisher = InformationPublisher(asyncio.get_running_loop(), None, books, timer, "OnChange")
+        RecordingPublisher(publisher)
+        await asyncio.sleep(0)
+        published = []
+        publisher.book_updates_published.append(published.append)
+        for tick_number in range(1, 4):
+            if tick_number == 3:
+                books[Instrument.ETF].insert(0.5, Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 10000, 1))
+            publisher.on_timer_tick(timer, tick_number * 0.25, tick_number)
+        return published
+
+    assert asyncio.run(run()) == [0.25, 0.75]
+
+
+def test_reaction_times_count_the_first_order_after_each_publication(tmp_path):
+    original_on_message = ExecutionConnection.on_message
+    reaction_times = ReactionTimes(str(tmp_path / "reaction_times.csv"))
+    reaction_times.install()
+    assert ExecutionConnection.on_message is not original_on_message
+
+    # Orders sent before anything is published are not reactions
+    reaction_times.on_insert_order("TeamA", time.perf_counter_ns())
+    reaction_times.on_book_updates_published(0.25)
+    published = time.perf_counter_ns()
+    reaction_times.on_insert_order("TeamA", published + 2000000)
+    reaction_times.on_insert_order("TeamA", published + 9000000)
+    reaction_times.on_insert_order("TeamB", published + 5000000)
+    reaction_times.on_book_updates_published(0.5)
+    reaction_times.on_insert_order("TeamA", time.perf_counter_ns() + 3000000)
+    reaction_times.close()
+
+    assert ExecutionConnection.on_message is original_on_message
+    assert reaction_times.histograms["TeamA"].count == 2
+    assert reaction_times.histograms["TeamB"].count == 1
+    count, median, p99 = reaction_times.score_board_summary("TeamA")
+    assert count == 2 and 2000.0 <= median <= p99
+    assert reaction_times.score_board_summary("TeamA") is reaction_times.score_board_summary("TeamA")
+    reaction_times.on_book_updates_published(0.75)
+    reaction_times.on_insert_order("TeamA", time.perf_counter_ns() + 4000000)
+    assert reaction_times.score_board_summary("TeamA")[0] == 3
+    assert reaction_times.score_board_summary("TeamC") == (0, 0.0, 0.0)
+    with open(tmp_path / "reaction_times.csv", newline="") as report:
+        rows = list(csv.reader(report))
+    assert rows[0] == ["Team", "Count", "Min", "Mean", "P50", "P90", "P99", "Max"]
+    assert [(row[0], row[1]) for row in rows[1:]] == [("TeamA", "2"), ("TeamB", "1")]
+
+
+def test_reaction_times_count_insert_orders_for_any_pair(monkeypatch):
+    monkeypatch.setattr(ExecutionConnection, "on_message", lambda connection, typ, data, start, length: None)
+    reaction_times = ReactionTimes()
+    reaction_times.install()
+    connection = types.SimpleNamespace(competitor=types.SimpleNamespace(name="TeamA"))
+
+    reaction_times.on_book_updates_published(0.25)
+    ExecutionConnection.on_message(connection, MessageType.PAIR_INSERT_ORDER, b"", 0, PAIR_INSERT_MESSAGE_SIZE)
+    reaction_times.on_book_updates_published(0.5)
+    ExecutionConnection.on_message(connection, MessageType.INSERT_ORDER, b"", 0, INSERT_MESSAGE_SIZE)
+    reaction_times.on_book_updates_published(0.75)
+    ExecutionConnection.on_message(connection, MessageType.CANCEL_ORDER, b"", 0, CANCEL_MESSAGE_SIZE)
+    reaction_times.uninstall()
+
+    assert reaction_times.histograms["TeamA"].count == 2
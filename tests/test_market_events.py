@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from ready_trader_go import market_events
+from ready_trader_go.market_events import (BlockMarketEventsReader, CompiledMarketEventsReader, MarketEventsReader,
+                                           compile_market_data, is_compiled_market_data)
+from ready_trader_go.match_events import MatchEvents
+from ready_trader_go.order_book import OrderBook
+from ready_trader_go.types import Instrument, instrument_number
+
+
+def replay(reader_type, path, steps, pair=0):
+    loop = asyncio.new_event_loop()
+    match_events = MatchEvents()
+    recorded = []
+    match_events.event_occurred.append(lambda e: recorded.append(tuple(e)))
+    reader = reader_type(str(path), loop, OrderBook(instrument_number(pair, Instrument.FUTURE), 0.0, 0.0),
+                         OrderBook(instrument_number(pair, Instrument.ETF), 0.0, 0.0), match_events)
+    completed = []
+    reader.task_complete.append(completed.append)
+    reader.start()
+    for elapsed in steps:
+        reader.process_market_events(elapsed)
+    if reader.reader_task is not None:
+        reader.reader_task.join()
+    loop.close()
+    return recorded, bool(completed)
+
+
+@pytest.mark.parametrize("block_size", [7, 4096])
+def test_block_reader_matches_row_reader(tmp_path, monkeypatch, write_market_data, block_size):
+    monkeypatch.setattr(market_events, "MARKET_EVENT_BLOCK_SIZE", block_size)
+    path = tmp_path / "market_data.csv"
+    write_market_data(path, 500, 42)
+    steps = [i * 0.05 for i in range(1, 120)]
+
+    row_events, row_complete = replay(MarketEventsReader, path, steps)
+    block_events, block_complete = replay(BlockMarketEventsReader, path, steps)
+
+    assert len(row_events) > 300
+    assert block_events == row_events
+    assert block_complete and row_complete
+
+
+def test_compiled_reader_matches_row_reader(tmp_path, write_market_data):
+    path = tmp_path / "market_data.csv"
+    compiled_path = tmp_path / "market_data.bin"
+    write_market_data(path, 500, 7)
+    assert compile_market_data(str(path), str(compiled_path)) == 500
+    assert is_compiled_market_data(str(compiled_path)) and not is_compiled_market_data(str(path))
+    steps = [i * 0.05 for i in range(1, 120)]
+
+    row_events, row_complete = replay(MarketEventsReader, path, steps)
+    compiled_events, compiled_complete = replay(CompiledMarketEventsReader, compiled_path, steps)
+
+    assert compiled_events == row_events
+    assert compiled_complete and row_complete
+
+
+@pytest.mark.parametrize("reader_type", [MarketEventsReader, BlockMarketEventsReader, CompiledMarketEventsReader])
+def test_market_data_can_be_replayed_into_another_pair(tmp_path, write_market_data, reader_type):
+    path = tmp_path / "market_data.csv"
+    write_market_data(path, 300, 11)
+    if reader_type is CompiledMarketEventsReader:
+        compile_market_data(str(path), str(tmp_path / "market_data.bin"))
+        path = tmp_path / "market_data.bin"
+    steps = [i * 0.05 for i in range(1, 80)]
+
+    first_events, _ = replay(reader_type, path, steps)
+    second_events, second_complete = replay(reader_type, path, steps, pair=1)
+
+    # Events are recorded with the instrument numbers of the second pair
+    assert {e[4] for e in second_events if e[4] is not None} == {2, 3}
+    assert [e[:4] + e[5:] for e in second_events] == [e[:4] + e[5:] for e in first_events]
+    assert [e[4] + 2 if e[4] is not None else None for e in first_events] == [e[4] for e in second_events]
+    assert second_complete
@@ -0,0 +1,86 @@
+import asyncio
+
+from ready_trader_go.match_events import (MATCH_EVENT_BATCH_SIZE, ColumnarMatchEventsWriter, MatchEvents,
+                                          MatchEventsWriter, convert_match_events, is_columnar_match_events,
+                                          read_match_events)
+from ready_trader_go.types import Instrument, Lifespan, Side
+from ready_trader_go.writer_queue import WriterQueue
+
+
+def generate_events(match_events, count):
+    for i in range(count):
+        now = i / 7.0
+        name = "Team%d" % (i // MATCH_EVENT_BATCH_SIZE) if i % 3 else ""
+        kind = i % 5
+        if kind == 0:
+            match_events.insert(now, name, i, Instrument(i % 2), Side(i % 2), 1 + i % 9, 10000 + i % 11 * 100,
+                                Lifespan(i % 2))
+        elif kind == 1:
+            match_events.amend(now, name, i, -(i % 4))
+        elif kind == 2:
+            match_events.cancel(now, name, i, -(i % 6))
+        elif kind == 3:
+            match_events.fill(now, name, i, Instrument(i % 2), Side(i % 2), 10100, 1 + i % 3, -i % 7 + 2)
+        else:
+            match_events.hedge(now, name, i, Instrument.FUTURE, Side(i % 2), 10000 + i % 13 * 100 if i % 2 else 9950.5,
+                               2)
+
+
+def write(tmp_path, writer_type, filename, count):
+    async def run():
+        match_events = MatchEvents()
+        writer = writer_type(match_events, str(tmp_path / filename), asyncio.get_running_loop())
+        writer.start()
+        generate_events(match_events, count)
+        writer.finish()
+        await asyncio.get_running_loop().run_in_executor(None, writer.writer_task.join)
+
+    asyncio.run(run())
+
+
+def test_columnar_match_events_convert_to_the_same_csv(tmp_path):
+    count = 2 * MATCH_EVENT_BATCH_SIZE + 100
+    write(tmp_path, MatchEventsWriter, "match_events.csv", count)
+    write(tmp_path, ColumnarMatchEventsWriter, "match_events.bin", count)
+
+    assert is_columnar_match_events(str(tmp_path / "match_events.bin"))
+    assert not is_columnar_match_events(str(tmp_path / "match_events.csv"))
+    assert convert_match_events(str(tmp_path / "match_events.bin"), str(tmp_path / "converted.csv")) == count
+    assert (tmp_path / "converted.csv").read_text() == (tmp_path / "match_events.csv").read_text()
+
+
+def test_read_match_events_returns_columns(tmp_path):
+    write(tmp_path, ColumnarMatchEventsWriter, "match_events.bin", MATCH_EVENT_BATCH_SIZE + 1)
+    columns = read_match_events(str(tmp_path / "match_events.bin"))
+    assert len(columns) == MATCH_EVENT_BATCH_SIZE + 1
+    assert columns.names == ["", "Team0", "Team1"]
+    assert list(columns.order_ids) == list(range(MATCH_EVENT_BATCH_SIZE + 1))
+    assert columns.times[7] == 1.0
+
+
+def test_match_events_are_handed_to_the_writer_once_per_loop_iteration(tmp_path):
+    class RecordingQueue(WriterQueue):
+        def __init__(self):
+            super().__init__("TEST")
+            self.lengths = []
+
+        def put(self, batch):
+            self.lengths.append(len(batch) if batch is not None else None)
+            super().put(batch)
+
+    async def run():
+        match_events = MatchEvents()
+        fifo = RecordingQueue()
+        writer = MatchEventsWriter(match_events, str(tmp_path / "match_events.csv"), asyncio.get_running_loop(),
+                                   fifo)
+        writer.start()
+        for _ in range(3):
+            generate_events(match_events, 10)
+            await asyncio.sleep(0)
+        generate_events(match_events, 5)
+        writer.finish()
+        await asyncio.get_running_loop().run_in_executor(None, writer.writer_task.join)
+        return fifo.lengths
+
+    assert asyncio.run(run()) == [10, 10, 10, 5, None]
+    assert len((tmp_path / "match_events.csv").read_text().splitlines()) == 36
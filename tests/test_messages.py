@@ -0,0 +1,46 @@
+import random
+
+from ready_trader_go import messages
+from ready_trader_go.messages import CANCEL_MESSAGE, CANCEL_MESSAGE_SIZE, HEADER, Connection, MessageType
+
+
+class Recorder(Connection):
+    def __init__(self):
+        super().__init__()
+        self.received = []
+
+    def on_message(self, typ, data, start, length):
+        self.received.append((typ, CANCEL_MESSAGE.unpack_from(data, start)[0]))
+
+
+def feed(connection, stream, chunk_sizes):
+    pos = 0
+    for chunk_size in chunk_sizes:
+        if pos >= len(stream):
+            break
+        buffer = connection.get_buffer(-1)
+        nbytes = min(len(buffer), chunk_size, len(stream) - pos)
+        buffer[:nbytes] = stream[pos:pos + nbytes]
+        connection.buffer_updated(nbytes)
+        pos += nbytes
+    return pos
+
+
+def test_messages_split_across_reads(monkeypatch):
+    # A small buffer forces partial messages to be moved to the front
+    monkeypatch.setattr(messages, "RECEIVE_BUFFER_SIZE", 64)
+    monkeypatch.setattr(messages, "MINIMUM_RECEIVE_SPACE", 16)
+    header = HEADER.pack(CANCEL_MESSAGE_SIZE, MessageType.CANCEL_ORDER)
+    stream = b"".join(header + CANCEL_MESSAGE.pack(i) for i in range(1000))
+    rng = random.Random(1)
+
+    connection = Recorder()
+    assert feed(connection, stream, iter(lambda: rng.randint(1, 20), None)) == len(stream)
+    assert connection.received == [(MessageType.CANCEL_ORDER, i) for i in range(1000)]
+
+
+def test_malformed_length_closes_connection():
+    connection = Recorder()
+    feed(connection, HEADER.pack(0, MessageType.CANCEL_ORDER) + b"\x00" * 10, [100])
+    assert connection.received == []
+    assert connection._closing
@@ -0,0 +1,142 @@
+import random
+
+import pytest
+
+from ready_trader_go.array_order_book import MAXIMUM_CAPACITY, ArrayOrderBook
+from ready_trader_go.order_book import TOP_LEVEL_COUNT, IOrderListener, Order, OrderBook
+from ready_trader_go.types import Instrument, Lifespan, Side
+
+TICK_SIZE = 100
+
+
+class RecordingListener(IOrderListener):
+    def __init__(self):
+        self.events = []
+        self.orders = {}
+
+    def on_order_amended(self, now, order, volume_removed):
+        self.events.append(("amended", order.client_order_id, volume_removed))
+
+    def on_order_cancelled(self, now, order, volume_removed):
+        self.events.append(("cancelled", order.client_order_id, volume_removed))
+        self.orders.pop(order.client_order_id, None)
+
+    def on_order_placed(self, now, order):
+        self.events.append(("placed", order.client_order_id))
+        self.orders[order.client_order_id] = order
+
+    def on_order_filled(self, now, order, price, volume, fee):
+        self.events.append(("filled", order.client_order_id, price, volume, fee))
+        if order.remaining_volume == 0:
+            self.orders.pop(order.client_order_id, None)
+
+
+def snapshot(book):
+    levels = [[0] * TOP_LEVEL_COUNT for _ in range(4)]
+    book.top_levels(*levels)
+    return levels, book.best_ask(), book.best_bid(), book.midpoint_price(), book.last_traded_price()
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("capacity, maximum_capacity, stray", [(8, MAXIMUM_CAPACITY, 0.0),
+                                                               (4096, MAXIMUM_CAPACITY, 0.0), (8, 16, 0.1)])
+def test_array_order_book_matches_order_book(seed, capacity, maximum_capacity, stray):
+    rng = random.Random(seed)
+    sorted_listener, array_listener = RecordingListener(), RecordingListener()
+    sorted_book = OrderBook(Instrument.ETF, -0.0001, 0.0002)
+    array_book = ArrayOrderBook(Instrument.ETF, -0.0001, 0.0002, TICK_SIZE, capacity,
+                                maximum_capacity=maximum_capacity)
+    mid = 100000 if stray else 10000  # Keep stray prices above zero
+
+    for client_order_id in range(1, 2001):
+        mid += rng.randint(-3, 3) * TICK_SIZE
+        action = rng.random()
+        if action < 0.6 or not sorted_listener.orders:
+            side = rng.choice((Side.BUY, Side.SELL))
+            price = mid + rng.randint(-20, 20) * TICK_SIZE
+            if stray and rng.random() < stray:
+                # Far from the rest of the book or off the tick grid
+                price = rng.choice((price + TICK_SIZE // 2, price + rng.randint(20, 40) * TICK_SIZE,
+                                    price - rng.randint(20, 40) * TICK_SIZE))
+            volume = rng.randint(1, 50)
+            lifespan = rng.choice((Lifespan.GOOD_FOR_DAY, Lifespan.GOOD_FOR_DAY, Lifespan.FILL_AND_KILL))
+            sorted_book.insert(0.0, Order(client_order_id, Instrument.ETF, lifespan, side, price, volume,
+                                          sorted_listener))
+            array_book.insert(0.0, Order(client_order_id, Instrument.ETF, lifespan, side, price, volume,
+                                         array_listener))
+        else:
+            order_id = rng.choice(sorted(sorted_listener.orders))
+            if action < 0.8:
+                sorted_book.cancel(0.0, sorted_listener.orders[order_id])
+                array_book.cancel(0.0, array_listener.orders[order_id])
+            else:
+                new_volume = rng.randint(0, sorted_listener.orders[order_id].volume)
+                sorted_book.amend(0.0, sorted_listener.orders[order_id], new_volume)
+                array_book.amend(0.0, array_listener.orders[order_id], new_volume)
+
+        assert snapshot(array_book) == snapshot(sorted_book)
+        side = rng.choice((Side.ASK, Side.BID))
+        limit = mid + rng.randint(-10, 10) * TICK_SIZE
+        assert array_book.try_trade(side, limit, 100) == sorted_book.try_trade(side, limit, 100)
+
+        if client_order_id % 25 == 0:
+            sorted_ticks = [[0] * TOP_LEVEL_COUNT for _ in range(4)]
+            array_ticks = [[0] * TOP_LEVEL_COUNT for _ in range(4)]
+            assert array_book.trade_ticks(*array_ticks) == sorted_book.trade_ticks(*sorted_ticks)
+            assert array_ticks == sorted_ticks
+
+    assert array_listener.events == sorted_listener.events
+
+
+def test_array_order_book_accepts_extreme_and_off_grid_prices():
+    listener = RecordingListener()
+    book = ArrayOrderBook(Instrument.ETF, 0.0, 0.0, TICK_SIZE)
+    book.insert(0.0, Order(1, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 10000, 10, listener))
+    book.insert(0.0, Order(2, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.SELL, 2147483600, 10, listener))
+    book.insert(0.0, Order(3, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 100, 10, listener))
+    book.insert(0.0, Order(4, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 9950, 10, listener))
+    assert book._ArrayOrderBook__capacity <= MAXIMUM_CAPACITY
+    assert snapshot(book)[0] == [[10000, 2147483600, 0, 0, 0], [10, 10, 0, 0, 0],
+                                 [9950, 100, 0, 0, 0], [10, 10, 0, 0, 0]]
+
+    # Trading through the near level leaves the far one as the best ask
+    book.insert(0.0, Order(5, Instrument.ETF, Lifespan.FILL_AND_KILL, Side.BUY, 10000, 15, listener))
+    assert (book.best_ask(), book.best_bid()) == (2147483600, 9950)
+    assert book.try_trade(Side.BUY, 2147483647, 20) == (10, 2147483600)
+    book.insert(0.0, Order(6, Instrument.ETF, Lifespan.FILL_AND_KILL, Side.SELL, 100, 15, listener))
+    assert book.best_bid() == 100
+    book.cancel(0.0, listener.orders[3])
+    book.cancel(0.0, listener.orders[2])
+    assert (book.best_ask(), book.best_bid(), book.midpoint_price()) == (None, None, None)
+
+    # With the book empty, the arrays can be moved to wherever trading is now
+    book.insert(0.0, Order(7, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 2147483600, 1, listener))
+    assert book.best_bid() == 2147483600 and book._ArrayOrderBook__capacity <= MAXIMUM_CAPACITY
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("book_type", [OrderBook, ArrayOrderBook])
+def test_version_changes_only_when_top_levels_change(seed, book_type):
+    rng = random.Random(seed)
+    listener = RecordingListener()
+    book = book_type(Instrument.ETF, -0.0001, 0.0002)
+    mid = 100000
+
+    for client_order_id in range(1, 2001):
+        before_levels, before_version = snapshot(book)[0], book.version
+        mid += rng.randint(-3, 3) * TICK_SIZE
+        action = rng.random()
+        if action < 0.6 or not listener.orders:
+            side = rng.choice((Side.BUY, Side.SELL))
+            price = mid + rng.randint(-20, 20) * TICK_SIZE
+            book.insert(0.0, Order(client_order_id, Instrument.ETF, Lifespan.GOOD_FOR_DAY, side, price,
+                                   rng.randint(1, 50), listener))
+        else:
+            order = listener.orders[rng.choice(sorted(listener.orders))]
+            if action < 0.8:
+                book.cancel(0.0, order)
+            else:
+                book.amend(0.0, order, rng.randint(0, order.volume))
+
+        changed = snapshot(book)[0] != before_levels
+        assert (book.version != before_version) == changed
@@ -0,0 +1,206 @@
+import asyncio
+import collections
+import random
+
+import pytest
+
+from ready_trader_go.array_order_book import ArrayOrderBook
+from ready_trader_go.base_auto_trader import BaseAutoTrader, OrderFeedReceiver
+from ready_trader_go.messages import HEADER, HEADER_SIZE, SNAPSHOT_HEADER, MessageType
+from ready_trader_go.order_book import Order, OrderBook
+from ready_trader_go.order_feed import SNAPSHOT_ORDER_LIMIT, OrderFeedPublisher
+from ready_trader_go.pubsub import BUFFER_SIZE, Publisher
+from ready_trader_go.timer import Timer
+from ready_trader_go.types import Instrument, Lifespan, Side
+
+DEPTH = 50
+
+
+class RecordingPublisher(Publisher):
+    def __init__(self, protocol):
+        super().__init__(memoryview(bytearray(BUFFER_SIZE)), protocol)
+        self.messages = []
+        self.pending = None
+
+    def begin_write(self, length):
+        buffer, offset = super().begin_write(length)
+        self.pending = (buffer, offset, length)
+        return buffer, offset
+
+    def end_write(self):
+        buffer, offset, length = self.pending
+        self.messages.append(bytes(buffer[offset:offset + length]))
+        super().end_write()
+
+
+class BookBuilder(BaseAutoTrader):
+    """Keep a copy of each order book from the order feed, starting from the first snapshot."""
+
+    def __init__(self):
+        super().__init__(None, "Team", "secret")
+        self.orders = [None for _ in Instrument]
+        self.sequences = [0 for _ in Instrument]
+        self.snapshots = [[] for _ in Instrument]
+
+    def apply(self, instrument, sequence_number):
+        if self.orders[instrument] is None or sequence_number <= self.sequences[instrument]:
+            return False
+        assert sequence_number == self.sequences[instrument] + 1
+        self.sequences[instrument] = sequence_number
+        return True
+
+    def on_order_added_message(self, instrument, sequence_number, order_id, side, price, volume):
+        if self.apply(instrument, sequence_number):
+            self.orders[instrument][order_id] = [side, price, volume]
+
+    def on_order_book_snapshot_message(self, instrument, sequence_number, orders):
+        self.snapshots[instrument].append((sequence_number, orders))
+        if self.orders[instrument] is None:
+            self.orders[instrument] = {o[0]: list(o[1:]) for o in orders}
+            self.sequences[instrument] = sequence_number
+
+    def on_order_deleted_message(self, instrument, sequence_number, order_id):
+        if self.apply(instrument, sequence_number):
+            del self.orders[instrument][order_id]
+
+    def on_order_executed_message(self, instrument, sequence_number, order_id, volume):
+        if self.apply(instrument, sequence_number):
+            order = self.orders[instrument][order_id]
+            assert 0 < volume <= order[2]
+            order[2] -= volume
+            if order[2] == 0:
+                del self.orders[instrument][order_id]
+
+    def on_order_modified_message(self, instrument, sequence_number, order_id, remaining_volume):
+        if self.apply(instrument, sequence_number):
+            assert 0 < remaining_volume < self.orders[instrument][order_id][2]
+            self.orders[instrument][order_id][2] = remaining_volume
+
+    def levels(self, instrument):
+        volumes = collections.defaultdict(int)
+        for side, price, volume in self.orders[instrument].values():
+            volumes[side, price] += volume
+        asks = sorted((p, v) for (s, p), v in volumes.items() if s == Side.SELL)
+        bids = sorted(((p, v) for (s, p), v in volumes.items() if s == Side.BUY), reverse=True)
+        return asks, bids
+
+
+def book_levels(book):
+    ask_prices, ask_volumes, bid_prices, bid_volumes = ([0] * DEPTH for _ in range(4))
+    book.top_levels(ask_prices, ask_volumes, bid_prices, bid_volumes)
+    return ([(p, v) for p, v in zip(ask_prices, ask_volumes) if p],
+            [(p, v) for p, v in zip(bid_prices, bid_volumes) if p])
+
+
+def trade_randomly(rng, books, live, count, first_order_id):
+    """Insert, amend and cancel random orders around a price of 1000.00."""
+    for i in range(first_order_id, first_order_id + count):
+        action = rng.random()
+        if action < 0.2 and live:
+            order = live.pop(rng.randrange(len(live)))
+            books[order.instrument].cancel(0.0, order)
+        elif action < 0.35 and live:
+            order = live[rng.randrange(len(live))]
+            books[order.instrument].amend(0.0, order, rng.randint(0, order.volume))
+        else:
+            side = rng.choice((Side.BUY, Side.SELL))
+            price = 100000 + (-1 if side == Side.BUY else 1) * rng.randint(-2, 10) * 100
+            lifespan = Lifespan.FILL_AND_KILL if rng.random() < 0.1 else Lifespan.GOOD_FOR_DAY
+            order = Order(i, rng.choice(tuple(Instrument)), lifespan, side, price, rng.randint(1, 20))
+            books[order.instrument].insert(0.0, order)
+            if order.remaining_volume:
+                live.append(order)
+        live[:] = [o for o in live if o.remaining_volume]
+
+
+async def replay(book_type, seed, snapshot_interval=1):
+    """Trade randomly between snapshots and return the books and the order feed messages."""
+    books = tuple(book_type(i, 0.0, 0.0, depth=DEPTH) for i in Instrument)
+    timer = Timer(0.25, 1.0)
+    feed = OrderFeedPublisher(None, books, timer, snapshot_interval)
+    transport = RecordingPublisher(feed)
+    await asyncio.sleep(0)
+
+    rng = random.Random(seed)
+    live = []
+    trade_randomly(rng, books, live, 200, 1)
+    for tick_number in range(1, 3):
+        feed.on_timer_tick(timer, tick_number * 0.25, tick_number)
+        trade_randomly(rng, books, live, 200, tick_number * 1000)
+    feed.on_timer_tick(timer, 0.75, 3)
+    return books, transport.messages
+
+
+def receive(messages):
+    builder = BookBuilder()
+    receiver = OrderFeedReceiver(builder)
+    for message in messages:
+        receiver.on_datagram(HEADER.unpack_from(message)[1], message, HEADER_SIZE, len(message))
+    return builder
+
+
+@pytest.mark.parametrize("book_type", (OrderBook, ArrayOrderBook))
+@pytest.mark.parametrize("seed", range(3))
+def test_books_built_from_the_order_feed_match_the_order_books(book_type, seed):
+    books, messages = asyncio.run(replay(book_type, seed))
+    builder = receive(messages)
+    for book in books:
+        assert builder.levels(book.instrument) == book_levels(book)
+        # The final snapshot matches the book built from the snapshot before
+        sequence_number, orders = builder.snapshots[book.instrument][-1]
+        assert sequence_number == builder.sequences[book.instrument]
+        assert {o[0]: list(o[1:]) for o in orders} == builder.orders[book.instrument]
+
+
+@pytest.mark.parametrize("book_type", (OrderBook, ArrayOrderBook))
+def test_late_joiner_catches_up_from_a_snapshot(book_type):
+    books, messages = asyncio.run(replay(book_type, 7))
+    snapshots = [i for i, m in enumerate(messages) if HEADER.unpack_from(m)[1] == MessageType.ORDER_BOOK_SNAPSHOT]
+    # Join part way between the first and second snapshots
+    builder = receive(messages[(snapshots[0] + snapshots[-1]) // 2:])
+    for book in books:
+        assert builder.levels(book.instrument) == book_levels(book)
+
+
+def test_long_snapshots_are_split_into_parts():
+    async def run():
+        book = OrderBook(Instrument.ETF, 0.0, 0.0)
+        timer = Timer(0.25, 1.0)
+        feed = OrderFeedPublisher(None, (book,), timer)
+        transport = RecordingPublisher(feed)
+        await asyncio.sleep(0)
+        for i in range(1, 2 * SNAPSHOT_ORDER_LIMIT + 2):
+            book.insert(0.0, Order(i, Instrument.ETF, Lifespan.GOOD_FOR_DAY, Side.BUY, 10000 - i % 7 * 100, i))
+        feed.on_timer_tick(timer, 0.25, 1)
+        return transport.messages
+
+    messages = asyncio.run(run())
+    parts = [m for m in messages if HEADER.unpack_from(m)[1] == MessageType.ORDER_BOOK_SNAPSHOT]
+    assert len(parts) == 3
+
+    builder = receive(messages)
+    sequence_number, orders = builder.snapshots[Instrument.ETF][0]
+    assert sequence_number == 2 * SNAPSHOT_ORDER_LIMIT + 1
+    assert orders == [(i, Side.BUY, 10000 - i % 7 * 100, i) for i in range(1, 2 * SNAPSHOT_ORDER_LIMIT + 2)]
+
+    # A snapshot with a missing part is discarded
+    builder = receive(parts[:1] + parts[2:])
+    assert builder.snapshots[Instrument.ETF] == []
+
+
+def test_books_take_turns_to_publish_snapshots():
+    async def run():
+        books = tuple(OrderBook(i, 0.0, 0.0) for i in Instrument)
+        timer = Timer(0.25, 1.0)
+        feed = OrderFeedPublisher(None, books, timer, 2)
+        transport = RecordingPublisher(feed)
+        await asyncio.sleep(0)
+        snapshots = []
+        for tick_number in range(1, 6):
+            transport.messages.clear()
+            feed.on_timer_tick(timer, tick_number * 0.25, tick_number)
+            snapshots.append([SNAPSHOT_HEADER.unpack_from(m, HEADER_SIZE)[0] for m in transport.messages])
+        return snapshots
+
+    assert asyncio.run(run()) == [[Instrument.FUTURE], [Instrument.ETF], [Instrument.FUTURE], [Instrument.ETF],
+                                  [Instrument.FUTURE]]
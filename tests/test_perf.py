@@ -15,7 +15,7 @@ TEAM_NAME = "PurpleHaze"
         pathlib.Path("data/market_data4.csv"),
     ],
 )
-def test_single(market_data: pathlib.Path, run_with_hdu, speed):
+def test_single(market_data: pathlib.Path, run_with_hdu, speed, clock):
     traders = [
         Trader(name="autotrader", binary="autotrader", team_name=TEAM_NAME),
     ]
@@ -23,7 +23,7 @@ def test_single(market_data: pathlib.Path, run_with_hdu, speed):
     score_board_path = test_env_path / "score_board.csv"
 
     populate_test_env(test_env_path, traders)
-    setup_test_env(test_env_path, market_data, speed, traders)
+    setup_test_env(test_env_path, market_data, speed, traders, clock)
     run_test(test_env_path, run_with_hdu)
 
     assert winner(score_board_path) == TEAM_NAME
@@ -38,7 +38,7 @@ def test_single(market_data: pathlib.Path, run_with_hdu, speed):
         pathlib.Path("data/market_data4.csv"),
     ],
 )
-def test_basic(market_data: pathlib.Path, run_with_hdu, speed):
+def test_basic(market_data: pathlib.Path, run_with_hdu, speed, clock):
     traders = [
         Trader(name="autotrader", binary="autotrader", team_name=TEAM_NAME),
         Trader(name="default1", binary="default", team_name="TraderTwo"),
@@ -48,7 +48,7 @@ def test_basic(market_data: pathlib.Path, run_with_hdu, speed):
     score_board_path = test_env_path / "score_board.csv"
 
     populate_test_env(test_env_path, traders)
-    setup_test_env(test_env_path, market_data, speed, traders)
+    setup_test_env(test_env_path, market_data, speed, traders, clock)
     run_test(test_env_path, run_with_hdu)
 
     assert winner(score_board_path) == TEAM_NAME
@@ -63,7 +63,7 @@ def test_basic(market_data: pathlib.Path, run_with_hdu, speed):
         pathlib.Path("data/market_data4.csv"),
     ],
 )
-def test_against_defaults(market_data: pathlib.Path, run_with_hdu, speed):
+def test_against_defaults(market_data: pathlib.Path, run_with_hdu, speed, clock):
     traders = [
         Trader(name="autotrader", binary="autotrader", team_name=TEAM_NAME),
         Trader(name="default1", binary="default", team_name="Trader1-default"),
@@ -80,7 +80,7 @@ def test_against_defaults(market_data: pathlib.Path, run_with_hdu, speed):
     score_board_path = test_env_path / "score_board.csv"
 
     populate_test_env(test_env_path, traders)
-    setup_test_env(test_env_path, market_data, speed, traders)
+    setup_test_env(test_env_path, market_data, speed, traders, clock)
     run_test(test_env_path, run_with_hdu)
 
     assert winner(score_board_path) == TEAM_NAME
@@ -95,7 +95,7 @@ def test_against_defaults(market_data: pathlib.Path, run_with_hdu, speed):
         pathlib.Path("data/market_data4.csv"),
     ],
 )
-def test_rumble(market_data: pathlib.Path, run_with_hdu, speed):
+def test_rumble(market_data: pathlib.Path, run_with_hdu, speed, clock):
     traders = [
         Trader(name="autotrader", binary="autotrader", team_name=TEAM_NAME),
         Trader(name="autotrader1", binary="autotrader", team_name="Trader1-autotrader"),
@@ -110,7 +110,7 @@ def test_rumble(market_data: pathlib.Path, run_with_hdu, speed):
     score_board_path = test_env_path / "score_board.csv"
 
     populate_test_env(test_env_path, traders)
-    setup_test_env(test_env_path, market_data, speed, traders)
+    setup_test_env(test_env_path, market_data, speed, traders, clock)
     run_test(test_env_path, run_with_hdu)
 
     assert winner(score_board_path) == TEAM_NAME
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import struct
+import uuid
+
+import pytest
+
+from ready_trader_go.pubsub import (FRAME_SIZE, MAXIMUM_MESSAGE_LENGTH, MAXIMUM_PAYLOAD_LENGTH, PublisherFactory,
+                                    SubscriberFactory)
+
+
+class Receiver(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.received = []
+
+    def datagram_received(self, data, addr):
+        self.received.append(data)
+
+
+async def publish_and_receive(typ, name, count, wakeup="Spin"):
+    publisher = PublisherFactory(typ, name).create(asyncio.Protocol())
+    receiver = Receiver()
+    subscriber = SubscriberFactory(typ, name, wakeup, 2).create(receiver)
+    await asyncio.sleep(0)
+    for i in range(count):
+        publisher.write(b"message %d" % i)
+        for _ in range(3):
+            await asyncio.sleep(0)
+    for _ in range(100):
+        if len(receiver.received) == count:
+            break
+        await asyncio.sleep(0.001)
+    subscriber.close()
+    await asyncio.sleep(0)
+    publisher.close()
+    return receiver.received
+
+
+@pytest.mark.parametrize("wakeup", ["Spin", "SpinThenBlock", "Block"])
+@pytest.mark.parametrize("typ", ["mmap", "shm"])
+def test_round_trip(tmp_path, typ, wakeup):
+    name = str(tmp_path / "info.dat") if typ == "mmap" else "rtg_test_%s" % uuid.uuid4().hex
+    received = asyncio.run(publish_and_receive(typ, name, 200, wakeup))
+    assert received == [b"message %d" % i for i in range(200)]
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="requires /dev/shm")
+def test_shm_publisher_removes_block_on_close():
+    name = "rtg_test_%s" % uuid.uuid4().hex
+    asyncio.run(publish_and_receive("shm", name, 1))
+    assert not os.path.exists(os.path.join("/dev/shm", name))
+
+
+async def lap_subscriber(typ, name, ring_size, count):
+    publisher = PublisherFactory(typ, name, ring_size).create(asyncio.Protocol())
+    receiver = Receiver()
+    subscriber = SubscriberFactory(typ, name).create(receiver)
+    dropped = []
+    subscriber.frames_dropped.append(lambda _, n: dropped.append(n))
+    await asyncio.sleep(0)
+    for i in range(count):
+        publisher.write(b"message %d" % i)
+    for _ in range(3):
+        await asyncio.sleep(0)
+    publisher.write(b"message %d" % count)
+    for _ in range(3):
+        await asyncio.sleep(0)
+    subscriber.close()
+    await asyncio.sleep(0)
+    publisher.close()
+    return receiver.received, dropped, subscriber.dropped_frame_count
+
+
+@pytest.mark.parametrize("typ", ["mmap", "shm"])
+def test_late_subscriber_starts_from_newest_frame(tmp_path, typ):
+    name = str(tmp_path / "info.dat") if typ == "mmap" else "rtg_test_%s" % uuid.uuid4().hex
+
+    async def run():
+        publisher = PublisherFactory(typ, name, 32).create(asyncio.Protocol())
+        for i in range(100):
+            publisher.write(b"message %d" % i)
+        receiver = Receiver()
+        subscriber = SubscriberFactory(typ, name).create(receiver)
+        dropped = []
+        subscriber.frames_dropped.append(lambda _, n: dropped.append(n))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        publisher.write(b"message 100")
+        for _ in range(3):
+            await asyncio.sleep(0)
+        subscriber.close()
+        await asyncio.sleep(0)
+        publisher.close()
+        return receiver.received, dropped, subscriber.dropped_frame_count
+
+    assert asyncio.run(run()) == ([b"message 99", b"message 100"], [], 0)
+
+
+@pytest.mark.parametrize("typ", ["mmap", "shm"])
+def test_lapped_subscriber_skips_to_newest_frame(tmp_path, typ):
+    name = str(tmp_path / "info.dat") if typ == "mmap" else "rtg_test_%s" % uuid.uuid4().hex
+    received, dropped, dropped_frame_count = asyncio.run(lap_subscriber(typ, name, 32, 100))
+    assert received == [b"message 99", b"message 100"]
+    assert dropped == [99]
+    assert dropped_frame_count == 99
+
+
+def test_ring_size(tmp_path):
+    name = str(tmp_path / "info.dat")
+    received = asyncio.run(publish_and_receive("mmap", name, 10))
+    assert received == [b"message %d" % i for i in range(10)]
+    assert os.path.getsize(name) == 64 * FRAME_SIZE
+
+    with pytest.raises(ValueError):
+        PublisherFactory("mmap", name, 48)
+    with pytest.raises(ValueError):
+        PublisherFactory("mmap", name, 16)
+
+
+class ViewReceiver(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.received = []
+        self.views = []
+
+    def datagram_received(self, data, addr):
+        self.received.append(bytes(data))
+        self.views.append(data)
+
+
+@pytest.mark.parametrize("typ", ["mmap", "shm"])
+def test_zero_copy_delivers_released_views(tmp_path, typ):
+    name = str(tmp_path / "info.dat") if typ == "mmap" else "rtg_test_%s" % uuid.uuid4().hex
+
+    async def run():
+        publisher = PublisherFactory(typ, name).create(asyncio.Protocol())
+        receiver = ViewReceiver()
+        subscriber = SubscriberFactory(typ, name, zero_copy=True).create(receiver)
+        await asyncio.sleep(0)
+        for i in range(100):
+            buffer, offset = publisher.begin_write(11)
+            struct.pack_into("!7sI", buffer, offset, b"message", i)
+            publisher.end_write()
+            for _ in range(3):
+                await asyncio.sleep(0)
+        subscriber.close()
+        await asyncio.sleep(0)
+        publisher.close()
+        return receiver
+
+    receiver = asyncio.run(run())
+    assert receiver.received == [struct.pack("!7sI", b"message", i) for i in range(100)]
+    assert all(isinstance(v, memoryview) for v in receiver.views)
+    with pytest.raises(ValueError):
+        bytes(receiver.views[0])
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+def test_long_messages_are_fragmented(tmp_path, zero_copy):
+    name = str(tmp_path / "info.dat")
+    lengths = (1, MAXIMUM_PAYLOAD_LENGTH, MAXIMUM_PAYLOAD_LENGTH + 1, 500, MAXIMUM_MESSAGE_LENGTH)
+    messages = [bytes((i + j) % 256 for j in range(length)) for i, length in enumerate(lengths * 10)]
+
+    async def run():
+        publisher = PublisherFactory("mmap", name).create(asyncio.Protocol())
+        receiver = ViewReceiver()
+        subscriber = SubscriberFactory("mmap", name, zero_copy=zero_copy).create(receiver)
+        await asyncio.sleep(0)
+        for i, message in enumerate(messages):
+            if i % 2:
+                publisher.write(message)
+            else:
+                buffer, offset = publisher.begin_write(len(message))
+                buffer[offset:offset + len(message)] = message
+                publisher.end_write()
+            for _ in range(10):
+                await asyncio.sleep(0)
+        with pytest.raises(ValueError):
+            publisher.write(bytes(MAXIMUM_MESSAGE_LENGTH + 1))
+        subscriber.close()
+        await asyncio.sleep(0)
+        publisher.close()
+        return receiver.received
+
+    assert asyncio.run(run()) == messages
+
+
+def test_lapped_subscriber_discards_partial_message(tmp_path):
+    name = str(tmp_path / "info.dat")
+    long_message = bytes(300)  # three frames
+
+    async def run():
+        publisher = PublisherFactory("mmap", name, 32).create(asyncio.Protocol())
+        receiver = Receiver()
+        subscriber = SubscriberFactory("mmap", name).create(receiver)
+        await asyncio.sleep(0)
+        for _ in range(20):
+            publisher.write(long_message)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        publisher.write(b"short")
+        publisher.write(long_message)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        subscriber.close()
+        await asyncio.sleep(0)
+        publisher.close()
+        return receiver.received, subscriber.dropped_frame_count
+
+    received, dropped_frame_count = asyncio.run(run())
+    assert received == [b"short", long_message]
+    assert dropped_frame_count == 59
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from ready_trader_go.array_order_book import create_order_book
+from ready_trader_go.market_events import create_market_events_reader
+from ready_trader_go.match_events import MatchEvents
+from ready_trader_go.order_book import IOrderListener, Order
+from ready_trader_go.shard import Shard, ShardGateway
+from ready_trader_go.types import Instrument, Lifespan, Side, instrument_number
+
+DEPTH = 5
+FEES = (-0.0001, 0.0002)
+
+
+class Recorder(IOrderListener):
+    def __init__(self):
+        self.calls = []
+
+    def on_order_amended(self, now, order, volume_removed):
+        self.calls.append(("amended", now, order.client_order_id, volume_removed, order.remaining_volume))
+
+    def on_order_cancelled(self, now, order, volume_removed):
+        self.calls.append(("cancelled", now, order.client_order_id, volume_removed, order.remaining_volume))
+
+    def on_order_filled(self, now, order, price, volume, fee):
+        self.calls.append(("filled", now, order.client_order_id, price, volume, fee, order.remaining_volume,
+                           order.total_fees))
+
+    def on_order_placed(self, now, order):
+        self.calls.append(("placed", now, order.client_order_id, order.remaining_volume))
+
+
+def book_summary(book):
+    levels = [[0] * DEPTH for _ in range(4)]
+    book.top_levels(*levels)
+    ticks = [[0] * DEPTH for _ in range(4)]
+    traded = book.trade_ticks(*ticks)
+    return (book.instrument, book.version, book.best_bid(), book.best_ask(), book.last_traded_price(),
+            book.midpoint_price(), levels, traded and ticks, book.try_trade(Side.BUY, 10300, 20))
+
+
+def trade(books, process, steps):
+    """Step through the market data, trading in the ETF books of every pair, and record what happens."""
+    recorder = Recorder()
+    summaries = []
+    live = []
+    for i, now in enumerate(steps):
+        process(now)
+        for book in books[1::2]:
+            side = Side.BUY if i % 2 else Side.SELL
+            order = Order(i * 100 + book.instrument, book.instrument, Lifespan.GOOD_FOR_DAY, side,
+                          10000 + (i % 5 - 2) * 100, 5 + i % 7, recorder)
+            book.insert(now, order)
+            if order.remaining_volume:
+                live.append((book, order))
+            if i % 3 == 0 and len(live) > 1:
+                book, order = live.pop(0)
+                book.cancel(now, order)
+            elif i % 3 == 1 and live:
+                book, order = live[-1]
+                book.amend(now, order, order.remaining_volume - 1)
+            live = [(b, o) for b, o in live if o.remaining_volume]
+        summaries.append([book_summary(book) for book in books])
+    return recorder.calls, summaries
+
+
+def run_in_process(paths, array_books, steps):
+    loop = asyncio.new_event_loop()
+    match_events = MatchEvents()
+    recorded = []
+    match_events.event_occurred.append(lambda e: recorded.append(tuple(e)))
+    books = []
+    readers = []
+    for pair, path in enumerate(paths):
+        future_book = create_order_book(instrument_number(pair, Instrument.FUTURE), 0.0, 0.0, 1.0, DEPTH,
+                                        array_books)
+        etf_book = create_order_book(instrument_number(pair, Instrument.ETF), *FEES, 1.0, DEPTH, array_books)
+        readers.append(create_market_events_reader(str(path), False, loop, future_book, etf_book, match_events))
+        books.extend((future_book, etf_book))
+    for reader in readers:
+        reader.start()
+
+    calls, summaries = trade(books, lambda now: [r.process_market_events(now) for r in readers], steps)
+    for reader in readers:
+        reader.reader_task.join()
+    loop.close()
+    return recorded, calls, summaries
+
+
+def run_sharded(paths, array_books, steps, shard_count):
+    match_events = MatchEvents()
+    recorded = []
+    match_events.event_occurred.append(lambda e: recorded.append(tuple(e)))
+    gateway = ShardGateway(shard_count, [(str(path),) + FEES for path in paths], array_books, False, 1.0, DEPTH,
+                           match_events)
+    completed = []
+    gateway.task_complete.append(completed.append)
+    try:
+        gateway.start()
+        calls, summaries = trade(gateway.order_books, gateway.process_market_events, steps)
+    finally:
+        gateway.close()
+    return recorded, calls, summaries, bool(completed)
+
+
+@pytest.mark.parametrize("array_books", [False, True])
+def test_sharded_books_match_books_in_one_process(tmp_path, monkeypatch, write_market_data, array_books):
+    monkeypatch.chdir(tmp_path)
+    paths = [tmp_path / ("market_data%d.csv" % i) for i in range(3)]
+    for i, path in enumerate(paths):
+        write_market_data(path, 300, i)
+    steps = [i * 0.1 for i in range(1, 40)]
+
+    expected = run_in_process(paths, array_books, steps)
+    *actual, completed = run_sharded(paths, array_books, steps, 2)
+
+    assert len(expected[0]) > 300 and any(c[0] == "filled" for c in expected[1])
+    assert actual == list(expected)
+    assert completed
+    assert (tmp_path / "exchange_shard1.log").exists()
+
+
+def test_reading_every_book_costs_one_request_per_shard(tmp_path, monkeypatch, write_market_data):
+    monkeypatch.chdir(tmp_path)
+    paths = [tmp_path / ("market_data%d.csv" % i) for i in range(3)]
+    for i, path in enumerate(paths):
+        write_market_data(path, 300, i)
+    gateway = ShardGateway(2, [(str(path),) + FEES for path in paths], True, False, 1.0, DEPTH, MatchEvents())
+    requests = []
+    send = Shard.send
+    monkeypatch.setattr(Shard, "send", lambda shard, request: requests.append(request[0]) or send(shard, request))
+    traded = 0
+    try:
+        gateway.start()
+        for now in (i * 0.1 for i in range(1, 20)):
+            gateway.process_market_events(now)
+            del requests[:]
+            for _ in range(2):
+                for book in gateway.order_books:
+                    book.top_levels(*([0] * DEPTH for _ in range(4)))
+                    traded += book.trade_ticks(*([0] * DEPTH for _ in range(4)))
+            assert len(requests) <= 2
+    finally:
+        gateway.close()
+    assert traded
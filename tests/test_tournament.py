@@ -0,0 +1,112 @@
+import json
+import pathlib
+
+import pytest
+
+from ready_trader_go.tournament import (PORT_IN_USE_ERROR, Match, MatchResult, final_scores, prepare_match, run_match,
+                                         summarise)
+
+EXCHANGE_CONFIG = {
+    "Engine": {"MarketDataFile": "data/market_data1.csv", "MatchEventsFile": "match_events.csv",
+               "ScoreBoardFile": "score_board.csv"},
+    "Execution": {"Host": "127.0.0.1", "Port": 12345},
+    "Hud": {"Host": "127.0.0.1", "Port": 12347},
+    "Information": {"Type": "mmap", "Name": "info.dat"},
+    "Traders": {"TraderOne": "secret"},
+}
+
+
+def test_prepare_match_isolates_each_match(tmp_path):
+    for name in ("one", "two"):
+        (tmp_path / (name + ".py")).write_text("")
+        (tmp_path / (name + ".json")).write_text(json.dumps({
+            "Execution": {"Host": "127.0.0.1", "Port": 12345}, "Information": {"Type": "mmap", "Name": "info.dat"},
+            "TeamName": name.title(), "Secret": name}))
+    market_data = tmp_path / "market_data.csv"
+    match = Match(1, tmp_path / "out" / "match_0001", [tmp_path / "one.py", tmp_path / "two.py"], market_data, 7,
+                  23456)
+
+    prepare_match(match, EXCHANGE_CONFIG)
+
+    config = json.loads((match.directory / "exchange.json").read_text())
+    assert "Hud" not in config
+    assert config["Engine"]["MarketDataFile"] == str(market_data.resolve())
+    assert config["Engine"]["Seed"] == 7
+    assert config["Execution"]["Port"] == 23456
+    assert config["Traders"] == {"One": "one", "Two": "two"}
+    for name in ("one", "two"):
+        assert (match.directory / (name + ".py")).exists()
+        assert json.loads((match.directory / (name + ".json")).read_text())["Execution"]["Port"] == 23456
+    assert EXCHANGE_CONFIG["Execution"]["Port"] == 12345
+
+
+def test_final_scores_and_summary(tmp_path):
+    score_board = tmp_path / "score_board.csv"
+    score_board.write_text(
+        "Time,Team,Operation,BuyVolume,SellVolume,EtfPosition,FuturePosition,EtfPrice,FuturePrice,TotalFees,"
+        "AccountBalance,ProfitOrLoss,Status\n"
+        "0.0,A,Tick,0,0,0,0,,,0,0,0,OK\n"
+        "0.0,B,Tick,0,0,0,0,,,0,0,0,OK\n"
+        "1.0,A,Tick,1,0,1,-1,100,100,0,-100,50,OK\n"
+        "1.0,B,Breach,0,0,0,0,100,100,0,0,-20,BREACH\n")
+    assert final_scores(score_board) == {"A": (50.0, "OK"), "B": (-20.0, "BREACH")}
+
+    match = Match(1, tmp_path, [], pathlib.Path("md.csv"), 0, 0)
+    results = [MatchResult(match, "A", 10.0, "OK"), MatchResult(match, "A", 30.0, "OK"),
+               MatchResult(match, "B", 5.0, "OK")]
+    summary = summarise(results)
+    assert summary[0][:3] == ("A", 2, 20.0)
+    assert summary[0][3] == pytest.approx(14.142, abs=1e-3)
+    assert summary[1] == ("B", 1, 5.0, 0.0, 5.0, 5.0)
+
+
+def write_trader(directory, name, information):
+    (directory / (name + ".py")).write_text("")
+    (directory / (name + ".json")).write_text(json.dumps({
+        "Execution": {"Host": "127.0.0.1", "Port": 12345}, "Information": information, "OrderFeed": information,
+        "TeamName": name.title(), "Secret": name}))
+    return directory / (name + ".py")
+
+
+def test_concurrent_matches_use_their_own_channels(tmp_path):
+    information = {"Type": "shm", "Name": "rtg_info"}
+    exchange_config = dict(EXCHANGE_CONFIG, Information=information, OrderFeed={"Type": "shm", "Name": "rtg_feed"},
+                           Instrumentation={"File": "instrumentation.csv", "Port": 12348})
+    trader = write_trader(tmp_path, "one", information)
+    configs = list()
+    for number in (1, 2):
+        match = Match(number, tmp_path / ("match_%d" % number), [trader], tmp_path / "market_data.csv", 0,
+                      23456 + number)
+        prepare_match(match, exchange_config)
+        config = json.loads((match.directory / "exchange.json").read_text())
+        trader_config = json.loads((match.directory / "one.json").read_text())
+        assert trader_config["Information"] == config["Information"]
+        assert trader_config["OrderFeed"] == config["OrderFeed"]
+        assert config["Instrumentation"] == {"File": "instrumentation.csv"}
+        configs.append(config)
+
+    assert configs[0]["Information"]["Name"] != configs[1]["Information"]["Name"]
+    assert configs[0]["OrderFeed"]["Name"] != configs[1]["OrderFeed"]["Name"]
+    assert exchange_config["Information"]["Name"] == "rtg_info"
+
+
+def test_run_match_tries_another_port_if_its_port_is_taken(tmp_path):
+    # Stands in for rtg.py, failing as the exchange does if the port is taken
+    rtg = tmp_path / "rtg.py"
+    rtg.write_text(
+        "import json\n"
+        "port = json.load(open('exchange.json'))['Execution']['Port']\n"
+        "with open('exchange.log', 'a') as log:\n"
+        "    log.write('%%d\\n' %% port)\n"
+        "    if port == 23456:\n"
+        "        log.write(%r)\n" % (PORT_IN_USE_ERROR + "address already in use\n"))
+    trader = write_trader(tmp_path, "one", {"Type": "mmap", "Name": "info.dat"})
+    match = Match(1, tmp_path / "match_1", [trader], tmp_path / "market_data.csv", 0, 23456)
+    prepare_match(match, EXCHANGE_CONFIG)
+
+    run_match(match, rtg, 10.0)
+
+    assert match.returncode == 0
+    assert match.port != 23456
+    assert (match.directory / "exchange.log").read_text() == "%d\n" % match.port
+    assert json.loads((match.directory / "one.json").read_text())["Execution"]["Port"] == match.port
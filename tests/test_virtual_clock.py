@@ -0,0 +1,68 @@
+import json
+import pathlib
+
+from ready_trader_go.tournament import Match, allocate_ports, prepare_match, run_match
+
+RTG = pathlib.Path(__file__).resolve().parent.parent / "rtg.py"
+
+EXCHANGE_CONFIG = {
+    "Engine": {"MarketDataFile": "market_data.csv", "MarketEventInterval": 0.05, "MarketOpenDelay": 10.0,
+               "MatchEventsFile": "match_events.csv", "ScoreBoardFile": "score_board.csv", "Speed": 1.0,
+               "TickInterval": 0.25, "Clock": "Virtual"},
+    "Execution": {"Host": "127.0.0.1", "Port": 12345},
+    "Fees": {"Maker": -0.0001, "Taker": 0.0002},
+    "Information": {"Type": "mmap", "Name": "info.dat"},
+    "Instrument": {"EtfClamp": 0.002, "TickSize": 1.00},
+    "Limits": {"ActiveOrderCountLimit": 10, "ActiveVolumeLimit": 200, "MessageFrequencyInterval": 1.0,
+               "MessageFrequencyLimit": 50, "PositionLimit": 100},
+    "Traders": {},
+}
+
+# Both teams chase the same prices, so the result depends upon whose orders
+# are handled first when they arrive at the same (simulated) time.
+AUTO_TRADER = """
+import itertools
+
+from ready_trader_go import BaseAutoTrader, Instrument, Lifespan, Side
+
+
+class AutoTrader(BaseAutoTrader):
+    def __init__(self, loop, team_name, secret):
+        super().__init__(loop, team_name, secret)
+        self.order_ids = itertools.count(1)
+        self.position = 0
+
+    def on_order_book_update_message(self, instrument, sequence_number, ask_prices, ask_volumes, bid_prices,
+                                     bid_volumes):
+        if instrument == Instrument.ETF and ask_prices[0] and bid_prices[0]:
+            if self.position <= 0:
+                self.send_insert_order(next(self.order_ids), Side.BUY, ask_prices[0], 5, Lifespan.FILL_AND_KILL)
+            else:
+                self.send_insert_order(next(self.order_ids), Side.SELL, bid_prices[0], 5, Lifespan.FILL_AND_KILL)
+
+    def on_order_filled_message(self, client_order_id, price, volume):
+        self.position += volume if self.position <= 0 else -volume
+"""
+
+
+def test_seeded_virtual_matches_are_identical(tmp_path, write_market_data):
+    market_data = tmp_path / "market_data.csv"
+    write_market_data(market_data, 300, 11)
+    for name in ("alpha", "beta"):
+        (tmp_path / (name + ".py")).write_text(AUTO_TRADER)
+        (tmp_path / (name + ".json")).write_text(json.dumps({
+            "Execution": {"Host": "127.0.0.1", "Port": 12345}, "Information": {"Type": "mmap", "Name": "info.dat"},
+            "TeamName": name.title(), "Secret": name}))
+    traders = [tmp_path / "alpha.py", tmp_path / "beta.py"]
+
+    outputs = list()
+    for number, port in enumerate(allocate_ports(2), 1):
+        match = Match(number, tmp_path / ("match_%d" % number), traders, market_data, 3, port)
+        prepare_match(match, EXCHANGE_CONFIG)
+        assert run_match(match, RTG, 60.0).returncode == 0
+        outputs.append(tuple((match.directory / name).read_bytes()
+                             for name in ("match_events.csv", "score_board.csv")))
+
+    match_events, score_board = outputs[0]
+    assert b"Alpha" in match_events and b"Beta" in match_events
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from ready_trader_go.writer_queue import WriterQueue
+
+
+def drain(fifo, received):
+    batch = fifo.get()
+    while batch is not None:
+        received.extend(batch)
+        batch = fifo.get()
+
+
+def start_consumer(fifo, delay=0.0):
+    received = []
+
+    def consume():
+        time.sleep(delay)
+        drain(fifo, received)
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    return thread, received
+
+
+def test_block_policy_waits_for_the_writer():
+    fifo = WriterQueue("TEST", 4, "Block")
+    thread, received = start_consumer(fifo, 0.05)
+    for i in range(0, 100, 2):
+        fifo.put([i, i + 1])
+    fifo.put(None)
+    thread.join(5.0)
+    assert received == list(range(100))
+    assert fifo.statistics().high_water_mark == 4
+    assert fifo.statistics().max_lag > 0.0
+    assert fifo.dropped == fifo.spilled == 0
+
+
+def test_a_batch_larger_than_the_queue_is_accepted_when_the_queue_is_empty():
+    fifo = WriterQueue("TEST", 4, "Drop")
+    fifo.put(list(range(10)))
+    fifo.put([10])
+    assert fifo.qsize() == 10 and fifo.dropped == 1
+    assert fifo.get() == list(range(10))
+
+
+def test_drop_policy_discards_items_but_not_the_end():
+    fifo = WriterQueue("TEST", 4, "Drop")
+    for i in range(10):
+        fifo.put([i])
+    assert fifo.qsize() == 4 and fifo.dropped == 6
+    thread, received = start_consumer(fifo)
+    fifo.put(None)
+    thread.join(5.0)
+    assert received == [0, 1, 2, 3]
+
+
+def test_spill_policy_keeps_every_item_in_order():
+    fifo = WriterQueue("TEST", 4, "Spill")
+    for i in range(0, 10, 2):
+        fifo.put([("event", i), ("event", i + 1)])
+    assert fifo.qsize() == 10 and fifo.spilled == 6
+    assert [fifo.get() for _ in range(3)] == [[("event", i), ("event", i + 1)] for i in range(0, 6, 2)]
+    fifo.put([("event", 10), ("event", 11)])
+    fifo.put(None)
+    received = []
+    drain(fifo, received)
+    assert received == [("event", i) for i in range(6, 12)]
+    assert fifo.statistics()[:4] == (0, 4, 8, 0)
+
+    # Once the spill file is empty, batches are queued in memory again
+    fifo.put(["later"])
+    assert fifo.spilled == 8 and fifo.get() == ["later"]
+
+
+def test_put_does_not_block_once_the_writer_has_gone():
+    fifo = WriterQueue("TEST", 1, "Block")
+    fifo.put([1])
+    fifo.close()
+    fifo.put([2, 3])
+    fifo.put(None)
+    assert fifo.dropped == 2
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        WriterQueue("TEST", 1, "Ignore")
@@ -30,8 +30,10 @@ def configure_exchange(
     execution_port: int,
     hdu_port: int,
     speed: int = 10.0,
+    clock: str = "Wall",
 ):
     engine = _Engine(
+        Clock=clock,
         MarketDataFile=str(data_source),
         MatchEventsFile=str(test_env / "match_events.csv"),
         ScoreBoardFile=str(test_env / "score_board.csv"),
@@ -86,6 +88,7 @@ def setup_test_env(
     data_source: pathlib.Path,
     speed: float,
     traders: list[Trader],
+    clock: str = "Wall",
 ) -> None:
     execution_port = get_free_port()
     hdu_port = get_free_port()
@@ -97,6 +100,7 @@ def setup_test_env(
         hdu_port=hdu_port,
         speed=speed,
         traders=traders,
+        clock=clock,
     )
     configure_traders(test_env=test_env)
 
@@ -107,6 +111,7 @@ def run_test(test_env: pathlib.Path, run_with_hdu: bool = False):
 
     hdu_port = config["Hud"]["Port"]
     speed = config["Engine"]["Speed"]
+    clock = config["Engine"].get("Clock", "Wall")
     traders = [f for f in test_env.glob("*.json") if f.name != "exchange.json"]
     traders = [f.with_suffix("").as_posix() for f in traders]
 
@@ -122,8 +127,12 @@ def run_test(test_env: pathlib.Path, run_with_hdu: bool = False):
     else:
         command += [f"--port={hdu_port}"]
 
+    # A virtual clock match ends as soon as the market data is exhausted, so
+    # the timeout is only a safety net.
+    timeout = SIMULATION_TIME if clock == "Virtual" else SIMULATION_TIME / speed
+
     try:
-        subprocess.run(command, timeout=SIMULATION_TIME / speed)
+        subprocess.run(command, timeout=timeout)
     except subprocess.TimeoutExpired:
         pass
 
@@ -55,9 +55,12 @@ public:
 
     // Called periodically to report the status of an order book.
     // The sequence number can be used to detect missed or out-of-order
-    // messages. The five best available ask (i.e. sell) and bid (i.e. buy)
-    // prices are reported along with the volume available at each of those
-    // price levels.
+    // messages. The TOP_LEVEL_COUNT best available ask (i.e. sell) and bid
+    // (i.e. buy) prices are reported along with the volume available at each
+    // of those price levels. The sequence number is the number of the tick at which
+    // the message was sent; if the simulator only sends order books that have
+    // changed, a gap in the sequence numbers for an instrument means the
+    // book did not change during the missing ticks.
     void OrderBookMessageHandler(ReadyTraderGo::Instrument instrument,
                                  unsigned long sequenceNumber,
                                  const std::array<unsigned long, ReadyTraderGo::TOP_LEVEL_COUNT>& askPrices,
@@ -81,10 +84,10 @@ public:
                                    signed long fees) override;
 
     // Called periodically when there is trading activity on the market.
-    // The five best ask (i.e. sell) and bid (i.e. buy) prices at which there
-    // has been trading activity are reported along with the aggregated volume
-    // traded at each of those price levels.
-    // If there are less than five prices on a side, then zeros will appear at
+    // The TOP_LEVEL_COUNT best ask (i.e. sell) and bid (i.e. buy) prices at
+    // which there has been trading activity are reported along with the
+    // aggregated volume traded at each of those price levels.
+    // If there are fewer prices on a side, then zeros will appear at
     // the end of both the prices and volumes arrays.
     void TradeTicksMessageHandler(ReadyTraderGo::Instrument instrument,
                                   unsigned long sequenceNumber,